@@ -6,6 +6,11 @@ reload, load, unloadなどの管理者専用コマンドを提供します。
 from typing import Any, List, Optional
 import logging
 
+from utils.cog_loader import CogLoader
+from utils.loop_profiler import LoopProfiler
+from utils.sampling_profiler import SCOPE_ALL, SamplingProfiler
+from utils.slack_client import SlackClient
+
 logger = logging.getLogger(__name__)
 
 # TODO: SlackCogsフレームワークが実装されたら以下のimportを有効化
@@ -23,6 +28,15 @@ class AdminCog:
         """
         self.app = app
         self.loaded_cogs: List[str] = []
+        # アプリにCogローダーが設定されていれば、reload/load/unload はローダー経由で行う
+        loader = getattr(app, "cog_loader", None)
+        self.cog_loader: Optional[CogLoader] = loader if isinstance(loader, CogLoader) else None
+        profiler = getattr(app, "loop_profiler", None)
+        self.loop_profiler: Optional[LoopProfiler] = profiler if isinstance(profiler, LoopProfiler) else None
+        sampler = getattr(app, "sampling_profiler", None)
+        self.sampling_profiler: Optional[SamplingProfiler] = sampler if isinstance(sampler, SamplingProfiler) else None
+        client = getattr(app, "slack_client", None)
+        self.slack_client: Optional[SlackClient] = client if isinstance(client, SlackClient) else None
     
     # TODO: SlackCogsフレームワーク実装後に有効化
     # @slash_command()
@@ -38,9 +52,9 @@ class AdminCog:
         try:
             if cog_name:
                 # 特定のCogをリロード
-                await self._reload_specific_cog(cog_name)
-                await ctx.respond(f"✅ Cog `{cog_name}` を正常にリロードしました。")
-                logger.info(f"Cog {cog_name} reloaded successfully")
+                elapsed = await self._reload_specific_cog(cog_name)
+                await ctx.respond(f"✅ Cog `{cog_name}` を正常にリロードしました。（{elapsed * 1000:.1f}ms）")
+                logger.info(f"Cog {cog_name} reloaded successfully ({elapsed * 1000:.1f}ms)")
             else:
                 # 全Cogをリロード
                 reloaded_count = await self._reload_all_cogs()
@@ -104,14 +118,91 @@ class AdminCog:
         Args:
             ctx: Slackコンテキスト
         """
-        if not self.loaded_cogs:
+        loader = self._get_loader(required=False)
+        loaded_cogs = list(loader.specs) if loader is not None else self.loaded_cogs
+        if not loaded_cogs:
             await ctx.respond("📝 現在読み込まれているCogはありません。")
             return
         
-        cog_list = "\n".join([f"🔹 {cog}" for cog in self.loaded_cogs])
+        if loader is not None:
+            # lazyで未読み込みのCogは初回のコマンド実行時に読み込まれる
+            cog_list = "\n".join([
+                f"🔹 {cog}" + ("" if loader.is_loaded(cog) else "（未読み込み）")
+                for cog in loaded_cogs
+            ])
+        else:
+            cog_list = "\n".join([f"🔹 {cog}" for cog in loaded_cogs])
         message = f"📚 **読み込み済みCog一覧**\n\n{cog_list}"
         await ctx.respond(message)
     
+    # @slash_command()
+    # @admin_only()
+    async def slow_callbacks(self, ctx: Any, limit: Optional[str] = None) -> None:
+        """
+        イベントループをブロックした処理を、合計時間の長い順に表示します。
+        
+        Args:
+            ctx: Slackコンテキスト
+            limit: 表示する件数（"reset" で集計を消去）
+        """
+        if self.loop_profiler is None:
+            await ctx.respond("⚠️ ループプロファイラーが無効です。`LOOP_PROFILER_ENABLED=true` で有効にできます。")
+            return
+        
+        if limit == "reset":
+            self.loop_profiler.reset()
+            await ctx.respond("🧹 ブロックした処理の集計を消去しました。")
+            return
+        
+        try:
+            count = int(limit) if limit else 10
+        except ValueError:
+            await ctx.respond("❌ 件数は数値で指定してください。")
+            return
+        await ctx.respond(self.loop_profiler.format_report(max(1, min(count, 50))))
+    
+    # @slash_command()
+    # @admin_only()
+    async def profile(self, ctx: Any, seconds: Optional[str] = None, scope: Optional[str] = None) -> None:
+        """
+        稼働中のボットを指定した秒数だけプロファイルし、上位の関数とflamegraph用のファイルを返します。
+        
+        Args:
+            ctx: Slackコンテキスト
+            seconds: 計測する秒数（未指定時は10秒）
+            scope: all（プロセス全体、未指定時）、cogs（全Cog）、またはCog名
+        """
+        if self.sampling_profiler is None:
+            await ctx.respond("⚠️ サンプリングプロファイラーが利用できません。")
+            return
+        
+        try:
+            duration = float(seconds) if seconds else 10.0
+        except ValueError:
+            await ctx.respond("❌ 秒数は数値で指定してください。")
+            return
+        scope = scope or SCOPE_ALL
+        
+        await ctx.respond(f"🔬 {duration:g}秒間プロファイルします（対象: {scope}）...")
+        try:
+            result = await self.sampling_profiler.profile(duration, scope)
+        except (ValueError, RuntimeError) as e:
+            await ctx.respond(f"❌ {e}")
+            return
+        
+        path = await self.sampling_profiler.save(result)
+        message = f"{result.format_summary()}\n\n📄 `{path}`（flamegraph.pl / speedscope で表示できます）"
+        await ctx.respond(message)
+        
+        channel_id = getattr(getattr(ctx, "channel", None), "id", None)
+        if self.slack_client is not None and isinstance(channel_id, str):
+            try:
+                await self.slack_client.upload_file(
+                    channel_id, result.filename, result.collapsed(), title="プロファイル結果（collapsed stack）"
+                )
+            except Exception as e:
+                logger.warning(f"Failed to upload profile {path}: {e}")
+    
     # @slash_command()
     # @admin_only()
     async def admin_help(self, ctx: Any) -> None:
@@ -128,28 +219,46 @@ class AdminCog:
 📥 `/load <cog名>` - 指定されたCogを読み込み
 📤 `/unload <cog名>` - 指定されたCogをアンロード
 📚 `/list_cogs` - 読み込まれているCog一覧を表示
+🐢 `/slow_callbacks [件数|reset]` - イベントループをブロックした処理を表示
+🔬 `/profile [秒数] [all|cogs|Cog名]` - 稼働中のボットをプロファイル
 ❓ `/admin_help` - この管理者ヘルプを表示
 
 ⚠️ これらのコマンドは管理者権限が必要です。
         """
         await ctx.respond(help_text)
     
-    async def _reload_specific_cog(self, cog_name: str) -> None:
-        """特定のCogをリロードします"""
-        # TODO: SlackCogsフレームワーク実装時に実装
-        pass
+    def _get_loader(self, required: bool = True) -> Optional[CogLoader]:
+        """アプリに設定されたCogローダーを取得します"""
+        if self.cog_loader is not None:
+            return self.cog_loader
+        if required:
+            raise RuntimeError("Cogローダーが設定されていません")
+        return None
+    
+    async def _reload_specific_cog(self, cog_name: str) -> float:
+        """
+        特定のCogをリロードします。
+        
+        Returns:
+            float: リロードにかかった秒数
+        """
+        return await self._get_loader().reload_cog(cog_name)
     
     async def _reload_all_cogs(self) -> int:
         """全Cogをリロードします"""
-        # TODO: SlackCogsフレームワーク実装時に実装
-        return len(self.loaded_cogs)
+        return await self._get_loader().reload_all()
     
     async def _load_cog(self, cog_name: str) -> None:
-        """Cogを読み込みます"""
-        # TODO: SlackCogsフレームワーク実装時に実装
-        pass
+        """Cogを読み込みます（登録されていなければマニフェストから登録します）"""
+        loader = self._get_loader()
+        if loader.is_loaded(cog_name):
+            raise ValueError(f"Cog `{cog_name}` は既に読み込まれています")
+        loader.register_from_manifest(cog_name)
+        await loader.load_cog(cog_name)
     
     async def _unload_cog(self, cog_name: str) -> None:
         """Cogをアンロードします"""
-        # TODO: SlackCogsフレームワーク実装時に実装
-        pass
+        loader = self._get_loader()
+        if loader.commands.get("unload") == cog_name:
+            raise ValueError("管理者機能のCogはアンロードできません")
+        await loader.unload_cog(cog_name)
@@ -4,16 +4,25 @@
 カスタム機能の実装例を提供します。
 新しいCogを作成する際の参考にしてください。
 """
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+import heapq
 import random
 from datetime import datetime
 
+from utils.executor import offload
+from utils.rate_limit import rate_limit
+from utils.stats import ActivityStats
+from utils.user_store import MemoryUserStore, UserActivityStore
+
 # TODO: SlackCogsフレームワークが実装されたら以下のimportを有効化
-# from slackcogs import BaseCog, slash_command, SlackContext, rate_limit
+# from slackcogs import BaseCog, slash_command, SlackContext
 
 class ExampleCog:
     """サンプル機能を提供するCog"""
     
+    # リロード時に新しいインスタンスへ引き継ぐ属性
+    reload_state = ("counter", "user_data", "activity")
+    
     def __init__(self, app: Any):
         """
         ExampleCogを初期化します。
@@ -23,7 +32,13 @@ class ExampleCog:
         """
         self.app = app
         self.counter = 0
-        self.user_data: Dict[str, Any] = {}
+        # アプリに永続化ストアが設定されていれば共有し、なければメモリ上に保持
+        store = getattr(app, "user_store", None)
+        self.user_data: UserActivityStore = (
+            store if isinstance(store, UserActivityStore) else MemoryUserStore()
+        )
+        # 直近1分・1時間・24時間のコマンド数とアクティブユーザー数
+        self.activity = ActivityStats()
         self.quotes = [
             "継続は力なり",
             "七転び八起き",
@@ -42,6 +57,7 @@ class ExampleCog:
             ctx: Slackコンテキスト
             name: 挨拶する相手の名前（オプション）
         """
+        self._track_user(ctx.user.id)
         if name:
             message = f"こんにちは、{name}さん！👋"
         else:
@@ -50,7 +66,7 @@ class ExampleCog:
         await ctx.respond(message)
     
     # @slash_command()
-    # @rate_limit(max_requests=5, time_window=60)
+    @rate_limit(max_requests=5, time_window=60)
     async def count(self, ctx: Any) -> None:
         """
         カウンターコマンド - カウンターを増加させて表示します。
@@ -58,6 +74,7 @@ class ExampleCog:
         Args:
             ctx: Slackコンテキスト
         """
+        self._track_user(ctx.user.id)
         self.counter += 1
         await ctx.respond(f"🔢 カウンター: {self.counter}")
     
@@ -69,6 +86,7 @@ class ExampleCog:
         Args:
             ctx: Slackコンテキスト
         """
+        self._track_user(ctx.user.id)
         quote = random.choice(self.quotes)
         await ctx.respond(f"💭 **今日の名言**\n\n*{quote}*")
     
@@ -80,6 +98,7 @@ class ExampleCog:
         Args:
             ctx: Slackコンテキスト
         """
+        self._track_user(ctx.user.id)
         current_time = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
         await ctx.respond(f"🕐 現在の時刻: {current_time}")
     
@@ -92,11 +111,12 @@ class ExampleCog:
             ctx: Slackコンテキスト
             action: 実行するアクション（show/reset）
         """
-        user_id = ctx.user.id  # TODO: 実際のuser_id取得方法に修正
+        user_id = ctx.user.id
+        self._track_user(user_id)
         
         if action == "show":
-            if user_id in self.user_data:
-                data = self.user_data[user_id]
+            data = self.user_data.get(user_id)
+            if data is not None:
                 message = f"""
 👤 **ユーザー情報**
 
@@ -108,8 +128,7 @@ class ExampleCog:
                 message = "👤 ユーザー情報が見つかりませんでした。"
             
         elif action == "reset":
-            if user_id in self.user_data:
-                del self.user_data[user_id]
+            if self.user_data.delete(user_id):
                 message = "✅ ユーザー情報をリセットしました。"
             else:
                 message = "❌ リセットするユーザー情報が見つかりませんでした。"
@@ -119,6 +138,30 @@ class ExampleCog:
         
         await ctx.respond(message)
     
+    # @slash_command()
+    async def report(self, ctx: Any, top: Optional[str] = None) -> None:
+        """
+        レポートコマンド - コマンド実行回数の多いユーザーを表示します。
+        
+        集計は共有スレッドプールで実行されるため、ユーザー数が多くても
+        他のコマンドの応答を妨げません。
+        
+        Args:
+            ctx: Slackコンテキスト
+            top: 表示する人数（未指定時は10人）
+        """
+        self._track_user(ctx.user.id)
+        try:
+            count = int(top) if top else 10
+        except ValueError:
+            await ctx.respond("❌ 人数は数値で指定してください。")
+            return
+        
+        # 集計中の変更の影響を受けないよう、イベントループ上でスナップショットを取る
+        entries = list(self.user_data.iter_counts())
+        message = await self._build_report(entries, max(1, min(count, 50)))
+        await ctx.respond(message)
+    
     # @slash_command()
     async def example_help(self, ctx: Any) -> None:
         """
@@ -127,6 +170,7 @@ class ExampleCog:
         Args:
             ctx: Slackコンテキスト
         """
+        self._track_user(ctx.user.id)
         help_text = """
 🎯 **サンプルコマンド**
 
@@ -135,36 +179,65 @@ class ExampleCog:
 💭 `/quote` - ランダムな名言を表示
 🕐 `/time` - 現在の時刻を表示
 👤 `/user_info [show/reset]` - ユーザー情報の表示・リセット
+📊 `/report [人数]` - コマンド実行回数ランキングを表示
 ❓ `/example_help` - このヘルプを表示
 
 これらは実装例です。実際の使用時は適宜カスタマイズしてください。
         """
         await ctx.respond(help_text)
     
+    @staticmethod
+    @offload(pool="thread")
+    def _build_report(entries: List[Tuple[str, int]], top: int) -> str:
+        """
+        コマンド実行回数ランキングを作成します（スレッドプールで実行）。
+        
+        Args:
+            entries: (ユーザーID, コマンド実行回数) のリスト
+            top: 表示する人数
+            
+        Returns:
+            str: レポートメッセージ
+        """
+        if not entries:
+            return "📊 集計対象のユーザーがいません。"
+        
+        ranking = heapq.nlargest(max(top, 1), entries, key=lambda item: item[1])
+        total = sum(count for _, count in entries)
+        lines = [
+            f"{rank}. <@{user_id}> - {count}回"
+            for rank, (user_id, count) in enumerate(ranking, start=1)
+        ]
+        return (
+            f"📊 **コマンド実行ランキング**\n\n"
+            + "\n".join(lines)
+            + f"\n\n👥 ユーザー数: {len(entries)} / 🔢 総実行回数: {total}"
+        )
+    
     def _track_user(self, user_id: str) -> None:
         """
-        ユーザーの活動を記録します。
+        ユーザーの活動を記録します。各コマンドの先頭で呼び出されます。
+        
+        永続化するストアでも書き込みはまとめて後から行われるため、O(1)で完了します。
         
         Args:
             user_id: ユーザーID
         """
-        if user_id not in self.user_data:
-            self.user_data[user_id] = {
-                'first_seen': datetime.now().isoformat(),
-                'command_count': 0
-            }
-        
-        self.user_data[user_id]['command_count'] += 1
+        self.user_data.track(user_id)
+        self.activity.record(user_id)
     
     def get_stats(self) -> Dict[str, Any]:
         """
         Cogの統計情報を取得します。
         
+        集計値は記録のたびに更新されているため、ユーザー数に関係なく一定時間で返します。
+        
         Returns:
-            Dict[str, Any]: 統計情報
+            Dict[str, Any]: 統計情報（windowsはウィンドウごとのコマンド数・アクティブユーザー数の推定値）
         """
         return {
             'counter': self.counter,
             'total_users': len(self.user_data),
-            'total_commands': sum(data.get('command_count', 0) for data in self.user_data.values())
+            'total_commands': self.user_data.total_commands,
+            'windows': self.activity.snapshot()
         }
@@ -12,6 +12,9 @@ from typing import Any
 class GeneralCog:
     """基本コマンドを管理するCog"""
     
+    # リロード時に新しいインスタンスへ引き継ぐ属性
+    reload_state = ("start_time", "command_count")
+    
     def __init__(self, app: Any):
         """
         GeneralCogを初期化します。
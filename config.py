@@ -2,7 +2,7 @@
 設定管理
 """
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 # .envファイルを読み込み
@@ -20,15 +20,96 @@ class Config:
         
         # 開発設定
         self.ENABLE_HOT_RELOAD: bool = self._get_env_var("ENABLE_HOT_RELOAD", "false").lower() == "true"
+        self.HOT_RELOAD_DIRS: List[str] = [
+            d.strip() for d in self._get_env_var("HOT_RELOAD_DIRS", "cogs").split(",") if d.strip()
+        ]
+        self.HOT_RELOAD_DEBOUNCE: float = float(self._get_env_var("HOT_RELOAD_DEBOUNCE", "0.5"))
         self.DEBUG_MODE: bool = self._get_env_var("DEBUG_MODE", "false").lower() == "true"
+        # 未設定なら DEBUG_MODE のときだけ有効
+        self.LOOP_PROFILER_ENABLED: bool = self._get_env_var(
+            "LOOP_PROFILER_ENABLED", "true" if self.DEBUG_MODE else "false"
+        ).lower() == "true"
+        self.LOOP_PROFILER_THRESHOLD: float = float(self._get_env_var("LOOP_PROFILER_THRESHOLD", "0.1"))
+        
+        # Cog設定
+        self.COG_MANIFEST_PATH: str = self._get_env_var("COG_MANIFEST_PATH", "cogs/manifest.json")
+        self.COG_SETUP_TIMEOUT: float = float(self._get_env_var("COG_SETUP_TIMEOUT", "30"))
         
         # ログ設定
         self.LOG_LEVEL: str = self._get_env_var("LOG_LEVEL", "INFO").upper()
         self.LOG_FILE: Optional[str] = self._get_env_var("LOG_FILE", None)
+        self.LOG_JSON: bool = self._get_env_var("LOG_JSON", "false").lower() == "true"
+        self.LOG_QUEUE_ENABLED: bool = self._get_env_var("LOG_QUEUE_ENABLED", "false").lower() == "true"
+        self.LOG_QUEUE_SIZE: int = int(self._get_env_var("LOG_QUEUE_SIZE", "10000"))
+        self.LOG_QUEUE_POLICY: str = self._get_env_var("LOG_QUEUE_POLICY", "drop").lower()
+        self.LOG_QUEUE_BATCH_SIZE: int = int(self._get_env_var("LOG_QUEUE_BATCH_SIZE", "100"))
+        self.LOG_MAX_BYTES: int = int(self._get_env_var("LOG_MAX_BYTES", "0"))
+        self.LOG_BACKUP_COUNT: int = int(self._get_env_var("LOG_BACKUP_COUNT", "5"))
+        self.LOG_ROTATE_WHEN: str = self._get_env_var("LOG_ROTATE_WHEN", "")
+        self.LOG_COMPRESSION: str = self._get_env_var("LOG_COMPRESSION", "").lower()
+        self.LOG_COMMAND_SAMPLE_RATE: float = float(self._get_env_var("LOG_COMMAND_SAMPLE_RATE", "1.0"))
+        self.LOG_COMMAND_SAMPLE_RATES: Dict[str, float] = self._parse_float_map(
+            self._get_env_var("LOG_COMMAND_SAMPLE_RATES", "")
+        )
+        self.LOG_RATE_LIMIT: float = float(self._get_env_var("LOG_RATE_LIMIT", "0"))
+        self.LOG_RATE_BURST: float = float(self._get_env_var("LOG_RATE_BURST", "0"))
+        
+        # コマンドディスパッチャー設定
+        self.DISPATCHER_MAX_WORKERS: int = int(self._get_env_var("DISPATCHER_MAX_WORKERS", "16"))
+        self.DISPATCHER_QUEUE_SIZE: int = int(self._get_env_var("DISPATCHER_QUEUE_SIZE", "200"))
+        self.DISPATCHER_COG_CONCURRENCY: int = int(self._get_env_var("DISPATCHER_COG_CONCURRENCY", "4"))
+        self.DISPATCHER_ENQUEUE_TIMEOUT: float = float(self._get_env_var("DISPATCHER_ENQUEUE_TIMEOUT", "1.0"))
+        
+        # オフロード実行設定（CPU負荷の高いコマンド用）
+        self.OFFLOAD_THREAD_WORKERS: int = int(self._get_env_var("OFFLOAD_THREAD_WORKERS", "4"))
+        self.OFFLOAD_PROCESS_WORKERS: int = int(self._get_env_var("OFFLOAD_PROCESS_WORKERS", "2"))
+        self.OFFLOAD_TIMEOUT: float = float(self._get_env_var("OFFLOAD_TIMEOUT", "30"))
+        
+        # Slack API クライアント設定
+        self.SLACK_HTTP_MAX_CONNECTIONS: int = int(self._get_env_var("SLACK_HTTP_MAX_CONNECTIONS", "20"))
+        self.SLACK_HTTP_KEEPALIVE: float = float(self._get_env_var("SLACK_HTTP_KEEPALIVE", "30"))
+        self.SLACK_USERS_LIST_THRESHOLD: int = int(self._get_env_var("SLACK_USERS_LIST_THRESHOLD", "20"))
+        self.SLACK_USERS_LIST_MAX_PAGES: int = int(self._get_env_var("SLACK_USERS_LIST_MAX_PAGES", "10"))
+        
+        # Slack API 送信スケジューラー設定（レート制限対策）
+        self.SLACK_SCHEDULER_ENABLED: bool = self._get_env_var("SLACK_SCHEDULER_ENABLED", "true").lower() == "true"
+        self.SLACK_SCHEDULER_CONCURRENCY: int = int(self._get_env_var("SLACK_SCHEDULER_CONCURRENCY", "8"))
+        self.SLACK_SCHEDULER_QUEUE_SIZE: int = int(self._get_env_var("SLACK_SCHEDULER_QUEUE_SIZE", "1000"))
+        self.SLACK_CHANNEL_POST_RATE: float = float(self._get_env_var("SLACK_CHANNEL_POST_RATE", "1.0"))
+        self.SLACK_RATE_LIMIT_RETRIES: int = int(self._get_env_var("SLACK_RATE_LIMIT_RETRIES", "3"))
         
         # データベース設定（将来使用）
         self.DATABASE_URL: Optional[str] = self._get_env_var("DATABASE_URL", None)
         
+        # ユーザー活動ストア設定
+        self.USER_STORE_BACKEND: str = self._get_env_var("USER_STORE_BACKEND", "memory").lower()
+        self.USER_STORE_PATH: str = self._get_env_var("USER_STORE_PATH", "data/users.db")
+        self.REDIS_URL: str = self._get_env_var("REDIS_URL", "redis://localhost:6379/0")
+        self.USER_STORE_FLUSH_INTERVAL: float = float(self._get_env_var("USER_STORE_FLUSH_INTERVAL", "5.0"))
+        self.USER_STORE_FLUSH_BATCH_SIZE: int = int(self._get_env_var("USER_STORE_FLUSH_BATCH_SIZE", "500"))
+        
+        # キャッシュ設定（Slack APIの結果など）
+        self.CACHE_MAX_SIZE: int = int(self._get_env_var("CACHE_MAX_SIZE", "1024"))
+        self.CACHE_TTL: float = float(self._get_env_var("CACHE_TTL", "300"))
+        self.CACHE_NEGATIVE_TTL: float = float(self._get_env_var("CACHE_NEGATIVE_TTL", "30"))
+        self.CACHE_REDIS_ENABLED: bool = self._get_env_var("CACHE_REDIS_ENABLED", "false").lower() == "true"
+        
+        # コマンドのレート制限設定
+        self.RATE_LIMIT_REDIS_ENABLED: bool = self._get_env_var("RATE_LIMIT_REDIS_ENABLED", "false").lower() == "true"
+        
+        # メトリクス設定（/metrics を PORT で公開）
+        self.METRICS_ENABLED: bool = self._get_env_var("METRICS_ENABLED", "true").lower() == "true"
+        self.METRICS_LOOP_LAG_INTERVAL: float = float(self._get_env_var("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+        
+        # ヘルスチェック設定（/health, /ready を PORT で公開）
+        self.HEALTH_ENABLED: bool = self._get_env_var("HEALTH_ENABLED", "true").lower() == "true"
+        self.HEALTH_MAX_LOOP_LAG: float = float(self._get_env_var("HEALTH_MAX_LOOP_LAG", "5.0"))
+        
+        # サンプリングプロファイラー設定（AdminCogの /profile）
+        self.PROFILER_INTERVAL: float = float(self._get_env_var("PROFILER_INTERVAL", "0.01"))
+        self.PROFILER_MAX_DURATION: float = float(self._get_env_var("PROFILER_MAX_DURATION", "60"))
+        self.PROFILER_OUTPUT_DIR: str = self._get_env_var("PROFILER_OUTPUT_DIR", "data/profiles")
+        
         # その他設定
         self.PORT: int = int(self._get_env_var("PORT", "3000"))
         self.HOST: str = self._get_env_var("HOST", "localhost")
@@ -51,6 +132,24 @@ class Config:
             raise ValueError(f"環境変数 {key} が設定されていません")
         return value or ""
     
+    @staticmethod
+    def _parse_float_map(value: str) -> Dict[str, float]:
+        """"key=value,key=value" 形式の設定を辞書に変換します
+        
+        Args:
+            value (str): 設定値
+            
+        Returns:
+            Dict[str, float]: キーと数値の辞書
+        """
+        result: Dict[str, float] = {}
+        for item in value.split(","):
+            key, sep, number = item.partition("=")
+            if not sep:
+                continue
+            result[key.strip()] = float(number)
+        return result
+    
     def validate(self) -> bool:
         """設定の妥当性を検証します
         
@@ -5,8 +5,24 @@ import asyncio
 import logging
 import sys
 
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
 from slackcogs import SlackCogsApp
 from config import Config
+from utils.app_bridge import AppBridge
+from utils.cache import close_cache, configure_cache
+from utils.cog_loader import CogLoader
+from utils.dispatcher import CommandDispatcher
+from utils.executor import configure_offload
+from utils.health import HealthCheck
+from utils.hot_reload import HotReloader
+from utils.logging_utils import configure_log_sampling, setup_logging, stop_queue_logging
+from utils.loop_profiler import LoopProfiler
+from utils.metrics import LoopLagMonitor, MetricsServer, get_metrics
+from utils.rate_limit import close_rate_limit, configure_rate_limit
+from utils.sampling_profiler import SamplingProfiler
+from utils.slack_client import SlackClient
+from utils.slack_scheduler import OutboundScheduler
+from utils.user_store import create_user_store
 
 # ログ設定
 logging.basicConfig(
@@ -20,33 +36,244 @@ class MySlackBot:
     def __init__(self):
         self.config = Config()
         
+        # slackbotロガーの設定（コマンド・Cog・セキュリティログ）
+        setup_logging(
+            log_level=self.config.LOG_LEVEL,
+            log_file=self.config.LOG_FILE or None,
+            enable_json_logging=self.config.LOG_JSON,
+            use_queue=self.config.LOG_QUEUE_ENABLED,
+            queue_size=self.config.LOG_QUEUE_SIZE,
+            queue_policy=self.config.LOG_QUEUE_POLICY,
+            batch_size=self.config.LOG_QUEUE_BATCH_SIZE,
+            max_bytes=self.config.LOG_MAX_BYTES,
+            backup_count=self.config.LOG_BACKUP_COUNT,
+            rotate_when=self.config.LOG_ROTATE_WHEN or None,
+            compression=self.config.LOG_COMPRESSION or None
+        )
+        # コマンド集中・不正アクセスの大量発生時にログ出力自体が詰まらないよう間引く
+        configure_log_sampling(
+            "slackbot.commands",
+            sample_rate=self.config.LOG_COMMAND_SAMPLE_RATE,
+            per_key_rates=self.config.LOG_COMMAND_SAMPLE_RATES,
+            rate_limit=self.config.LOG_RATE_LIMIT or None,
+            burst=self.config.LOG_RATE_BURST or None
+        )
+        configure_log_sampling(
+            "slackbot.security",
+            rate_limit=self.config.LOG_RATE_LIMIT or None,
+            burst=self.config.LOG_RATE_BURST or None
+        )
+        
         # SlackCogsアプリ作成
         self.app = SlackCogsApp(
             token=self.config.SLACK_BOT_TOKEN,
             signing_secret=self.config.SLACK_SIGNING_SECRET,
             app_token=self.config.SLACK_APP_TOKEN
         )
+        # Socket Modeの接続（/ready は接続が確立するまでと切断中は503）
+        self.socket_mode = AsyncSocketModeHandler(self.app, self.config.SLACK_APP_TOKEN)
+        
+        # コマンドディスパッチャー作成（ackを即時返し、ハンドラーは上限付きプールで実行）
+        self.dispatcher = CommandDispatcher(
+            max_workers=self.config.DISPATCHER_MAX_WORKERS,
+            max_queue_size=self.config.DISPATCHER_QUEUE_SIZE,
+            per_cog_limit=self.config.DISPATCHER_COG_CONCURRENCY,
+            enqueue_timeout=self.config.DISPATCHER_ENQUEUE_TIMEOUT
+        )
+        self.app.dispatcher = self.dispatcher
+        
+        # CPU負荷の高いコマンド用の共有プール
+        self.offload_executor = configure_offload(
+            thread_workers=self.config.OFFLOAD_THREAD_WORKERS,
+            process_workers=self.config.OFFLOAD_PROCESS_WORKERS,
+            default_timeout=self.config.OFFLOAD_TIMEOUT
+        )
+        
+        # ユーザー活動ストア（ExampleCogなどで共有）
+        self.user_store = create_user_store(
+            backend=self.config.USER_STORE_BACKEND,
+            path=self.config.USER_STORE_PATH,
+            redis_url=self.config.REDIS_URL,
+            flush_interval=self.config.USER_STORE_FLUSH_INTERVAL,
+            flush_batch_size=self.config.USER_STORE_FLUSH_BATCH_SIZE
+        )
+        self.app.user_store = self.user_store
+        
+        # Slack APIの結果などの共有キャッシュ（Cogからは get_cache / @cached で利用）
+        configure_cache(
+            redis_url=self.config.REDIS_URL if self.config.CACHE_REDIS_ENABLED else None,
+            max_size=self.config.CACHE_MAX_SIZE,
+            ttl=self.config.CACHE_TTL,
+            negative_ttl=self.config.CACHE_NEGATIVE_TTL
+        )
+        
+        # @rate_limit のバックエンド（Redisを使うと複数レプリカで実行回数を共有）
+        configure_rate_limit(
+            redis_url=self.config.REDIS_URL if self.config.RATE_LIMIT_REDIS_ENABLED else None
+        )
+        
+        # Slack Web APIクライアント（接続プール共有・同一呼び出しのまとめ・ユーザー参照のバッチ化）
+        self.slack_client = SlackClient(
+            token=self.config.SLACK_BOT_TOKEN,
+            max_connections=self.config.SLACK_HTTP_MAX_CONNECTIONS,
+            keepalive_timeout=self.config.SLACK_HTTP_KEEPALIVE,
+            users_list_threshold=self.config.SLACK_USERS_LIST_THRESHOLD,
+            users_list_max_pages=self.config.SLACK_USERS_LIST_MAX_PAGES
+        )
+        self.app.slack_client = self.slack_client
+        
+        # Slackのレート制限に合わせた送信スケジューラー
+        self.outbound_scheduler = None
+        if self.config.SLACK_SCHEDULER_ENABLED:
+            self.outbound_scheduler = OutboundScheduler(
+                self.slack_client.send,
+                max_concurrency=self.config.SLACK_SCHEDULER_CONCURRENCY,
+                max_queue_size=self.config.SLACK_SCHEDULER_QUEUE_SIZE,
+                channel_rate=self.config.SLACK_CHANNEL_POST_RATE,
+                max_retries=self.config.SLACK_RATE_LIMIT_RETRIES
+            )
+            self.slack_client.scheduler = self.outbound_scheduler
+        
+        # マニフェストに従ってCogを読み込むローダー（lazyなCogは初回のコマンド実行時にimport）
+        self.cog_loader = CogLoader(
+            self.app,
+            manifest_path=self.config.COG_MANIFEST_PATH,
+            setup_timeout=self.config.COG_SETUP_TIMEOUT
+        )
+        self.app.cog_loader = self.cog_loader
+        # マニフェストのコマンド・メッセージ・アクションをアプリに登録し、ディスパッチャー経由でCogLoaderへ転送
+        self.app_bridge = AppBridge(self.app, self.cog_loader, dispatcher=self.dispatcher)
+        self.hot_reloader = None
+        
+        # メトリクス（コマンドの実行時間はCogLoaderが自動で記録）
+        self.metrics = get_metrics()
+        self.metrics.add_gauge(
+            "dispatcher_queue_depth",
+            "ディスパッチャーの待ちコマンド数",
+            lambda: self.dispatcher.queue_depth
+        )
+        if self.outbound_scheduler is not None:
+            self.metrics.add_gauge(
+                "slack_outbound_queue_depth",
+                "Slack API呼び出しの送信待ち数",
+                lambda: self.outbound_scheduler.queue_depth
+            )
+        self.loop_lag_monitor = LoopLagMonitor(
+            interval=self.config.METRICS_LOOP_LAG_INTERVAL,
+            registry=self.metrics
+        )
+        
+        # イベントループをブロックした処理の記録（AdminCogの /slow_callbacks で表示）
+        self.loop_profiler = None
+        if self.config.LOOP_PROFILER_ENABLED:
+            self.loop_profiler = LoopProfiler(
+                threshold=self.config.LOOP_PROFILER_THRESHOLD,
+                loader=self.cog_loader,
+                registry=self.metrics
+            )
+        self.app.loop_profiler = self.loop_profiler
+        
+        # 稼働中にプロファイルするためのサンプリングプロファイラー（/profile の実行中のみ動作）
+        self.sampling_profiler = SamplingProfiler(
+            interval=self.config.PROFILER_INTERVAL,
+            loader=self.cog_loader,
+            max_duration=self.config.PROFILER_MAX_DURATION,
+            output_dir=self.config.PROFILER_OUTPUT_DIR
+        )
+        self.app.sampling_profiler = self.sampling_profiler
+        
+        # /metrics, /health, /ready を提供するHTTPサーバー（Slack APIにはアクセスしない）
+        self.health = HealthCheck(
+            loop_monitor=self.loop_lag_monitor,
+            dispatcher=self.dispatcher,
+            cog_loader=self.cog_loader,
+            connection_state=self._slack_connection_state,
+            max_loop_lag=self.config.HEALTH_MAX_LOOP_LAG
+        )
+        self.http_server = None
+        if self.config.METRICS_ENABLED or self.config.HEALTH_ENABLED:
+            self.http_server = MetricsServer(
+                self.config.HOST,
+                self.config.PORT,
+                registry=self.metrics,
+                expose_metrics=self.config.METRICS_ENABLED
+            )
+            if self.config.HEALTH_ENABLED:
+                self.health.add_routes(self.http_server)
+    
+    def _slack_connection_state(self):
+        """Socket Modeクライアントが接続中か（接続前・再接続中はFalse）"""
+        client = self.socket_mode.client
+        session = client.current_session
+        return not client.closed and session is not None and not session.closed
     
     async def start(self):
         """ボット開始"""
         try:
             logger.info("🚀 Starting SlackBot...")
             
-            # Cogを自動読み込み
-            await self.app.load_cogs_from_directory("cogs")
+            # 起動中もヘルスチェックに応答できるよう最初に開始（/ready は起動完了まで503）
+            await self.loop_lag_monitor.start()
+            if self.loop_profiler is not None:
+                await self.loop_profiler.start()
+            if self.http_server is not None:
+                await self.http_server.start()
+            
+            # 保存済みのユーザー活動を読み込み
+            await self.user_store.start()
+            
+            # 送信スケジューラー開始
+            if self.outbound_scheduler is not None:
+                await self.outbound_scheduler.start()
+            
+            # Cogのコマンドを登録（lazyでないCogを依存関係の順に並行して初期化）
+            await self.cog_loader.load()
+            self.app_bridge.bind()
+            logger.info(f"Cog startup report:\n{self.cog_loader.format_startup_report()}")
             
             # ホットリロード有効化（開発環境のみ）
             if self.config.ENABLE_HOT_RELOAD:
-                await self.app.enable_hot_reload("cogs")
+                self.hot_reloader = HotReloader(
+                    self.cog_loader,
+                    directories=self.config.HOT_RELOAD_DIRS,
+                    debounce=self.config.HOT_RELOAD_DEBOUNCE
+                )
+                await self.hot_reloader.start()
                 logger.info("🔥 Hot reload enabled")
             
-            # ボット開始
+            # ディスパッチャー開始
+            await self.dispatcher.start()
+            
+            # Slackに接続してから準備完了にする
+            await self.socket_mode.connect_async()
+            self.health.mark_ready()
             logger.info("✅ Bot is ready!")
-            await self.app.start()
+            # 停止されるまで待機（切断時はSocket Modeクライアントが再接続する）
+            await asyncio.sleep(float("inf"))
             
         except Exception as e:
             logger.error(f"❌ Failed to start bot: {e}")
             sys.exit(1)
+        finally:
+            self.health.mark_ready(False)
+            await self.socket_mode.close_async()
+            if self.http_server is not None:
+                await self.http_server.stop()
+            await self.loop_lag_monitor.stop()
+            if self.loop_profiler is not None:
+                await self.loop_profiler.stop()
+            if self.hot_reloader is not None:
+                await self.hot_reloader.stop()
+            await self.dispatcher.stop()
+            await self.cog_loader.shutdown()
+            await self.user_store.close()
+            if self.outbound_scheduler is not None:
+                await self.outbound_scheduler.stop()
+            await self.slack_client.close()
+            await close_cache()
+            await close_rate_limit()
+            self.offload_executor.shutdown(wait=False)
+            stop_queue_logging()
 
 async def main():
     bot = MySlackBot()
@@ -0,0 +1,6 @@
+"""
+ベンチマークパッケージ
+
+Cogやユーティリティのホットパスの性能を計測し、
+保存済みベースラインと比較して性能劣化を検出します。
+"""
@@ -0,0 +1,197 @@
+"""
+ベンチマーク用フィクスチャ
+
+pytest-benchmark風の `bench` フィクスチャを提供します。外部サービスには接続せず、
+計測結果（1操作あたりの中央値）を baselines.json と比較し、
+許容倍率を超えて遅くなった場合はテストを失敗させます。
+
+環境変数:
+    BENCH_SAVE=1         計測結果で baselines.json を更新する
+    BENCH_TOLERANCE=3.0  ベースラインに対する許容倍率（CI環境の揺らぎを考慮）
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "3.0"))
+SAVE_BASELINES = os.getenv("BENCH_SAVE", "") == "1"
+
+# 計測ラウンド数と、1ラウンドあたりの最小計測時間
+ROUNDS = 5
+MIN_ROUND_TIME = 0.005
+MAX_ITERATIONS = 1_000_000
+
+# サブマイクロ秒の計測はノイズが大きいため、この差までは劣化とみなさない
+NOISE_FLOOR = 1e-6
+
+_results: Dict[str, Dict[str, Any]] = {}
+
+def _load_baselines() -> Dict[str, Dict[str, Any]]:
+    """保存済みのベースラインを読み込みます"""
+    if not BASELINE_FILE.exists():
+        return {}
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+_baselines = _load_baselines()
+
+class FakeUser:
+    """テスト用ユーザー"""
+
+    def __init__(self, user_id: str = "U00000001"):
+        self.id = user_id
+
+class FakeContext:
+    """ctx.respondを記録するだけの軽量なSlackコンテキスト"""
+
+    def __init__(self, user_id: str = "U00000001"):
+        self.user = FakeUser(user_id)
+        self.responses = 0
+        self.last_response: Optional[str] = None
+
+    async def ack(self) -> None:
+        pass
+
+    async def respond(self, message: str) -> None:
+        self.responses += 1
+        self.last_response = message
+
+class Benchmark:
+    """1つのベンチマークの計測と、ベースラインとの比較を行います"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stats: Optional[Dict[str, Any]] = None
+        self.extra_info: Dict[str, Any] = {}
+
+    def __call__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        同期関数を計測します。
+
+        Returns:
+            Any: 関数の戻り値（計測後に1回実行した結果）
+        """
+        def run(iterations: int) -> float:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func(*args, **kwargs)
+            return time.perf_counter() - start
+
+        self._measure(run)
+        return func(*args, **kwargs)
+
+    def run_async(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        コルーチン関数を1つのイベントループ上で計測します。
+
+        Returns:
+            Any: コルーチンの戻り値（計測後に1回実行した結果）
+        """
+        async def timed(iterations: int) -> float:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await func(*args, **kwargs)
+            return time.perf_counter() - start
+
+        loop = asyncio.new_event_loop()
+        try:
+            self._measure(lambda iterations: loop.run_until_complete(timed(iterations)))
+            return loop.run_until_complete(func(*args, **kwargs))
+        finally:
+            loop.close()
+
+    def _measure(self, run: Callable[[int], float]) -> None:
+        """反復回数を調整してから計測し、ベースラインと比較します"""
+        iterations = 1
+        while iterations < MAX_ITERATIONS:
+            if run(iterations) >= MIN_ROUND_TIME:
+                break
+            iterations *= 10
+
+        timings: List[float] = [run(iterations) / iterations for _ in range(ROUNDS)]
+        self.stats = {
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'mean': statistics.fmean(timings),
+            'rounds': ROUNDS,
+            'iterations': iterations
+        }
+        self.stats.update(self.extra_info)
+        _results[self.name] = self.stats
+        self._check_regression()
+
+    def _check_regression(self) -> None:
+        """ベースラインに対して許容倍率を超えていれば失敗させます"""
+        if SAVE_BASELINES:
+            return
+        baseline = _baselines.get(self.name)
+        if not baseline:
+            return
+
+        limit = max(baseline['median'] * TOLERANCE, baseline['median'] + NOISE_FLOOR)
+        if self.stats['median'] > limit:
+            pytest.fail(
+                f"ベンチマーク {self.name} が劣化しました: "
+                f"{_format_seconds(self.stats['median'])} > "
+                f"{_format_seconds(baseline['median'])} x {TOLERANCE}"
+            )
+
+@pytest.fixture
+def bench(request) -> Benchmark:
+    """ベンチマーク計測フィクスチャ"""
+    path, _, test_name = request.node.nodeid.partition("::")
+    return Benchmark(f"{Path(path).stem}::{test_name}")
+
+@pytest.fixture
+def fake_context() -> FakeContext:
+    """応答を記録するだけのコンテキスト"""
+    return FakeContext()
+
+def pytest_configure(config) -> None:
+    """benchmarkマーカーを登録します"""
+    config.addinivalue_line("markers", "benchmark: ホットパスの性能計測（-m 'not benchmark' で除外）")
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    """BENCH_SAVE=1 の場合、計測結果をベースラインとして保存します"""
+    if not SAVE_BASELINES or not _results:
+        return
+
+    baselines = _load_baselines()
+    for name, stats in _results.items():
+        baselines[name] = {'median': stats['median'], 'iterations': stats['iterations']}
+
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(baselines.items())), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """計測結果の一覧を表示します"""
+    if not _results:
+        return
+
+    terminalreporter.section("benchmark")
+    for name, stats in sorted(_results.items()):
+        baseline = _baselines.get(name)
+        ratio = f"x{stats['median'] / baseline['median']:.2f}" if baseline else "new"
+        operations = stats.get('operations', 1)
+        ops = operations / stats['median'] if stats['median'] > 0 else float('inf')
+        terminalreporter.write_line(
+            f"{name:<72} {_format_seconds(stats['median']):>10}  {ops:>12,.0f} ops/s  {ratio}"
+        )
+
+def _format_seconds(seconds: float) -> str:
+    """秒数を読みやすい単位で表示します"""
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f}us"
+    return f"{seconds * 1e9:.0f}ns"
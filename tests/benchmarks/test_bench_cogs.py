@@ -0,0 +1,132 @@
+"""
+Cogベンチマーク
+
+各コマンドの実行レイテンシと、ディスパッチャー経由のスループットを計測します。
+"""
+import pytest
+import asyncio
+import importlib
+from unittest.mock import MagicMock
+
+from cogs.general import GeneralCog
+from cogs.admin import AdminCog
+from cogs.example import ExampleCog
+from utils.dispatcher import CommandDispatcher
+from utils.rate_limit import GCRALimiter
+
+pytestmark = pytest.mark.benchmark
+
+# utils パッケージでは rate_limit がデコレータ名で上書きされるため、モジュールは直接取得する
+rate_limit_module = importlib.import_module("utils.rate_limit")
+
+# スループット計測時の同時コマンド数
+CONCURRENT_COMMANDS = 500
+
+# 統計取得の計測時に登録しておくユーザー数
+TRACKED_USERS = 100_000
+
+@pytest.fixture
+def general_cog():
+    """GeneralCogのインスタンスを作成"""
+    return GeneralCog(MagicMock())
+
+@pytest.fixture
+def admin_cog():
+    """AdminCogのインスタンスを作成"""
+    return AdminCog(MagicMock())
+
+@pytest.fixture
+def example_cog():
+    """ExampleCogのインスタンスを作成"""
+    return ExampleCog(MagicMock())
+
+@pytest.fixture
+def rate_limits(monkeypatch):
+    """テストごとに空のリミッター一覧を使い、名前ごとのリミッターを差し替えられるようにする"""
+    limiters = {}
+    monkeypatch.setattr(rate_limit_module, "_limiters", limiters)
+    return limiters
+
+class TestCommandLatency:
+    """コマンド単体の実行レイテンシ"""
+
+    @pytest.mark.parametrize("command", ["ping", "help", "status"])
+    def test_general_commands(self, bench, general_cog, fake_context, command):
+        """GeneralCogのコマンド"""
+        bench.run_async(getattr(general_cog, command), fake_context)
+        assert fake_context.responses > 0
+
+    @pytest.mark.parametrize("command", ["list_cogs", "admin_help"])
+    def test_admin_commands(self, bench, admin_cog, fake_context, command):
+        """AdminCogのコマンド"""
+        admin_cog.loaded_cogs = ["general", "admin", "example"]
+        bench.run_async(getattr(admin_cog, command), fake_context)
+        assert fake_context.responses > 0
+
+    @pytest.mark.parametrize("command", ["hello", "count", "quote", "time", "user_info"])
+    def test_example_commands(self, bench, example_cog, fake_context, rate_limits, command):
+        """ExampleCogのコマンド（レート制限は判定のみ行い、常に許可される）"""
+        limiter = rate_limits[ExampleCog.count.rate_limit_name] = GCRALimiter(max_requests=10**9, time_window=1.0)
+        bench.run_async(getattr(example_cog, command), fake_context)
+        assert fake_context.responses > 0
+        assert limiter.rejected == 0
+
+    def test_rate_limited_command(self, bench, example_cog, fake_context, rate_limits):
+        """レート制限で拒否されるコマンド（コマンド本体は実行されない）"""
+        limiter = rate_limits[ExampleCog.count.rate_limit_name] = GCRALimiter(max_requests=1, time_window=3600)
+        limiter.hit(fake_context.user.id)
+        bench.run_async(example_cog.count, fake_context)
+        assert example_cog.counter == 0
+        assert "上限" in fake_context.last_response
+
+class TestDispatch:
+    """ディスパッチャー経由の実行"""
+
+    def test_dispatch_latency(self, bench, general_cog, fake_context):
+        """1コマンドをsubmitしてから完了するまでのレイテンシ"""
+        dispatcher = CommandDispatcher()
+
+        async def dispatch_one():
+            if not dispatcher._running:
+                await dispatcher.start()
+            done = asyncio.get_running_loop().create_future()
+
+            async def handler(ctx):
+                await general_cog.ping(ctx)
+                done.set_result(None)
+
+            await dispatcher.submit("general", handler, fake_context)
+            await done
+
+        bench.run_async(dispatch_one)
+        assert dispatcher.get_stats()['failed'] == 0
+
+    def test_concurrent_throughput(self, bench, general_cog, fake_context):
+        """CONCURRENT_COMMANDS件の同時コマンドを処理しきるまでの時間"""
+        async def burst():
+            dispatcher = CommandDispatcher(max_queue_size=CONCURRENT_COMMANDS)
+            await dispatcher.start()
+            for _ in range(CONCURRENT_COMMANDS):
+                await dispatcher.submit("general", general_cog.ping, fake_context)
+            await dispatcher.stop()
+            return dispatcher.completed
+
+        bench.extra_info['operations'] = CONCURRENT_COMMANDS
+        assert bench.run_async(burst) == CONCURRENT_COMMANDS
+
+class TestActivityTracking:
+    """ユーザー活動の記録と統計取得"""
+
+    def test_track_user(self, bench, example_cog):
+        """1回のコマンド実行の記録"""
+        bench(example_cog._track_user, "U00000001")
+        assert example_cog.user_data.get("U00000001")['command_count'] > 1
+
+    def test_get_stats_many_users(self, bench, example_cog):
+        """TRACKED_USERS人を記録した状態での統計取得"""
+        for i in range(TRACKED_USERS):
+            example_cog._track_user(f"U{i:08d}")
+
+        stats = bench(example_cog.get_stats)
+        assert stats['total_users'] == TRACKED_USERS
+        assert stats['total_commands'] == TRACKED_USERS
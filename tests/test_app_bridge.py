@@ -0,0 +1,187 @@
+"""
+アプリへのハンドラー登録テスト
+
+アプリに登録したリスナーからCogのメソッドまで、コマンド・メッセージ・
+ブロックアクションが届くことをテストします。
+"""
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import utils.metrics as metrics_module
+from utils.app_bridge import AppBridge
+from utils.cog_loader import CogLoader, CogSpec
+from utils.dispatcher import CommandDispatcher
+from utils.metrics import MetricsRegistry
+
+class EchoCog:
+    """メッセージとアクションを受け取るテスト用のCog"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def wait(self, ctx):
+        await self.app.release.wait()
+        await ctx.respond("done")
+
+    async def echo(self, ctx, *words):
+        await ctx.respond(" ".join(words))
+
+    async def on_deploy(self, ctx, match):
+        await ctx.respond(f"deploy {match.group(1)} by {ctx.user.id}")
+
+    async def on_vote(self, ctx, action_id):
+        await ctx.respond(f"{action_id}={ctx.text}")
+
+class FakeApp:
+    """Bolt互換の command / message / action デコレーターを持つアプリ"""
+
+    def __init__(self):
+        self.commands = {}
+        self.messages = []
+        self.actions = []
+
+    def command(self, name):
+        def decorator(func):
+            self.commands[name] = func
+            return func
+        return decorator
+
+    def message(self, pattern):
+        def decorator(func):
+            self.messages.append((pattern, func))
+            return func
+        return decorator
+
+    def action(self, pattern):
+        def decorator(func):
+            self.actions.append((pattern, func))
+            return func
+        return decorator
+
+    async def run_command(self, name, text=""):
+        """スラッシュコマンドのリクエストを処理し、ack と respond を返す"""
+        ack, respond = AsyncMock(), AsyncMock()
+        payload = {"command": name, "text": text, "user_id": "U123", "channel_id": "C123"}
+        await self.commands[name](ack=ack, command=payload, respond=respond)
+        return ack, respond
+
+@pytest.fixture
+def registry(monkeypatch):
+    """共有レジストリを新しいものに差し替える"""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, "_default_registry", registry)
+    return registry
+
+async def bind_app(dispatcher=None):
+    """general と lazy な example、EchoCog をアプリに登録する"""
+    app = FakeApp()
+    loader = CogLoader(MagicMock(release=asyncio.Event()))
+    await loader.load([
+        CogSpec("general", "cogs.general", "GeneralCog", ["ping"], lazy=False),
+        CogSpec("example", "cogs.example", "ExampleCog", ["hello"]),
+        CogSpec(
+            "echo", __name__, "EchoCog", ["echo", "wait"],
+            messages={r"^deploy (\w+)": "on_deploy"},
+            actions={"vote_": "on_vote"}
+        )
+    ])
+    bridge = AppBridge(app, loader, dispatcher=dispatcher)
+    bridge.bind()
+    return app, loader
+
+class TestAppBridge:
+    """AppBridgeのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_commands_reach_cogs(self, registry):
+        """アプリのコマンドからCogのメソッドまで届き、lazy なCogが読み込まれ計測されることをテスト"""
+        app, loader = await bind_app()
+        assert set(app.commands) == {"/ping", "/hello", "/echo", "/wait"}
+        assert not loader.is_loaded("example")
+
+        ack, respond = await app.run_command("/hello", "太郎")
+
+        ack.assert_awaited_once()
+        respond.assert_awaited_once_with(text="こんにちは、太郎さん！👋")
+        assert loader.is_loaded("example")
+        assert registry.get_command_stats()["example.hello"]['count'] == 1
+
+        _, respond = await app.run_command("/echo", "a  b")
+        respond.assert_awaited_once_with(text="a b")
+
+    @pytest.mark.asyncio
+    async def test_message_and_action(self):
+        """メッセージとブロックアクションがパターン・プレフィックスの一致したCogに届くことをテスト"""
+        app, _ = await bind_app()
+        (pattern, on_message), = app.messages
+        (action_pattern, on_action), = app.actions
+        assert pattern.search("deploy api")
+        assert action_pattern.match("vote_yes")
+
+        say = AsyncMock()
+        await on_message(ack=AsyncMock(), message={"text": "deploy api", "user": "U9", "channel": "C1"}, say=say)
+        say.assert_awaited_once_with(text="deploy api by U9")
+
+        respond = AsyncMock()
+        await on_action(
+            ack=AsyncMock(),
+            action={"action_id": "vote_yes", "value": "1"},
+            body={"user": {"id": "U9"}, "channel": {"id": "C1"}},
+            respond=respond
+        )
+        respond.assert_awaited_once_with(text="vote_yes=1")
+
+    @pytest.mark.asyncio
+    async def test_errors_and_late_registration(self):
+        """失敗をユーザーに通知し、後から登録したCogもアプリに登録されることをテスト"""
+        app, loader = await bind_app()
+        with pytest.raises(TypeError):
+            await app.run_command("/ping", "extra")
+
+        loader.register(CogSpec("late", __name__, "EchoCog", ["late_echo"]))
+        assert "/late_echo" in app.commands
+
+        loader.unregister("late")
+        _, respond = await app.run_command("/late_echo")
+        assert "不明なコマンド" in respond.call_args.kwargs['text']
+
+class TestDispatchedCommands:
+    """ディスパッチャー経由で実行するコマンドのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_ack_then_run_on_pool(self):
+        """ackを即座に返し、ハンドラーはディスパッチャーのワーカーで実行されることをテスト"""
+        dispatcher = CommandDispatcher(max_workers=2)
+        await dispatcher.start()
+        app, loader = await bind_app(dispatcher)
+
+        ack, respond = await app.run_command("/wait")
+
+        ack.assert_awaited_once()
+        respond.assert_not_called()
+        assert dispatcher.active_count == 1
+
+        loader.app.release.set()
+        await dispatcher.stop()
+        respond.assert_awaited_once_with(text="done")
+        assert dispatcher.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_full_is_reported(self):
+        """キューが満杯のときは実行せずに混雑を通知することをテスト"""
+        dispatcher = CommandDispatcher(max_workers=1, max_queue_size=1, per_cog_limit=1, enqueue_timeout=0)
+        await dispatcher.start()
+        app, loader = await bind_app(dispatcher)
+
+        await app.run_command("/wait")
+        await app.run_command("/wait")
+        ack, respond = await app.run_command("/echo", "x")
+
+        ack.assert_awaited_once()
+        assert "混み合って" in respond.call_args.kwargs['text']
+        assert dispatcher.rejected == 1
+
+        loader.app.release.set()
+        await dispatcher.stop()
+        assert dispatcher.completed == 2
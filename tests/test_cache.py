@@ -0,0 +1,201 @@
+"""
+キャッシュテスト
+
+TTL付きLRU・コアレッシング・ネガティブキャッシュ・Redis層をテストします。
+"""
+import pytest
+import asyncio
+import json
+from typing import Dict
+
+from utils.cache import CacheManager, CacheNamespace, cached, configure_cache, get_cache_stats
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeRedis:
+    """GET/SET/DELETEだけを持つRedisの代わり"""
+
+    def __init__(self):
+        self.data: Dict[str, str] = {}
+        self.fail = False
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, px=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+class TestCacheNamespace:
+    """CacheNamespaceのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru_eviction(self):
+        """有効期限切れとLRUの退避のテスト"""
+        clock = FakeClock()
+        cache = CacheNamespace("test", max_size=2, ttl=10, clock=clock)
+
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        assert await cache.get("a") == 1
+        await cache.set("c", 3)
+
+        # 直前に参照したaは残り、bが退避される
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+
+        clock.now = 11
+        assert await cache.get("a") is None
+        stats = cache.get_stats()
+        assert stats['evictions'] == 1
+        assert stats['expirations'] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_are_coalesced(self):
+        """同時の読み込みが1回にまとめられることのテスト"""
+        cache = CacheNamespace("users")
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": "U1"}
+
+        results = await asyncio.gather(*[cache.get_or_load("U1", loader) for _ in range(10)])
+
+        assert calls == 1
+        assert all(result == {"id": "U1"} for result in results)
+        assert cache.get_stats()['coalesced'] == 9
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_waiters(self):
+        """読み込みを始めた呼び出し元がキャンセルされても、他の呼び出し元は結果を受け取れることのテスト"""
+        cache = CacheNamespace("users")
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return {"id": "U1"}
+
+        first = asyncio.create_task(cache.get_or_load("U1", loader))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_load("U1", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == {"id": "U1"}
+        assert first.cancelled()
+        assert await cache.get("U1") == {"id": "U1"}
+
+    @pytest.mark.asyncio
+    async def test_negative_cache(self):
+        """Noneの結果がnegative_ttlの間キャッシュされることのテスト"""
+        clock = FakeClock()
+        cache = CacheNamespace("users", ttl=100, negative_ttl=5, clock=clock)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return None
+
+        assert await cache.get_or_load("missing", loader) is None
+        assert await cache.get_or_load("missing", loader) is None
+        assert calls == 1
+        assert cache.get_stats()['negative_hits'] == 1
+
+        clock.now = 6
+        await cache.get_or_load("missing", loader)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_loader_error_is_not_cached(self):
+        """ローダーの例外が全員に伝わり、キャッシュされないことのテスト"""
+        cache = CacheNamespace("users")
+
+        async def broken():
+            await asyncio.sleep(0)
+            raise RuntimeError("api error")
+
+        results = await asyncio.gather(
+            cache.get_or_load("U1", broken),
+            cache.get_or_load("U1", broken),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(cache) == 0
+        assert cache.get_stats()['load_errors'] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_tier(self):
+        """Redis層が共有され、障害時はローダーにフォールバックすることのテスト"""
+        redis = FakeRedis()
+        manager = CacheManager(redis_client=redis)
+        first = manager.namespace("channels")
+
+        async def loader():
+            return {"name": "general"}
+
+        await first.get_or_load("C1", loader)
+        assert json.loads(redis.data["slackbot:cache:channels:C1"]) == {"name": "general"}
+
+        # 別プロセスを想定した新しいマネージャーはRedisから取得する
+        second = CacheManager(redis_client=redis).namespace("channels")
+        assert await second.get_or_load("C1", None) == {"name": "general"}
+        assert second.get_stats()['remote_hits'] == 1
+
+        redis.fail = True
+        third = CacheManager(redis_client=redis).namespace("channels")
+        assert await third.get_or_load("C1", loader) == {"name": "general"}
+        assert third.get_stats()['remote_errors'] == 2
+
+class TestCachedDecorator:
+    """cachedデコレータのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_method_cache_and_invalidate(self):
+        """メソッドの結果のキャッシュと削除のテスト"""
+        configure_cache()
+
+        class Lookup:
+            def __init__(self):
+                self.calls = 0
+
+            @cached("test.profiles", ttl=60)
+            async def profile(self, user_id):
+                self.calls += 1
+                return {"id": user_id}
+
+        lookup = Lookup()
+        assert await lookup.profile("U1") == {"id": "U1"}
+        assert await lookup.profile("U1") == {"id": "U1"}
+        assert lookup.calls == 1
+
+        # キーにselfを含まないため、別インスタンスとも共有される
+        assert await Lookup().profile("U1") == {"id": "U1"}
+
+        await Lookup.profile.invalidate(lookup, "U1")
+        await lookup.profile("U1")
+        assert lookup.calls == 2
+        assert get_cache_stats()["test.profiles"]['hits'] == 2
+
+    def test_sync_function_is_rejected(self):
+        """同期関数を拒否することのテスト"""
+        with pytest.raises(TypeError):
+            cached("test")(lambda: None)
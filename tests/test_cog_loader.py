@@ -0,0 +1,429 @@
+"""
+Cogローダーテスト
+
+マニフェストの読み込み、コマンド登録、初回実行時の遅延importをテストします。
+"""
+import pytest
+import asyncio
+import json
+import sys
+import textwrap
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from utils.cog_loader import CogLoadError, CogLoader, CogSpec, load_manifest, scan_cog_commands
+
+COG_SOURCE = textwrap.dedent('''
+    IMPORT_COUNT = globals().get("IMPORT_COUNT", 0) + 1
+
+    class SampleCog:
+        def __init__(self, app):
+            self.app = app
+
+        async def greet(self, ctx):
+            await ctx.respond("hi")
+
+        async def _private(self, ctx):
+            pass
+
+        def get_stats(self):
+            return {}
+''')
+
+@pytest.fixture
+def cog_package(tmp_path, monkeypatch):
+    """一時ディレクトリにCogパッケージを作成し、パッケージ名を返す"""
+    package = f"tmpcogs_{uuid.uuid4().hex[:8]}"
+    (tmp_path / package).mkdir()
+    (tmp_path / package / "__init__.py").write_text("")
+    (tmp_path / package / "sample.py").write_text(COG_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    return package
+
+LIFECYCLE_COG_SOURCE = textwrap.dedent('''
+    import asyncio
+    from . import events
+
+    class {class_name}:
+        def __init__(self, app):
+            self.app = app
+
+        async def setup(self):
+            events.LOG.append(("start", "{name}"))
+            await asyncio.sleep({delay})
+            if {fail}:
+                raise RuntimeError("setup failed")
+            events.LOG.append(("setup", "{name}"))
+
+        async def teardown(self):
+            events.LOG.append(("teardown", "{name}"))
+
+        async def {name}_cmd(self, ctx):
+            pass
+''')
+
+@pytest.fixture
+def lifecycle_package(tmp_path, monkeypatch):
+    """setup/teardown を記録するCogを作る関数と、記録のリストを返す"""
+    package = f"tmplife_{uuid.uuid4().hex[:8]}"
+    (tmp_path / package).mkdir()
+    (tmp_path / package / "__init__.py").write_text("")
+    (tmp_path / package / "events.py").write_text("LOG = []\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def make_spec(name: str, depends_on=(), delay: float = 0.0, fail: bool = False, **options) -> CogSpec:
+        class_name = f"{name.capitalize()}Cog"
+        source = LIFECYCLE_COG_SOURCE.format(class_name=class_name, name=name, delay=delay, fail=fail)
+        (tmp_path / package / f"{name}.py").write_text(source)
+        return CogSpec(
+            name, f"{package}.{name}", class_name, [f"{name}_cmd"],
+            lazy=False, depends_on=list(depends_on), **options
+        )
+
+    def events():
+        return __import__(f"{package}.events", fromlist=["LOG"]).LOG
+
+    return make_spec, events
+
+def make_context() -> MagicMock:
+    """Slackコンテキストを作成"""
+    ctx = MagicMock()
+    ctx.respond = AsyncMock()
+    return ctx
+
+class TestManifest:
+    """マニフェストのテストクラス"""
+
+    def test_manifest_matches_sources(self):
+        """同梱のマニフェストのコマンド名がCogのソースと一致することをテスト"""
+        for spec in load_manifest("cogs/manifest.json"):
+            path = spec.module.replace(".", "/") + ".py"
+            assert spec.commands == scan_cog_commands(path, spec.class_name)
+
+    def test_lifecycle_methods_are_not_commands(self, tmp_path):
+        """setup, teardown がコマンドとして扱われないことをテスト"""
+        path = tmp_path / "cog.py"
+        path.write_text(LIFECYCLE_COG_SOURCE.format(class_name="ACog", name="a", delay=0, fail=False))
+        assert scan_cog_commands(str(path), "ACog") == ["a_cmd"]
+
+    def test_commands_are_scanned_when_omitted(self, cog_package):
+        """commands を省略するとソースから求めることをテスト"""
+        with open("manifest.json", "w", encoding="utf-8") as f:
+            json.dump({'cogs': [{'name': "sample", 'module': f"{cog_package}.sample", 'class': "SampleCog"}]}, f)
+
+        specs = load_manifest("manifest.json")
+        assert specs[0].commands == ["greet"]
+        assert specs[0].lazy is True
+        assert f"{cog_package}.sample" not in sys.modules
+
+class TestCogLoader:
+    """CogLoaderのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_lazy_cog_is_imported_on_first_use(self, cog_package):
+        """lazy なCogが最初のコマンド実行時に1回だけimportされることをテスト"""
+        module = f"{cog_package}.sample"
+        loader = CogLoader(MagicMock())
+        await loader.load([CogSpec("sample", module, "SampleCog", ["greet"], lazy=True)])
+
+        assert loader.commands == {'greet': "sample"}
+        assert module not in sys.modules
+        assert loader.format_startup_report() == "sample: deferred"
+
+        contexts = [make_context() for _ in range(5)]
+        await asyncio.gather(*[loader.invoke("greet", ctx) for ctx in contexts])
+
+        assert sys.modules[module].IMPORT_COUNT == 1
+        assert all(ctx.respond.await_count == 1 for ctx in contexts)
+        report = loader.get_startup_report()[0]
+        assert report['loaded'] is True
+        assert report['trigger'] == "greet"
+        assert report['import_time'] >= 0
+
+    @pytest.mark.asyncio
+    async def test_eager_cogs_are_loaded(self):
+        """lazy でないCogが起動時に読み込まれることをテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([CogSpec("general", "cogs.general", "GeneralCog", ["ping"], lazy=False)])
+
+        assert loader.is_loaded("general")
+        ctx = make_context()
+        await loader.invoke("ping", ctx)
+        ctx.respond.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_command(self):
+        """別のCogと同じコマンド名を登録できないことをテスト"""
+        loader = CogLoader(MagicMock())
+        loader.register(CogSpec("a", "cogs.general", "GeneralCog", ["help"]))
+        with pytest.raises(CogLoadError):
+            loader.register(CogSpec("b", "cogs.example", "ExampleCog", ["help"]))
+
+    @pytest.mark.asyncio
+    async def test_missing_command_method(self, cog_package):
+        """マニフェストのコマンドがCogにない場合のテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([CogSpec("sample", f"{cog_package}.sample", "SampleCog", ["greet", "wave"])])
+
+        with pytest.raises(CogLoadError):
+            await loader.invoke("greet", make_context())
+        assert not loader.is_loaded("sample")
+
+    @pytest.mark.asyncio
+    async def test_unknown_command(self):
+        """登録されていないコマンドのテスト"""
+        loader = CogLoader(MagicMock())
+        with pytest.raises(ValueError):
+            await loader.invoke("missing", make_context())
+
+class TestCogLifecycle:
+    """Cogの setup / teardown と依存関係のテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_dependencies_are_set_up_first(self, lifecycle_package):
+        """依存するCogが先に、独立したCogが並行して初期化されることをテスト"""
+        make_spec, events = lifecycle_package
+        specs = [
+            make_spec("db", delay=0.05),
+            make_spec("cache", delay=0.05),
+            make_spec("api", depends_on=["db", "cache"])
+        ]
+        loader = CogLoader(MagicMock())
+        await loader.load(specs)
+
+        log = events()
+        # db と cache は両方とも開始してから完了する（並行）
+        assert [entry[0] for entry in log[:2]] == ["start", "start"]
+        assert log.index(("start", "api")) > log.index(("setup", "db"))
+        assert log.index(("start", "api")) > log.index(("setup", "cache"))
+        assert loader.get_startup_report()[0]['setup_time'] >= 0.04
+
+        await loader.shutdown()
+        teardowns = [name for kind, name in events() if kind == "teardown"]
+        assert teardowns[0] == "api"
+        assert set(teardowns) == {"db", "cache", "api"}
+
+    @pytest.mark.asyncio
+    async def test_optional_failure_degrades(self, lifecycle_package):
+        """必須でないCogの失敗は、依存するCogと共に無効になるだけであることをテスト"""
+        make_spec, _ = lifecycle_package
+        loader = CogLoader(MagicMock())
+        await loader.load([
+            make_spec("broken", fail=True),
+            make_spec("user", depends_on=["broken"]),
+            make_spec("other")
+        ])
+
+        assert loader.is_loaded("other")
+        assert set(loader.failed) == {"broken", "user"}
+        assert "failed" in loader.format_startup_report()
+
+    @pytest.mark.asyncio
+    async def test_required_failure_aborts(self, lifecycle_package):
+        """必須のCogが失敗すると起動を中止することをテスト"""
+        make_spec, _ = lifecycle_package
+        loader = CogLoader(MagicMock())
+        with pytest.raises(CogLoadError):
+            await loader.load([make_spec("core", fail=True, required=True), make_spec("slow", delay=1.0)])
+        assert not loader.is_loaded("slow")
+
+    @pytest.mark.asyncio
+    async def test_setup_timeout(self, lifecycle_package):
+        """setup() がタイムアウトしたCogが失敗扱いになることをテスト"""
+        make_spec, _ = lifecycle_package
+        loader = CogLoader(MagicMock())
+        await loader.load([make_spec("stuck", delay=1.0, timeout=0.05)])
+
+        assert "stuck" in loader.failed
+        assert not loader.is_loaded("stuck")
+
+    @pytest.mark.asyncio
+    async def test_dependency_cycle(self, lifecycle_package):
+        """循環依存を検出することのテスト"""
+        make_spec, _ = lifecycle_package
+        loader = CogLoader(MagicMock())
+        with pytest.raises(CogLoadError, match="循環"):
+            await loader.load([make_spec("a", depends_on=["b"]), make_spec("b", depends_on=["a"])])
+
+RELOADABLE_COG_SOURCE = textwrap.dedent('''
+    import asyncio
+
+    class CounterCog:
+        reload_state = ("counter",)
+
+        def __init__(self, app):
+            self.app = app
+            self.counter = 0
+            self.release = asyncio.Event()
+            self.torn_down = False
+
+        async def bump(self, ctx):
+            self.counter += 1
+            await ctx.respond("{message}")
+
+        async def slow(self, ctx):
+            await self.release.wait()
+            await ctx.respond("done")
+
+        async def teardown(self):
+            self.torn_down = True
+''')
+
+@pytest.fixture
+def reloadable_cog(tmp_path, monkeypatch):
+    """書き換え可能なCogのソースを作成し、(CogSpec, ソースを書き換える関数) を返す"""
+    package = f"tmpreload_{uuid.uuid4().hex[:8]}"
+    (tmp_path / package).mkdir()
+    (tmp_path / package / "__init__.py").write_text("")
+    path = tmp_path / package / "counter.py"
+    path.write_text(RELOADABLE_COG_SOURCE.format(message="v1"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def rewrite(source: str) -> None:
+        path.write_text(source)
+
+    spec = CogSpec("counter", f"{package}.counter", "CounterCog", ["bump", "slow"], lazy=False)
+    return spec, rewrite
+
+class TestCogReload:
+    """Cogのリロード・アンロードのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_reload_swaps_and_carries_state(self, reloadable_cog):
+        """リロードで新しいコードに差し替わり、reload_state の属性が引き継がれることをテスト"""
+        spec, rewrite = reloadable_cog
+        loader = CogLoader(MagicMock())
+        await loader.load([spec])
+        old = loader.cogs["counter"]
+        await loader.invoke("bump", make_context())
+
+        rewrite(RELOADABLE_COG_SOURCE.format(message="v2"))
+        elapsed = await loader.reload_cog("counter")
+
+        new = loader.cogs["counter"]
+        assert new is not old
+        assert new.counter == 1
+        assert old.torn_down
+        ctx = make_context()
+        await loader.invoke("bump", ctx)
+        ctx.respond.assert_called_once_with("v2")
+        assert elapsed > 0
+        assert loader.get_startup_report()[0]['reloads'] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_old_cog(self, reloadable_cog):
+        """コンパイルできないコードへのリロードが元のCogを残すことをテスト"""
+        spec, rewrite = reloadable_cog
+        loader = CogLoader(MagicMock())
+        await loader.load([spec])
+        old = loader.cogs["counter"]
+
+        rewrite("class CounterCog(:\n")
+        with pytest.raises(CogLoadError):
+            await loader.reload_cog("counter")
+
+        assert loader.cogs["counter"] is old
+        assert not old.torn_down
+
+    @pytest.mark.asyncio
+    async def test_inflight_command_finishes_on_old_cog(self, reloadable_cog):
+        """実行中のコマンドが元のCogで完了してから teardown されることをテスト"""
+        spec, _ = reloadable_cog
+        loader = CogLoader(MagicMock())
+        await loader.load([spec])
+        old = loader.cogs["counter"]
+
+        ctx = make_context()
+        running = asyncio.ensure_future(loader.invoke("slow", ctx))
+        await asyncio.sleep(0)
+        reloading = asyncio.ensure_future(loader.reload_cog("counter"))
+        await asyncio.sleep(0.05)
+
+        # 新しいCogには差し替わっているが、元のCogはまだ終了していない
+        assert loader.cogs["counter"] is not old
+        assert not old.torn_down
+
+        old.release.set()
+        await asyncio.gather(running, reloading)
+        ctx.respond.assert_called_once_with("done")
+        assert old.torn_down
+
+    @pytest.mark.asyncio
+    async def test_unload(self, reloadable_cog):
+        """アンロードでコマンドの登録が解除されることをテスト"""
+        spec, _ = reloadable_cog
+        loader = CogLoader(MagicMock())
+        await loader.load([spec])
+        old = loader.cogs["counter"]
+
+        await loader.unload_cog("counter")
+        assert old.torn_down
+        assert "bump" not in loader.commands
+        with pytest.raises(ValueError):
+            await loader.invoke("bump", make_context())
+
+    @pytest.mark.asyncio
+    async def test_unload_blocked_by_dependents(self, lifecycle_package):
+        """依存されているCogをアンロードできないことをテスト"""
+        make_spec, _ = lifecycle_package
+        loader = CogLoader(MagicMock())
+        await loader.load([make_spec("db"), make_spec("api", depends_on=["db"])])
+
+        with pytest.raises(CogLoadError):
+            await loader.unload_cog("db")
+        assert loader.is_loaded("db")
+
+class TestAdminCommands:
+    """AdminCogのリロード系コマンドのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_reload_command(self, reloadable_cog):
+        """reload コマンドがリロード時間を応答することをテスト"""
+        from cogs.admin import AdminCog
+
+        spec, _ = reloadable_cog
+        app = MagicMock()
+        app.cog_loader = loader = CogLoader(app)
+        await loader.load([spec])
+        admin = AdminCog(app)
+
+        ctx = make_context()
+        await admin.reload(ctx, "counter")
+        message = ctx.respond.call_args[0][0]
+        assert message.startswith("✅") and "ms" in message
+
+        ctx = make_context()
+        await admin.list_cogs(ctx)
+        assert "counter" in ctx.respond.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_reload_admin_from_its_own_command(self):
+        """/reload admin が自身のコマンドの完了待ちで止まらないことをテスト"""
+        app = MagicMock()
+        app.cog_loader = loader = CogLoader(app, setup_timeout=3.0)
+        await loader.load([CogSpec("admin", "cogs.admin", "AdminCog", ["reload"], lazy=False)])
+        old = loader.cogs["admin"]
+
+        ctx = make_context()
+        started = time.perf_counter()
+        await asyncio.wait_for(loader.invoke("reload", ctx, "admin"), 2.0)
+        assert time.perf_counter() - started < 1.0
+        assert ctx.respond.call_args[0][0].startswith("✅")
+        assert loader.cogs["admin"] is not old
+        assert not loader._inflight
+
+    @pytest.mark.asyncio
+    async def test_cannot_unload_admin(self):
+        """管理者機能のCog自身はアンロードできないことをテスト"""
+        from cogs.admin import AdminCog
+
+        app = MagicMock()
+        app.cog_loader = loader = CogLoader(app)
+        await loader.load([CogSpec("admin", "cogs.admin", "AdminCog", ["unload"], lazy=False)])
+
+        ctx = make_context()
+        await loader.cogs["admin"].unload(ctx, "admin")
+        assert ctx.respond.call_args[0][0].startswith("❌")
+        assert loader.is_loaded("admin")
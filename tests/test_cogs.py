@@ -178,6 +178,45 @@ class TestExampleCog:
         assert "現在の時刻" in call_args
         assert "年" in call_args
     
+    @pytest.mark.asyncio
+    async def test_report_command(self, example_cog, mock_context):
+        """reportコマンドのテスト"""
+        example_cog._track_user("user1")
+        example_cog._track_user("user2")
+        example_cog._track_user("user2")
+        await example_cog.report(mock_context)
+        
+        mock_context.respond.assert_called_once()
+        call_args = mock_context.respond.call_args[0][0]
+        assert "コマンド実行ランキング" in call_args
+        assert call_args.index("user2") < call_args.index("user1")
+
+    @pytest.mark.asyncio
+    async def test_report_command_args(self, example_cog, mock_context):
+        """reportコマンドの人数が文字列の引数から解釈されることのテスト"""
+        example_cog._track_user("user1")
+        example_cog._track_user("user2")
+        example_cog._track_user("user2")
+        await example_cog.report(mock_context, "1")
+
+        call_args = mock_context.respond.call_args[0][0]
+        assert "user2" in call_args and "user1" not in call_args.split("👥")[0]
+
+        await example_cog.report(mock_context, "abc")
+        assert mock_context.respond.call_args[0][0].startswith("❌")
+
+    @pytest.mark.asyncio
+    async def test_commands_track_user(self, example_cog, mock_context):
+        """コマンドの実行がユーザー活動として記録されることのテスト"""
+        await example_cog.hello(mock_context)
+        await example_cog.count(mock_context)
+        await example_cog.time(mock_context)
+        
+        assert example_cog.user_data.get("test_user_123")['command_count'] == 3
+        stats = example_cog.get_stats()
+        assert stats['total_commands'] == 3
+        assert stats['windows']['1m'] == {'commands': 3, 'active_users': 1}
+    
     def test_track_user(self, example_cog):
         """_track_userメソッドのテスト"""
         user_id = "test_user_123"
@@ -185,25 +224,38 @@ class TestExampleCog:
         # 初回記録
         example_cog._track_user(user_id)
         assert user_id in example_cog.user_data
-        assert example_cog.user_data[user_id]['command_count'] == 1
+        assert example_cog.user_data.get(user_id)['command_count'] == 1
         
         # 2回目記録
         example_cog._track_user(user_id)
-        assert example_cog.user_data[user_id]['command_count'] == 2
+        assert example_cog.user_data.get(user_id)['command_count'] == 2
+    
+    @pytest.mark.asyncio
+    async def test_user_info_reset(self, example_cog, mock_context):
+        """user_infoコマンドのリセットのテスト"""
+        await example_cog.user_info(mock_context, "show")
+        assert "コマンド実行回数: 1" in mock_context.respond.call_args[0][0]
+        
+        await example_cog.user_info(mock_context, "reset")
+        assert "リセットしました" in mock_context.respond.call_args[0][0]
+        assert "test_user_123" not in example_cog.user_data
     
     def test_get_stats(self, example_cog):
         """get_statsメソッドのテスト"""
         # テストデータ追加
         example_cog.counter = 5
-        example_cog.user_data = {
-            "user1": {"command_count": 3},
-            "user2": {"command_count": 2}
-        }
+        for user_id in ["user1", "user1", "user1", "user2", "user2"]:
+            example_cog._track_user(user_id)
         
         stats = example_cog.get_stats()
         assert stats['counter'] == 5
         assert stats['total_users'] == 2
         assert stats['total_commands'] == 5
+        assert stats['windows']['1m'] == {'commands': 5, 'active_users': 2}
+        
+        # リセットしたユーザーの分は累計から除かれる
+        example_cog.user_data.delete("user1")
+        assert example_cog.get_stats()['total_commands'] == 2
 
 class TestCogIntegration:
     """複数Cog間の統合テスト"""
@@ -0,0 +1,110 @@
+"""
+ディスパッチャーテスト
+
+CommandDispatcherのキューイングと同時実行制御をテストします。
+"""
+import pytest
+import asyncio
+from unittest.mock import AsyncMock
+
+from utils.dispatcher import CommandDispatcher
+
+class TestCommandDispatcher:
+    """CommandDispatcherのテストクラス"""
+
+    @pytest.fixture
+    def mock_context(self):
+        """モックコンテキストを作成"""
+        ctx = AsyncMock()
+        ctx.ack = AsyncMock()
+        ctx.respond = AsyncMock()
+        return ctx
+
+    @pytest.mark.asyncio
+    async def test_ack_before_handler(self, mock_context):
+        """ハンドラー実行前にackされることのテスト"""
+        dispatcher = CommandDispatcher()
+        await dispatcher.start()
+        release = asyncio.Event()
+
+        async def slow_handler(ctx):
+            await release.wait()
+            await ctx.respond("done")
+
+        accepted = await dispatcher.submit("general", slow_handler, mock_context)
+
+        assert accepted
+        mock_context.ack.assert_awaited_once()
+        mock_context.respond.assert_not_called()
+
+        release.set()
+        await dispatcher.stop()
+        mock_context.respond.assert_awaited_once_with("done")
+        assert dispatcher.completed == 1
+
+    @pytest.mark.asyncio
+    async def test_per_cog_limit(self, mock_context):
+        """Cogごとの同時実行上限のテスト"""
+        dispatcher = CommandDispatcher(max_workers=8, per_cog_limit=2)
+        await dispatcher.start()
+        release = asyncio.Event()
+        running = {"max": 0, "now": 0}
+
+        async def handler(ctx):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await release.wait()
+            running["now"] -= 1
+
+        for _ in range(5):
+            await dispatcher.submit("example", handler, mock_context)
+        await dispatcher.submit("general", handler, mock_context)
+        await asyncio.sleep(0)
+
+        stats = dispatcher.get_stats()
+        assert stats['cogs']['example']['active'] == 2
+        assert stats['cogs']['example']['queued'] == 3
+        assert stats['cogs']['general']['active'] == 1
+
+        release.set()
+        await dispatcher.stop()
+        assert running["max"] == 3
+        assert dispatcher.completed == 6
+
+    @pytest.mark.asyncio
+    async def test_reject_when_queue_full(self, mock_context):
+        """キュー満杯時の拒否のテスト"""
+        dispatcher = CommandDispatcher(
+            max_workers=1, max_queue_size=1, enqueue_timeout=0
+        )
+        await dispatcher.start()
+        release = asyncio.Event()
+
+        async def handler(ctx):
+            await release.wait()
+
+        assert await dispatcher.submit("example", handler, mock_context)
+        assert await dispatcher.submit("example", handler, mock_context)
+        assert not await dispatcher.submit("example", handler, mock_context)
+
+        assert dispatcher.rejected == 1
+        assert "混み合っています" in mock_context.respond.call_args[0][0]
+
+        release.set()
+        await dispatcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_handler_error_is_counted(self, mock_context):
+        """ハンドラー例外が記録されることのテスト"""
+        dispatcher = CommandDispatcher()
+        await dispatcher.start()
+
+        async def broken(ctx):
+            raise RuntimeError("boom")
+
+        await dispatcher.submit("example", broken, mock_context)
+        await dispatcher.stop()
+
+        stats = dispatcher.get_stats()
+        assert stats['failed'] == 1
+        assert stats['queue_depth'] == 0
@@ -0,0 +1,82 @@
+"""
+オフロード実行テスト
+
+OffloadExecutorとoffloadデコレータをテストします。
+"""
+import pytest
+import asyncio
+import time
+
+from utils.executor import OffloadExecutor, configure_offload, offload
+
+@offload(pool="process")
+def square_in_process(value: int) -> int:
+    """プロセスプールで実行されるテスト用関数"""
+    return value * value
+
+@offload(pool="thread")
+def blocking_sleep(seconds: float) -> float:
+    """スレッドプールで実行されるテスト用関数"""
+    time.sleep(seconds)
+    return seconds
+
+class TestOffloadExecutor:
+    """OffloadExecutorのテストクラス"""
+
+    @pytest.fixture
+    def executor(self):
+        """テスト用の共有エグゼキューターを作成"""
+        executor = configure_offload(thread_workers=2, process_workers=1)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_thread_offload_keeps_loop_responsive(self, executor):
+        """スレッド実行中もイベントループが応答することのテスト"""
+        task = asyncio.ensure_future(blocking_sleep(0.2))
+
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 0.1
+
+        assert await task == 0.2
+        stats = executor.get_stats()['thread']
+        assert stats['completed'] == 1
+        assert stats['busy_time'] >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_process_offload(self, executor):
+        """プロセスプールでデコレート済み関数を実行できることのテスト"""
+        assert await square_in_process(7) == 49
+        assert executor.get_stats()['process']['completed'] == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """タイムアウトのテスト"""
+        executor = OffloadExecutor(thread_workers=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(time.sleep, 0.2, timeout=0.01)
+
+        assert executor.get_stats()['thread']['timeouts'] == 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates(self):
+        """例外が呼び出し元へ伝播することのテスト"""
+        executor = OffloadExecutor()
+
+        def broken():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await executor.run(broken)
+
+        assert executor.get_stats()['thread']['failed'] == 1
+        executor.shutdown()
+
+    def test_rejects_coroutine_function(self):
+        """非同期関数へのデコレートが拒否されることのテスト"""
+        with pytest.raises(TypeError):
+            @offload()
+            async def not_allowed():
+                pass
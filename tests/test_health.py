@@ -0,0 +1,111 @@
+"""
+ヘルスチェックテスト
+
+生存確認・準備完了の判定と、/health・/ready エンドポイントをテストします。
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from utils.cog_loader import CogLoader, CogSpec
+from utils.dispatcher import CommandDispatcher
+from utils.health import HealthCheck
+from utils.metrics import LoopLagMonitor, MetricsRegistry, MetricsServer
+
+@pytest.fixture
+def loop_monitor():
+    """遅延を直接設定できる計測（開始はしない）"""
+    return LoopLagMonitor(registry=MetricsRegistry())
+
+class TestHealthCheck:
+    """HealthCheckのテストクラス"""
+
+    def test_health_depends_on_loop_lag(self, loop_monitor):
+        """イベントループの遅延が上限を超えると生存確認が失敗することをテスト"""
+        health = HealthCheck(loop_monitor=loop_monitor, max_loop_lag=1.0)
+        loop_monitor.lag = 0.01
+        ok, body = health.check_health()
+        assert ok
+        assert body['status'] == "ok"
+
+        loop_monitor.lag = 2.0
+        ok, body = health.check_health()
+        assert not ok
+        assert body['event_loop_lag'] == 2.0
+
+    def test_not_ready_until_marked(self, loop_monitor):
+        """起動完了を記録するまで準備完了にならないことをテスト"""
+        health = HealthCheck(loop_monitor=loop_monitor)
+        ok, body = health.check_ready()
+        assert not ok
+        assert body['reasons'] == ["starting"]
+
+        health.mark_ready()
+        assert health.check_ready()[0]
+
+    def test_queue_and_connection_state(self, loop_monitor):
+        """キューが埋まっている・Slackと切断されている場合に準備完了にならないことをテスト"""
+        dispatcher = CommandDispatcher(max_workers=1, max_queue_size=10)
+        connected = {'value': None}
+        health = HealthCheck(
+            loop_monitor=loop_monitor,
+            dispatcher=dispatcher,
+            connection_state=lambda: connected['value']
+        )
+        health.mark_ready()
+        ok, body = health.check_ready()
+        assert ok
+        assert body['slack_connected'] is None
+        assert body['queue']['max_queue_size'] == 10
+
+        connected['value'] = False
+        dispatcher._pending = 9
+        ok, body = health.check_ready()
+        assert not ok
+        assert body['reasons'] == ["queue full", "slack disconnected"]
+
+    @pytest.mark.asyncio
+    async def test_required_cogs_must_be_loaded(self, loop_monitor):
+        """required のCogが読み込まれていなければ準備完了にならないことをテスト"""
+        loader = CogLoader(MagicMock())
+        loader.register(CogSpec("general", "cogs.general", "GeneralCog", ["ping"], required=True))
+        loader.register(CogSpec("example", "cogs.example", "ExampleCog", ["hello"]))
+        health = HealthCheck(loop_monitor=loop_monitor, cog_loader=loader)
+        health.mark_ready()
+
+        ok, body = health.check_ready()
+        assert not ok
+        assert body['cogs'] == {'general': "deferred", 'example': "deferred"}
+        assert body['reasons'] == ["cogs not loaded: general"]
+
+        await loader.load_cog("general")
+        ok, body = health.check_ready()
+        assert ok
+        assert body['cogs']['general'] == "loaded"
+
+class TestHealthEndpoints:
+    """/health, /ready エンドポイントのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_endpoints(self, loop_monitor):
+        """/health は200、起動前の /ready は503を返し、/metrics は無効にできることをテスト"""
+        aiohttp = pytest.importorskip("aiohttp")
+        health = HealthCheck(loop_monitor=loop_monitor)
+        server = MetricsServer("127.0.0.1", 0, registry=MetricsRegistry(), expose_metrics=False)
+        health.add_routes(server)
+        await server.start()
+        base = f"http://127.0.0.1:{server.bound_port}"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base}/health") as response:
+                    assert response.status == 200
+                    assert (await response.json())['status'] == "ok"
+                async with session.get(f"{base}/ready") as response:
+                    assert response.status == 503
+                    assert (await response.json())['reasons'] == ["starting"]
+                health.mark_ready()
+                async with session.get(f"{base}/ready") as response:
+                    assert response.status == 200
+                async with session.get(f"{base}/metrics") as response:
+                    assert response.status == 404
+        finally:
+            await server.stop()
@@ -0,0 +1,206 @@
+"""
+ホットリロードテスト
+
+import関係の解析、変更の影響を受けるCogだけのリロード、内容が同じファイルの
+スキップ、ファイル監視からのリロードをテストします。
+"""
+import pytest
+import asyncio
+import sys
+import textwrap
+import uuid
+from unittest.mock import MagicMock
+
+from utils.cog_loader import CogLoader, CogSpec
+from utils import hot_reload
+from utils.hot_reload import HotReloader, ModuleGraph
+
+COG_SOURCE = textwrap.dedent('''
+    from .{helper} import VALUE
+
+    class {class_name}:
+        def __init__(self, app):
+            self.app = app
+
+        async def {name}_cmd(self, ctx):
+            await ctx.respond(VALUE)
+''')
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """helper を使う cog_a と、使わない cog_b を持つ一時パッケージを作る"""
+    package = f"tmphot_{uuid.uuid4().hex[:8]}"
+    root = tmp_path / package
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "helper.py").write_text('VALUE = "v1"\n')
+    (root / "other.py").write_text('VALUE = "other"\n')
+    (root / "cog_a.py").write_text(COG_SOURCE.format(helper="helper", class_name="ACog", name="a"))
+    (root / "cog_b.py").write_text(COG_SOURCE.format(helper="other", class_name="BCog", name="b"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path, package
+    for module in [m for m in sys.modules if m.startswith(package)]:
+        del sys.modules[module]
+
+async def make_loader(package: str) -> CogLoader:
+    """cog_a と cog_b を読み込んだローダーを作る"""
+    loader = CogLoader(MagicMock())
+    await loader.load([
+        CogSpec("a", f"{package}.cog_a", "ACog", ["a_cmd"], lazy=False),
+        CogSpec("b", f"{package}.cog_b", "BCog", ["b_cmd"], lazy=False)
+    ])
+    return loader
+
+class TestModuleGraph:
+    """ModuleGraphのテスト"""
+
+    def test_dependents_follow_imports(self, project):
+        """変更されたモジュールを（間接的に）importしているモジュールだけが対象になることをテスト"""
+        tmp_path, package = project
+        (tmp_path / package / "base.py").write_text("X = 1\n")
+        (tmp_path / package / "helper.py").write_text('from .base import X\nVALUE = "v1"\n')
+        graph = ModuleGraph(str(tmp_path), [package])
+        graph.build()
+
+        assert graph.dependents([f"{package}.base"]) == {
+            f"{package}.base", f"{package}.helper", f"{package}.cog_a"
+        }
+        assert graph.dependents([f"{package}.other"]) == {f"{package}.other", f"{package}.cog_b"}
+        order = graph.order(graph.dependents([f"{package}.base"]))
+        assert order.index(f"{package}.base") < order.index(f"{package}.helper") < order.index(f"{package}.cog_a")
+
+    def test_package_reexports_are_not_dependencies(self, project):
+        """親パッケージの __init__ の変更で、サブモジュールを使うCogまで対象にならないことをテスト"""
+        tmp_path, package = project
+        (tmp_path / package / "__init__.py").write_text("from .helper import *\n")
+        graph = ModuleGraph(str(tmp_path), [package])
+        graph.build()
+
+        assert graph.dependents([package]) == {package}
+        assert package in graph.dependents([f"{package}.helper"])
+
+class TestHotReloader:
+    """HotReloaderのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_reloads_only_affected_cog(self, project):
+        """helper の変更で、それを使うCogだけがリロードされることをテスト"""
+        tmp_path, package = project
+        loader = await make_loader(package)
+        old_a, old_b = loader.cogs["a"], loader.cogs["b"]
+
+        reloader = HotReloader(loader, root=str(tmp_path), directories=[package])
+        await reloader.start()
+        try:
+            (tmp_path / package / "helper.py").write_text('VALUE = "v2"\n')
+            report = await reloader.reload_paths([str(tmp_path / package / "helper.py")])
+        finally:
+            await reloader.stop()
+
+        assert report["changed"] == [f"{package}.helper"]
+        assert report["modules"] == [f"{package}.helper"]
+        assert report["cogs"] == ["a"]
+        assert report["errors"] == {}
+        assert loader.cogs["a"] is not old_a
+        assert loader.cogs["b"] is old_b
+
+        ctx = MagicMock()
+        ctx.respond = MagicMock(return_value=asyncio.sleep(0))
+        await loader.invoke("a_cmd", ctx)
+        ctx.respond.assert_called_once_with("v2")
+
+    @pytest.mark.asyncio
+    async def test_unchanged_content_is_skipped(self, project):
+        """内容が同じファイルの保存ではリロードしないことをテスト"""
+        tmp_path, package = project
+        loader = await make_loader(package)
+        old_a = loader.cogs["a"]
+
+        reloader = HotReloader(loader, root=str(tmp_path), directories=[package])
+        await reloader.start()
+        try:
+            path = tmp_path / package / "cog_a.py"
+            path.write_text(path.read_text())
+            report = await reloader.reload_paths([str(path)])
+        finally:
+            await reloader.stop()
+
+        assert report["changed"] == []
+        assert report["skipped"] == [f"{package}.cog_a"]
+        assert loader.cogs["a"] is old_a
+        stats = reloader.get_stats()
+        assert stats["skipped_unchanged"] == 1
+        assert stats["reloads"] == 0
+
+    @pytest.mark.asyncio
+    async def test_non_reloadable_dependents_are_kept(self, project, monkeypatch):
+        """共有インスタンスを持つモジュールは、変更されたモジュールに依存していてもリロードされないことをテスト"""
+        tmp_path, package = project
+        (tmp_path / package / "registry.py").write_text("from .helper import VALUE\nINSTANCES = []\n")
+        registry = __import__(f"{package}.registry", fromlist=["INSTANCES"])
+        monkeypatch.setattr(hot_reload, "_NON_RELOADABLE", hot_reload._NON_RELOADABLE | {f"{package}.registry"})
+        loader = await make_loader(package)
+
+        reloader = HotReloader(loader, root=str(tmp_path), directories=[package])
+        await reloader.start()
+        try:
+            (tmp_path / package / "helper.py").write_text('VALUE = "v2"\n')
+            report = await reloader.reload_paths([str(tmp_path / package / "helper.py")])
+        finally:
+            await reloader.stop()
+
+        assert report["modules"] == [f"{package}.helper"]
+        assert report["cogs"] == ["a"]
+        assert report["restart_required"] == [f"{package}.registry"]
+        assert sys.modules[f"{package}.registry"] is registry
+        assert registry.VALUE == "v1"
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_old_cog(self, project):
+        """構文エラーのあるCogはリロードされず、エラーが記録されることをテスト"""
+        tmp_path, package = project
+        loader = await make_loader(package)
+        old_a = loader.cogs["a"]
+
+        reloader = HotReloader(loader, root=str(tmp_path), directories=[package])
+        await reloader.start()
+        try:
+            (tmp_path / package / "cog_a.py").write_text("class ACog(:\n")
+            report = await reloader.reload_paths([str(tmp_path / package / "cog_a.py")])
+        finally:
+            await reloader.stop()
+
+        assert "a" in report["errors"]
+        assert loader.cogs["a"] is old_a
+        assert reloader.get_stats()["errors"] == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    async def test_watcher_debounces_changes(self, project, use_inotify):
+        """連続した保存がデバウンスされ、1回のリロードにまとめられることをテスト"""
+        tmp_path, package = project
+        loader = await make_loader(package)
+
+        reloader = HotReloader(
+            loader, root=str(tmp_path), directories=[package], debounce=0.2, use_inotify=use_inotify
+        )
+        await reloader.start()
+        if not use_inotify:
+            reloader._watcher._interval = 0.05
+        elif type(reloader._watcher).__name__ != "_InotifyWatcher":
+            await reloader.stop()
+            pytest.skip("inotify is not available")
+        try:
+            for version in range(3):
+                await asyncio.sleep(0.01 if use_inotify else 0.06)
+                (tmp_path / package / "helper.py").write_text(f'VALUE = "v{version + 2}"\n')
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                if reloader.reloads:
+                    break
+        finally:
+            await reloader.stop()
+
+        assert reloader.reloads == 1
+        assert reloader.last_report["cogs"] == ["a"]
+        assert sys.modules[f"{package}.helper"].VALUE == "v4"
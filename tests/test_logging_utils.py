@@ -0,0 +1,397 @@
+"""
+ログユーティリティテスト
+
+ログ統計の集計などをテストします。
+"""
+import pytest
+import gzip
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from utils.logging_utils import (
+    LOG_INDEX_SUFFIX,
+    JSON_BACKENDS,
+    BoundedQueueHandler,
+    JsonFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    SegmentCompressor,
+    configure_log_sampling,
+    find_log_segments,
+    format_timestamp,
+    get_json_backend,
+    get_log_stats,
+    get_log_sampling_stats,
+    get_logging_queue_stats,
+    iter_log_lines,
+    log_command_usage,
+    search_logs,
+    set_json_backend,
+    setup_logging,
+    stop_queue_logging
+)
+
+class TestGetLogStats:
+    """get_log_statsのテストクラス"""
+
+    @pytest.fixture
+    def log_file(self, tmp_path):
+        """テスト用ログファイルのパス"""
+        return tmp_path / "bot.log"
+
+    def test_missing_file(self, log_file):
+        """存在しないファイルのテスト"""
+        stats = get_log_stats(str(log_file))
+        assert stats == {'exists': False, 'size': 0, 'line_count': 0}
+
+    @pytest.mark.parametrize("content, expected", [
+        ("", 0),
+        ("one", 1),
+        ("one\n", 1),
+        ("one\ntwo", 2),
+        ("one\n\ntwo\n", 3),
+    ])
+    def test_line_count_matches_readlines(self, log_file, content, expected):
+        """行数がreadlines()と一致することのテスト"""
+        log_file.write_text(content, encoding='utf-8')
+        stats = get_log_stats(str(log_file))
+        assert stats['line_count'] == expected
+        assert stats['size'] == len(content.encode('utf-8'))
+
+    def test_incremental_scan(self, log_file):
+        """2回目以降は追記分だけを読み込むことのテスト"""
+        log_file.write_text("a\n" * 1000, encoding='utf-8')
+        first = get_log_stats(str(log_file))
+        assert first['scanned_bytes'] == 2000
+        assert (log_file.parent / (log_file.name + LOG_INDEX_SUFFIX)).exists()
+
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write("b\nc")
+        second = get_log_stats(str(log_file))
+        assert second['scanned_bytes'] == 3
+        assert second['line_count'] == 1002
+
+        with open(log_file, 'a', encoding='utf-8') as f:
+            f.write("c\n")
+        third = get_log_stats(str(log_file))
+        # 改行で終わっていなかった末尾の行は再度読み込む
+        assert third['scanned_bytes'] == 3
+        assert third['line_count'] == 1002
+
+    def test_rewritten_file_is_rescanned(self, log_file):
+        """切り詰めて書き直されたファイルが再集計されることのテスト"""
+        log_file.write_text("old line\n" * 10, encoding='utf-8')
+        get_log_stats(str(log_file))
+
+        log_file.write_text("new\n" * 3, encoding='utf-8')
+        stats = get_log_stats(str(log_file))
+        assert stats['line_count'] == 3
+
+    def test_detailed_counts(self, log_file):
+        """レベル別・コマンド別の集計のテスト"""
+        records = [
+            {'level': 'INFO', 'message': 'ok', 'extra': {'command': 'ping'}},
+            {'level': 'INFO', 'message': 'ok', 'extra': {'command': 'ping'}},
+            {'level': 'ERROR', 'message': 'ng', 'extra': {'command': 'count'}},
+        ]
+        lines = [json.dumps(record) for record in records]
+        lines.append("2024-01-01 00:00:00 - slackbot - WARNING - text line")
+        log_file.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+        get_log_stats(str(log_file))
+        stats = get_log_stats(str(log_file), detailed=True)
+        assert stats['level_counts'] == {'INFO': 2, 'ERROR': 1, 'WARNING': 1}
+        assert stats['command_counts'] == {'ping': 2, 'count': 1}
+
+class TestQueueLogging:
+    """キュー経由ログ出力のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def restore_logger(self):
+        """テスト後にslackbotロガーを元に戻す"""
+        logger = logging.getLogger("slackbot")
+        handlers = list(logger.handlers)
+        propagate = logger.propagate
+        level = logger.level
+        yield
+        stop_queue_logging()
+        for handler in list(logger.handlers):
+            handler.close()
+        logger.handlers[:] = handlers
+        logger.propagate = propagate
+        logger.setLevel(level)
+
+    def test_records_are_written_by_listener(self, tmp_path):
+        """リスナースレッド経由でファイルに書き出されることのテスト"""
+        log_file = tmp_path / "queue.log"
+        logger = setup_logging(log_file=str(log_file), enable_json_logging=True, use_queue=True)
+
+        assert all(
+            isinstance(handler, logging.handlers.QueueHandler) for handler in logger.handlers
+        )
+        log_command_usage("ping", "U0123456789", "C0123456789")
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logging.getLogger("slackbot.cogs").exception("failed")
+
+        stats = get_logging_queue_stats()
+        assert stats['enabled'] and stats['enqueued'] == 2
+        stop_queue_logging()
+
+        lines = [json.loads(line) for line in log_file.read_text(encoding='utf-8').splitlines()]
+        assert lines[0]['extra']['command'] == "ping"
+        assert "RuntimeError: boom" in lines[1]['exception']
+
+    def test_drop_policy_counts_dropped(self):
+        """満杯時に破棄件数が記録されることのテスト"""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1), policy="drop")
+        record = logging.LogRecord("slackbot", logging.INFO, __file__, 1, "msg", None, None)
+
+        for _ in range(3):
+            handler.emit(record)
+
+        assert handler.enqueued == 1
+        assert handler.dropped == 2
+
+    def test_invalid_policy(self):
+        """不明なポリシーのテスト"""
+        with pytest.raises(ValueError):
+            setup_logging(use_queue=True, queue_policy="unknown")
+
+class TestLogRotation:
+    """ログローテーションとセグメント読み込みのテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def restore_logger(self):
+        """テスト後にslackbotロガーを元に戻す"""
+        logger = logging.getLogger("slackbot")
+        handlers = list(logger.handlers)
+        propagate = logger.propagate
+        yield
+        for handler in list(logger.handlers):
+            handler.close()
+        logger.handlers[:] = handlers
+        logger.propagate = propagate
+
+    def _file_handler(self, logger):
+        return next(h for h in logger.handlers if isinstance(h, logging.FileHandler))
+
+    def test_size_rotation_with_gzip(self, tmp_path):
+        """サイズによるローテーションと圧縮・保持数のテスト"""
+        log_file = tmp_path / "bot.log"
+        logger = setup_logging(
+            log_file=str(log_file), max_bytes=200, backup_count=3, compression="gzip"
+        )
+        handler = self._file_handler(logger)
+        assert isinstance(handler, logging.handlers.RotatingFileHandler)
+
+        for i in range(40):
+            logger.info(f"message {i:03d}")
+        handler.compressor.wait()
+
+        segments = find_log_segments(str(log_file))
+        assert [path.name for path in segments] == ["bot.log.3.gz", "bot.log.2.gz", "bot.log.1.gz"]
+        assert handler.compressor.compressed >= 3
+        with gzip.open(segments[-1], 'rt', encoding='utf-8') as f:
+            assert "message" in f.read()
+
+        # 保持数を超えた古いメッセージは削除され、残りは古い順に読める
+        lines = list(iter_log_lines(str(log_file)))
+        numbers = [int(line.rsplit(" ", 1)[1]) for line in lines]
+        assert numbers == sorted(numbers)
+        assert numbers[-1] == 39
+        assert 0 not in numbers
+
+    def test_rotation_does_not_wait_for_compression(self, tmp_path, monkeypatch):
+        """圧縮が終わらなくても、ローテーションが書き込むスレッドを待たせないことのテスト"""
+        release = threading.Event()
+        compress = SegmentCompressor._compress
+
+        def slow_compress(self, raw, dest):
+            release.wait(5)
+            compress(self, raw, dest)
+
+        monkeypatch.setattr(SegmentCompressor, "_compress", slow_compress)
+        log_file = tmp_path / "bot.log"
+        logger = setup_logging(
+            log_file=str(log_file), max_bytes=200, backup_count=3, compression="gzip"
+        )
+        handler = self._file_handler(logger)
+
+        started = time.perf_counter()
+        for i in range(40):
+            logger.info(f"message {i:03d}")
+        assert time.perf_counter() - started < 1.0
+
+        # 圧縮待ちのファイルも含めて、古い順に欠けなく読める
+        numbers = [int(line.rsplit(" ", 1)[1]) for line in iter_log_lines(str(log_file))]
+        assert numbers == list(range(40))
+
+        release.set()
+        handler.compressor.wait()
+        segments = find_log_segments(str(log_file))
+        assert [path.name for path in segments] == ["bot.log.3.gz", "bot.log.2.gz", "bot.log.1.gz"]
+        numbers = [int(line.rsplit(" ", 1)[1]) for line in iter_log_lines(str(log_file))]
+        assert numbers == sorted(numbers) and numbers[-1] == 39
+
+    def test_rotated_stats_and_search(self, tmp_path):
+        """ローテーション済みファイルを含む統計と検索のテスト"""
+        log_file = tmp_path / "bot.log"
+        logger = setup_logging(
+            log_file=str(log_file), max_bytes=300, backup_count=10, compression="gzip"
+        )
+        for i in range(30):
+            logger.info(f"message {i:03d}")
+        self._file_handler(logger).compressor.wait()
+
+        stats = get_log_stats(str(log_file), include_rotated=True)
+        assert stats['rotated_segments'] >= 2
+        assert stats['line_count'] + stats['rotated_line_count'] == 30
+
+        # 2回目はキャッシュされた行数を使う
+        assert (log_file.parent / "bot.log.segments.idx").exists()
+        again = get_log_stats(str(log_file), include_rotated=True)
+        assert again['rotated_line_count'] == stats['rotated_line_count']
+        assert search_logs(str(log_file), r"message 00[0-2]$") == [
+            line for line in iter_log_lines(str(log_file)) if line.endswith(("000", "001", "002"))
+        ]
+        assert len(search_logs(str(log_file), r"message", limit=5)) == 5
+
+    def test_timed_segments_are_ordered(self, tmp_path):
+        """時間によるローテーションのファイル名が日時順に並ぶことのテスト"""
+        log_file = tmp_path / "bot.log"
+        for name in ["bot.log.2024-01-02.gz", "bot.log.2024-01-01", "bot.log.idx", "other.log.1"]:
+            (tmp_path / name).write_bytes(b"")
+
+        assert [path.name for path in find_log_segments(str(log_file))] == [
+            "bot.log.2024-01-01", "bot.log.2024-01-02.gz"
+        ]
+
+    def test_pending_raw_segment_is_readable(self, tmp_path):
+        """圧縮前の一時ファイルも読み込み対象になることのテスト"""
+        log_file = tmp_path / "bot.log"
+        log_file.write_text("current\n", encoding='utf-8')
+        (tmp_path / ".bot.log.1").write_text("pending\n", encoding='utf-8')
+
+        assert list(iter_log_lines(str(log_file))) == ["pending", "current"]
+
+    def test_invalid_rotation_options(self, tmp_path):
+        """不正なローテーション設定のテスト"""
+        with pytest.raises(ValueError):
+            setup_logging(log_file=str(tmp_path / "bot.log"), max_bytes=100, rotate_when="midnight")
+        with pytest.raises(ValueError):
+            SegmentCompressor("lz4")
+
+class TestLogSampling:
+    """ログのサンプリング・レート制限のテストクラス"""
+
+    def _record(self, command="ping", level=logging.INFO):
+        record = logging.LogRecord("slackbot.commands", level, __file__, 1, "msg %s", (command,), None)
+        record.extra_data = {'command': command}
+        return record
+
+    def test_sampling_keeps_exact_ratio(self):
+        """割合どおりに記録されることのテスト"""
+        log_filter = SamplingFilter(rate=0.1, per_key_rates={'help': 0.5})
+
+        kept = [log_filter.filter(self._record()) for _ in range(100)]
+        kept_help = [log_filter.filter(self._record("help")) for _ in range(10)]
+
+        assert sum(kept) == 10
+        assert sum(kept_help) == 5
+        assert log_filter.sampled_out == 95
+
+    def test_errors_are_always_kept(self):
+        """ERROR以上はサンプリング・レート制限されないことのテスト"""
+        sampling = SamplingFilter(rate=0.0)
+        limiter = RateLimitFilter(rate=1, burst=1)
+
+        for _ in range(5):
+            record = self._record(level=logging.ERROR)
+            assert sampling.filter(record) and limiter.filter(record)
+        assert not sampling.filter(self._record())
+
+    def test_rate_limit_reports_suppressed(self):
+        """抑制件数が次のレコードに追記されることのテスト"""
+        log_filter = RateLimitFilter(rate=1000, burst=2)
+
+        results = [log_filter.filter(self._record()) for _ in range(5)]
+        assert results == [True, True, False, False, False]
+        assert log_filter.filter(self._record("help"))
+        assert log_filter.get_suppressed() == {'ping': 3}
+
+        for bucket in log_filter._buckets.values():
+            bucket.tokens = bucket.capacity
+        record = self._record()
+        assert log_filter.filter(record)
+        assert record.suppressed == 3
+        assert record.getMessage() == "msg ping (3件のログを抑制しました)"
+        assert log_filter.get_suppressed() == {}
+
+    def test_configure_log_sampling(self):
+        """ロガーへのフィルター設定と置き換えのテスト"""
+        logger = logging.getLogger("slackbot.test_sampling")
+        try:
+            filters = configure_log_sampling("slackbot.test_sampling", sample_rate=0.5, rate_limit=10)
+            assert len(filters) == 2 and logger.filters == filters
+
+            configure_log_sampling("slackbot.test_sampling", rate_limit=10)
+            assert len(logger.filters) == 1
+            assert isinstance(logger.filters[0], RateLimitFilter)
+            assert 'suppressed' in get_log_sampling_stats()["slackbot.test_sampling"]
+        finally:
+            configure_log_sampling("slackbot.test_sampling")
+        assert logger.filters == []
+
+    def test_invalid_rate(self):
+        """不正な割合のテスト"""
+        with pytest.raises(ValueError):
+            SamplingFilter(rate=1.5)
+
+class TestJsonFormatter:
+    """JsonFormatterとシリアライザーのテストクラス"""
+
+    @pytest.fixture
+    def record(self):
+        """追加データ付きのログレコード"""
+        record = logging.LogRecord(
+            "slackbot.commands", logging.INFO, __file__, 10, "コマンド実行成功: %s", ("ping",), None
+        )
+        record.extra_data = {'command': 'ping', 'log_file': Path("logs/bot.log")}
+        return record
+
+    @pytest.mark.parametrize("backend", sorted(JSON_BACKENDS))
+    def test_backends_produce_same_data(self, record, backend):
+        """どのバックエンドでも同じ内容のJSONになることのテスト"""
+        output = JsonFormatter(json_backend=backend).format(record)
+
+        assert "コマンド実行成功" in output
+        data = json.loads(output)
+        assert data['message'] == "コマンド実行成功: ping"
+        assert data['extra'] == {'command': 'ping', 'log_file': str(Path("logs/bot.log"))}
+
+    def test_set_json_backend(self):
+        """バックエンド切り替えのテスト"""
+        original = get_json_backend()
+        try:
+            assert set_json_backend("json") == "json"
+            assert get_json_backend() == "json"
+            with pytest.raises(ValueError):
+                set_json_backend("unknown")
+        finally:
+            set_json_backend(original)
+
+    def test_format_timestamp(self):
+        """タイムスタンプがミリ秒精度のISO形式になることのテスト"""
+        created = 1700000000.1239
+        expected = datetime.fromtimestamp(1700000000).isoformat() + ".123"
+        assert format_timestamp(created) == expected
+        assert format_timestamp(created + 1).endswith(".123")
+        assert format_timestamp(created) == expected
@@ -0,0 +1,139 @@
+"""
+ループプロファイラーテスト
+
+イベントループをブロックした処理の検出と、スタックからのCog・コマンドの特定、
+AdminCogの /slow_callbacks コマンドをテストします。
+"""
+import pytest
+import asyncio
+import sys
+import textwrap
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from cogs.admin import AdminCog
+from utils.cog_loader import CogLoader, CogSpec
+from utils.loop_profiler import LoopProfiler
+from utils.metrics import MetricsRegistry
+
+COG_SOURCE = textwrap.dedent('''
+    import time
+
+    class SlowCog:
+        def __init__(self, app):
+            self.app = app
+
+        async def slow_cmd(self, ctx):
+            self._work()
+            await ctx.respond("done")
+
+        def _work(self):
+            time.sleep(0.2)
+''')
+
+@pytest.fixture
+def slow_package(tmp_path, monkeypatch):
+    """イベントループをブロックするコマンドを持つ一時パッケージを作る"""
+    package = f"tmpslow_{uuid.uuid4().hex[:8]}"
+    root = tmp_path / package
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "slow.py").write_text(COG_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    for module in [m for m in sys.modules if m.startswith(package)]:
+        del sys.modules[module]
+
+@pytest.fixture
+def mock_context():
+    """モックコンテキスト"""
+    context = MagicMock()
+    context.respond = AsyncMock()
+    return context
+
+class TestLoopProfiler:
+    """LoopProfilerのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_command_is_attributed(self, slow_package, mock_context):
+        """ブロックした処理がスタックからCog・コマンドに結び付けられることをテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([CogSpec("slow", f"{slow_package}.slow", "SlowCog", ["slow_cmd"], lazy=False)])
+        registry = MetricsRegistry()
+        profiler = LoopProfiler(threshold=0.05, loader=loader, registry=registry)
+        await profiler.start()
+        try:
+            await asyncio.sleep(0.05)
+            await loader.invoke("slow_cmd", mock_context)
+            await asyncio.sleep(0.05)
+        finally:
+            await profiler.stop()
+
+        report = profiler.get_report()
+        assert len(report) == 1
+        entry = report[0]
+        assert entry['cog'] == "slow"
+        assert entry['command'] == "slow_cmd"
+        assert entry['location'].endswith("in _work")
+        assert entry['count'] == 1
+        assert entry['total'] >= 0.1
+        assert profiler.max_lag >= 0.1
+        assert "slackbot_slow_callbacks_total 1.0" in registry.render()
+        assert "`slow.slow_cmd`" in profiler.format_report()
+
+    @pytest.mark.asyncio
+    async def test_short_blocks_are_not_recorded(self):
+        """閾値未満のブロックは記録されず、遅延だけが計測されることをテスト"""
+        profiler = LoopProfiler(threshold=0.2)
+        await profiler.start()
+        try:
+            await asyncio.sleep(0.15)
+        finally:
+            await profiler.stop()
+
+        assert not profiler.running
+        assert profiler.get_report() == []
+        assert profiler.lag_histogram.count > 0
+        assert "ありません" in profiler.format_report()
+
+    def test_unknown_stack_and_eviction(self):
+        """Cog外の処理は不明として記録され、上限を超えると合計の短いものから捨てられることをテスト"""
+        profiler = LoopProfiler(max_entries=2)
+        profiler._record(0.3, [("/x/a.py", 1, "a")])
+        profiler._record(0.1, [("/x/b.py", 2, "b")])
+        profiler._record(0.2, [("/x/c.py", 3, "c")])
+        profiler._record(0.2, [])
+
+        locations = [entry['location'] for entry in profiler.get_report()]
+        assert profiler.slow_callbacks == 4
+        assert locations[0] == "a.py:1 in a"
+        assert "b.py:2 in b" not in locations
+        assert len(locations) == 2
+
+class TestSlowCallbacksCommand:
+    """AdminCogの /slow_callbacks のテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, mock_context):
+        """プロファイラーが無効な場合に案内を返すことをテスト"""
+        app = MagicMock()
+        app.loop_profiler = None
+        await AdminCog(app).slow_callbacks(mock_context)
+        assert "LOOP_PROFILER_ENABLED" in mock_context.respond.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_report_and_reset(self, mock_context):
+        """集計の表示と消去をテスト"""
+        app = MagicMock()
+        app.loop_profiler = LoopProfiler()
+        app.loop_profiler._record(0.3, [("/x/a.py", 1, "a")])
+        cog = AdminCog(app)
+
+        await cog.slow_callbacks(mock_context, "5")
+        assert "a.py:1 in a" in mock_context.respond.call_args[0][0]
+
+        await cog.slow_callbacks(mock_context, "abc")
+        assert "数値" in mock_context.respond.call_args[0][0]
+
+        await cog.slow_callbacks(mock_context, "reset")
+        assert app.loop_profiler.get_report() == []
@@ -0,0 +1,139 @@
+"""
+メトリクステスト
+
+ヒストグラムの集計、コマンドの自動計測、Prometheus形式の出力、
+イベントループの遅延計測と /metrics エンドポイントをテストします。
+"""
+import pytest
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import utils.metrics as metrics_module
+from utils.cog_loader import CogLoader, CogSpec
+from utils.metrics import Histogram, LoopLagMonitor, MetricsRegistry, MetricsServer, get_metrics
+
+@pytest.fixture
+def registry(monkeypatch):
+    """共有レジストリを新しいものに差し替える"""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, "_default_registry", registry)
+    return registry
+
+class TestHistogram:
+    """Histogramのテストクラス"""
+
+    def test_observe_and_quantiles(self):
+        """記録した値がバケットに振り分けられ、分位数が推定できることをテスト"""
+        histogram = Histogram((0.01, 0.1, 1.0))
+        for _ in range(90):
+            histogram.observe(0.005)
+        for _ in range(10):
+            histogram.observe(0.5)
+
+        assert histogram.count == 100
+        assert histogram.counts == [90, 0, 10, 0]
+        assert histogram.cumulative_counts()[-1][1] == 100
+        assert histogram.quantile(0.5) <= 0.01
+        assert 0.1 < histogram.quantile(0.95) <= 0.5
+        assert histogram.max == 0.5
+
+    def test_values_above_last_bucket(self):
+        """最後のバケットを超える値が +Inf に入り、分位数が最大値を超えないことをテスト"""
+        histogram = Histogram((0.1,))
+        histogram.observe(3.0)
+
+        assert histogram.counts == [0, 1]
+        assert 0.1 < histogram.quantile(0.99) <= 3.0
+
+class TestMetricsRegistry:
+    """MetricsRegistryのテストクラス"""
+
+    def test_render_prometheus_format(self, registry):
+        """コマンドのヒストグラム・カウンターとゲージがPrometheus形式で出力されることをテスト"""
+        registry.observe_command("general", "ping", 0.002)
+        registry.observe_command("general", "ping", 0.02, error=True)
+        registry.add_gauge("queue_depth", "待ち数", lambda: 3)
+
+        text = registry.render()
+
+        assert "# TYPE slackbot_command_duration_seconds histogram" in text
+        assert 'slackbot_command_duration_seconds_bucket{cog="general",command="ping",le="0.0025"} 1' in text
+        assert 'slackbot_command_duration_seconds_bucket{cog="general",command="ping",le="+Inf"} 2' in text
+        assert 'slackbot_command_duration_seconds_count{cog="general",command="ping"} 2' in text
+        assert 'slackbot_commands_total{cog="general",command="ping",status="success"} 1' in text
+        assert 'slackbot_commands_total{cog="general",command="ping",status="error"} 1' in text
+        assert "slackbot_queue_depth 3.0" in text
+        assert text.endswith("\n")
+
+    def test_failing_gauge_is_skipped(self, registry):
+        """値の取得に失敗したゲージは出力されないことをテスト"""
+        registry.add_gauge("broken", "壊れたゲージ", lambda: 1 / 0)
+        registry.add_gauge("ok", "正常なゲージ", lambda: 1)
+
+        text = registry.render()
+        assert "slackbot_broken" not in text
+        assert "slackbot_ok 1.0" in text
+
+    def test_label_values_are_escaped(self, registry):
+        """ラベル値の引用符・改行がエスケープされることをテスト"""
+        registry.observe_command('we"ird', "cmd\nx", 0.001)
+        assert 'cog="we\\"ird",command="cmd\\nx"' in registry.render()
+
+    @pytest.mark.asyncio
+    async def test_loader_records_every_command(self, registry):
+        """CogLoader経由のコマンドの実行時間と成功・失敗が自動で記録されることをテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([CogSpec("general", "cogs.general", "GeneralCog", ["ping"], lazy=False)])
+        ctx = MagicMock()
+        ctx.respond = MagicMock(side_effect=[asyncio.sleep(0), RuntimeError("送信失敗")])
+
+        await loader.invoke("ping", ctx)
+        with pytest.raises(RuntimeError):
+            await loader.invoke("ping", ctx)
+
+        stats = registry.get_command_stats()["general.ping"]
+        assert stats['count'] == 2
+        assert stats['errors'] == 1
+        assert stats['max'] > 0
+
+class TestLoopLagMonitor:
+    """LoopLagMonitorのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_callback_is_measured(self, registry):
+        """イベントループをブロックした時間が遅延として記録されることをテスト"""
+        monitor = LoopLagMonitor(interval=0.01, registry=registry)
+        await monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)
+            await asyncio.sleep(0.03)
+        finally:
+            await monitor.stop()
+
+        assert monitor.max_lag >= 0.05
+        assert monitor.histogram.count > 0
+        assert "slackbot_event_loop_lag_max_seconds" in registry.render()
+
+class TestMetricsServer:
+    """MetricsServerのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, registry):
+        """/metrics がPrometheus形式のテキストを返すことをテスト"""
+        aiohttp = pytest.importorskip("aiohttp")
+        registry.observe_command("general", "ping", 0.001)
+        server = MetricsServer("127.0.0.1", 0)
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{server.bound_port}/metrics") as response:
+                    body = await response.text()
+                    content_type = response.headers["Content-Type"]
+        finally:
+            await server.stop()
+
+        assert server.registry is get_metrics()
+        assert content_type.startswith("text/plain; version=0.0.4")
+        assert 'slackbot_commands_total{cog="general",command="ping",status="success"} 1' in body
@@ -0,0 +1,194 @@
+"""
+レート制限テスト
+
+TokenBucketの補充と消費、GCRAリミッターと rate_limit デコレータをテストします。
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from utils.rate_limit import (
+    GCRALimiter,
+    RedisGCRALimiter,
+    TokenBucket,
+    configure_rate_limit,
+    get_rate_limit_stats,
+    rate_limit
+)
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class TestTokenBucket:
+    """TokenBucketのテストクラス"""
+
+    def test_burst_then_refill(self):
+        """バースト分を消費した後、時間経過で補充されることのテスト"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+        assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+        assert bucket.time_until_available() == pytest.approx(0.5)
+
+        clock.now = 0.5
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+
+    def test_capacity_is_upper_bound(self):
+        """長時間経過しても容量を超えて貯まらないことのテスト"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+
+        clock.now = 100
+        assert sum(bucket.try_acquire() for _ in range(5)) == 2
+
+    def test_invalid_arguments(self):
+        """不正な設定のテスト"""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+        with pytest.raises(ValueError):
+            TokenBucket(rate=1, capacity=0.5)
+
+class FailingRedis:
+    """スクリプトの実行が常に失敗するRedisクライアントの代わり"""
+
+    def register_script(self, script: str):
+        async def run(keys, args):
+            raise ConnectionError("redis is down")
+        return run
+
+class RecordingRedis:
+    """スクリプトの呼び出しを記録し、指定した待機ミリ秒を返すRedisクライアントの代わり"""
+
+    def __init__(self, wait_ms: int = 0):
+        self.wait_ms = wait_ms
+        self.calls = []
+
+    def register_script(self, script: str):
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            return self.wait_ms
+        return run
+
+@pytest.fixture(autouse=True)
+def fresh_limiters():
+    """テストごとにリミッターを作り直す"""
+    configure_rate_limit()
+
+def make_context(user_id: str) -> MagicMock:
+    """ユーザーIDを持つSlackコンテキストを作成"""
+    ctx = MagicMock()
+    ctx.respond = AsyncMock()
+    ctx.user.id = user_id
+    return ctx
+
+class TestGCRALimiter:
+    """GCRALimiterのテストクラス"""
+
+    def test_burst_then_spacing(self):
+        """連続でmax_requests回まで許可し、その後は間隔をあけて許可することのテスト"""
+        clock = FakeClock()
+        limiter = GCRALimiter(max_requests=5, time_window=60, clock=clock)
+
+        assert [limiter.hit("U1") for _ in range(5)] == [0.0] * 5
+        assert limiter.hit("U1") == pytest.approx(12.0)
+        # 別のキーには影響しない
+        assert limiter.hit("U2") == 0.0
+
+        clock.now = 12.0
+        assert limiter.hit("U1") == 0.0
+        assert limiter.hit("U1") > 0
+        assert limiter.get_stats()['rejected'] == 2
+
+    def test_expired_keys_are_removed_lazily(self):
+        """許可時刻を過ぎたキーが次の判定のついでに削除されることのテスト"""
+        clock = FakeClock()
+        limiter = GCRALimiter(max_requests=2, time_window=10, clock=clock)
+        for i in range(100):
+            limiter.hit(f"U{i}")
+        assert len(limiter) == 100
+
+        clock.now = 5.0
+        limiter.hit("U_new")
+        assert len(limiter) == 1
+
+    def test_max_keys(self):
+        """キー数が上限を超えると最も古いキーが削除されることのテスト"""
+        limiter = GCRALimiter(max_requests=1, time_window=60, max_keys=2, clock=FakeClock())
+        for user_id in ("U1", "U2", "U3"):
+            limiter.hit(user_id)
+        assert len(limiter) == 2
+
+class TestRedisGCRALimiter:
+    """RedisGCRALimiterのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_uses_script(self):
+        """Redisのスクリプトで判定し、ミリ秒を秒に変換することのテスト"""
+        redis = RecordingRedis(wait_ms=1500)
+        limiter = RedisGCRALimiter(redis, "count", max_requests=5, time_window=60)
+
+        assert await limiter.acquire("U1") == pytest.approx(1.5)
+        assert redis.calls == [(["slackbot:ratelimit:count:U1"], [12000, 60000])]
+        assert limiter.get_stats()['rejected'] == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_memory(self):
+        """Redisに接続できない間はメモリ上の制限で判定することのテスト"""
+        limiter = RedisGCRALimiter(FailingRedis(), "count", max_requests=2, time_window=60)
+
+        results = [await limiter.acquire("U1") for _ in range(3)]
+        assert results[:2] == [0.0, 0.0]
+        assert results[2] > 0
+        assert limiter.get_stats()['remote_errors'] == 3
+
+class TestRateLimitDecorator:
+    """rate_limit デコレータのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_rejects_over_limit(self):
+        """上限を超えた実行がコマンドを呼ばずに応答することのテスト"""
+        calls = []
+
+        class Cog:
+            @rate_limit(max_requests=2, time_window=60)
+            async def command(self, ctx):
+                calls.append(ctx.user.id)
+
+        cog = Cog()
+        ctx = make_context("U1")
+        for _ in range(3):
+            await cog.command(ctx)
+        await cog.command(make_context("U2"))
+
+        assert calls == ["U1", "U1", "U2"]
+        assert "秒後に再度お試しください" in ctx.respond.call_args[0][0]
+
+        stats = get_rate_limit_stats()[Cog.command.rate_limit_name]
+        assert stats['allowed'] == 3
+        assert stats['rejected'] == 1
+        assert stats['keys'] == 2
+
+    @pytest.mark.asyncio
+    async def test_global_limit(self):
+        """per=global では全ユーザーで回数を共有することのテスト"""
+        class Cog:
+            @rate_limit(max_requests=1, time_window=60, per="global", name="announce")
+            async def command(self, ctx):
+                return "ok"
+
+        cog = Cog()
+        assert await cog.command(make_context("U1")) == "ok"
+        assert await cog.command(make_context("U2")) is None
+
+    def test_invalid_arguments(self):
+        """不正な引数のテスト"""
+        with pytest.raises(ValueError):
+            rate_limit(max_requests=0, time_window=60)
+        with pytest.raises(ValueError):
+            rate_limit(max_requests=1, time_window=60, per="team")
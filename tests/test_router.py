@@ -0,0 +1,188 @@
+"""
+コマンドルーターテスト
+
+コマンド・メッセージのパターン・action_id のプレフィックスの振り分けと、
+Cogの登録・解除に合わせた索引の更新をテストします。
+"""
+import pytest
+import sys
+import textwrap
+import uuid
+from unittest.mock import MagicMock
+
+from utils.cog_loader import CogLoadError, CogLoader, CogSpec
+from utils.router import CommandRouter
+
+class TestCommandRouter:
+    """CommandRouterのテストクラス"""
+
+    def test_route_command(self):
+        """コマンド名から登録したCogに振り分けられることをテスト"""
+        router = CommandRouter()
+        router.add("general", ["ping", "help"])
+
+        route = router.route_command("ping")
+        assert (route.cog_name, route.method) == ("general", "ping")
+        assert router.route_command("unknown") is None
+        assert router.commands == {'ping': "general", 'help': "general"}
+
+    def test_invalid_or_duplicate_registration_is_rejected(self):
+        """不正・重複した登録は何も登録せずに拒否されることをテスト"""
+        router = CommandRouter()
+        router.add("general", ["ping"], messages={r"^hello": "on_hello"}, actions={"vote_": "on_vote"})
+
+        with pytest.raises(ValueError):
+            router.add("other", ["pong", "x"])
+        with pytest.raises(ValueError):
+            router.add("other", ["pong", "ping"])
+        with pytest.raises(ValueError):
+            router.add("other", ["pong"], messages={r"^hello": "greet"})
+        with pytest.raises(ValueError):
+            router.add("other", ["pong"], messages={r"(": "broken"})
+        with pytest.raises(ValueError):
+            router.add("other", ["pong"], actions={"vote_": "on_vote"})
+        assert router.route_command("pong") is None
+
+    def test_anchored_patterns_take_priority(self):
+        """先頭一致のパターンが優先され、その中では先に登録したものが選ばれることをテスト"""
+        router = CommandRouter()
+        router.add("deploy", messages={r"deploy (\w+)": "on_deploy"})
+        router.add("greet", messages={r"^hello": "on_hello", r"^hel+o (?P<name>\w+)": "on_name"})
+        router.add("bang", messages={r"^!deploy\b": "on_bang", r"^!": "on_any"})
+
+        route = router.route_message("please deploy api")
+        assert (route.cog_name, route.method) == ("deploy", "on_deploy")
+        assert route.match.group(1) == "api"
+
+        assert router.route_message("hello bob").method == "on_hello"
+        assert router.route_message("helllo bob").match.group("name") == "bob"
+        assert router.route_message("!deploy web").method == "on_bang"
+        assert router.route_message("!deployment").method == "on_any"
+        assert router.route_message("hello, deploy api").method == "on_hello"
+        assert router.route_message("nothing here") is None
+
+    def test_unanchored_patterns_in_registration_order(self):
+        """先頭一致でないパターンは登録順に照合されることをテスト"""
+        router = CommandRouter()
+        router.add("a", messages={r"(?P<id>A\d+)": "on_a", r"(?i)ticket": "on_ticket"})
+        router.add("b", messages={r"B\d+|C\d+": "on_b"})
+
+        assert router.route_message("see B12").match.group(0) == "B12"
+        assert router.route_message("TICKET C3").method == "on_ticket"
+        assert router.route_message("C3 then A1").method == "on_a"
+
+    def test_route_action_longest_prefix(self):
+        """action_id に最も長く一致するプレフィックスが選ばれることをテスト"""
+        router = CommandRouter()
+        router.add("poll", actions={"poll_": "on_poll", "poll_close": "on_close"})
+
+        assert router.route_action("poll_vote_3").method == "on_poll"
+        assert router.route_action("poll_close_3").method == "on_close"
+        assert router.route_action("poll") is None
+        assert router.route_action("other") is None
+
+    def test_remove_updates_index(self):
+        """Cogの登録解除で、そのCogの振り分け先だけが取り除かれることをテスト"""
+        router = CommandRouter()
+        router.add("poll", ["poll"], messages={r"^vote": "on_vote"}, actions={"poll_": "on_poll"})
+        router.add("admin", ["reload"], messages={r"^reload": "on_reload"}, actions={"poll_admin": "on_admin"})
+        assert router.route_message("vote now").cog_name == "poll"
+
+        router.remove("poll")
+
+        assert router.route_command("poll") is None
+        assert router.route_message("vote now") is None
+        assert router.route_message("reload").cog_name == "admin"
+        assert router.route_action("poll_1") is None
+        assert router.route_action("poll_admin_1").cog_name == "admin"
+        assert router.get_stats() == {
+            'commands': 1, 'message_patterns': 1, 'unanchored_patterns': 0, 'action_prefixes': 1
+        }
+
+        router.remove("admin")
+        assert router._anchored == {}
+        assert router._action_trie == {}
+        assert router.route_message("reload") is None
+
+LISTENER_COG_SOURCE = textwrap.dedent('''
+    class PollCog:
+        def __init__(self, app):
+            self.app = app
+            self.events = []
+
+        async def poll(self, ctx):
+            self.events.append("poll")
+
+        async def on_vote(self, ctx, match):
+            self.events.append(("vote", match.group(1)))
+
+        async def on_poll_action(self, ctx, action_id):
+            self.events.append(("action", action_id))
+''')
+
+@pytest.fixture
+def poll_module(tmp_path, monkeypatch):
+    """メッセージ・アクションのハンドラーを持つCogのモジュール名を返す"""
+    package = f"tmproute_{uuid.uuid4().hex[:8]}"
+    (tmp_path / package).mkdir()
+    (tmp_path / package / "__init__.py").write_text("")
+    (tmp_path / package / "poll.py").write_text(LISTENER_COG_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield f"{package}.poll"
+    for module in [m for m in sys.modules if m.startswith(package)]:
+        del sys.modules[module]
+
+def poll_spec(module: str) -> CogSpec:
+    return CogSpec(
+        "poll", module, "PollCog", ["poll"],
+        messages={r"^vote (\d+)": "on_vote"},
+        actions={"poll_": "on_poll_action"}
+    )
+
+class TestLoaderRouting:
+    """CogLoader経由の振り分けのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_loads_lazy_cog(self, poll_module):
+        """メッセージ・アクションで lazy なCogが読み込まれ、ハンドラーが呼ばれることをテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([poll_spec(poll_module)])
+        assert not loader.is_loaded("poll")
+
+        route = await loader.dispatch_message(MagicMock(), "vote 2")
+        assert route.method == "on_vote"
+        assert await loader.dispatch_action(MagicMock(), "poll_close") is not None
+        assert await loader.dispatch_message(MagicMock(), "hello") is None
+        assert await loader.dispatch_action(MagicMock(), "other") is None
+
+        assert loader.cogs["poll"].events == [("vote", "2"), ("action", "poll_close")]
+        assert loader.timings["poll"]['trigger'] == "on_vote"
+
+    @pytest.mark.asyncio
+    async def test_unload_removes_routes(self, poll_module):
+        """アンロードでメッセージ・アクションの振り分け先も取り除かれることをテスト"""
+        loader = CogLoader(MagicMock())
+        await loader.load([poll_spec(poll_module)])
+        await loader.load_cog("poll")
+
+        await loader.unload_cog("poll")
+
+        assert loader.router.route_message("vote 1") is None
+        assert loader.router.route_action("poll_1") is None
+
+    @pytest.mark.asyncio
+    async def test_missing_handler_fails_load(self, poll_module):
+        """マニフェストに記載したハンドラーがない場合に読み込みが失敗することをテスト"""
+        loader = CogLoader(MagicMock())
+        spec = CogSpec("poll", poll_module, "PollCog", ["poll"], actions={"poll_": "on_missing"})
+        await loader.load([spec])
+
+        with pytest.raises(CogLoadError, match="on_missing"):
+            await loader.load_cog("poll")
+
+    def test_invalid_command_name_is_rejected(self, poll_module):
+        """validate_command_name に合わないコマンド名の登録が拒否されることをテスト"""
+        loader = CogLoader(MagicMock())
+        with pytest.raises(CogLoadError):
+            loader.register(CogSpec("poll", poll_module, "PollCog", ["p"]))
+        assert "poll" not in loader.specs
@@ -0,0 +1,181 @@
+"""
+サンプリングプロファイラーテスト
+
+全スレッドのスタックのサンプリング、Cogのコードへの絞り込み、collapsed stack 形式の出力、
+AdminCogの /profile コマンドをテストします。
+"""
+import pytest
+import asyncio
+import sys
+import textwrap
+import threading
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+from cogs.admin import AdminCog
+from utils.cog_loader import CogLoader, CogSpec
+from utils.sampling_profiler import SCOPE_COGS, SamplingProfiler
+from utils.slack_client import SlackClient
+
+COG_SOURCE = textwrap.dedent('''
+    import time
+
+    def spin(seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            pass
+
+    class BusyCog:
+        def __init__(self, app):
+            self.app = app
+
+        async def busy_cmd(self, ctx):
+            await ctx.respond("ok")
+''')
+
+def spin(seconds: float) -> None:
+    """Cogの外でCPUを使う処理"""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+@pytest.fixture
+def busy_loader(tmp_path, monkeypatch):
+    """CPUを使う関数を持つCogを読み込む一時パッケージとローダーを作る"""
+    package = f"tmpbusy_{uuid.uuid4().hex[:8]}"
+    root = tmp_path / package
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "busy.py").write_text(COG_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    loader = CogLoader(MagicMock())
+    yield loader, package
+    for module in [m for m in sys.modules if m.startswith(package)]:
+        del sys.modules[module]
+
+@pytest.fixture
+def mock_context():
+    """モックコンテキスト"""
+    context = MagicMock()
+    context.respond = AsyncMock()
+    return context
+
+def start_thread(target, seconds: float, name: str) -> threading.Thread:
+    """CPUを使うスレッドを開始する"""
+    thread = threading.Thread(target=target, args=(seconds,), name=name, daemon=True)
+    thread.start()
+    return thread
+
+class TestSamplingProfiler:
+    """SamplingProfilerのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_whole_process(self):
+        """全スレッドのスタックが記録され、待機中のスレッドは除かれることをテスト"""
+        profiler = SamplingProfiler(interval=0.005)
+        thread = start_thread(spin, 0.3, "spinner")
+        result = await profiler.profile(0.2)
+        thread.join()
+
+        assert not profiler.running
+        assert result.samples > 10
+        assert 0 <= result.overhead < 0.5
+        spinner = [stack for stack in result.stacks if stack[0] == "spinner"]
+        assert spinner
+        assert any("spin (tests/test_sampling_profiler.py:" in label for label in spinner[0])
+
+        top = result.top_functions(5)
+        assert top[0]['function'].startswith("spin ")
+        assert top[0]['self'] <= top[0]['total']
+        for line in result.collapsed().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0 and ";" in stack
+        assert "spin" in result.format_summary()
+
+    @pytest.mark.asyncio
+    async def test_cog_scope(self, busy_loader):
+        """Cogのスコープではcogのフレームから内側のスタックだけが残ることをテスト"""
+        loader, package = busy_loader
+        await loader.load([CogSpec("busy", f"{package}.busy", "BusyCog", ["busy_cmd"], lazy=False)])
+        cog_spin = sys.modules[f"{package}.busy"].spin
+        profiler = SamplingProfiler(interval=0.005, loader=loader)
+        threads = [start_thread(cog_spin, 0.5, "cog"), start_thread(spin, 0.5, "other")]
+
+        result = await profiler.profile(0.2, SCOPE_COGS)
+        by_name = await profiler.profile(0.05, "busy")
+        for thread in threads:
+            thread.join()
+
+        assert result.stacks
+        for stack in result.stacks:
+            assert stack[0] == "busy"
+            assert stack[1].startswith("spin (")
+        assert by_name.stacks
+        assert all(stack[0] == "busy" for stack in by_name.stacks)
+
+    @pytest.mark.asyncio
+    async def test_invalid_arguments(self):
+        """不正な秒数・対象、同時実行がエラーになることをテスト"""
+        profiler = SamplingProfiler(max_duration=1.0)
+        with pytest.raises(ValueError):
+            await profiler.profile(5.0)
+        with pytest.raises(ValueError):
+            await profiler.profile(0.1, "missing")
+
+        task = asyncio.create_task(profiler.profile(0.1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError):
+            await profiler.profile(0.1)
+        await task
+
+    @pytest.mark.asyncio
+    async def test_save(self, tmp_path):
+        """結果が collapsed stack 形式のファイルに保存されることをテスト"""
+        profiler = SamplingProfiler(output_dir=str(tmp_path / "profiles"))
+        result = await profiler.profile(0.05)
+        path = await profiler.save(result)
+
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == result.collapsed()
+        assert path.endswith(".folded")
+
+class TestProfileCommand:
+    """AdminCogの /profile のテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_profile_and_upload(self, tmp_path, mock_context):
+        """結果の一覧を返し、ファイルを保存してチャンネルにアップロードすることをテスト"""
+        app = MagicMock()
+        app.sampling_profiler = SamplingProfiler(output_dir=str(tmp_path))
+        web = MagicMock()
+        web.files_upload_v2 = AsyncMock(return_value={'ok': True})
+        app.slack_client = SlackClient(client=web)
+        mock_context.channel.id = "C12345"
+        cog = AdminCog(app)
+
+        await cog.profile(mock_context, "0.05")
+
+        message = mock_context.respond.call_args[0][0]
+        assert "プロファイル結果" in message
+        assert str(tmp_path) in message
+        assert len(list(tmp_path.iterdir())) == 1
+        upload = web.files_upload_v2.call_args.kwargs
+        assert upload['channel'] == "C12345"
+        assert upload['filename'].endswith(".folded")
+        assert app.slack_client.calls["files.upload"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors(self, mock_context):
+        """無効時・不正な引数で案内を返すことをテスト"""
+        app = MagicMock()
+        app.sampling_profiler = None
+        await AdminCog(app).profile(mock_context)
+        assert "利用できません" in mock_context.respond.call_args[0][0]
+
+        app.sampling_profiler = SamplingProfiler()
+        cog = AdminCog(app)
+        await cog.profile(mock_context, "abc")
+        assert "数値" in mock_context.respond.call_args[0][0]
+        await cog.profile(mock_context, "0.05", "missing")
+        assert "missing" in mock_context.respond.call_args[0][0]
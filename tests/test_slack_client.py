@@ -0,0 +1,205 @@
+"""
+Slack APIクライアントテスト
+
+呼び出しのコアレッシングとユーザー参照のバッチ化をテストします。
+"""
+import pytest
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from utils.cache import configure_cache
+from utils.slack_client import SlackClient, USERS_LIST_PAGE_SIZE
+from utils.slack_scheduler import OutboundScheduler, PRIORITY_BACKGROUND
+
+class FakeSlackApiError(Exception):
+    """slack_sdk.errors.SlackApiError の代わり"""
+
+    def __init__(self, error: str):
+        super().__init__(error)
+        self.response = {'ok': False, 'error': error}
+
+class FakeWebClient:
+    """api_callを記録し、少し待ってから応答するAsyncWebClientの代わり"""
+
+    def __init__(self, user_count: int = 0):
+        self.requests: List[tuple] = []
+        self.members = [{'id': f"U{i:08d}", 'name': f"user{i}"} for i in range(user_count)]
+
+    async def api_call(self, method: str, http_verb: str = "POST", params=None, json=None) -> Dict[str, Any]:
+        args = params if params is not None else json
+        self.requests.append((method, http_verb, args))
+        await asyncio.sleep(0.001)
+
+        if method == "users.info":
+            for member in self.members:
+                if member['id'] == args['user']:
+                    return {'ok': True, 'user': member}
+            raise FakeSlackApiError("user_not_found")
+        if method == "users.list":
+            start = int(args.get('cursor') or 0)
+            end = start + args['limit']
+            next_cursor = str(end) if end < len(self.members) else ""
+            return {
+                'ok': True,
+                'members': self.members[start:end],
+                'response_metadata': {'next_cursor': next_cursor}
+            }
+        return {'ok': True}
+
+    def count(self, method: str) -> int:
+        return sum(1 for request in self.requests if request[0] == method)
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """テストごとに共有キャッシュを作り直す"""
+    configure_cache()
+
+class TestSlackClient:
+    """SlackClientのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_are_coalesced(self):
+        """同じ読み取り呼び出しが1回にまとめられることのテスト"""
+        web = FakeWebClient(user_count=1)
+        client = SlackClient(client=web)
+
+        results = await asyncio.gather(
+            *[client.call("users.info", user="U00000000") for _ in range(500)]
+        )
+
+        assert web.count("users.info") == 1
+        assert all(result['user']['id'] == "U00000000" for result in results)
+        assert client.get_stats()['coalesced'] == 499
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_call(self):
+        """まとめた呼び出しの最初の呼び出し元がキャンセルされても、他の呼び出し元には応答が届くことのテスト"""
+        web = FakeWebClient(user_count=1)
+        client = SlackClient(client=web)
+
+        first = asyncio.create_task(client.call("users.info", user="U00000000"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(client.call("users.info", user="U00000000"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert (await second)['user']['id'] == "U00000000"
+        assert first.cancelled()
+        assert web.count("users.info") == 1
+
+    @pytest.mark.asyncio
+    async def test_write_calls_are_not_coalesced(self):
+        """書き込み系の呼び出しはまとめられないことのテスト"""
+        web = FakeWebClient()
+        client = SlackClient(client=web)
+
+        await asyncio.gather(*[client.call("chat.postMessage", channel="C1", text="hi") for _ in range(3)])
+
+        assert web.count("chat.postMessage") == 3
+        assert web.requests[0][1] == "POST"
+
+    @pytest.mark.asyncio
+    async def test_many_user_lookups_use_users_list(self):
+        """多数のユーザー参照が users.list のページ取得にまとめられることのテスト"""
+        web = FakeWebClient(user_count=USERS_LIST_PAGE_SIZE + 50)
+        client = SlackClient(client=web, users_list_threshold=10)
+        user_ids = [f"U{i:08d}" for i in range(0, 250, 5)] + ["U99999999"]
+
+        users = await asyncio.gather(*[client.users_info(user_id) for user_id in user_ids])
+
+        assert web.count("users.list") == 2
+        # 一覧になかったユーザーだけ個別に確認する
+        assert web.count("users.info") == 1
+        assert users[-1] is None
+        assert [user['id'] for user in users[:-1]] == user_ids[:-1]
+
+        # 参照したユーザーはキャッシュから、取得済みのページにいた他のユーザーは一覧の索引から返る
+        assert (await client.users_info("U00000005"))['name'] == "user5"
+        assert (await client.users_info("U00000001"))['name'] == "user1"
+        assert len(web.requests) == 3
+        assert client.get_stats()['directory_size'] == USERS_LIST_PAGE_SIZE + 50
+
+    @pytest.mark.asyncio
+    async def test_users_list_stops_when_all_found(self):
+        """キャッシュの上限より大きいワークスペースでも、参照したユーザーが一覧から取得されることのテスト"""
+        configure_cache(max_size=100)
+        web = FakeWebClient(user_count=3000)
+        client = SlackClient(client=web, users_list_threshold=10)
+        user_ids = [f"U{i:08d}" for i in range(0, 1500, 50)]
+
+        users = await asyncio.gather(*[client.users_info(user_id) for user_id in user_ids])
+
+        assert [user['id'] for user in users] == user_ids
+        # 最後のユーザーが見つかった8ページ目で打ち切る
+        assert web.count("users.list") == 8
+        assert web.count("users.info") == 0
+
+    @pytest.mark.asyncio
+    async def test_users_list_pages_are_capped_and_resumed(self):
+        """1回のバッチのページ数に上限があり、残りは users.info で取得し、次のバッチは続きのページから取得することのテスト"""
+        web = FakeWebClient(user_count=2000)
+        client = SlackClient(client=web, users_list_threshold=10, users_list_max_pages=3)
+
+        first = [f"U{i:08d}" for i in range(0, 1000, 50)]
+        users = await asyncio.gather(*[client.users_info(user_id) for user_id in first])
+        assert [user['id'] for user in users] == first
+        assert web.count("users.list") == 3
+        # 3ページ（600人）より後のユーザーだけ個別に取得する
+        assert web.count("users.info") == 8
+
+        second = [f"U{i:08d}" for i in range(1, 2000, 50)]
+        users = await asyncio.gather(*[client.users_info(user_id) for user_id in second])
+        assert [user['id'] for user in users] == second
+        assert [request[2].get('cursor') for request in web.requests if request[0] == "users.list"][3:] == [
+            "600", "800", "1000"
+        ]
+        # 取得済みのページのユーザーはAPIを呼ばず、1200人目より後のユーザーだけ個別に取得する
+        assert web.count("users.info") == 8 + 16
+
+        # 保持期間を過ぎた索引は最初のページから取得し直す
+        client._directory_expires = time.monotonic()
+        configure_cache()
+        await asyncio.gather(*[client.users_info(user_id) for user_id in first[:10]])
+        assert [request[2].get('cursor') for request in web.requests if request[0] == "users.list"][6:] == [
+            None, "200", "400"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_few_user_lookups_use_users_info(self):
+        """少数のユーザー参照は users.info を使うことのテスト"""
+        web = FakeWebClient(user_count=5)
+        client = SlackClient(client=web, users_list_threshold=10)
+
+        users = await asyncio.gather(
+            client.users_info("U00000001"),
+            client.users_info("U00000001"),
+            client.users_info("U00000002")
+        )
+
+        assert web.count("users.list") == 0
+        assert web.count("users.info") == 2
+        assert [user['id'] for user in users] == ["U00000001", "U00000001", "U00000002"]
+
+    @pytest.mark.asyncio
+    async def test_calls_go_through_scheduler(self):
+        """スケジューラーを設定すると呼び出しがスケジューラー経由になることをテスト"""
+        web = FakeWebClient()
+        client = SlackClient(client=web)
+        scheduler = OutboundScheduler(client.send)
+        client.scheduler = scheduler
+        await scheduler.start()
+        try:
+            await client.call("chat.postMessage", channel="C1", text="hello", background=True)
+
+            assert web.requests == [("chat.postMessage", "POST", {'channel': "C1", 'text': "hello"})]
+            stats = client.get_stats()['scheduler']
+            assert stats['sent'] == 1
+            assert PRIORITY_BACKGROUND in stats['priorities']
+        finally:
+            await scheduler.stop()
+
+    def test_requires_token_or_client(self):
+        """トークンもクライアントもない場合のテスト"""
+        with pytest.raises(ValueError):
+            SlackClient()
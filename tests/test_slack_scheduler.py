@@ -0,0 +1,182 @@
+"""
+Slack API送信スケジューラーテスト
+
+Tierごとの制限、チャンネルごとの投稿制限、Retry-After、優先度をテストします。
+"""
+import pytest
+import asyncio
+from typing import Any, Dict, List
+
+from utils.slack_scheduler import (
+    OutboundQueueFull,
+    OutboundScheduler,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE
+)
+
+class FakeResponse:
+    """slack_sdkのSlackResponseの代わり"""
+
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+class FakeRateLimitedError(Exception):
+    """429を表すSlackApiErrorの代わり"""
+
+    def __init__(self, retry_after: str):
+        super().__init__("ratelimited")
+        self.response = FakeResponse(429, {'Retry-After': retry_after})
+
+class RecordingSender:
+    """送信を記録する送信関数"""
+
+    def __init__(self):
+        self.sent: List[tuple] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.failures: List[Exception] = []
+
+    async def __call__(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        await self.gate.wait()
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((method, params.get('text')))
+        return {'ok': True, 'method': method}
+
+class TestOutboundScheduler:
+    """OutboundSchedulerのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_result(self):
+        """送信結果が呼び出し元に返ることをテスト"""
+        sender = RecordingSender()
+        scheduler = OutboundScheduler(sender)
+        await scheduler.start()
+        try:
+            result = await scheduler.submit("chat.postMessage", {'channel': "C1", 'text': "hi"})
+            assert result == {'ok': True, 'method': "chat.postMessage"}
+            assert scheduler.get_stats()['sent'] == 1
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_method_tier_limits_calls(self):
+        """Tier 2のメソッドは連続で呼び出せないことをテスト"""
+        sender = RecordingSender()
+        scheduler = OutboundScheduler(sender)
+        await scheduler.start()
+        try:
+            tasks = [
+                asyncio.ensure_future(scheduler.submit("conversations.list", {}))
+                for _ in range(3)
+            ]
+            # 別メソッドの呼び出しは制限中のメソッドに待たされない
+            await scheduler.submit("users.info", {'user': "U1"})
+            await asyncio.sleep(0.05)
+
+            assert [method for method, _ in sender.sent].count("conversations.list") == 1
+            assert scheduler.queue_depth == 2
+        finally:
+            await scheduler.stop(timeout=0)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 停止時に送信されていなかった呼び出しはキャンセルされる
+        assert sum(isinstance(result, asyncio.CancelledError) for result in results) == 2
+
+    @pytest.mark.asyncio
+    async def test_channel_rate_is_per_channel(self):
+        """チャンネルごとの投稿制限が他のチャンネルに影響しないことをテスト"""
+        sender = RecordingSender()
+        scheduler = OutboundScheduler(sender, channel_rate=20.0)
+        await scheduler.start()
+        try:
+            await asyncio.gather(
+                scheduler.submit("chat.postMessage", {'channel': "C1", 'text': "a1"}),
+                scheduler.submit("chat.postMessage", {'channel': "C1", 'text': "a2"}),
+                scheduler.submit("chat.postMessage", {'channel': "C2", 'text': "b1"})
+            )
+            texts = [text for _, text in sender.sent]
+            # C1の2件目は約50ms待つため、C2の投稿が先に送られる
+            assert texts == ["a1", "b1", "a2"]
+            assert scheduler.get_stats()['priorities'][PRIORITY_INTERACTIVE]['wait_time_max'] > 0.03
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_interactive_before_background(self):
+        """対話的な応答がバックグラウンドの投稿より先に送られることをテスト"""
+        sender = RecordingSender()
+        sender.gate.clear()
+        scheduler = OutboundScheduler(sender, max_concurrency=1)
+        await scheduler.start()
+        try:
+            first = asyncio.ensure_future(scheduler.submit("auth.test", {'text': "first"}))
+            await asyncio.sleep(0.01)
+            background = asyncio.ensure_future(
+                scheduler.submit("reactions.add", {'text': "background"}, PRIORITY_BACKGROUND)
+            )
+            interactive = asyncio.ensure_future(scheduler.submit("views.open", {'text': "interactive"}))
+            await asyncio.sleep(0.01)
+
+            sender.gate.set()
+            await asyncio.gather(first, background, interactive)
+            assert [text for _, text in sender.sent] == ["first", "interactive", "background"]
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_all_calls(self):
+        """429を受けるとRetry-Afterの間すべての送信が止まり、再送されることをテスト"""
+        sender = RecordingSender()
+        sender.failures.append(FakeRateLimitedError("0.1"))
+        scheduler = OutboundScheduler(sender)
+        await scheduler.start()
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            first = asyncio.ensure_future(scheduler.submit("users.info", {'text': "first"}))
+            await asyncio.sleep(0.01)
+            assert scheduler.paused_for > 0
+
+            await scheduler.submit("auth.test", {'text': "other"})
+            assert loop.time() - started >= 0.09
+            assert await first == {'ok': True, 'method': "users.info"}
+
+            stats = scheduler.get_stats()
+            assert stats['rate_limited'] == 1
+            assert stats['retried'] == 1
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_retries_are_limited(self):
+        """再送回数を超えると例外が呼び出し元に返ることをテスト"""
+        sender = RecordingSender()
+        sender.failures.extend([FakeRateLimitedError("0"), FakeRateLimitedError("0")])
+        scheduler = OutboundScheduler(sender, max_retries=1)
+        await scheduler.start()
+        try:
+            with pytest.raises(FakeRateLimitedError):
+                await scheduler.submit("users.info", {})
+            assert scheduler.get_stats()['failed'] == 1
+        finally:
+            await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self):
+        """キューが満杯のとき呼び出しを拒否することをテスト"""
+        sender = RecordingSender()
+        sender.gate.clear()
+        scheduler = OutboundScheduler(sender, max_concurrency=1, max_queue_size=1)
+        await scheduler.start()
+        try:
+            asyncio.ensure_future(scheduler.submit("auth.test", {}))
+            await asyncio.sleep(0.01)
+            asyncio.ensure_future(scheduler.submit("auth.test", {}))
+            await asyncio.sleep(0)
+
+            with pytest.raises(OutboundQueueFull):
+                await scheduler.submit("auth.test", {})
+            assert scheduler.get_stats()['rejected'] == 1
+        finally:
+            await scheduler.stop(timeout=0)
@@ -0,0 +1,110 @@
+"""
+集計ユーティリティテスト
+
+スライディングウィンドウとHyperLogLogをテストします。
+"""
+import pytest
+
+from utils.stats import (
+    ActivityStats,
+    HyperLogLog,
+    SlidingWindowCounter,
+    WindowedHyperLogLog,
+    _BucketRing
+)
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+class TestSlidingWindowCounter:
+    """SlidingWindowCounterのテストクラス"""
+
+    def test_old_buckets_expire(self):
+        """ウィンドウ外の件数が除かれることのテスト"""
+        clock = FakeClock()
+        counter = SlidingWindowCounter(60, buckets=6, clock=clock)
+
+        counter.add(3)
+        clock.now += 30
+        counter.add(2)
+        assert counter.count() == 5
+
+        clock.now += 40
+        assert counter.count() == 2
+
+        clock.now += 3600
+        assert counter.count() == 0
+        counter.add()
+        assert counter.count() == 1
+
+    def test_ring_requires_clear_slot(self):
+        """_clear_slot を実装していないリングは作成時にエラーになることのテスト"""
+        class NoClearRing(_BucketRing):
+            pass
+
+        with pytest.raises(TypeError):
+            NoClearRing(60, buckets=6, clock=FakeClock())
+
+class TestHyperLogLog:
+    """HyperLogLogのテストクラス"""
+
+    @pytest.mark.parametrize("n", [10, 1000, 50000])
+    def test_estimate_is_close(self, n):
+        """推定誤差が許容範囲内であることのテスト"""
+        hll = HyperLogLog(precision=12)
+        for i in range(n):
+            hll.add(f"U{i:08d}")
+            hll.add(f"U{i:08d}")
+
+        assert abs(hll.count() - n) <= max(2, n * 0.05)
+
+    def test_merge(self):
+        """マージで和集合になることのテスト"""
+        a, b = HyperLogLog(), HyperLogLog()
+        for i in range(500):
+            a.add(f"U{i}")
+            b.add(f"U{i + 250}")
+        a.merge(b)
+
+        assert abs(a.count() - 750) <= 750 * 0.1
+        with pytest.raises(ValueError):
+            a.merge(HyperLogLog(precision=12))
+
+    def test_windowed_expiry(self):
+        """ウィンドウ外のユーザーが除かれることのテスト"""
+        clock = FakeClock()
+        users = WindowedHyperLogLog(60, buckets=6, clock=clock)
+
+        for i in range(100):
+            users.add(f"old{i}")
+        clock.now += 30
+        for i in range(20):
+            users.add(f"new{i}")
+        assert abs(users.count() - 120) <= 12
+
+        clock.now += 40
+        assert abs(users.count() - 20) <= 2
+
+class TestActivityStats:
+    """ActivityStatsのテストクラス"""
+
+    def test_snapshot(self):
+        """ウィンドウごとの集計のテスト"""
+        clock = FakeClock()
+        stats = ActivityStats(windows={"1m": 60, "1h": 3600}, clock=clock)
+
+        for user_id in ["U1", "U2", "U1"]:
+            stats.record(user_id)
+        clock.now += 120
+        stats.record("U3")
+
+        snapshot = stats.snapshot()
+        assert stats.total_commands == 4
+        assert snapshot["1m"] == {'commands': 1, 'active_users': 1}
+        assert snapshot["1h"] == {'commands': 4, 'active_users': 3}
@@ -0,0 +1,133 @@
+"""
+ユーザー活動ストアテスト
+
+メモリストアとライトビハインドの永続化をテストします。
+"""
+import pytest
+from datetime import datetime
+from typing import List
+
+from utils.user_store import (
+    MemoryUserStore,
+    SQLiteUserStore,
+    WriteBehindUserStore,
+    create_user_store
+)
+
+class FlakyStore(WriteBehindUserStore):
+    """書き込みを記録し、指定回数だけ失敗するストア"""
+
+    def __init__(self, failures: int = 0):
+        super().__init__(flush_interval=60)
+        self.failures = failures
+        self.writes: List[tuple] = []
+
+    async def _load_rows(self):
+        return [("U1", 100.0, 5)]
+
+    async def _write_rows(self, deleted, upserts):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend down")
+        self.writes.append((deleted, sorted(upserts)))
+
+class TestMemoryUserStore:
+    """MemoryUserStoreのテストクラス"""
+
+    def test_track_and_get(self):
+        """記録と取得のテスト"""
+        store = MemoryUserStore()
+
+        assert store.track("U1", now=0) == 1
+        assert store.track("U1", now=10) == 2
+        store.track("U2")
+
+        assert len(store) == 2
+        assert store.get("U1")['command_count'] == 2
+        assert store.get("U1")['first_seen'] == datetime.fromtimestamp(0).isoformat()
+        assert store.get("missing") is None
+        assert dict(store.iter_counts()) == {"U1": 2, "U2": 1}
+
+    def test_deleted_slot_is_reused(self):
+        """削除した位置が再利用されることのテスト"""
+        store = MemoryUserStore()
+        store.track("U1")
+        store.track("U1")
+
+        assert store.delete("U1")
+        assert not store.delete("U1")
+        store.track("U2")
+
+        assert len(store._counts) == 1
+        assert dict(store.iter_counts()) == {"U2": 1}
+
+class TestWriteBehindUserStore:
+    """ライトビハインドのテストクラス"""
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """_write_rows を実装していないバックエンドは作成時にエラーになることのテスト"""
+        class ReadOnlyStore(WriteBehindUserStore):
+            async def _load_rows(self):
+                return []
+
+        with pytest.raises(TypeError):
+            ReadOnlyStore()
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_deltas(self):
+        """読み込み後の増分だけが書き込まれることのテスト"""
+        store = FlakyStore()
+        await store.start()
+        store.track("U1")
+        store.track("U2", now=200.0)
+        store.track("U2")
+
+        assert store.get("U1")['command_count'] == 6
+        await store.close()
+
+        assert store.writes == [([], [("U1", 100.0, 1), ("U2", 200.0, 2)])]
+        assert store.pending_writes == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self):
+        """失敗した書き込みが次回の変更とまとめて再試行されることのテスト"""
+        store = FlakyStore(failures=1)
+        store.track("U1", now=1.0)
+        store.track("U2", now=2.0)
+        await store.flush()
+        assert store.flush_errors == 1
+
+        store.track("U1")
+        store.delete("U2")
+        await store.flush()
+
+        assert store.writes == [(["U2"], [("U1", 1.0, 2)])]
+
+class TestSQLiteUserStore:
+    """SQLiteUserStoreのテストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_state_survives_restart(self, tmp_path):
+        """再起動後も記録が残ることのテスト"""
+        path = str(tmp_path / "users.db")
+        store = SQLiteUserStore(path)
+        await store.start()
+        for _ in range(3):
+            store.track("U1")
+        store.track("U2")
+        await store.flush()
+        store.track("U1")
+        store.delete("U2")
+        await store.close()
+
+        restarted = SQLiteUserStore(path)
+        await restarted.start()
+        assert dict(restarted.iter_counts()) == {"U1": 4}
+        assert restarted.get("U1")['first_seen'] == store.get("U1")['first_seen']
+        await restarted.close()
+
+    def test_unknown_backend(self):
+        """不明なバックエンドのテスト"""
+        with pytest.raises(ValueError):
+            create_user_store("mongodb")
+        assert isinstance(create_user_store(), MemoryUserStore)
@@ -0,0 +1,94 @@
+"""
+バリデーションテスト
+
+入力のサニタイズと各種バリデーターをテストします。
+"""
+import pytest
+
+from utils.validation import (
+    VALIDATOR_PATTERNS,
+    register_validator,
+    sanitize_input,
+    sanitize_many,
+    validate_channel_id,
+    validate_email,
+    validate_many,
+    validate_user_id
+)
+
+class TestSanitizeInput:
+    """sanitize_inputのテストクラス"""
+
+    def test_escapes_html(self):
+        """HTMLエスケープのテスト"""
+        assert sanitize_input("<b>太郎</b> & 花子") == "&lt;b&gt;太郎&lt;/b&gt; &amp; 花子"
+
+    @pytest.mark.parametrize("text", [
+        "javascript:alert(1)",
+        "JaVaScRiPt:alert(1)",
+        "vbscript:msgbox",
+        "<img onerror=alert(1)>",
+        "ONLOAD =run()",
+    ])
+    def test_removes_dangerous_patterns(self, text):
+        """危険なパターンが除去されることのテスト"""
+        sanitized = sanitize_input(text).lower()
+        assert "javascript:" not in sanitized
+        assert "vbscript:" not in sanitized
+        assert "onerror=" not in sanitized
+        assert "onload" not in sanitized
+
+    def test_removal_does_not_create_new_pattern(self):
+        """除去によって新たに現れたパターンも除去されることのテスト"""
+        assert sanitize_input("vbjavascript:script:x") == "x"
+
+    def test_truncates_escaped_text(self):
+        """エスケープ後の文字列がmax_lengthで切り詰められることのテスト"""
+        assert sanitize_input("&" * 10, max_length=7) == "&amp;&a"
+        assert len(sanitize_input("a" * 100_000)) == 1000
+
+    def test_non_string(self):
+        """文字列以外の入力のテスト"""
+        assert sanitize_input(None) == ""
+
+    def test_sanitize_many(self):
+        """一括サニタイズのテスト"""
+        texts = ["<a>", "onclick=x", 123, "  ok  "]
+        assert sanitize_many(texts) == [sanitize_input(text) for text in texts]
+
+class TestValidateMany:
+    """validate_manyのテストクラス"""
+
+    ID_VALUES = [
+        "U0123456789", "U01234567", "U012345678901", "U0123456",
+        "u0123456789", "U01234567a", "C0123456789", "U01234567\n",
+        "", None, 12345, "Ｕ0123456789"
+    ]
+
+    def test_user_ids_match_single_validator(self):
+        """ユーザーIDの結果が個別バリデーターと一致することのテスト"""
+        expected = [validate_user_id(value) for value in self.ID_VALUES]
+        assert validate_many("user_id", self.ID_VALUES) == expected
+
+    def test_channel_ids_match_single_validator(self):
+        """チャンネルIDの結果が個別バリデーターと一致することのテスト"""
+        expected = [validate_channel_id(value) for value in self.ID_VALUES]
+        assert validate_many("channel_id", self.ID_VALUES) == expected
+
+    def test_regex_kind(self):
+        """正規表現によるバリデーターのテスト"""
+        values = ["bot@example.com", "invalid", None]
+        assert validate_many("email", values) == [validate_email(v) for v in values]
+
+    def test_unknown_kind(self):
+        """不明な種類のテスト"""
+        with pytest.raises(ValueError):
+            validate_many("unknown", ["x"])
+
+    def test_register_validator(self):
+        """バリデーター登録のテスト"""
+        register_validator("team_id", r"^T[A-Z0-9]{8,11}$")
+        try:
+            assert validate_many("team_id", ["T0123456789", "U0123456789"]) == [True, False]
+        finally:
+            VALIDATOR_PATTERNS.pop("team_id")
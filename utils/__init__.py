@@ -7,6 +7,22 @@
 from .helpers import *
 from .logging_utils import *
 from .validation import *
+from .dispatcher import *
+from .executor import *
+from .rate_limit import *
+from .user_store import *
+from .stats import *
+from .cache import *
+from .slack_scheduler import *
+from .slack_client import *
+from .router import *
+from .metrics import *
+from .health import *
+from .loop_profiler import *
+from .sampling_profiler import *
+from .cog_loader import *
+from .hot_reload import *
+from .app_bridge import *
 
 __version__ = "1.0.0"
 __all__ = [
@@ -15,6 +31,30 @@ __all__ = [
     "create_embed_message",
     "setup_logging",
     "log_command_usage", 
+    "get_logging_queue_stats",
+    "set_json_backend",
+    "configure_log_sampling",
     "validate_slack_token",
-    "sanitize_input"
+    "sanitize_input",
+    "sanitize_many",
+    "validate_many",
+    "CommandDispatcher",
+    "offload",
+    "TokenBucket",
+    "rate_limit",
+    "create_user_store",
+    "ActivityStats",
+    "get_cache",
+    "cached",
+    "SlackClient",
+    "OutboundScheduler",
+    "CommandRouter",
+    "get_metrics",
+    "MetricsServer",
+    "HealthCheck",
+    "LoopProfiler",
+    "SamplingProfiler",
+    "CogLoader",
+    "HotReloader",
+    "AppBridge"
 ]
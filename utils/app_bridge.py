@@ -0,0 +1,261 @@
+"""
+アプリへのハンドラー登録
+
+CogLoader に登録されたコマンド・メッセージのパターン・action_id のプレフィックスを
+アプリ（Slack Bolt 互換の command / message / action デコレーター）に登録し、
+受け取ったリクエストを CogLoader の invoke / dispatch_message / dispatch_action に
+転送します。
+
+登録するのはマニフェストの名前だけで、Cogのモジュールは最初のリクエストで
+CogLoader が読み込みます。後から登録されたCog（/load など）のハンドラーも
+その場でアプリに登録されます。
+
+ディスパッチャーを指定すると、リクエストには即座に応答確認（ack）を返し、
+ハンドラーはCogごとの上限付きのワーカープールで実行されます（満杯なら混雑を通知）。
+"""
+import logging
+import re
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .cog_loader import CogLoader, CogSpec
+from .dispatcher import CommandDispatcher
+
+__all__ = ["AppBridge", "CommandContext"]
+
+logger = logging.getLogger(__name__)
+
+class CommandContext:
+    """Cogのハンドラーに渡すコンテキスト（Boltのリクエストをまとめたもの）"""
+
+    def __init__(
+        self,
+        ack: Optional[Callable[..., Awaitable[Any]]],
+        respond: Optional[Callable[..., Awaitable[Any]]],
+        payload: Dict[str, Any],
+        user_id: Optional[str] = None,
+        channel_id: Optional[str] = None,
+        text: str = ""
+    ):
+        """
+        コンテキストを初期化します。
+
+        Args:
+            ack (Optional[Callable[..., Awaitable[Any]]]): Boltの ack
+            respond (Optional[Callable[..., Awaitable[Any]]]): Boltの respond（メッセージでは say）
+            payload (Dict[str, Any]): リクエストの内容
+            user_id (Optional[str]): 実行したユーザーのID
+            channel_id (Optional[str]): チャンネルID
+            text (str): コマンドの引数・メッセージの本文
+        """
+        self._ack = ack
+        self._respond = respond
+        self.payload = payload
+        self.user = SimpleNamespace(id=user_id)
+        self.channel = SimpleNamespace(id=channel_id)
+        self.text = text
+        self.acked = False
+
+    @property
+    def args(self) -> List[str]:
+        """空白で区切ったコマンドの引数"""
+        return self.text.split()
+
+    async def ack(self) -> None:
+        """応答確認を返します（2回目以降は何もしません）"""
+        if self.acked or self._ack is None:
+            return
+        self.acked = True
+        await self._ack()
+
+    async def respond(self, text: str, **kwargs: Any) -> Any:
+        """
+        リクエストに応答します。
+
+        Args:
+            text (str): 応答のテキスト
+            **kwargs (Any): Boltの respond / say に渡す引数（blocks など）
+        """
+        if self._respond is None:
+            raise RuntimeError("このリクエストには応答できません")
+        return await self._respond(text=text, **kwargs)
+
+class AppBridge:
+    """CogLoader のハンドラーをアプリに登録し、リクエストを転送します"""
+
+    def __init__(self, app: Any, loader: CogLoader, dispatcher: Optional[CommandDispatcher] = None):
+        """
+        ブリッジを初期化します。
+
+        Args:
+            app (Any): command / message / action デコレーターを持つアプリ
+            loader (CogLoader): 転送先のCogローダー
+            dispatcher (Optional[CommandDispatcher]): ハンドラーを実行するディスパッチャー（Noneでその場で実行）
+        """
+        self.app = app
+        self.loader = loader
+        self.dispatcher = dispatcher
+        self._commands: Set[str] = set()
+        self._messages: Set[str] = set()
+        self._actions: Set[str] = set()
+        self._bound = False
+
+    def bind(self) -> int:
+        """
+        登録済みの全Cogのハンドラーをアプリに登録し、以降に登録されるCogも登録します。
+
+        Returns:
+            int: アプリに登録したハンドラーの数
+        """
+        if not self._bound:
+            self._bound = True
+            self.loader.on_register.append(self.register)
+        for spec in list(self.loader.specs.values()):
+            self.register(spec)
+        count = len(self._commands) + len(self._messages) + len(self._actions)
+        logger.info(
+            f"Bound {len(self._commands)} commands, {len(self._messages)} message patterns "
+            f"and {len(self._actions)} action prefixes to the app"
+        )
+        return count
+
+    def register(self, spec: CogSpec) -> None:
+        """
+        Cogのコマンド・メッセージ・アクションのうち、未登録のものをアプリに登録します。
+
+        アプリからハンドラーを削除することはできないため、アンロードしたCogの
+        ハンドラーは登録したまま残り、実行時に不明なコマンドとして応答します。
+
+        Args:
+            spec (CogSpec): Cogの定義
+        """
+        for command in spec.commands:
+            if command not in self._commands:
+                self._commands.add(command)
+                self.app.command(f"/{command}")(self._command_listener(command))
+        for pattern in spec.messages:
+            if pattern not in self._messages:
+                self._messages.add(pattern)
+                self.app.message(re.compile(pattern))(self._message_listener())
+        for prefix in spec.actions:
+            if prefix not in self._actions:
+                self._actions.add(prefix)
+                self.app.action(re.compile(f"^{re.escape(prefix)}"))(self._action_listener())
+
+    def _command_listener(self, name: str) -> Callable[..., Awaitable[None]]:
+        """スラッシュコマンドのリスナーを作ります（引数名はBoltが値を渡すためのもの）"""
+        async def listener(ack: Any, command: Dict[str, Any], respond: Any) -> None:
+            ctx = CommandContext(
+                ack, respond, command,
+                user_id=command.get("user_id"),
+                channel_id=command.get("channel_id"),
+                text=command.get("text") or ""
+            )
+            await self.handle_command(name, ctx)
+        return listener
+
+    def _message_listener(self) -> Callable[..., Awaitable[None]]:
+        """メッセージのリスナーを作ります"""
+        async def listener(ack: Any, message: Dict[str, Any], say: Any) -> None:
+            ctx = CommandContext(
+                ack, say, message,
+                user_id=message.get("user"),
+                channel_id=message.get("channel"),
+                text=message.get("text") or ""
+            )
+            await self.handle_message(ctx)
+        return listener
+
+    def _action_listener(self) -> Callable[..., Awaitable[None]]:
+        """ブロックアクションのリスナーを作ります"""
+        async def listener(ack: Any, action: Dict[str, Any], body: Dict[str, Any], respond: Any) -> None:
+            ctx = CommandContext(
+                ack, respond, body,
+                user_id=(body.get("user") or {}).get("id"),
+                channel_id=(body.get("channel") or {}).get("id"),
+                text=action.get("value") or ""
+            )
+            await self.handle_action(action.get("action_id", ""), ctx)
+        return listener
+
+    async def handle_command(self, name: str, ctx: CommandContext) -> None:
+        """
+        コマンドを、テキストを空白で区切った引数と共にCogに転送します。
+
+        Args:
+            name (str): コマンド名
+            ctx (CommandContext): コンテキスト
+        """
+        route = self.loader.router.route_command(name)
+        if route is None:
+            await ctx.ack()
+            await _respond_error(ctx, f"❌ 不明なコマンドです: /{name}")
+            return
+        await self._run(route.cog_name, self._invoke, ctx, name, *ctx.args)
+
+    async def handle_message(self, ctx: CommandContext) -> None:
+        """
+        メッセージを、一致したパターンのCogに転送します。
+
+        Args:
+            ctx (CommandContext): コンテキスト
+        """
+        route = self.loader.router.route_message(ctx.text)
+        if route is None:
+            return
+        await self._run(route.cog_name, self._dispatch_message, ctx)
+
+    async def handle_action(self, action_id: str, ctx: CommandContext) -> None:
+        """
+        ブロックアクションを、action_id に一致したCogに転送します。
+
+        Args:
+            action_id (str): action_id
+            ctx (CommandContext): コンテキスト
+        """
+        route = self.loader.router.route_action(action_id)
+        if route is None:
+            await ctx.ack()
+            return
+        await self._run(route.cog_name, self._dispatch_action, ctx, action_id)
+
+    async def _run(
+        self,
+        cog_name: str,
+        handler: Callable[..., Awaitable[Any]],
+        ctx: CommandContext,
+        *args: Any
+    ) -> None:
+        """応答確認を返してからハンドラーを実行します（ディスパッチャーがあればキューに積みます）"""
+        if self.dispatcher is not None:
+            await self.dispatcher.submit(cog_name, handler, ctx, *args)
+            return
+        await ctx.ack()
+        await handler(ctx, *args)
+
+    async def _invoke(self, ctx: CommandContext, name: str, *args: Any) -> None:
+        """CogLoader.invoke でコマンドを実行します（失敗時はユーザーに通知して再送出）"""
+        try:
+            await self.loader.invoke(name, ctx, *args)
+        except Exception:
+            await _respond_error(ctx, f"❌ /{name} の実行中にエラーが発生しました。")
+            raise
+
+    async def _dispatch_message(self, ctx: CommandContext) -> None:
+        """CogLoader.dispatch_message でメッセージを処理します"""
+        await self.loader.dispatch_message(ctx, ctx.text)
+
+    async def _dispatch_action(self, ctx: CommandContext, action_id: str) -> None:
+        """CogLoader.dispatch_action でブロックアクションを処理します"""
+        try:
+            await self.loader.dispatch_action(ctx, action_id)
+        except Exception:
+            await _respond_error(ctx, "❌ 操作の処理中にエラーが発生しました。")
+            raise
+
+async def _respond_error(ctx: CommandContext, message: str) -> None:
+    """エラーをユーザーに通知します（通知の失敗はログに記録するだけ）"""
+    try:
+        await ctx.respond(message)
+    except Exception as e:
+        logger.warning(f"Failed to send error response: {e}")
@@ -0,0 +1,478 @@
+"""
+キャッシュ
+
+プロセス内のTTL付きLRUキャッシュと、任意のRedisキャッシュの2層構成で、
+Slack APIの結果などを名前空間ごとにキャッシュします。
+同じキーへの同時の読み込みは1回にまとめ（コアレッシング）、
+見つからなかった結果（None）も短い期間キャッシュします（ネガティブキャッシュ）。
+"""
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+__all__ = [
+    "CacheNamespace",
+    "CacheManager",
+    "configure_cache",
+    "get_cache",
+    "get_cache_stats",
+    "close_cache",
+    "cached"
+]
+
+logger = logging.getLogger(__name__)
+
+# キャッシュにない場合の番兵（Noneはネガティブキャッシュの値として使う）
+_MISSING = object()
+
+class _Entry:
+    """キャッシュのエントリ"""
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+class CacheNamespace:
+    """
+    1つの名前空間のキャッシュ
+
+    ローカルのLRUを先に参照し、なければRedis（設定されている場合）、
+    それもなければローダーを呼び出して両方に保存します。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        redis: Any = None,
+        redis_prefix: str = "slackbot:cache",
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        名前空間を初期化します。
+
+        Args:
+            name (str): 名前空間の名前
+            max_size (int): ローカルに保持する最大件数
+            ttl (float): デフォルトの有効期限（秒）
+            negative_ttl (float): Noneの結果の有効期限（秒、0でネガティブキャッシュ無効）
+            redis (Any): redis.asyncioクライアント（Noneでローカルのみ）
+            redis_prefix (str): Redisキーの接頭辞
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        if max_size < 1 or ttl <= 0 or negative_ttl < 0:
+            raise ValueError("max_size は1以上、ttl は0より大きく、negative_ttl は0以上である必要があります")
+
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.redis = redis
+        self._redis_prefix = f"{redis_prefix}:{name}:"
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # メトリクス
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.remote_hits = 0
+        self.remote_errors = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """
+        キャッシュから値を取得します（ローダーは呼び出しません）。
+
+        Args:
+            key (str): キー
+            default (Any): キャッシュにない場合の値
+
+        Returns:
+            Any: キャッシュされた値、またはdefault
+        """
+        value = self._get_local(key)
+        if value is _MISSING:
+            value = await self._get_remote(key)
+            if value is _MISSING:
+                return default
+            self._set_local(key, value, None)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        値をキャッシュに保存します。
+
+        Args:
+            key (str): キー
+            value (Any): 値（Redisを使う場合はJSONに変換できる必要があります）
+            ttl (Optional[float]): 有効期限（秒、Noneで名前空間のデフォルト）
+        """
+        self._set_local(key, value, ttl)
+        await self._set_remote(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        """
+        キーをキャッシュから削除します。
+
+        Args:
+            key (str): キー
+        """
+        self._entries.pop(key, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self._redis_prefix + key)
+            except Exception as e:
+                self.remote_errors += 1
+                logger.warning(f"Cache {self.name}: failed to delete from redis: {e}")
+
+    def clear_local(self) -> None:
+        """ローカルのエントリをすべて削除します"""
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        キャッシュから値を取得し、なければローダーで読み込んで保存します。
+
+        同じキーの読み込みが実行中であれば、新たに読み込まずにその結果を待ちます。
+        読み込みは独立したタスクで行うため、最初の呼び出し元がキャンセルされても
+        他の呼び出し元の待っている読み込みは止まりません。
+        ローダーがNoneを返した場合はnegative_ttlの間キャッシュします。
+        ローダーの例外はキャッシュせず、待っていた呼び出しすべてに送出します。
+
+        Args:
+            key (str): キー
+            loader (Callable[[], Awaitable[Any]]): 値を読み込むコルーチン関数
+            ttl (Optional[float]): 有効期限（秒、Noneで名前空間のデフォルト）
+
+        Returns:
+            Any: キャッシュされた値、または読み込んだ値
+        """
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_load(key, done))
+        # 待っている側（最初の呼び出し元を含む）がキャンセルされても、読み込み自体は止めない
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        """リモート・ローダーから値を読み込んで保存します（get_or_load のタスク）"""
+        try:
+            value = await self._get_remote(key)
+            if value is _MISSING:
+                self.loads += 1
+                value = await loader()
+                await self._set_remote(key, value, ttl)
+        except Exception:
+            self.load_errors += 1
+            raise
+        self._set_local(key, value, ttl)
+        return value
+
+    def _finish_load(self, key: str, task: asyncio.Task) -> None:
+        """完了した読み込みタスクを実行中の一覧から外します"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 待っている呼び出しがなくても警告が出ないよう、例外を取得済みにしておく
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        名前空間の統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: ヒット率・退避件数などの統計
+        """
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+            'remote_hits': self.remote_hits,
+            'remote_errors': self.remote_errors,
+            'loads': self.loads,
+            'load_errors': self.load_errors,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def _get_local(self, key: str) -> Any:
+        """ローカルのLRUから取得します（ないか期限切れなら_MISSING）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        if entry.expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        if entry.value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry.value
+
+    def _set_local(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """ローカルのLRUに保存し、上限を超えた古いエントリを退避します"""
+        ttl = self._resolve_ttl(value, ttl)
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = _Entry(value, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _get_remote(self, key: str) -> Any:
+        """Redisから取得します（未設定・ない・エラーなら_MISSING）"""
+        if self.redis is None:
+            return _MISSING
+        try:
+            raw = await self.redis.get(self._redis_prefix + key)
+        except Exception as e:
+            self.remote_errors += 1
+            logger.warning(f"Cache {self.name}: failed to read from redis: {e}")
+            return _MISSING
+        if raw is None:
+            return _MISSING
+
+        self.remote_hits += 1
+        return json.loads(raw)
+
+    async def _set_remote(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Redisに保存します（失敗してもローカルのキャッシュは有効）"""
+        if self.redis is None:
+            return
+        ttl = self._resolve_ttl(value, ttl)
+        if ttl <= 0:
+            return
+        try:
+            await self.redis.set(
+                self._redis_prefix + key, json.dumps(value, ensure_ascii=False), px=int(ttl * 1000)
+            )
+        except Exception as e:
+            self.remote_errors += 1
+            logger.warning(f"Cache {self.name}: failed to write to redis: {e}")
+
+    def _resolve_ttl(self, value: Any, ttl: Optional[float]) -> float:
+        """値に応じた有効期限を決めます"""
+        if value is None:
+            return self.negative_ttl
+        return self.ttl if ttl is None else ttl
+
+class CacheManager:
+    """名前空間ごとのキャッシュと、共有のRedis接続を管理します"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_client: Any = None,
+        prefix: str = "slackbot:cache",
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0
+    ):
+        """
+        キャッシュマネージャーを初期化します。
+
+        Args:
+            redis_url (Optional[str]): RedisのURL（Noneでローカルのみ）
+            redis_client (Any): 既存のredis.asyncioクライアント（redis_urlより優先）
+            prefix (str): Redisキーの接頭辞
+            max_size (int): 名前空間ごとのデフォルトの最大件数
+            ttl (float): デフォルトの有効期限（秒）
+            negative_ttl (float): デフォルトのネガティブキャッシュの有効期限（秒）
+        """
+        if redis_client is None and redis_url:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                raise ValueError("Redisキャッシュには redis パッケージが必要です")
+            redis_client = redis_asyncio.from_url(redis_url, decode_responses=True)
+
+        self.redis = redis_client
+        self.prefix = prefix
+        self.defaults = {'max_size': max_size, 'ttl': ttl, 'negative_ttl': negative_ttl}
+        self._namespaces: Dict[str, CacheNamespace] = {}
+
+    def namespace(self, name: str, **options: Any) -> CacheNamespace:
+        """
+        名前空間を取得します（初回は作成）。
+
+        Args:
+            name (str): 名前空間の名前
+            **options (Any): 初回作成時の max_size, ttl, negative_ttl, local_only
+
+        Returns:
+            CacheNamespace: 名前空間
+        """
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            local_only = options.pop('local_only', False)
+            settings = {**self.defaults, **options}
+            namespace = self._namespaces[name] = CacheNamespace(
+                name,
+                redis=None if local_only else self.redis,
+                redis_prefix=self.prefix,
+                **settings
+            )
+        return namespace
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        全名前空間の統計情報を取得します。
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 名前空間名をキーにした統計
+        """
+        return {name: namespace.get_stats() for name, namespace in sorted(self._namespaces.items())}
+
+    async def close(self) -> None:
+        """Redis接続を閉じます"""
+        if self.redis is not None:
+            close = getattr(self.redis, "aclose", None) or getattr(self.redis, "close", None)
+            if close is not None:
+                await close()
+            self.redis = None
+
+_default_manager: Optional[CacheManager] = None
+
+def configure_cache(**options: Any) -> CacheManager:
+    """
+    共有キャッシュマネージャーを設定します。既存の名前空間は破棄されます。
+
+    Args:
+        **options (Any): CacheManager の引数
+
+    Returns:
+        CacheManager: 新しい共有キャッシュマネージャー
+    """
+    global _default_manager
+
+    _default_manager = CacheManager(**options)
+    return _default_manager
+
+def _get_manager() -> CacheManager:
+    """共有キャッシュマネージャーを取得します（未設定ならローカルのみで作成）"""
+    global _default_manager
+
+    if _default_manager is None:
+        _default_manager = CacheManager()
+    return _default_manager
+
+def get_cache(name: str, **options: Any) -> CacheNamespace:
+    """
+    共有キャッシュマネージャーから名前空間を取得します。
+
+    Args:
+        name (str): 名前空間の名前（slack.users など）
+        **options (Any): 初回作成時の max_size, ttl, negative_ttl, local_only
+
+    Returns:
+        CacheNamespace: 名前空間
+    """
+    return _get_manager().namespace(name, **options)
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    共有キャッシュマネージャーの統計情報を取得します。
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 名前空間名をキーにした統計
+    """
+    return _get_manager().get_stats()
+
+async def close_cache() -> None:
+    """共有キャッシュマネージャーのRedis接続を閉じます"""
+    if _default_manager is not None:
+        await _default_manager.close()
+
+def cached(
+    namespace: str,
+    ttl: Optional[float] = None,
+    key: Optional[Callable[..., str]] = None,
+    **options: Any
+) -> Callable:
+    """
+    非同期関数・メソッドの結果をキャッシュするデコレータ
+
+    同じ引数での同時呼び出しは1回の実行にまとめられます。
+    キーはデフォルトで関数名と引数のreprから作成し、メソッドのselfは含めません。
+
+    Args:
+        namespace (str): 使用する名前空間
+        ttl (Optional[float]): 有効期限（秒、Noneで名前空間のデフォルト）
+        key (Optional[Callable[..., str]]): 関数と同じ引数を受け取りキーを返す関数
+        **options (Any): 名前空間の初回作成時の設定
+
+    Returns:
+        Callable: デコレータ
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError(f"{func.__qualname__} は非同期関数である必要があります")
+
+        parameters = list(inspect.signature(func).parameters)
+        skip_self = bool(parameters) and parameters[0] in ("self", "cls")
+
+        def make_key(args: tuple, kwargs: Dict[str, Any]) -> str:
+            if key is not None:
+                return key(*args, **kwargs)
+            key_args = args[1:] if skip_self else args
+            return f"{func.__qualname__}:{key_args!r}:{sorted(kwargs.items())!r}"
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await get_cache(namespace, **options).get_or_load(
+                make_key(args, kwargs), lambda: func(*args, **kwargs), ttl
+            )
+
+        async def invalidate(*args: Any, **kwargs: Any) -> None:
+            """指定した引数のキャッシュを削除します"""
+            await get_cache(namespace, **options).delete(make_key(args, kwargs))
+
+        wrapper.cache_namespace = namespace
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
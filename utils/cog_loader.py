@@ -0,0 +1,814 @@
+"""
+Cogローダー
+
+マニフェスト（cogs/manifest.json）からCogとコマンド名を読み込み、起動時には
+コマンド名だけを登録します。lazy なCogのモジュールは最初にコマンドが
+呼ばれたときに初めてimportするため、Cogが増えても起動時間は伸びません。
+Cogごとのimport・初期化にかかった時間は起動レポートとして取得できます。
+
+Cogは async の setup() / teardown() を持つことができ、マニフェストの
+depends_on で宣言した依存関係の順に初期化されます。依存関係のないCog同士は
+並行して初期化されます。
+
+リロードでは新しいモジュールをスレッドプールでコンパイル・実行・検証してから
+Cogを差し替えるため、失敗しても元のCogはそのまま動き続けます。実行中のコマンドは
+元のCogで最後まで実行され、Cogの reload_state に挙げた属性は新しいCogに引き継がれます。
+/reload のように、リロードを呼び出したコマンド自身は完了待ちの対象に含めません。
+
+マニフェストの messages（正規表現 -> メソッド名）と actions（action_id の
+プレフィックス -> メソッド名）で、メッセージとブロックアクションのハンドラーも
+登録できます。振り分けは CommandRouter の索引で行います。
+"""
+import ast
+import asyncio
+import contextvars
+import importlib
+import importlib.util
+import json
+import sys
+import logging
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .executor import get_offload_executor
+from .metrics import get_metrics
+from .router import CommandRouter, Route
+
+__all__ = [
+    "CogSpec",
+    "CogLoader",
+    "CogLoadError",
+    "load_manifest",
+    "scan_cog_commands"
+]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = "cogs/manifest.json"
+
+# コマンドとして扱わないライフサイクルメソッド
+LIFECYCLE_METHODS = frozenset({"setup", "teardown"})
+
+# 現在のタスクが実行中のコマンドのCogインスタンス（id）。外側のコマンドから順に並ぶ
+_running_cogs: contextvars.ContextVar[Tuple[int, ...]] = contextvars.ContextVar("running_cogs", default=())
+
+class CogLoadError(Exception):
+    """Cogの読み込みに失敗した"""
+
+class CogSpec:
+    """マニフェストに記載されたCogの定義"""
+
+    __slots__ = (
+        "name", "module", "class_name", "commands", "lazy", "depends_on", "required", "timeout",
+        "messages", "actions"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        class_name: str,
+        commands: List[str],
+        lazy: bool = True,
+        depends_on: Optional[List[str]] = None,
+        required: bool = False,
+        timeout: Optional[float] = None,
+        messages: Optional[Dict[str, str]] = None,
+        actions: Optional[Dict[str, str]] = None
+    ):
+        """
+        Cogの定義を初期化します。
+
+        Args:
+            name (str): Cog名
+            module (str): モジュール名（cogs.example など）
+            class_name (str): Cogのクラス名
+            commands (List[str]): Cogが提供するコマンド名（メソッド名）
+            lazy (bool): 最初の呼び出しまでimportを遅らせるか
+            depends_on (Optional[List[str]]): 先に初期化が必要なCog名
+            required (bool): 起動時に初期化できなければ起動を中止するか
+            timeout (Optional[float]): import・setup()のタイムアウト秒数（Noneでローダーの設定）
+            messages (Optional[Dict[str, str]]): メッセージの正規表現と、処理するメソッド名
+            actions (Optional[Dict[str, str]]): action_id のプレフィックスと、処理するメソッド名
+        """
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.commands = commands
+        self.lazy = lazy
+        self.depends_on = list(depends_on or [])
+        self.required = required
+        self.timeout = timeout
+        self.messages = dict(messages or {})
+        self.actions = dict(actions or {})
+
+    @property
+    def handlers(self) -> List[str]:
+        """コマンド・メッセージ・アクションを処理するメソッド名"""
+        return list(dict.fromkeys([*self.commands, *self.messages.values(), *self.actions.values()]))
+
+def scan_cog_commands(path: str, class_name: str) -> List[str]:
+    """
+    Cogのソースを解析し、importせずにコマンド名を取得します。
+
+    クラスに定義された、アンダースコアで始まらない async メソッドをコマンドとみなします
+    （setup, teardown を除く）。
+
+    Args:
+        path (str): Cogのソースファイルのパス
+        class_name (str): Cogのクラス名
+
+    Returns:
+        List[str]: コマンド名（定義順）
+    """
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            return [
+                item.name for item in node.body
+                if isinstance(item, ast.AsyncFunctionDef)
+                and not item.name.startswith("_")
+                and item.name not in LIFECYCLE_METHODS
+            ]
+    raise CogLoadError(f"{path} にクラス {class_name} が見つかりません")
+
+def _module_path(module: str) -> Path:
+    """モジュール名から（importせずに）ソースファイルのパスを求めます"""
+    return Path(*module.split(".")).with_suffix(".py")
+
+def _compile_module(module_name: str) -> ModuleType:
+    """
+    モジュールのソースを読み込み直し、sys.modules に登録せずに実行します。
+
+    Args:
+        module_name (str): モジュール名
+
+    Returns:
+        ModuleType: 新しく実行したモジュール
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.loader is None:
+        raise CogLoadError(f"モジュール {module_name} が見つかりません")
+    module = importlib.util.module_from_spec(spec)
+    source = spec.loader.get_source(module_name)
+    code = compile(source, spec.origin or module_name, "exec")
+    exec(code, module.__dict__)
+    return module
+
+def load_manifest(path: str = DEFAULT_MANIFEST_PATH) -> List[CogSpec]:
+    """
+    マニフェストを読み込みます。
+
+    commands を省略したCogは、ソースを解析してコマンド名を求めます（messages・actions の
+    ハンドラーはコマンドに含めません）。
+
+    Args:
+        path (str): マニフェストのパス
+
+    Returns:
+        List[CogSpec]: Cogの定義（記載順）
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    specs: List[CogSpec] = []
+    for entry in data.get('cogs', []):
+        try:
+            name = entry['name']
+            module = entry['module']
+            class_name = entry['class']
+        except KeyError as e:
+            raise CogLoadError(f"マニフェストの項目 {e} がありません: {entry}")
+        messages = entry.get('messages') or {}
+        actions = entry.get('actions') or {}
+        commands = entry.get('commands')
+        if commands is None:
+            listeners = set(messages.values()) | set(actions.values())
+            commands = [
+                command for command in scan_cog_commands(str(_module_path(module)), class_name)
+                if command not in listeners
+            ]
+        specs.append(CogSpec(
+            name,
+            module,
+            class_name,
+            list(commands),
+            lazy=entry.get('lazy', True),
+            depends_on=entry.get('depends_on'),
+            required=entry.get('required', False),
+            timeout=entry.get('timeout'),
+            messages=messages,
+            actions=actions
+        ))
+    return specs
+
+class CogLoader:
+    """マニフェストに従ってCogを読み込み、コマンドを対応するCogに振り分けます"""
+
+    def __init__(
+        self,
+        app: Any,
+        manifest_path: str = DEFAULT_MANIFEST_PATH,
+        setup_timeout: float = 30.0
+    ):
+        """
+        ローダーを初期化します。
+
+        Args:
+            app (Any): Cogに渡すアプリケーションインスタンス
+            manifest_path (str): マニフェストのパス
+            setup_timeout (float): Cogごとのimport・setup()のデフォルトのタイムアウト秒数
+        """
+        self.app = app
+        self.manifest_path = manifest_path
+        self.setup_timeout = setup_timeout
+        self.specs: Dict[str, CogSpec] = {}
+        self.cogs: Dict[str, Any] = {}
+        self.failed: Dict[str, Exception] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.router = CommandRouter()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Cogインスタンス（id）ごとの実行中のコマンド数と、実行完了を待つイベント
+        self._inflight: Dict[int, int] = {}
+        self._drained: Dict[int, Tuple[int, asyncio.Event]] = {}
+        # Cogの登録時に呼ばれる関数（AppBridge がアプリへのハンドラー登録に使う）
+        self.on_register: List[Callable[[CogSpec], None]] = []
+
+    @property
+    def commands(self) -> Dict[str, str]:
+        """コマンド名とCog名の対応"""
+        return self.router.commands
+
+    def is_loaded(self, cog_name: str) -> bool:
+        """
+        Cogが読み込み済みかを確認します。
+
+        Args:
+            cog_name (str): Cog名
+
+        Returns:
+            bool: 読み込み済みの場合True
+        """
+        return cog_name in self.cogs
+
+    def source_files(self) -> Dict[str, str]:
+        """
+        読み込み済みのCogのソースファイルとCog名の対応を取得します。
+
+        プロファイラーがスタックのフレームをCogに結び付けるのに使います。
+
+        Returns:
+            Dict[str, str]: ソースファイルのパスとCog名
+        """
+        files = {}
+        for name, spec in self.specs.items():
+            module = sys.modules.get(spec.module)
+            path = getattr(module, "__file__", None)
+            if path:
+                files[path] = name
+        return files
+
+    async def load(self, specs: Optional[List[CogSpec]] = None) -> None:
+        """
+        マニフェストのCogを登録し、lazy でないCogを読み込みます。
+
+        依存関係のないCogは並行して初期化します。required のCogが失敗した場合は
+        残りの初期化を中止して CogLoadError を送出し、それ以外のCogの失敗は
+        記録して（そのCogに依存するCogと共に）無効のまま起動を続けます。
+
+        Args:
+            specs (Optional[List[CogSpec]]): Cogの定義（Noneでマニフェストから読み込む）
+        """
+        started = time.perf_counter()
+        if specs is None:
+            specs = load_manifest(self.manifest_path)
+        for spec in specs:
+            self.register(spec)
+        self._check_dependencies()
+
+        tasks = {
+            asyncio.ensure_future(self.load_cog(spec.name)): spec
+            for spec in specs if not spec.lazy
+        }
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    continue
+                spec = tasks[task]
+                if spec.required:
+                    for other in pending:
+                        other.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    raise CogLoadError(f"必須のCog {spec.name} を初期化できませんでした: {error}") from error
+                logger.warning(f"Cog {spec.name} disabled: {error}")
+
+        logger.info(
+            f"Registered {len(self.router.commands)} commands from {len(self.specs)} cogs "
+            f"({len(self.cogs)} loaded, {len(self.failed)} failed) in {time.perf_counter() - started:.3f}s"
+        )
+
+    def register(self, spec: CogSpec) -> None:
+        """
+        Cogのコマンド名を登録します（モジュールはimportしません）。
+
+        Args:
+            spec (CogSpec): Cogの定義
+        """
+        if spec.name in self.specs:
+            raise CogLoadError(f"Cog {spec.name} は既に登録されています")
+        try:
+            self.router.add(spec.name, spec.commands, spec.messages, spec.actions)
+        except ValueError as e:
+            raise CogLoadError(str(e)) from e
+
+        self.specs[spec.name] = spec
+        self.timings[spec.name] = {
+            'cog': spec.name,
+            'lazy': spec.lazy,
+            'loaded': False,
+            'trigger': None,
+            'import_time': None,
+            'init_time': None,
+            'setup_time': None,
+            'error': None,
+            'reload_time': None,
+            'reloads': 0
+        }
+        for callback in self.on_register:
+            callback(spec)
+
+    def unregister(self, cog_name: str) -> None:
+        """
+        Cogとそのコマンド名の登録を解除します。
+
+        Args:
+            cog_name (str): Cog名
+        """
+        spec = self.specs.pop(cog_name, None)
+        if spec is None:
+            return
+        self.router.remove(cog_name)
+        self.timings.pop(cog_name, None)
+        self.failed.pop(cog_name, None)
+        self._locks.pop(cog_name, None)
+
+    def register_from_manifest(self, cog_name: str) -> CogSpec:
+        """
+        マニフェストを読み直し、指定したCogを登録します（登録済みならその定義を返します）。
+
+        Args:
+            cog_name (str): Cog名
+
+        Returns:
+            CogSpec: Cogの定義
+        """
+        spec = self.specs.get(cog_name)
+        if spec is not None:
+            return spec
+        for spec in load_manifest(self.manifest_path):
+            if spec.name == cog_name:
+                for dependency in spec.depends_on:
+                    if dependency not in self.specs:
+                        raise CogLoadError(f"Cog {cog_name} が依存する {dependency} は登録されていません")
+                self.register(spec)
+                return spec
+        raise CogLoadError(f"マニフェストに Cog {cog_name} がありません")
+
+    async def load_cog(self, cog_name: str, trigger: Optional[str] = None) -> Any:
+        """
+        Cogを読み込みます（読み込み済みならそのインスタンスを返します）。
+
+        依存するCogを先に（互いに並行して）読み込んでから、モジュールのimport・
+        インスタンス作成・setup() を行います。importはイベントループを止めないよう
+        スレッドプールで行い、同じCogの同時読み込みは1回にまとめます。
+
+        Args:
+            cog_name (str): Cog名
+            trigger (Optional[str]): 読み込みのきっかけになったコマンド名
+
+        Returns:
+            Any: Cogのインスタンス
+        """
+        cog = self.cogs.get(cog_name)
+        if cog is not None:
+            return cog
+        spec = self.specs.get(cog_name)
+        if spec is None:
+            raise CogLoadError(f"不明なCogです: {cog_name}")
+
+        lock = self._locks.get(cog_name)
+        if lock is None:
+            lock = self._locks[cog_name] = asyncio.Lock()
+        async with lock:
+            cog = self.cogs.get(cog_name)
+            if cog is not None:
+                return cog
+            try:
+                cog = await self._load_locked(spec, trigger)
+            except Exception as e:
+                self.failed[cog_name] = e
+                self.timings[cog_name]['error'] = str(e)
+                raise
+            self.failed.pop(cog_name, None)
+            return cog
+
+    async def shutdown(self) -> None:
+        """
+        読み込み済みの全Cogの teardown() を呼びます。
+
+        Cogは自分に依存するCogの teardown() が終わってから終了します。
+        依存関係のないCog同士は並行して終了し、失敗はログに記録して続行します。
+        """
+        names = list(self.cogs)
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def teardown(name: str) -> None:
+            dependents = [tasks[other] for other in names if name in self.specs[other].depends_on]
+            await asyncio.gather(*dependents, return_exceptions=True)
+            await self._teardown(name)
+
+        for name in reversed(self.dependency_order(names)):
+            tasks[name] = asyncio.ensure_future(teardown(name))
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        self.cogs.clear()
+
+    async def reload_cog(self, cog_name: str) -> float:
+        """
+        Cogのモジュールを読み込み直し、Cogを新しいインスタンスに差し替えます。
+
+        新しいモジュールのコンパイル・実行はスレッドプールで行い、インスタンス作成と
+        setup() が成功してから一度に差し替えます。失敗した場合は元のCogのまま
+        CogLoadError を送出します。元のCogの teardown() は、差し替え前に始まった
+        コマンドの完了を待ってから呼びます。
+
+        Args:
+            cog_name (str): Cog名
+
+        Returns:
+            float: リロードにかかった秒数（元のCogの終了待ちは含まない）
+        """
+        spec = self.specs.get(cog_name)
+        if spec is None:
+            raise CogLoadError(f"不明なCogです: {cog_name}")
+
+        lock = self._locks.setdefault(cog_name, asyncio.Lock())
+        async with lock:
+            started = time.perf_counter()
+            timeout = self._timeout(spec)
+            try:
+                module = await get_offload_executor().run(_compile_module, spec.module, timeout=timeout)
+            except CogLoadError:
+                raise
+            except Exception as e:
+                raise CogLoadError(f"Cog {cog_name} のコンパイルに失敗しました: {e}") from e
+
+            old = self.cogs.get(cog_name)
+            if old is None:
+                # 未読み込みのCogは、次の読み込みで新しいモジュールが使われるようにするだけ
+                sys.modules[spec.module] = module
+                elapsed = time.perf_counter() - started
+            else:
+                state = {
+                    name: getattr(old, name)
+                    for name in getattr(old, "reload_state", ()) if hasattr(old, name)
+                }
+                cog, _ = await self._create_cog(spec, module, timeout, state)
+
+                # ここから差し替え完了までawaitしない（コマンドは古いか新しいCogのどちらかで動く）
+                sys.modules[spec.module] = module
+                self.cogs[cog_name] = cog
+                elapsed = time.perf_counter() - started
+
+            timings = self.timings[cog_name]
+            timings['reload_time'] = elapsed
+            timings['reloads'] += 1
+            logger.info(f"Reloaded cog {cog_name} in {elapsed * 1000:.1f}ms")
+
+        if old is not None:
+            await self._retire(cog_name, old)
+        return elapsed
+
+    async def reload_all(self) -> int:
+        """
+        読み込み済みの全Cogを、依存されるCogから順にリロードします。
+
+        Returns:
+            int: リロードしたCogの数
+        """
+        names = self.dependency_order(list(self.cogs))
+        for name in names:
+            await self.reload_cog(name)
+        return len(names)
+
+    async def unload_cog(self, cog_name: str) -> None:
+        """
+        Cogをアンロードし、コマンドの登録を解除します。
+
+        実行中のコマンドの完了を待ってから teardown() を呼びます。
+        読み込み済みの他のCogが依存している場合はアンロードできません。
+
+        Args:
+            cog_name (str): Cog名
+        """
+        if cog_name not in self.specs:
+            raise CogLoadError(f"不明なCogです: {cog_name}")
+        dependents = [name for name in self.cogs if cog_name in self.specs[name].depends_on]
+        if dependents:
+            raise CogLoadError(f"Cog {', '.join(dependents)} が依存しているためアンロードできません")
+
+        async with self._locks.setdefault(cog_name, asyncio.Lock()):
+            cog = self.cogs.pop(cog_name, None)
+            self.unregister(cog_name)
+        if cog is not None:
+            await self._retire(cog_name, cog)
+        logger.info(f"Unloaded cog {cog_name}")
+
+    async def _load_locked(self, spec: CogSpec, trigger: Optional[str]) -> Any:
+        """ロックを取得した状態でCogを読み込みます"""
+        results = await asyncio.gather(
+            *[self.load_cog(dependency) for dependency in spec.depends_on], return_exceptions=True
+        )
+        for dependency, result in zip(spec.depends_on, results):
+            if isinstance(result, BaseException):
+                raise CogLoadError(f"依存するCog {dependency} を読み込めませんでした: {result}") from result
+
+        timeout = self._timeout(spec)
+        started = time.perf_counter()
+        try:
+            module = await get_offload_executor().run(importlib.import_module, spec.module, timeout=timeout)
+        except Exception as e:
+            raise CogLoadError(f"Cog {spec.name} のimportに失敗しました: {e}") from e
+        imported = time.perf_counter()
+
+        cog, initialized = await self._create_cog(spec, module, timeout)
+        finished = time.perf_counter()
+
+        self.cogs[spec.name] = cog
+        self.timings[spec.name].update({
+            'loaded': True,
+            'trigger': trigger,
+            'import_time': imported - started,
+            'init_time': initialized - imported,
+            'setup_time': finished - initialized,
+            'error': None
+        })
+        logger.info(
+            f"Loaded cog {spec.name} in {finished - started:.3f}s"
+            + (f" (triggered by {trigger})" if trigger else "")
+        )
+        return cog
+
+    async def _create_cog(
+        self,
+        spec: CogSpec,
+        module: ModuleType,
+        timeout: float,
+        state: Optional[Dict[str, Any]] = None
+    ) -> tuple:
+        """
+        モジュールからCogを作成し、引き継ぐ状態を設定して setup() を呼びます。
+
+        Returns:
+            tuple: (Cogのインスタンス, インスタンス作成が終わった時刻)
+        """
+        cog_class = getattr(module, spec.class_name, None)
+        if cog_class is None:
+            raise CogLoadError(f"{spec.module} にクラス {spec.class_name} がありません")
+        cog = cog_class(self.app)
+        missing = [method for method in spec.handlers if not callable(getattr(cog, method, None))]
+        if missing:
+            raise CogLoadError(f"Cog {spec.name} にメソッド {', '.join(missing)} がありません")
+        for name, value in (state or {}).items():
+            setattr(cog, name, value)
+        initialized = time.perf_counter()
+
+        setup = getattr(cog, "setup", None)
+        if setup is not None:
+            try:
+                await asyncio.wait_for(setup(), timeout)
+            except asyncio.TimeoutError:
+                raise CogLoadError(f"Cog {spec.name} の setup() が {timeout}秒以内に終わりませんでした")
+            except Exception as e:
+                raise CogLoadError(f"Cog {spec.name} の setup() に失敗しました: {e}") from e
+        return cog, initialized
+
+    async def _retire(self, cog_name: str, cog: Any) -> None:
+        """差し替え・アンロードしたCogの実行中のコマンドを待ってから teardown() を呼びます"""
+        key = id(cog)
+        # 呼び出し元自身がこのCogのコマンドの中にいる場合（/reload admin など）、その分は待たない
+        own = _running_cogs.get().count(key)
+        if self._inflight.get(key, 0) > own:
+            _, drained = self._drained.setdefault(key, (own, asyncio.Event()))
+            try:
+                await asyncio.wait_for(drained.wait(), self.setup_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Cog {cog_name}: in-flight commands did not finish before teardown")
+            self._drained.pop(key, None)
+        await self._call_teardown(cog_name, cog)
+
+    def _timeout(self, spec: CogSpec) -> float:
+        """Cogのimport・setup()・teardown()のタイムアウト秒数"""
+        return spec.timeout if spec.timeout is not None else self.setup_timeout
+
+    async def _teardown(self, cog_name: str) -> None:
+        """読み込み済みのCogの teardown() を呼びます"""
+        await self._call_teardown(cog_name, self.cogs.get(cog_name))
+
+    async def _call_teardown(self, cog_name: str, cog: Any) -> None:
+        """Cogの teardown() を呼びます（失敗はログに記録するだけ）"""
+        teardown = getattr(cog, "teardown", None)
+        if teardown is None:
+            return
+        spec = self.specs.get(cog_name)
+        timeout = self._timeout(spec) if spec is not None else self.setup_timeout
+        try:
+            await asyncio.wait_for(teardown(), timeout)
+        except Exception as e:
+            logger.error(f"Cog {cog_name} teardown failed: {e!r}")
+
+    def _check_dependencies(self) -> None:
+        """未登録のCogへの依存と循環依存がないことを確認します"""
+        for spec in self.specs.values():
+            for dependency in spec.depends_on:
+                if dependency not in self.specs:
+                    raise CogLoadError(f"Cog {spec.name} が依存する {dependency} は登録されていません")
+        self.dependency_order(list(self.specs))
+
+    def dependency_order(self, names: List[str]) -> List[str]:
+        """
+        依存されるCogが先になるよう並べます。
+
+        Returns:
+            List[str]: 並べ替えたCog名（names に含まれるもののみ）
+        """
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1: 訪問中, 2: 完了
+
+        def visit(name: str, path: List[str]) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                cycle = " -> ".join(path[path.index(name):] + [name])
+                raise CogLoadError(f"Cogの依存関係が循環しています: {cycle}")
+            state[name] = 1
+            for dependency in self.specs[name].depends_on:
+                if dependency in self.specs:
+                    visit(dependency, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in names:
+            visit(name, [])
+        wanted = set(names)
+        return [name for name in order if name in wanted]
+
+    async def get_handler(self, command: str) -> Callable[..., Awaitable[Any]]:
+        """
+        コマンドのハンドラーを取得します（Cogが未読み込みなら読み込みます）。
+
+        Args:
+            command (str): コマンド名
+
+        Returns:
+            Callable[..., Awaitable[Any]]: Cogのメソッド
+        """
+        route = self.router.route_command(command)
+        if route is None:
+            raise ValueError(f"不明なコマンドです: {command}")
+        return await self._resolve(route, command)
+
+    async def invoke(self, command: str, ctx: Any, *args: Any, **kwargs: Any) -> Any:
+        """
+        コマンドを実行します。
+
+        実行中のコマンド数をCogごとに数え、リロード・アンロード時は
+        その完了を待ってから元のCogを終了します。実行時間と成功・失敗は
+        メトリクスに記録されます。
+
+        Args:
+            command (str): コマンド名
+            ctx (Any): Slackコンテキスト
+            *args (Any): コマンドの引数
+            **kwargs (Any): コマンドのキーワード引数
+
+        Returns:
+            Any: コマンドの戻り値
+        """
+        route = self.router.route_command(command)
+        if route is None:
+            raise ValueError(f"不明なコマンドです: {command}")
+        handler = await self._resolve(route, command)
+        return await self._call(route, handler, ctx, *args, **kwargs)
+
+    async def dispatch_message(self, ctx: Any, text: str) -> Optional[Route]:
+        """
+        メッセージに一致するパターンのハンドラーを実行します。
+
+        ハンドラーは handler(ctx, match) の形で呼ばれます。
+
+        Args:
+            ctx (Any): Slackコンテキスト
+            text (str): メッセージ本文
+
+        Returns:
+            Optional[Route]: 実行した振り分け先（一致するパターンがなければNone）
+        """
+        route = self.router.route_message(text)
+        if route is not None:
+            handler = await self._resolve(route, route.method)
+            await self._call(route, handler, ctx, route.match)
+        return route
+
+    async def dispatch_action(self, ctx: Any, action_id: str) -> Optional[Route]:
+        """
+        action_id に一致するプレフィックスのハンドラーを実行します。
+
+        ハンドラーは handler(ctx, action_id) の形で呼ばれます。
+
+        Args:
+            ctx (Any): Slackコンテキスト
+            action_id (str): ブロックアクションの action_id
+
+        Returns:
+            Optional[Route]: 実行した振り分け先（一致するプレフィックスがなければNone）
+        """
+        route = self.router.route_action(action_id)
+        if route is not None:
+            handler = await self._resolve(route, action_id)
+            await self._call(route, handler, ctx, action_id)
+        return route
+
+    async def _resolve(self, route: Route, trigger: str) -> Callable[..., Awaitable[Any]]:
+        """振り分け先のメソッドを取得します（Cogが未読み込みなら読み込みます）"""
+        cog = self.cogs.get(route.cog_name)
+        if cog is None:
+            cog = await self.load_cog(route.cog_name, trigger=trigger)
+        return getattr(cog, route.method)
+
+    async def _call(
+        self,
+        route: Route,
+        handler: Callable[..., Awaitable[Any]],
+        ctx: Any,
+        *args: Any,
+        **kwargs: Any
+    ) -> Any:
+        """Cogごとの実行中のコマンド数を数え、実行時間を記録しながらハンドラーを実行します"""
+        key = id(handler.__self__)
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+        token = _running_cogs.set(_running_cogs.get() + (key,))
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = await handler(ctx, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            get_metrics().observe_command(route.cog_name, route.method, time.perf_counter() - started, failed)
+            _running_cogs.reset(token)
+            remaining = self._inflight[key] - 1
+            if remaining:
+                self._inflight[key] = remaining
+            else:
+                del self._inflight[key]
+            waiter = self._drained.get(key)
+            if waiter is not None and remaining <= waiter[0]:
+                waiter[1].set()
+
+    def get_startup_report(self) -> List[Dict[str, Any]]:
+        """
+        Cogごとの読み込み時間を取得します。
+
+        Returns:
+            List[Dict[str, Any]]: Cogごとの lazy, loaded, trigger, import_time, init_time, setup_time, error
+        """
+        return [dict(self.timings[name]) for name in self.specs]
+
+    def format_startup_report(self) -> str:
+        """
+        起動レポートを表示用の文字列にします。
+
+        Returns:
+            str: Cogごとの読み込み時間の一覧
+        """
+        lines = []
+        for entry in self.get_startup_report():
+            if entry['loaded']:
+                times = [entry['import_time'], entry['init_time'], entry['setup_time']]
+                detail = (
+                    f"{sum(times) * 1000:.1f}ms (import {times[0] * 1000:.1f}ms, "
+                    f"init {times[1] * 1000:.1f}ms, setup {times[2] * 1000:.1f}ms)"
+                )
+                if entry['trigger']:
+                    detail += f" on /{entry['trigger']}"
+            elif entry['error']:
+                detail = f"failed: {entry['error']}"
+            else:
+                detail = "deferred"
+            lines.append(f"{entry['cog']}: {detail}")
+        return "\n".join(lines)
@@ -0,0 +1,355 @@
+"""
+コマンドディスパッチャー
+
+Slackへの応答確認（ack）を即座に返し、ハンドラーの実行を
+同時実行数に上限のあるワーカープールへキューイングします。
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+__all__ = ["CommandDispatcher"]
+
+logger = logging.getLogger(__name__)
+
+# 待ち時間のパーセンタイル計算に保持するサンプル数
+WAIT_SAMPLE_SIZE = 1024
+
+class _Job:
+    """キューに積まれたハンドラー実行要求"""
+
+    __slots__ = ("cog_name", "handler", "ctx", "args", "kwargs", "enqueued_at")
+
+    def __init__(
+        self,
+        cog_name: str,
+        handler: Callable[..., Awaitable[Any]],
+        ctx: Any,
+        args: tuple,
+        kwargs: Dict[str, Any]
+    ):
+        self.cog_name = cog_name
+        self.handler = handler
+        self.ctx = ctx
+        self.args = args
+        self.kwargs = kwargs
+        self.enqueued_at = time.perf_counter()
+
+class CommandDispatcher:
+    """上限付きワーカープールでCogハンドラーを実行するディスパッチャー"""
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_queue_size: int = 200,
+        per_cog_limit: int = 4,
+        per_cog_limits: Optional[Dict[str, int]] = None,
+        enqueue_timeout: float = 1.0
+    ):
+        """
+        ディスパッチャーを初期化します。
+
+        Args:
+            max_workers (int): 全体の最大同時実行数
+            max_queue_size (int): 実行待ちキューの最大長
+            per_cog_limit (int): Cogごとの最大同時実行数（デフォルト）
+            per_cog_limits (Optional[Dict[str, int]]): Cog名ごとの個別上限
+            enqueue_timeout (float): キュー満杯時に空きを待つ秒数（0で即時拒否）
+        """
+        if max_workers < 1 or max_queue_size < 1 or per_cog_limit < 1:
+            raise ValueError("max_workers, max_queue_size, per_cog_limit は1以上である必要があります")
+
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.per_cog_limit = per_cog_limit
+        self.per_cog_limits: Dict[str, int] = dict(per_cog_limits or {})
+        self.enqueue_timeout = enqueue_timeout
+
+        # Cogごとの実行待ちキュー（ラウンドロビンで公平に取り出す）
+        self._queues: Dict[str, Deque[_Job]] = {}
+        self._ready: Deque[str] = deque()
+        self._active_per_cog: Dict[str, int] = {}
+        self._active = 0
+        self._pending = 0
+        self._tasks: set = set()
+        self._space_waiters: Deque[asyncio.Future] = deque()
+        self._running = False
+
+        # メトリクス
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_samples: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    @property
+    def queue_depth(self) -> int:
+        """実行待ちのジョブ数"""
+        return self._pending
+
+    @property
+    def active_count(self) -> int:
+        """実行中のジョブ数"""
+        return self._active
+
+    def get_cog_limit(self, cog_name: str) -> int:
+        """
+        Cogの同時実行上限を取得します。
+
+        Args:
+            cog_name (str): Cog名
+
+        Returns:
+            int: 同時実行上限
+        """
+        return self.per_cog_limits.get(cog_name, self.per_cog_limit)
+
+    async def start(self) -> None:
+        """ディスパッチャーを開始します"""
+        self._running = True
+        logger.info(
+            f"Dispatcher started (workers={self.max_workers}, queue={self.max_queue_size})"
+        )
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        ディスパッチャーを停止します。
+
+        実行中・実行待ちのジョブが完了するまで最大timeout秒待機し、
+        残ったジョブはキャンセルします。
+
+        Args:
+            timeout (float): 完了待ちの最大秒数
+        """
+        self._running = False
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._tasks) and time.monotonic() < deadline:
+            if self._tasks:
+                await asyncio.wait(
+                    set(self._tasks),
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            else:
+                await asyncio.sleep(0.01)
+
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        dropped = self._pending
+        self._queues.clear()
+        self._ready.clear()
+        self._pending = 0
+        while self._space_waiters:
+            waiter = self._space_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+        if dropped:
+            logger.warning(f"Dispatcher stopped with {dropped} queued jobs dropped")
+        logger.info("Dispatcher stopped")
+
+    async def submit(
+        self,
+        cog_name: str,
+        handler: Callable[..., Awaitable[Any]],
+        ctx: Any,
+        *args: Any,
+        **kwargs: Any
+    ) -> bool:
+        """
+        応答確認を返してからハンドラーの実行をキューに積みます。
+
+        Args:
+            cog_name (str): ハンドラーを持つCog名
+            handler (Callable[..., Awaitable[Any]]): 実行するハンドラー
+            ctx (Any): Slackコンテキスト
+            *args (Any): ハンドラーに渡す引数
+            **kwargs (Any): ハンドラーに渡すキーワード引数
+
+        Returns:
+            bool: キューに積めた場合True、満杯で拒否した場合False
+        """
+        await self._ack(ctx)
+
+        if not self._running:
+            self.rejected += 1
+            await self._respond_busy(ctx, "⚠️ ボットは停止処理中です。しばらくしてから再度お試しください。")
+            return False
+
+        if self._pending >= self.max_queue_size and not await self._wait_for_space():
+            self.rejected += 1
+            logger.warning(
+                f"Dispatcher queue full, rejected {cog_name}.{getattr(handler, '__name__', handler)}"
+            )
+            await self._respond_busy(ctx, "⏳ 現在混み合っています。しばらくしてから再度お試しください。")
+            return False
+
+        job = _Job(cog_name, handler, ctx, args, kwargs)
+        queue = self._queues.get(cog_name)
+        if queue is None:
+            queue = self._queues[cog_name] = deque()
+        if not queue:
+            self._ready.append(cog_name)
+        queue.append(job)
+        self._pending += 1
+        self.submitted += 1
+
+        self._pump()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ディスパッチャーのメトリクスを取得します。
+
+        Returns:
+            Dict[str, Any]: キュー深さ・待ち時間・Cogごとの状況
+        """
+        samples = sorted(self._wait_samples)
+        started = self.completed + self.failed + self._active
+        cogs = set(self._queues) | set(self._active_per_cog)
+
+        return {
+            'queue_depth': self._pending,
+            'active': self._active,
+            'max_workers': self.max_workers,
+            'max_queue_size': self.max_queue_size,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'wait_time_avg': self._wait_total / started if started else 0.0,
+            'wait_time_max': self._wait_max,
+            'wait_time_p95': _percentile(samples, 0.95),
+            'cogs': {
+                cog: {
+                    'queued': len(self._queues.get(cog, ())),
+                    'active': self._active_per_cog.get(cog, 0),
+                    'limit': self.get_cog_limit(cog)
+                }
+                for cog in sorted(cogs)
+            }
+        }
+
+    def _pump(self) -> None:
+        """空きがある限り実行待ちのジョブを開始します"""
+        skipped: List[str] = []
+        while self._active < self.max_workers and self._ready:
+            cog_name = self._ready.popleft()
+            if self._active_per_cog.get(cog_name, 0) >= self.get_cog_limit(cog_name):
+                # このCogは上限に達しているので、完了時に再登録する
+                skipped.append(cog_name)
+                continue
+
+            queue = self._queues[cog_name]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(cog_name)
+            self._pending -= 1
+            self._start_job(job)
+            self._wake_space_waiter()
+
+        self._ready.extend(skipped)
+
+    def _start_job(self, job: _Job) -> None:
+        """ジョブの実行タスクを作成します"""
+        wait_time = time.perf_counter() - job.enqueued_at
+        self._wait_total += wait_time
+        self._wait_samples.append(wait_time)
+        if wait_time > self._wait_max:
+            self._wait_max = wait_time
+
+        self._active += 1
+        self._active_per_cog[job.cog_name] = self._active_per_cog.get(job.cog_name, 0) + 1
+
+        task = asyncio.ensure_future(self._run_job(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_job(self, job: _Job) -> None:
+        """ジョブを実行し、完了後に次のジョブを開始します"""
+        try:
+            await job.handler(job.ctx, *job.args, **job.kwargs)
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.failed += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(
+                f"Handler {job.cog_name}.{getattr(job.handler, '__name__', job.handler)} failed: {e}",
+                exc_info=True
+            )
+        finally:
+            self._active -= 1
+            remaining = self._active_per_cog.get(job.cog_name, 1) - 1
+            if remaining:
+                self._active_per_cog[job.cog_name] = remaining
+            else:
+                self._active_per_cog.pop(job.cog_name, None)
+                if not self._queues.get(job.cog_name):
+                    self._queues.pop(job.cog_name, None)
+            self._pump()
+
+    async def _wait_for_space(self) -> bool:
+        """キューに空きができるまでenqueue_timeout秒待機します"""
+        if self.enqueue_timeout <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._space_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if waiter in self._space_waiters:
+                self._space_waiters.remove(waiter)
+        return self._running and self._pending < self.max_queue_size
+
+    def _wake_space_waiter(self) -> None:
+        """空き待ちのsubmitを1件起こします"""
+        while self._space_waiters:
+            waiter = self._space_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    @staticmethod
+    async def _ack(ctx: Any) -> None:
+        """コンテキストが応答確認をサポートしていれば即座に返します"""
+        ack = getattr(ctx, "ack", None)
+        if ack is None:
+            return
+        try:
+            await ack()
+        except Exception as e:
+            logger.warning(f"Failed to ack command: {e}")
+
+    @staticmethod
+    async def _respond_busy(ctx: Any, message: str) -> None:
+        """混雑時のメッセージを返します"""
+        try:
+            await ctx.respond(message)
+        except Exception as e:
+            logger.warning(f"Failed to send busy response: {e}")
+
+def _percentile(sorted_values: List[float], ratio: float) -> float:
+    """
+    ソート済みの値からパーセンタイルを求めます。
+
+    Args:
+        sorted_values (List[float]): ソート済みの値
+        ratio (float): 0〜1の割合
+
+    Returns:
+        float: パーセンタイル値（値がない場合0.0）
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * ratio))
+    return sorted_values[index]
@@ -0,0 +1,304 @@
+"""
+オフロード実行
+
+CPU負荷の高い処理をスレッドプール・プロセスプールへ逃がし、
+イベントループ（pingなどの応答性）を止めないようにします。
+"""
+import asyncio
+import functools
+import importlib
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+__all__ = [
+    "OffloadExecutor",
+    "configure_offload",
+    "get_offload_executor",
+    "offload"
+]
+
+logger = logging.getLogger(__name__)
+
+POOL_TYPES = ("thread", "process")
+
+class _FunctionRef:
+    """
+    モジュール名と修飾名で関数を参照するピックル可能なラッパー
+
+    デコレートされた関数はモジュール上の名前がラッパーを指すため、
+    プロセスプールへは名前で渡し、子プロセス側で元の関数を解決します。
+    """
+
+    __slots__ = ("module", "qualname")
+
+    def __init__(self, module: str, qualname: str):
+        self.module = module
+        self.qualname = qualname
+
+    def __getstate__(self):
+        return (self.module, self.qualname)
+
+    def __setstate__(self, state):
+        self.module, self.qualname = state
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        target: Any = importlib.import_module(self.module)
+        for part in self.qualname.split("."):
+            target = getattr(target, part)
+        target = getattr(target, "__wrapped__", target)
+        return target(*args, **kwargs)
+
+def _timed_call(func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> tuple:
+    """
+    ワーカー内で関数を実行し、実行時間と結果を返します。
+
+    Returns:
+        tuple: (例外発生フラグ, 結果または例外, 実行秒数)
+    """
+    start = time.perf_counter()
+    try:
+        return False, func(*args, **kwargs), time.perf_counter() - start
+    except Exception as e:
+        return True, e, time.perf_counter() - start
+
+class _PoolStats:
+    """プールごとの利用統計"""
+
+    __slots__ = (
+        "max_workers", "created_at", "submitted", "in_flight",
+        "completed", "failed", "timeouts", "cancelled", "busy_time"
+    )
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.created_at = time.monotonic()
+        self.submitted = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.busy_time = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.created_at
+        capacity = elapsed * self.max_workers
+        return {
+            'max_workers': self.max_workers,
+            'submitted': self.submitted,
+            'in_flight': self.in_flight,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'cancelled': self.cancelled,
+            'busy_time': self.busy_time,
+            'utilization': min(self.busy_time / capacity, 1.0) if capacity > 0 else 0.0
+        }
+
+class OffloadExecutor:
+    """共有スレッドプール・プロセスプールを管理するエグゼキューター"""
+
+    def __init__(
+        self,
+        thread_workers: int = 4,
+        process_workers: int = 2,
+        default_timeout: Optional[float] = None
+    ):
+        """
+        エグゼキューターを初期化します。プールは初回利用時に作成されます。
+
+        Args:
+            thread_workers (int): スレッドプールのワーカー数
+            process_workers (int): プロセスプールのワーカー数
+            default_timeout (Optional[float]): デフォルトのタイムアウト秒数
+        """
+        if thread_workers < 1 or process_workers < 1:
+            raise ValueError("ワーカー数は1以上である必要があります")
+
+        self.default_timeout = default_timeout
+        self._workers = {"thread": thread_workers, "process": process_workers}
+        self._pools: Dict[str, Executor] = {}
+        self._stats = {
+            "thread": _PoolStats(thread_workers),
+            "process": _PoolStats(process_workers)
+        }
+
+    def _get_pool(self, pool: str) -> Executor:
+        """プールを取得します（未作成なら作成）"""
+        executor = self._pools.get(pool)
+        if executor is None:
+            if pool == "thread":
+                executor = ThreadPoolExecutor(
+                    max_workers=self._workers["thread"],
+                    thread_name_prefix="offload"
+                )
+            else:
+                executor = ProcessPoolExecutor(max_workers=self._workers["process"])
+            self._pools[pool] = executor
+        return executor
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        pool: str = "thread",
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        同期関数をプールで実行し、結果を待ちます。
+
+        タイムアウトや呼び出し元のキャンセル時は、未着手のジョブを取り消します。
+        既に実行中のジョブは中断できないため、完了まで実行されます。
+
+        Args:
+            func (Callable[..., Any]): 実行する同期関数
+            *args (Any): 関数に渡す引数
+            pool (str): 使用するプール（thread, process）
+            timeout (Optional[float]): タイムアウト秒数（Noneでdefault_timeout）
+            **kwargs (Any): 関数に渡すキーワード引数
+
+        Returns:
+            Any: 関数の戻り値
+
+        Raises:
+            ValueError: 不明なプールが指定された場合
+            asyncio.TimeoutError: タイムアウトした場合
+        """
+        if pool not in POOL_TYPES:
+            raise ValueError(f"不明なプールです: {pool}")
+
+        stats = self._stats[pool]
+        if timeout is None:
+            timeout = self.default_timeout
+
+        future = self._get_pool(pool).submit(_timed_call, func, args, kwargs)
+        stats.submitted += 1
+        stats.in_flight += 1
+        try:
+            failed, result, elapsed = await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout
+            )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            future.cancel()
+            logger.warning(f"Offloaded call {_describe(func)} timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            future.cancel()
+            raise
+        except Exception:
+            # ピックル不可能な引数などプール側の失敗
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+        stats.busy_time += elapsed
+        if failed:
+            stats.failed += 1
+            raise result
+        stats.completed += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        プールごとの利用統計を取得します。
+
+        Returns:
+            Dict[str, Dict[str, Any]]: プール名をキーにした統計情報
+        """
+        return {pool: stats.to_dict() for pool, stats in self._stats.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        すべてのプールを停止します。
+
+        Args:
+            wait (bool): 実行中のジョブの完了を待つか
+        """
+        for executor in self._pools.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self._pools.clear()
+
+_default_executor: Optional[OffloadExecutor] = None
+
+def configure_offload(
+    thread_workers: int = 4,
+    process_workers: int = 2,
+    default_timeout: Optional[float] = None
+) -> OffloadExecutor:
+    """
+    共有エグゼキューターを設定します。既存のエグゼキューターは停止されます。
+
+    Args:
+        thread_workers (int): スレッドプールのワーカー数
+        process_workers (int): プロセスプールのワーカー数
+        default_timeout (Optional[float]): デフォルトのタイムアウト秒数
+
+    Returns:
+        OffloadExecutor: 新しい共有エグゼキューター
+    """
+    global _default_executor
+
+    if _default_executor is not None:
+        _default_executor.shutdown(wait=False)
+    _default_executor = OffloadExecutor(thread_workers, process_workers, default_timeout)
+    return _default_executor
+
+def get_offload_executor() -> OffloadExecutor:
+    """
+    共有エグゼキューターを取得します（未設定ならデフォルト設定で作成）。
+
+    Returns:
+        OffloadExecutor: 共有エグゼキューター
+    """
+    global _default_executor
+
+    if _default_executor is None:
+        _default_executor = OffloadExecutor()
+    return _default_executor
+
+def offload(pool: str = "thread", timeout: Optional[float] = None) -> Callable:
+    """
+    同期関数・メソッドを共有プールで実行する非同期関数に変換するデコレータ
+
+    processプールでは関数をモジュール名と修飾名で子プロセスに渡すため、
+    モジュールのトップレベルかクラス直下で定義し、引数（メソッドならself含む）は
+    ピックル可能である必要があります。
+
+    Args:
+        pool (str): 使用するプール（thread, process）
+        timeout (Optional[float]): タイムアウト秒数
+
+    Returns:
+        Callable: デコレータ
+    """
+    if pool not in POOL_TYPES:
+        raise ValueError(f"不明なプールです: {pool}")
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(func):
+            raise TypeError(f"{func.__qualname__} は同期関数である必要があります")
+
+        target = _FunctionRef(func.__module__, func.__qualname__) if pool == "process" else func
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return await get_offload_executor().run(
+                target, *args, pool=pool, timeout=timeout, **kwargs
+            )
+
+        wrapper.offload_pool = pool
+        return wrapper
+
+    return decorator
+
+def _describe(func: Callable[..., Any]) -> str:
+    """ログ用に関数名を取得します"""
+    if isinstance(func, _FunctionRef):
+        return f"{func.module}.{func.qualname}"
+    return getattr(func, "__qualname__", repr(func))
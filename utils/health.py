@@ -0,0 +1,150 @@
+"""
+ヘルスチェック
+
+コンテナのヘルスチェック用に /health（生存確認）と /ready（リクエストを
+受け付けられるか）を提供します。
+
+どちらも記録済みの値（イベントループの遅延・ディスパッチャーのキュー深さ・
+Slackとの接続状態・Cogの読み込み状況）を読むだけで、Slack APIなどの外部サービスには
+アクセスしないため、イベントループが動いていれば即座に応答します。
+"""
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cog_loader import CogLoader
+from .dispatcher import CommandDispatcher
+from .metrics import LoopLagMonitor
+
+__all__ = ["HealthCheck"]
+
+logger = logging.getLogger(__name__)
+
+class HealthCheck:
+    """ボットの状態から生存・準備完了を判定します"""
+
+    def __init__(
+        self,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        dispatcher: Optional[CommandDispatcher] = None,
+        cog_loader: Optional[CogLoader] = None,
+        connection_state: Optional[Callable[[], Optional[bool]]] = None,
+        max_loop_lag: float = 5.0,
+        max_queue_ratio: float = 0.9
+    ):
+        """
+        ヘルスチェックを初期化します。
+
+        Args:
+            loop_monitor (Optional[LoopLagMonitor]): イベントループの遅延の計測
+            dispatcher (Optional[CommandDispatcher]): コマンドディスパッチャー
+            cog_loader (Optional[CogLoader]): Cogローダー
+            connection_state (Optional[Callable[[], Optional[bool]]]): Slackと接続中か返す関数（不明ならNone）
+            max_loop_lag (float): これを超える遅延で生存確認を失敗させる秒数
+            max_queue_ratio (float): キューがこの割合を超えて埋まっていれば準備完了としない
+        """
+        self.loop_monitor = loop_monitor
+        self.dispatcher = dispatcher
+        self.cog_loader = cog_loader
+        self.connection_state = connection_state
+        self.max_loop_lag = max_loop_lag
+        self.max_queue_ratio = max_queue_ratio
+        self.started_at = time.time()
+        self.ready = False
+
+    def mark_ready(self, ready: bool = True) -> None:
+        """
+        起動処理が終わったことを記録します（停止処理の開始時は False）。
+
+        Args:
+            ready (bool): 準備完了か
+        """
+        self.ready = ready
+
+    def check_health(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        生存確認を行います。
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: (正常か, 応答の内容)
+        """
+        lag = self._loop_lag()
+        healthy = lag is None or lag <= self.max_loop_lag
+        return healthy, {
+            'status': "ok" if healthy else "unhealthy",
+            'uptime': time.time() - self.started_at,
+            'event_loop_lag': lag
+        }
+
+    def check_ready(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        準備完了かを確認します。
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: (準備完了か, 応答の内容と失敗した理由)
+        """
+        healthy, body = self.check_health()
+        reasons = [] if healthy else ["event loop lag"]
+        if not self.ready:
+            reasons.append("starting")
+
+        if self.dispatcher is not None:
+            dispatcher = self.dispatcher
+            body['queue'] = {
+                'depth': dispatcher.queue_depth,
+                'active': dispatcher.active_count,
+                'max_queue_size': dispatcher.max_queue_size
+            }
+            if dispatcher.queue_depth >= dispatcher.max_queue_size * self.max_queue_ratio:
+                reasons.append("queue full")
+
+        connected = self.connection_state() if self.connection_state is not None else None
+        body['slack_connected'] = connected
+        if connected is False:
+            reasons.append("slack disconnected")
+
+        if self.cog_loader is not None:
+            loader = self.cog_loader
+            body['cogs'] = {
+                name: "loaded" if name in loader.cogs else "failed" if name in loader.failed else "deferred"
+                for name in loader.specs
+            }
+            missing = [name for name, spec in loader.specs.items() if spec.required and name not in loader.cogs]
+            if missing:
+                reasons.append(f"cogs not loaded: {', '.join(missing)}")
+
+        ready = not reasons
+        body['status'] = "ready" if ready else "not_ready"
+        body['reasons'] = reasons
+        return ready, body
+
+    def add_routes(self, server: Any) -> None:
+        """
+        /health と /ready を MetricsServer に追加します。
+
+        Args:
+            server (Any): MetricsServer
+        """
+        server.add_route("/health", self._handle_health)
+        server.add_route("/ready", self._handle_ready)
+
+    async def _handle_health(self, request: Any) -> Any:
+        return _json_response(*self.check_health())
+
+    async def _handle_ready(self, request: Any) -> Any:
+        return _json_response(*self.check_ready())
+
+    def _loop_lag(self) -> Optional[float]:
+        """直近のイベントループの遅延（計測していなければNone）"""
+        return self.loop_monitor.lag if self.loop_monitor is not None else None
+
+def _json_response(ok: bool, body: Dict[str, Any]) -> Any:
+    """判定結果をJSONで返します（失敗時は503）"""
+    from aiohttp import web
+
+    return web.Response(
+        body=json.dumps(body, ensure_ascii=False).encode('utf-8'),
+        status=200 if ok else 503,
+        content_type="application/json"
+    )
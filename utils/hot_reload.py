@@ -0,0 +1,521 @@
+"""
+ホットリロード
+
+Cog・ユーティリティのソースの変更を監視し、変更されたモジュールと、それを
+（間接的に）importしているモジュール・Cogだけをリロードします。
+
+- Linuxではinotifyでディレクトリを監視し、それ以外の環境では更新時刻をポーリングします
+- 保存が続いても、一定時間変更がなくなってからまとめてリロードします（デバウンス）
+- ファイルの内容のハッシュが変わっていなければリロードしません
+- ローダー自身や、プロセス全体で共有するインスタンスを持つモジュールはリロードせず、
+  変更されたモジュールに依存している場合も含めて再起動が必要であることをログに記録します
+"""
+import ast
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import importlib
+import logging
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .cog_loader import CogLoader
+from .executor import get_offload_executor
+
+__all__ = ["ModuleGraph", "HotReloader"]
+
+logger = logging.getLogger(__name__)
+
+# inotifyのイベント（linux/inotify.h）
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+# リロードできないモジュール（変更時は再起動が必要）。実行中のローダー自身と、
+# プロセス全体で共有するインスタンスを持つモジュール（リロードすると状態が二重になる）
+_NON_RELOADABLE = frozenset({
+    __name__,
+    CogLoader.__module__,
+    "utils.cache",
+    "utils.executor",
+    "utils.logging_utils",
+    "utils.metrics",
+    "utils.rate_limit"
+})
+
+def _file_hash(path: str) -> Optional[str]:
+    """ファイルの内容のハッシュを求めます（ファイルがなければNone）"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+class ModuleGraph:
+    """
+    監視対象のモジュール間のimport関係
+
+    ソースをimportせずに解析し、あるモジュールを（間接的に）importしている
+    モジュールを求めます。
+    """
+
+    def __init__(self, root: str = ".", directories: Iterable[str] = ("cogs", "utils")):
+        """
+        モジュールの依存関係を初期化します。
+
+        Args:
+            root (str): モジュール名の基準となるディレクトリ（sys.path 上にあること）
+            directories (Iterable[str]): 監視するパッケージのディレクトリ（root からの相対パス）
+        """
+        self.root = Path(root).resolve()
+        self.directories = [self.root / directory for directory in directories]
+        self.paths: Dict[str, str] = {}
+        self._imports: Dict[str, Set[str]] = {}
+        self._importers: Dict[str, Set[str]] = {}
+
+    def build(self) -> None:
+        """監視対象の全ファイルを解析します"""
+        self.paths.clear()
+        for directory in self.directories:
+            for path in sorted(directory.rglob("*.py")):
+                module = self.module_name(str(path))
+                if module is not None:
+                    self.paths[module] = str(path)
+        self._imports.clear()
+        self._importers = {module: set() for module in self.paths}
+        for module in self.paths:
+            self.update(module)
+
+    def module_name(self, path: str) -> Optional[str]:
+        """
+        ファイルのパスをモジュール名にします。
+
+        Args:
+            path (str): ソースファイルのパス
+
+        Returns:
+            Optional[str]: モジュール名（監視対象外ならNone）
+        """
+        resolved = Path(path).resolve()
+        if resolved.suffix != ".py" or not any(
+            directory == resolved.parent or directory in resolved.parents for directory in self.directories
+        ):
+            return None
+        parts = list(resolved.relative_to(self.root).with_suffix("").parts)
+        if parts[-1] == "__init__":
+            parts.pop()
+        return ".".join(parts) or None
+
+    def update(self, module: str) -> None:
+        """
+        モジュールのimportを解析し直します。
+
+        Args:
+            module (str): モジュール名
+        """
+        for imported in self._imports.pop(module, set()):
+            self._importers.get(imported, set()).discard(module)
+
+        path = self.paths.get(module)
+        if path is None or not os.path.exists(path):
+            return
+        try:
+            tree = ast.parse(Path(path).read_text(encoding='utf-8'), filename=path)
+        except (SyntaxError, UnicodeDecodeError) as e:
+            logger.warning(f"Hot reload: failed to parse {path}: {e}")
+            return
+
+        imports = self._resolve_imports(module, path, tree)
+        self._imports[module] = imports
+        for imported in imports:
+            self._importers.setdefault(imported, set()).add(module)
+
+    def add(self, path: str) -> Optional[str]:
+        """
+        新しく作成されたファイルを監視対象に加えます。
+
+        Args:
+            path (str): ソースファイルのパス
+
+        Returns:
+            Optional[str]: モジュール名（監視対象外ならNone）
+        """
+        module = self.module_name(path)
+        if module is not None:
+            self.paths[module] = str(Path(path).resolve())
+            self._importers.setdefault(module, set())
+            self.update(module)
+        return module
+
+    def dependents(self, modules: Iterable[str]) -> Set[str]:
+        """
+        モジュールを（間接的に）importしているモジュールを求めます。
+
+        Args:
+            modules (Iterable[str]): 変更されたモジュール名
+
+        Returns:
+            Set[str]: 変更されたモジュール自身を含む、影響を受けるモジュール名
+        """
+        affected: Set[str] = set()
+        stack = list(modules)
+        while stack:
+            module = stack.pop()
+            if module in affected:
+                continue
+            affected.add(module)
+            stack.extend(self._importers.get(module, ()))
+        return affected
+
+    def order(self, modules: Iterable[str]) -> List[str]:
+        """
+        importされるモジュールが先になるよう並べます（循環import は検出順）。
+
+        Args:
+            modules (Iterable[str]): モジュール名
+
+        Returns:
+            List[str]: 並べ替えたモジュール名
+        """
+        wanted = set(modules)
+        ordered: List[str] = []
+        visited: Set[str] = set()
+
+        def visit(module: str) -> None:
+            if module in visited:
+                return
+            visited.add(module)
+            for imported in sorted(self._imports.get(module, ())):
+                if imported in wanted:
+                    visit(imported)
+            ordered.append(module)
+
+        for module in sorted(wanted):
+            visit(module)
+        return ordered
+
+    def _resolve_imports(self, module: str, path: str, tree: ast.AST) -> Set[str]:
+        """import文から、監視対象のモジュール名を取り出します"""
+        package = module if path.endswith("__init__.py") else module.rpartition(".")[0]
+        found: Set[str] = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                if node.level:
+                    base_parts = package.split(".") if package else []
+                    base_parts = base_parts[:len(base_parts) - (node.level - 1)]
+                    base = ".".join(base_parts + ([node.module] if node.module else []))
+                else:
+                    base = node.module or ""
+                # from package import submodule はサブモジュール、それ以外はモジュール自身に依存する
+                names = [
+                    f"{base}.{alias.name}" if f"{base}.{alias.name}" in self.paths else base
+                    for alias in node.names
+                ]
+            else:
+                continue
+            # 親パッケージ（__init__.py）の再エクスポートは使わないため、依存に含めない
+            found.update(name for name in names if name in self.paths and name != module)
+        return found
+
+class _InotifyWatcher:
+    """inotifyでディレクトリを監視し、変更されたファイルのパスを通知します"""
+
+    def __init__(self, directories: List[Path], callback: Callable[[str], None]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._callback = callback
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 に失敗しました")
+        self._watches: Dict[int, str] = {}
+        for directory in directories:
+            for path in [directory, *[p for p in directory.rglob("*") if p.is_dir()]]:
+                self._add_watch(str(path))
+
+    def _add_watch(self, path: str) -> None:
+        """ディレクトリを監視対象に加えます"""
+        if "__pycache__" in path:
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            logger.warning(f"Hot reload: cannot watch {path} (errno {ctypes.get_errno()})")
+            return
+        self._watches[wd] = path
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.add_reader(self._fd, self._read)
+
+    def stop(self, loop: asyncio.AbstractEventLoop) -> None:
+        loop.remove_reader(self._fd)
+        os.close(self._fd)
+
+    def _read(self) -> None:
+        """届いたイベントを読み込みます"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors='replace')
+            offset += length
+
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & _IN_CREATE:
+                    self._add_watch(path)
+            elif name.endswith(".py"):
+                self._callback(path)
+
+class _PollingWatcher:
+    """更新時刻を定期的に確認し、変更されたファイルのパスを通知します（inotifyがない環境用）"""
+
+    def __init__(self, directories: List[Path], callback: Callable[[str], None], interval: float = 1.0):
+        self._directories = directories
+        self._callback = callback
+        self._interval = interval
+        self._mtimes = self._scan()
+        self._task: Optional[asyncio.Task] = None
+
+    def _scan(self) -> Dict[str, float]:
+        mtimes: Dict[str, float] = {}
+        for directory in self._directories:
+            for path in directory.rglob("*.py"):
+                try:
+                    mtimes[str(path)] = path.stat().st_mtime
+                except OSError:
+                    pass
+        return mtimes
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._task = loop.create_task(self._run())
+
+    def stop(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            mtimes = await get_offload_executor().run(self._scan)
+            for path in mtimes.keys() | self._mtimes.keys():
+                if mtimes.get(path) != self._mtimes.get(path):
+                    self._callback(path)
+            self._mtimes = mtimes
+
+class HotReloader:
+    """ファイルの変更を監視し、影響を受けるモジュールとCogだけをリロードします"""
+
+    def __init__(
+        self,
+        loader: CogLoader,
+        root: str = ".",
+        directories: Iterable[str] = ("cogs",),
+        debounce: float = 0.5,
+        use_inotify: Optional[bool] = None
+    ):
+        """
+        ホットリロードを初期化します。
+
+        Args:
+            loader (CogLoader): Cogをリロードするローダー
+            root (str): モジュール名の基準となるディレクトリ
+            directories (Iterable[str]): 監視するディレクトリ（root からの相対パス）
+            debounce (float): 最後の変更からリロードまで待つ秒数
+            use_inotify (Optional[bool]): inotifyを使うか（Noneで使える場合に使う）
+        """
+        self.loader = loader
+        self.debounce = debounce
+        self.graph = ModuleGraph(root, directories)
+        self._use_inotify = sys.platform.startswith("linux") if use_inotify is None else use_inotify
+        self._hashes: Dict[str, Optional[str]] = {}
+        self._pending: Set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._watcher: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # メトリクス
+        self.reloads = 0
+        self.skipped_unchanged = 0
+        self.errors = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    async def start(self) -> None:
+        """依存関係とファイルのハッシュを読み込み、監視を開始します"""
+        self._loop = asyncio.get_running_loop()
+        await get_offload_executor().run(self._index)
+
+        if self._use_inotify:
+            try:
+                self._watcher = _InotifyWatcher(self.graph.directories, self._on_change)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"Hot reload: inotify unavailable ({e}), falling back to polling")
+        if self._watcher is None:
+            self._watcher = _PollingWatcher(self.graph.directories, self._on_change)
+        self._watcher.start(self._loop)
+        logger.info(
+            f"Hot reload watching {len(self.graph.paths)} modules "
+            f"with {type(self._watcher).__name__.strip('_')}"
+        )
+
+    async def stop(self) -> None:
+        """監視を停止します"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._watcher is not None:
+            self._watcher.stop(self._loop)
+            self._watcher = None
+        if self._reload_task is not None:
+            await asyncio.gather(self._reload_task, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        ホットリロードの統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: リロード回数・内容が同じためスキップした回数・直近の結果
+        """
+        return {
+            'modules': len(self.graph.paths),
+            'reloads': self.reloads,
+            'skipped_unchanged': self.skipped_unchanged,
+            'errors': self.errors,
+            'pending': len(self._pending),
+            'last_report': self.last_report
+        }
+
+    async def reload_paths(self, paths: Iterable[str]) -> Dict[str, Any]:
+        """
+        変更されたファイルに影響を受けるモジュールとCogをリロードします。
+
+        Args:
+            paths (Iterable[str]): 変更されたファイルのパス
+
+        Returns:
+            Dict[str, Any]: changed, skipped, modules, cogs, restart_required, errors, elapsed
+        """
+        started = time.perf_counter()
+        changed: List[str] = []
+        skipped: List[str] = []
+        restart_required: Set[str] = set()
+        for path in sorted(set(paths)):
+            resolved = str(Path(path).resolve())
+            module = self.graph.module_name(resolved)
+            if module is None:
+                continue
+            digest = _file_hash(resolved)
+            if digest is not None and digest == self._hashes.get(resolved):
+                skipped.append(module)
+                continue
+            self._hashes[resolved] = digest
+            if module not in self.graph.paths:
+                self.graph.add(resolved)
+            else:
+                self.graph.update(module)
+            if digest is None:
+                continue
+            if module in _NON_RELOADABLE:
+                restart_required.add(module)
+                skipped.append(module)
+                continue
+            changed.append(module)
+
+        self.skipped_unchanged += sum(1 for module in skipped if module not in _NON_RELOADABLE)
+        report: Dict[str, Any] = {
+            'changed': changed, 'skipped': skipped, 'modules': [], 'cogs': [],
+            'restart_required': [], 'errors': {}
+        }
+        if changed:
+            affected = self.graph.dependents(changed)
+            # 変更されたモジュールに依存していても、リロードできないモジュールは再起動まで古いまま
+            restart_required.update(module for module in affected if module in _NON_RELOADABLE)
+            affected -= _NON_RELOADABLE
+            cog_names = {spec.module: name for name, spec in self.loader.specs.items()}
+            modules = [
+                module for module in self.graph.order(affected)
+                if module not in cog_names and module in sys.modules
+            ]
+            if modules:
+                errors = await get_offload_executor().run(_reload_modules, modules)
+                report['errors'].update(errors)
+                report['modules'] = [module for module in modules if module not in errors]
+
+            cogs = [cog_names[module] for module in affected if module in cog_names]
+            for name in self.loader.dependency_order(cogs):
+                try:
+                    await self.loader.reload_cog(name)
+                    report['cogs'].append(name)
+                except Exception as e:
+                    report['errors'][name] = str(e)
+
+        report['restart_required'] = sorted(restart_required)
+        if restart_required:
+            logger.warning(
+                f"Hot reload: {', '.join(report['restart_required'])} cannot be reloaded, restart required"
+            )
+        report['elapsed'] = time.perf_counter() - started
+        self.last_report = report
+        if changed:
+            self.reloads += 1
+            self.errors += len(report['errors'])
+            logger.info(
+                f"Hot reload: {len(changed)} changed, reloaded modules {report['modules']} "
+                f"and cogs {report['cogs']} in {report['elapsed'] * 1000:.1f}ms"
+            )
+            for name, error in report['errors'].items():
+                logger.error(f"Hot reload of {name} failed: {error}")
+        return report
+
+    def _index(self) -> None:
+        """モジュールの依存関係と、全ファイルのハッシュを読み込みます"""
+        self.graph.build()
+        self._hashes = {path: _file_hash(path) for path in self.graph.paths.values()}
+
+    def _on_change(self, path: str) -> None:
+        """ファイルの変更を記録し、デバウンスのタイマーを延長します"""
+        self._pending.add(path)
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self) -> None:
+        """たまった変更のリロードを開始します（リロード中なら完了後に行います）"""
+        self._timer = None
+        if self._reload_task is not None and not self._reload_task.done():
+            self._timer = self._loop.call_later(self.debounce, self._flush)
+            return
+        paths, self._pending = self._pending, set()
+        self._reload_task = self._loop.create_task(self.reload_paths(paths))
+
+def _reload_modules(modules: List[str]) -> Dict[str, str]:
+    """
+    モジュールを順にリロードします（スレッドプールで実行）。
+
+    Returns:
+        Dict[str, str]: リロードに失敗したモジュール名とエラー
+    """
+    errors: Dict[str, str] = {}
+    for module in modules:
+        try:
+            importlib.reload(sys.modules[module])
+        except Exception as e:
+            errors[module] = f"{type(e).__name__}: {e}"
+    return errors
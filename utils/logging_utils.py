@@ -3,28 +3,87 @@
 
 構造化ログとログ管理機能を提供します。
 """
+import atexit
+import copy
+import gzip
+import io
 import logging
+import logging.handlers
 import json
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait as futures_wait
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+from .rate_limit import TokenBucket
+
+# キュー満杯時のポリシー（drop: 破棄して件数を記録, block: 空くまで待つ）
+QUEUE_POLICIES = ("drop", "block")
+
+# 現在動作中のキューリスナー（setup_logging(use_queue=True) で作成）
+_queue_listener: Optional["BatchingQueueListener"] = None
+_queue_handler: Optional["BoundedQueueHandler"] = None
+
 def setup_logging(
     log_level: str = "INFO",
     log_file: Optional[str] = None,
-    enable_json_logging: bool = False
+    enable_json_logging: bool = False,
+    use_queue: bool = False,
+    queue_size: int = 10000,
+    queue_policy: str = "drop",
+    batch_size: int = 100,
+    max_bytes: int = 0,
+    backup_count: int = 5,
+    rotate_when: Optional[str] = None,
+    compression: Optional[str] = None
 ) -> logging.Logger:
     """
     ログシステムを設定します。
     
+    max_bytes または rotate_when を指定するとログファイルをローテーションし、
+    古いファイルは backup_count 個まで保持します。compression を指定すると、
+    ローテーションしたファイルをバックグラウンドのスレッドで圧縮します。
+    
+    use_queue=True の場合、ロガーにはキューへ積むだけのハンドラーを付け、
+    コンソール・ファイルへの書き込みは別スレッドのリスナーがまとめて行います。
+    これによりイベントループのスレッドでディスクI/Oが発生しなくなります。
+    
     Args:
         log_level (str): ログレベル
         log_file (Optional[str]): ログファイルのパス
         enable_json_logging (bool): JSON形式でのログ出力を有効にするか
+        use_queue (bool): キュー経由の非同期出力を有効にするか
+        queue_size (int): キューの最大長
+        queue_policy (str): キュー満杯時のポリシー（drop, block）
+        batch_size (int): リスナーが1回に処理する最大レコード数
+        max_bytes (int): サイズによるローテーションの閾値バイト数（0で無効）
+        backup_count (int): 保持するローテーション済みファイル数
+        rotate_when (Optional[str]): 時間によるローテーションの単位（S, M, H, D, midnight, W0-W6）
+        compression (Optional[str]): ローテーション済みファイルの圧縮形式（gzip, zstd）
         
     Returns:
         logging.Logger: 設定されたロガー
     """
+    global _queue_listener, _queue_handler
+    
+    if queue_policy not in QUEUE_POLICIES:
+        raise ValueError(f"不明なキューポリシーです: {queue_policy}")
+    if max_bytes > 0 and rotate_when:
+        raise ValueError("max_bytes と rotate_when は同時に指定できません")
+    if compression and compression not in LOG_COMPRESSION_SUFFIXES:
+        raise ValueError(f"不明な圧縮形式です: {compression}")
+    
+    # 以前のキューリスナーが動いていれば、残りを書き出して停止
+    stop_queue_logging()
+    
     # ログレベルを設定
     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
     
@@ -34,6 +93,9 @@ def setup_logging(
     
     # 既存のハンドラーをクリア
     logger.handlers.clear()
+    # 独自のハンドラーを持つため、ルートロガーへの二重出力を防ぐ
+    logger.propagate = False
+    handlers: List[logging.Handler] = []
     
     # フォーマッターを作成
     if enable_json_logging:
@@ -47,7 +109,7 @@ def setup_logging(
     # コンソールハンドラーを追加
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # ファイルハンドラーを追加（指定された場合）
     if log_file:
@@ -55,15 +117,497 @@ def setup_logging(
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = _create_file_handler(
+            log_file, max_bytes, backup_count, rotate_when, compression
+        )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if use_queue:
+        log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = BoundedQueueHandler(log_queue, policy=queue_policy)
+        _queue_listener = BatchingQueueListener(
+            log_queue, *handlers, batch_size=batch_size, respect_handler_level=True
+        )
+        _queue_listener.start()
+        logger.addHandler(_queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """上限付きキューにログレコードを積むハンドラー"""
+    
+    def __init__(self, log_queue: queue.Queue, policy: str = "drop", block_timeout: float = 1.0):
+        """
+        ハンドラーを初期化します。
+        
+        Args:
+            log_queue (queue.Queue): 上限付きのキュー
+            policy (str): キュー満杯時のポリシー（drop, block）
+            block_timeout (float): blockポリシーで空きを待つ最大秒数
+        """
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.enqueued = 0
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        別スレッドでフォーマットできるようレコードを準備します。
+        
+        標準の実装はメッセージと例外を1つの文字列に結合してしまうため、
+        例外情報はexc_textとして分けて保持します。
+        
+        Args:
+            record (logging.LogRecord): ログレコード
+            
+        Returns:
+            logging.LogRecord: キューに積むレコード
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        レコードをキューに積みます。満杯の場合はポリシーに従います。
+        
+        Args:
+            record (logging.LogRecord): ログレコード
+        """
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """キューからまとめてレコードを取り出して出力するリスナー"""
+    
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        *handlers: logging.Handler,
+        batch_size: int = 100,
+        respect_handler_level: bool = True
+    ):
+        """
+        リスナーを初期化します。
+        
+        Args:
+            log_queue (queue.Queue): 読み出すキュー
+            *handlers (logging.Handler): 出力先のハンドラー
+            batch_size (int): 1回に処理する最大レコード数
+            respect_handler_level (bool): ハンドラーのレベルを考慮するか
+        """
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.batch_size = max(1, batch_size)
+        self.batches = 0
+    
+    def _monitor(self) -> None:
+        """キューを監視し、溜まっているレコードをまとめて出力します"""
+        log_queue = self.queue
+        has_task_done = hasattr(log_queue, 'task_done')
+        
+        while True:
+            batch = [self.dequeue(True)]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            records = [record for record in batch if record is not self._sentinel]
+            stop = len(records) != len(batch)
+            if records:
+                self._handle_batch(records)
+                self.batches += 1
+            if has_task_done:
+                for _ in batch:
+                    log_queue.task_done()
+            if stop:
+                break
+    
+    def _handle_batch(self, records: List[logging.LogRecord]) -> None:
+        """
+        バッチ内のレコードを各ハンドラーで出力します。
+        
+        ストリーム系ハンドラーはレコードごとのフラッシュを止め、
+        バッチの最後に1回だけフラッシュします。
+        
+        Args:
+            records (List[logging.LogRecord]): 出力するレコード
+        """
+        for handler in self.handlers:
+            deferred = isinstance(handler, logging.StreamHandler)
+            if deferred:
+                handler.flush = _no_flush
+            try:
+                for record in records:
+                    if not self.respect_handler_level or record.levelno >= handler.level:
+                        handler.handle(record)
+            finally:
+                if deferred:
+                    del handler.flush
+                    handler.flush()
+
+def _no_flush() -> None:
+    """バッチ処理中にハンドラーのflushを置き換えるダミー"""
+
+# キュー投入時に例外を文字列化するためのフォーマッター
+_exception_formatter = logging.Formatter()
+
+def stop_queue_logging() -> None:
+    """キューリスナーを停止し、キューに残ったレコードを書き出します"""
+    global _queue_listener, _queue_handler
+    
+    # 先にハンドラーを外し、停止後に積まれて失われるレコードをなくす
+    if _queue_handler is not None:
+        logging.getLogger("slackbot").removeHandler(_queue_handler)
+        _queue_handler = None
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+def get_logging_queue_stats() -> Dict[str, Any]:
+    """
+    キュー経由ログの統計情報を取得します。
+    
+    Returns:
+        Dict[str, Any]: キューの使用状況と破棄件数
+    """
+    if _queue_handler is None or _queue_listener is None:
+        return {'enabled': False}
+    
+    return {
+        'enabled': True,
+        'policy': _queue_handler.policy,
+        'queued': _queue_handler.queue.qsize(),
+        'max_size': _queue_handler.queue.maxsize,
+        'enqueued': _queue_handler.enqueued,
+        'dropped': _queue_handler.dropped,
+        'batches': _queue_listener.batches
+    }
+
+# 終了時にキューに残ったログを書き出す
+atexit.register(stop_queue_logging)
+
+# 圧縮形式ごとのローテーション済みファイルの拡張子
+LOG_COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# サイズによるローテーションで、番号の付け替え・圧縮を待つ一時ファイルの接頭辞
+LOG_PENDING_PREFIX = "pending-"
+
+def _create_file_handler(
+    log_file: str,
+    max_bytes: int,
+    backup_count: int,
+    rotate_when: Optional[str],
+    compression: Optional[str]
+) -> logging.FileHandler:
+    """ローテーション設定に応じたファイルハンドラーを作成します"""
+    if max_bytes > 0:
+        handler_class = CompressingRotatingFileHandler if compression else logging.handlers.RotatingFileHandler
+        handler: logging.FileHandler = handler_class(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    elif rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        return logging.FileHandler(log_file, encoding='utf-8')
+    
+    if compression:
+        compressor = SegmentCompressor(compression)
+        handler.namer = compressor.namer
+        handler.rotator = compressor.rotator
+        handler.compressor = compressor
+    return handler
+
+class SegmentCompressor:
+    """
+    ローテーションしたログファイルをバックグラウンドで圧縮するローテーター
+    
+    ハンドラーのrotatorとして使用し、ロック中はリネームだけを行います。
+    圧縮は専用の1スレッドで実行するため、ログを書き込むスレッド
+    （イベントループなど）は圧縮の完了を待ちません。サイズによるローテーションの
+    番号の付け替えも圧縮と同じスレッドで順に行うため、圧縮中のファイルが移動される
+    ことはありません（CompressingRotatingFileHandler を参照）。
+    """
+    
+    def __init__(self, compression: str = "gzip", level: Optional[int] = None):
+        """
+        圧縮ローテーターを初期化します。
+        
+        Args:
+            compression (str): 圧縮形式（gzip, zstd）
+            level (Optional[int]): 圧縮レベル（Noneで形式ごとのデフォルト）
+        """
+        if compression not in LOG_COMPRESSION_SUFFIXES:
+            raise ValueError(f"不明な圧縮形式です: {compression}")
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ValueError("zstd圧縮には zstandard パッケージが必要です")
+        
+        self.compression = compression
+        self.suffix = LOG_COMPRESSION_SUFFIXES[compression]
+        self.level = level
+        self.compressed = 0
+        self.failed = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+        self._pending: List[Future] = []
+    
+    def namer(self, default_name: str) -> str:
+        """ローテーション先のファイル名に圧縮形式の拡張子を付けます"""
+        return default_name + self.suffix
+    
+    def rotator(self, source: str, dest: str) -> None:
+        """
+        ログファイルを圧縮前の一時ファイルにリネームし、圧縮をバックグラウンドに回します。
+        
+        一時ファイルは先頭に "." を付けた名前にし、ハンドラーの保持数の整理対象に
+        含まれないようにします。
+        
+        Args:
+            source (str): 現在のログファイル
+            dest (str): namerで決まったローテーション先（圧縮後の名前）
+        """
+        if not os.path.exists(source):
+            return
+        directory, name = os.path.split(dest)
+        raw = os.path.join(directory, "." + name[:-len(self.suffix)])
+        os.replace(source, raw)
+        self._pending.append(self._executor.submit(self._compress, raw, dest))
+    
+    def rotate_numbered(self, base: str, backup_count: int) -> None:
+        """
+        サイズによるローテーションを行います。
+        
+        呼び出し元ではログファイルを圧縮待ちの一時ファイル（".bot.log.pending-<時刻>"）に
+        リネームするだけで、既存ファイルの番号の付け替えと圧縮は圧縮スレッドで順に行います。
+        
+        Args:
+            base (str): 現在のログファイル
+            backup_count (int): 保持するローテーション済みファイルの数
+        """
+        if not os.path.exists(base):
+            return
+        directory, name = os.path.split(base)
+        raw = os.path.join(directory, f".{name}.{LOG_PENDING_PREFIX}{time.time_ns()}")
+        os.replace(base, raw)
+        self._pending.append(self._executor.submit(self._shift_and_compress, base, raw, backup_count))
+    
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        実行中の圧縮が完了するまで待機します。
+        
+        Args:
+            timeout (Optional[float]): 最大待機秒数
+        """
+        pending, self._pending = self._pending, []
+        if pending:
+            futures_wait(pending, timeout=timeout)
+    
+    def close(self) -> None:
+        """残りの圧縮を完了させてスレッドを停止します"""
+        self.wait()
+        self._executor.shutdown(wait=True)
+    
+    def _shift_and_compress(self, base: str, raw: str, backup_count: int) -> None:
+        """既存のファイルの番号を1つずつ繰り下げてから、一時ファイルを .1 として圧縮します"""
+        for index in range(backup_count - 1, 0, -1):
+            source = f"{base}.{index}{self.suffix}"
+            if os.path.exists(source):
+                os.replace(source, f"{base}.{index + 1}{self.suffix}")
+        self._compress(raw, f"{base}.1{self.suffix}")
+    
+    def _compress(self, raw: str, dest: str) -> None:
+        """圧縮前のファイルを圧縮し、元のファイルを削除します"""
+        tmp = raw + self.suffix + ".tmp"
+        try:
+            with open(raw, 'rb') as src, _open_compressed_writer(
+                tmp, self.compression, self.level
+            ) as dst:
+                shutil.copyfileobj(src, dst, LOG_READ_CHUNK_SIZE)
+            os.replace(tmp, dest)
+            os.remove(raw)
+            self.compressed += 1
+        except Exception as e:
+            # 圧縮に失敗しても圧縮前のファイルは残るため、読み込みは可能
+            self.failed += 1
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            sys.stderr.write(f"ログファイルの圧縮に失敗しました ({raw}): {e}\n")
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    サイズによるローテーションを SegmentCompressor に任せるハンドラー
+    
+    標準のハンドラーは書き込むスレッドで既存ファイルの番号を付け替えるため、
+    圧縮中のファイルを移動してしまいます。このハンドラーはリネームだけを行い、
+    付け替えと圧縮は圧縮スレッドで順に行います。
+    """
+    
+    compressor: SegmentCompressor
+    
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.backupCount > 0:
+            self.compressor.rotate_numbered(self.baseFilename, self.backupCount)
+        if not self.delay:
+            self.stream = self._open()
+
+def _open_compressed_writer(path: str, compression: str, level: Optional[int]) -> BinaryIO:
+    """圧縮形式に応じた書き込み用ストリームを開きます"""
+    if compression == "gzip":
+        return gzip.open(path, 'wb', compresslevel=6 if level is None else level)
+    
+    import zstandard
+    compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+    return compressor.stream_writer(open(path, 'wb'), closefd=True)
+
+def _load_json_backends() -> Dict[str, Callable[[Any], str]]:
+    """
+    利用可能なJSONシリアライザーを読み込みます。
+    
+    どのバックエンドでも、シリアライズできない値は str() で文字列化します。
+    
+    Returns:
+        Dict[str, Callable[[Any], str]]: バックエンド名とシリアライズ関数
+    """
+    backends: Dict[str, Callable[[Any], str]] = {
+        "json": lambda data: json.dumps(data, ensure_ascii=False, default=str)
+    }
+    
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        option = orjson.OPT_NON_STR_KEYS
+        backends["orjson"] = lambda data: orjson.dumps(data, default=str, option=option).decode('utf-8')
+    
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        backends["ujson"] = lambda data: ujson.dumps(data, ensure_ascii=False, default=str)
+    
+    return backends
+
+# 利用可能なJSONバックエンド（優先順: orjson → ujson → json）
+JSON_BACKENDS = _load_json_backends()
+_JSON_BACKEND_PRIORITY = ("orjson", "ujson", "json")
+
+_json_backend_name = next(name for name in _JSON_BACKEND_PRIORITY if name in JSON_BACKENDS)
+_json_dumps = JSON_BACKENDS[_json_backend_name]
+
+def set_json_backend(name: Optional[str] = None) -> str:
+    """
+    ログのJSONシリアライザーを切り替えます。
+    
+    Args:
+        name (Optional[str]): バックエンド名（json, orjson, ujson）。Noneで最速のものを選択
+        
+    Returns:
+        str: 選択されたバックエンド名
+        
+    Raises:
+        ValueError: バックエンドが利用できない場合
+    """
+    global _json_backend_name, _json_dumps
+    
+    if name is None:
+        name = next(backend for backend in _JSON_BACKEND_PRIORITY if backend in JSON_BACKENDS)
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSONバックエンド {name} は利用できません（利用可能: {', '.join(JSON_BACKENDS)}）")
+    
+    _json_backend_name = name
+    _json_dumps = JSON_BACKENDS[name]
+    return name
+
+def get_json_backend() -> str:
+    """
+    現在のJSONシリアライザー名を取得します。
+    
+    Returns:
+        str: バックエンド名
+    """
+    return _json_backend_name
+
+# タイムスタンプ文字列のキャッシュ（ミリ秒単位の完成形と、秒単位までの日時部分）
+# それぞれ1つのタプルで保持し、複数スレッドから読み書きしても組がずれないようにする
+_timestamp_cache: Tuple[int, str] = (-1, "")
+_timestamp_prefix_cache: Tuple[int, str] = (-1, "")
+
+def format_timestamp(created: Optional[float] = None) -> str:
+    """
+    UNIX時刻をミリ秒精度のISO形式文字列にフォーマットします。
+    
+    同じミリ秒内は前回の結果をそのまま返し、同じ秒内は日時部分を使い回すため、
+    ログ1件ごとのdatetime生成とisoformat呼び出しを省けます。
+    
+    Args:
+        created (Optional[float]): UNIX時刻（Noneで現在時刻）
+        
+    Returns:
+        str: ISO形式の日時（例: 2024-01-01T12:34:56.789）
+    """
+    global _timestamp_cache, _timestamp_prefix_cache
+    
+    if created is None:
+        created = time.time()
+    key = int(created * 1000)
+    
+    cached_key, value = _timestamp_cache
+    if cached_key == key:
+        return value
+    
+    seconds, milliseconds = divmod(key, 1000)
+    cached_seconds, prefix = _timestamp_prefix_cache
+    if cached_seconds != seconds:
+        prefix = datetime.fromtimestamp(seconds).isoformat()
+        _timestamp_prefix_cache = (seconds, prefix)
+    
+    value = f"{prefix}.{milliseconds:03d}"
+    _timestamp_cache = (key, value)
+    return value
+
 class JsonFormatter(logging.Formatter):
     """JSON形式でログを出力するフォーマッター"""
     
+    def __init__(self, *args: Any, json_backend: Optional[str] = None, **kwargs: Any):
+        """
+        フォーマッターを初期化します。
+        
+        Args:
+            json_backend (Optional[str]): 使用するJSONバックエンド（Noneでモジュール全体の設定に従う）
+        """
+        super().__init__(*args, **kwargs)
+        if json_backend is not None and json_backend not in JSON_BACKENDS:
+            raise ValueError(f"JSONバックエンド {json_backend} は利用できません")
+        self.json_backend = json_backend
+    
     def format(self, record: logging.LogRecord) -> str:
         """
         ログレコードをJSON形式にフォーマットします。
@@ -75,7 +619,7 @@ class JsonFormatter(logging.Formatter):
             str: JSON形式のログメッセージ
         """
         log_data = {
-            'timestamp': datetime.fromtimestamp(record.created).isoformat(),
+            'timestamp': format_timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -84,15 +628,25 @@ class JsonFormatter(logging.Formatter):
             'line': record.lineno
         }
         
-        # 例外情報があれば追加
+        # 例外情報があれば追加（キュー経由の場合は文字列化済み）
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data['exception'] = record.exc_text
         
         # 追加のコンテキストがあれば追加
         if hasattr(record, 'extra_data'):
             log_data['extra'] = record.extra_data
         
-        return json.dumps(log_data, ensure_ascii=False)
+        # サンプリング・レート制限の情報（集計時の補正用）
+        if hasattr(record, 'sample_rate'):
+            log_data['sample_rate'] = record.sample_rate
+        if hasattr(record, 'suppressed'):
+            log_data['suppressed'] = record.suppressed
+        
+        if self.json_backend is not None:
+            return JSON_BACKENDS[self.json_backend](log_data)
+        return _json_dumps(log_data)
 
 def log_command_usage(
     command_name: str,
@@ -122,7 +676,7 @@ def log_command_usage(
         'user_id': user_id,
         'channel_id': channel_id,
         'success': success,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': format_timestamp()
     }
     
     if args:
@@ -165,7 +719,7 @@ def log_cog_event(
         'event_type': event_type,
         'cog_name': cog_name,
         'success': success,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': format_timestamp()
     }
     
     if details:
@@ -202,7 +756,7 @@ def log_security_event(
         'event_type': event_type,
         'user_id': user_id,
         'severity': severity,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': format_timestamp()
     }
     
     if details:
@@ -246,14 +800,23 @@ class ContextFilter(logging.Filter):
 
 def create_logger_with_context(
     name: str,
-    context: Dict[str, Any]
+    context: Dict[str, Any],
+    sample_rate: Optional[float] = None,
+    rate_limit: Optional[float] = None,
+    burst: Optional[float] = None
 ) -> logging.Logger:
     """
     コンテキスト情報を含むロガーを作成します。
     
+    sample_rate・rate_limit を指定すると、サンプリング・レート制限のフィルターも
+    追加します（configure_log_sampling を参照）。
+    
     Args:
         name (str): ロガー名
         context (Dict[str, Any]): コンテキスト情報
+        sample_rate (Optional[float]): 記録する割合（0〜1）
+        rate_limit (Optional[float]): 1秒あたりの最大記録数
+        burst (Optional[float]): レート制限のバースト数
         
     Returns:
         logging.Logger: コンテキスト付きロガー
@@ -261,33 +824,629 @@ def create_logger_with_context(
     logger = logging.getLogger(name)
     context_filter = ContextFilter(context)
     logger.addFilter(context_filter)
+    if sample_rate is not None or rate_limit is not None:
+        configure_log_sampling(
+            name,
+            sample_rate=1.0 if sample_rate is None else sample_rate,
+            rate_limit=rate_limit,
+            burst=burst
+        )
     return logger
 
-def get_log_stats(log_file: str) -> Dict[str, Any]:
+# この重要度以上のログはサンプリング・レート制限の対象外
+LOG_ALWAYS_KEEP_LEVEL = logging.ERROR
+
+# キーごとの状態を保持する最大数（超えた分は共有のキーで扱う）
+_MAX_FILTER_KEYS = 1024
+_OVERFLOW_KEY = "*"
+
+def _default_log_key(record: logging.LogRecord) -> str:
+    """
+    サンプリング・レート制限のキーを取得します。
+    
+    log_command_usage などの追加データにコマンド名・イベントタイプがあれば
+    それを、なければロガー名を使用します。
+    """
+    extra_data = getattr(record, 'extra_data', None)
+    if isinstance(extra_data, dict):
+        key = extra_data.get('command') or extra_data.get('event_type')
+        if isinstance(key, str):
+            return key
+    return record.name
+
+class SamplingFilter(logging.Filter):
+    """
+    一定割合のログだけを通すフィルター
+    
+    乱数ではなく割合を積算して判定するため、rate=0.1 ならキーごとに
+    ちょうど10件に1件を通します。通したログには sample_rate 属性を付けます。
+    """
+    
+    def __init__(
+        self,
+        rate: float = 1.0,
+        per_key_rates: Optional[Dict[str, float]] = None,
+        key_func: Callable[[logging.LogRecord], str] = _default_log_key,
+        always_keep_level: int = LOG_ALWAYS_KEEP_LEVEL
+    ):
+        """
+        サンプリングフィルターを初期化します。
+        
+        Args:
+            rate (float): デフォルトの記録する割合（0〜1）
+            per_key_rates (Optional[Dict[str, float]]): キー（コマンド名など）ごとの割合
+            key_func (Callable[[logging.LogRecord], str]): レコードからキーを取得する関数
+            always_keep_level (int): この重要度以上は常に通す
+        """
+        super().__init__()
+        rates = dict(per_key_rates or {})
+        for value in [rate, *rates.values()]:
+            if not 0.0 <= value <= 1.0:
+                raise ValueError(f"サンプリング割合は0〜1である必要があります: {value}")
+        
+        self.rate = rate
+        self.per_key_rates = rates
+        self.key_func = key_func
+        self.always_keep_level = always_keep_level
+        self.sampled_out = 0
+        self._credits: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        サンプリング対象のレコードを判定します。
+        
+        Args:
+            record (logging.LogRecord): ログレコード
+            
+        Returns:
+            bool: フィルターを通すかどうか
+        """
+        if record.levelno >= self.always_keep_level:
+            return True
+        
+        key = self.key_func(record)
+        rate = self.per_key_rates.get(key, self.rate)
+        if rate >= 1.0:
+            return True
+        
+        with self._lock:
+            if key not in self._credits and len(self._credits) >= _MAX_FILTER_KEYS:
+                key = _OVERFLOW_KEY
+            # 最初のレコードは必ず通し、以降は割合を積算して1を超えたら通す
+            credit = self._credits.get(key, 1.0 - rate) + rate
+            keep = rate > 0.0 and credit >= 1.0 - 1e-9
+            self._credits[key] = credit - 1.0 if keep else credit
+            if not keep:
+                self.sampled_out += 1
+        
+        if keep:
+            record.sample_rate = rate
+        return keep
+
+class RateLimitFilter(logging.Filter):
+    """
+    トークンバケットでログの記録数を制限するフィルター
+    
+    制限で破棄した件数はキーごとに数え、次に通したレコードのメッセージに
+    「N件のログを抑制しました」と追記し、suppressed 属性にも設定します。
+    """
+    
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        per_key: bool = True,
+        key_func: Callable[[logging.LogRecord], str] = _default_log_key,
+        always_keep_level: int = LOG_ALWAYS_KEEP_LEVEL
+    ):
+        """
+        レート制限フィルターを初期化します。
+        
+        Args:
+            rate (float): 1秒あたりの最大記録数
+            burst (Optional[float]): 一時的に許容する記録数（Noneでrateと同じ）
+            per_key (bool): キー（コマンド名など）ごとに制限するか
+            key_func (Callable[[logging.LogRecord], str]): レコードからキーを取得する関数
+            always_keep_level (int): この重要度以上は常に通す
+        """
+        super().__init__()
+        # 設定の検証のため、先に1つ作っておく
+        TokenBucket(rate, burst)
+        
+        self.rate = rate
+        self.burst = burst
+        self.per_key = per_key
+        self.key_func = key_func
+        self.always_keep_level = always_keep_level
+        self.suppressed_total = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._suppressed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        レート制限内のレコードだけを通します。
+        
+        Args:
+            record (logging.LogRecord): ログレコード
+            
+        Returns:
+            bool: フィルターを通すかどうか
+        """
+        if record.levelno >= self.always_keep_level:
+            return True
+        
+        key = self.key_func(record) if self.per_key else _OVERFLOW_KEY
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= _MAX_FILTER_KEYS:
+                    key = _OVERFLOW_KEY
+                    bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            
+            if not bucket.try_acquire():
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                self.suppressed_total += 1
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+        
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed}件のログを抑制しました)"
+            record.args = None
+            record.suppressed = suppressed
+        return True
+    
+    def get_suppressed(self) -> Dict[str, int]:
+        """
+        まだ報告されていない抑制件数をキーごとに取得します。
+        
+        Returns:
+            Dict[str, int]: キーごとの抑制件数
+        """
+        with self._lock:
+            return dict(self._suppressed)
+
+# configure_log_sampling で追加したフィルター（ロガー名ごと）
+_sampling_filters: Dict[str, List[logging.Filter]] = {}
+
+def configure_log_sampling(
+    logger_name: str,
+    sample_rate: float = 1.0,
+    per_key_rates: Optional[Dict[str, float]] = None,
+    rate_limit: Optional[float] = None,
+    burst: Optional[float] = None,
+    always_keep_level: int = LOG_ALWAYS_KEEP_LEVEL
+) -> List[logging.Filter]:
+    """
+    ロガーにサンプリング・レート制限のフィルターを設定します。
+    
+    以前にこの関数で設定したフィルターは置き換えます。ERROR以上のログは
+    常に記録されるため、失敗したコマンドやセキュリティ上重要なイベントは失われません。
+    
+    Args:
+        logger_name (str): 対象のロガー名（slackbot.commands など）
+        sample_rate (float): デフォルトの記録する割合（0〜1）
+        per_key_rates (Optional[Dict[str, float]]): コマンド名・イベントタイプごとの割合
+        rate_limit (Optional[float]): キーごとの1秒あたりの最大記録数（Noneで無制限）
+        burst (Optional[float]): レート制限のバースト数
+        always_keep_level (int): この重要度以上は常に記録する
+        
+    Returns:
+        List[logging.Filter]: 追加したフィルター
+    """
+    logger = logging.getLogger(logger_name)
+    for log_filter in _sampling_filters.pop(logger_name, []):
+        logger.removeFilter(log_filter)
+    
+    filters: List[logging.Filter] = []
+    if sample_rate < 1.0 or any(rate < 1.0 for rate in (per_key_rates or {}).values()):
+        filters.append(SamplingFilter(sample_rate, per_key_rates, always_keep_level=always_keep_level))
+    if rate_limit:
+        filters.append(RateLimitFilter(rate_limit, burst, always_keep_level=always_keep_level))
+    
+    for log_filter in filters:
+        logger.addFilter(log_filter)
+    if filters:
+        _sampling_filters[logger_name] = filters
+    return filters
+
+def get_log_sampling_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    サンプリング・レート制限の統計情報を取得します。
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: ロガー名ごとの破棄件数
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for logger_name, filters in _sampling_filters.items():
+        entry: Dict[str, Any] = {}
+        for log_filter in filters:
+            if isinstance(log_filter, SamplingFilter):
+                entry['sampled_out'] = log_filter.sampled_out
+            elif isinstance(log_filter, RateLimitFilter):
+                entry['suppressed'] = log_filter.suppressed_total
+                entry['pending_suppressed'] = log_filter.get_suppressed()
+        stats[logger_name] = entry
+    return stats
+
+# ログファイルの読み込みチャンクサイズ
+LOG_READ_CHUNK_SIZE = 1024 * 1024
+
+# 統計インデックスファイルの拡張子とフォーマットバージョン
+LOG_INDEX_SUFFIX = ".idx"
+_LOG_INDEX_VERSION = 1
+
+# ローテーション済みファイルの行数キャッシュの拡張子
+LOG_SEGMENT_INDEX_SUFFIX = ".segments.idx"
+
+# ファイルの差し替え検出に使う先頭バイト数
+_LOG_HEAD_SIZE = 64
+
+# テキスト形式のログ行からレベルを取り出すパターン
+_TEXT_LEVEL_PATTERN = re.compile(rb" - (DEBUG|INFO|WARNING|ERROR|CRITICAL) - ")
+
+def get_log_stats(
+    log_file: str,
+    use_index: bool = True,
+    detailed: bool = False,
+    include_rotated: bool = False
+) -> Dict[str, Any]:
     """
     ログファイルの統計情報を取得します。
     
+    ファイルはチャンク単位でストリーミング読み込みするため、サイズに関わらず
+    メモリ使用量は一定です。use_index=True の場合、集計結果をログファイルの隣の
+    インデックスファイル（<log_file>.idx）に保存し、次回以降は追記された末尾だけを
+    読み込みます。ファイルが切り詰め・差し替えられた場合は全体を再集計します。
+    
+    include_rotated=True の場合、ローテーション済みファイル（圧縮を含む）の
+    件数とサイズも集計します。ローテーション済みファイルは変更されないため、
+    行数はセグメントインデックス（<log_file>.segments.idx）にキャッシュします。
+    
     Args:
         log_file (str): ログファイルのパス
+        use_index (bool): インデックスファイルを使用・更新するか
+        detailed (bool): レベル別・コマンド別の件数も集計するか
+        include_rotated (bool): ローテーション済みファイルも集計するか
         
     Returns:
         Dict[str, Any]: ログファイルの統計情報
     """
     log_path = Path(log_file)
     
-    if not log_path.exists():
+    try:
+        stat = log_path.stat()
+    except FileNotFoundError:
         return {
             'exists': False,
             'size': 0,
             'line_count': 0
         }
     
-    with open(log_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    index_path = log_path.with_name(log_path.name + LOG_INDEX_SUFFIX)
+    index = _load_log_index(index_path) if use_index else None
     
-    return {
+    with open(log_path, 'rb') as f:
+        head = f.read(_LOG_HEAD_SIZE)
+        if not _is_log_index_valid(index, stat, head, detailed):
+            index = _new_log_index(stat, head, detailed)
+        
+        scanned_bytes = 0
+        partial_bytes = 0
+        if index['offset'] < stat.st_size:
+            f.seek(index['offset'])
+            scanned_bytes, partial_bytes = _scan_log_tail(f, index, stat.st_size)
+    
+    index['size'] = stat.st_size
+    index['mtime_ns'] = stat.st_mtime_ns
+    if use_index:
+        _save_log_index(index_path, index)
+    
+    stats = {
         'exists': True,
-        'size': log_path.stat().st_size,
-        'line_count': len(lines),
-        'last_modified': datetime.fromtimestamp(log_path.stat().st_mtime).isoformat()
+        'size': stat.st_size,
+        'line_count': index['newlines'] + (1 if partial_bytes else 0),
+        'last_modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        'scanned_bytes': scanned_bytes
+    }
+    if detailed:
+        stats['level_counts'] = dict(index['level_counts'])
+        stats['command_counts'] = dict(index['command_counts'])
+    if include_rotated:
+        stats.update(_get_rotated_stats(log_path, use_index))
+    
+    return stats
+
+def _get_rotated_stats(log_path: Path, use_index: bool) -> Dict[str, Any]:
+    """ローテーション済みファイルのファイル数・サイズ・行数を集計します"""
+    index_path = log_path.with_name(log_path.name + LOG_SEGMENT_INDEX_SUFFIX)
+    cached = (_load_log_index(index_path) or {}) if use_index else {}
+    segments: Dict[str, Any] = {}
+    total_size = 0
+    total_lines = 0
+    
+    for segment in find_log_segments(str(log_path)):
+        try:
+            stat = segment.stat()
+        except FileNotFoundError:
+            # 集計中に保持数の整理で削除された
+            continue
+        entry = cached.get(segment.name)
+        if not (
+            isinstance(entry, dict)
+            and entry.get('size') == stat.st_size
+            and entry.get('mtime_ns') == stat.st_mtime_ns
+        ):
+            entry = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'lines': _count_segment_lines(segment)
+            }
+        segments[segment.name] = entry
+        total_size += stat.st_size
+        total_lines += entry['lines']
+    
+    if use_index and segments != cached:
+        _save_log_index(index_path, segments)
+    
+    return {
+        'rotated_segments': len(segments),
+        'rotated_size': total_size,
+        'rotated_line_count': total_lines
     }
+
+def _count_segment_lines(segment: Path) -> int:
+    """セグメントの行数をストリーミングで数えます"""
+    lines = 0
+    last = b"\n"
+    with open_log_segment(segment) as f:
+        while True:
+            chunk = f.read(LOG_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (0 if last == b"\n" else 1)
+
+def _scan_log_tail(f: BinaryIO, index: Dict[str, Any], size: int) -> Tuple[int, int]:
+    """
+    インデックスのオフセット以降を読み込み、インデックスを更新します。
+    
+    オフセットは最後の改行の直後まで進めます。改行で終わっていない末尾の行は
+    次回の呼び出しで再度読み込みます。
+    
+    Args:
+        f (BinaryIO): オフセット位置にシーク済みのファイル
+        index (Dict[str, Any]): 更新するインデックス
+        size (int): 読み込む終端（stat時点のファイルサイズ）
+        
+    Returns:
+        Tuple[int, int]: (読み込んだバイト数, 改行で終わっていない末尾のバイト数)
+    """
+    detailed = index['detailed']
+    remaining = size - index['offset']
+    scanned = 0
+    carry = b""
+    
+    while remaining > 0:
+        chunk = f.read(min(LOG_READ_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        scanned += len(chunk)
+        
+        last_newline = chunk.rfind(b"\n")
+        if last_newline < 0:
+            carry += chunk
+            continue
+        
+        complete = carry + chunk[:last_newline]
+        carry = chunk[last_newline + 1:]
+        index['newlines'] += chunk.count(b"\n")
+        index['offset'] += len(complete) + 1
+        if detailed:
+            for line in complete.split(b"\n"):
+                _count_log_line(line, index)
+    
+    return scanned, len(carry)
+
+def _count_log_line(line: bytes, index: Dict[str, Any]) -> None:
+    """1行のログからレベルとコマンドを集計します"""
+    level = None
+    command = None
+    
+    if line.startswith(b"{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            level = data.get('level')
+            extra = data.get('extra')
+            if isinstance(extra, dict):
+                command = extra.get('command')
+    else:
+        match = _TEXT_LEVEL_PATTERN.search(line)
+        if match:
+            level = match.group(1).decode('ascii')
+    
+    if isinstance(level, str):
+        level_counts = index['level_counts']
+        level_counts[level] = level_counts.get(level, 0) + 1
+    if isinstance(command, str):
+        command_counts = index['command_counts']
+        command_counts[command] = command_counts.get(command, 0) + 1
+
+def _new_log_index(stat: os.stat_result, head: bytes, detailed: bool) -> Dict[str, Any]:
+    """空のインデックスを作成します"""
+    return {
+        'version': _LOG_INDEX_VERSION,
+        'inode': stat.st_ino,
+        'head': head.hex(),
+        'size': 0,
+        'mtime_ns': 0,
+        'offset': 0,
+        'newlines': 0,
+        'detailed': detailed,
+        'level_counts': {},
+        'command_counts': {}
+    }
+
+def _is_log_index_valid(
+    index: Optional[Dict[str, Any]],
+    stat: os.stat_result,
+    head: bytes,
+    detailed: bool
+) -> bool:
+    """インデックスが現在のファイルの先頭部分を正しく表しているか確認します"""
+    if not index or index.get('version') != _LOG_INDEX_VERSION:
+        return False
+    if detailed and not index.get('detailed'):
+        return False
+    if index.get('inode') != stat.st_ino or index.get('offset', 0) > stat.st_size:
+        return False
+    
+    # 同じinodeのまま切り詰めて書き直された場合を先頭バイトで検出する
+    indexed_head = bytes.fromhex(index.get('head', ''))
+    return head[:len(indexed_head)] == indexed_head
+
+def _load_log_index(index_path: Path) -> Optional[Dict[str, Any]]:
+    """インデックスファイルを読み込みます（存在しない・壊れている場合None）"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if isinstance(index, dict) else None
+
+def _save_log_index(index_path: Path, index: Dict[str, Any]) -> None:
+    """インデックスファイルをアトミックに保存します（失敗しても無視）"""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        logging.getLogger("slackbot").debug(f"ログ統計インデックスを保存できませんでした: {e}")
+
+def find_log_segments(log_file: str) -> List[Path]:
+    """
+    ローテーション済みのログファイルを古い順に列挙します。
+    
+    サイズによるローテーション（bot.log.1, bot.log.2.gz など）は番号の大きい順、
+    時間によるローテーション（bot.log.2024-01-01.gz など）は日時の昇順に並べます。
+    番号の付け替え・圧縮を待つ一時ファイル（.bot.log.pending-<時刻>）は最後に並べます。
+    現在のログファイル自体は含みません。
+    
+    Args:
+        log_file (str): 現在のログファイルのパス
+        
+    Returns:
+        List[Path]: ローテーション済みファイルのパス（古い順）
+    """
+    log_path = Path(log_file)
+    prefix = log_path.name + "."
+    if not log_path.parent.is_dir():
+        return []
+    
+    numbered: List[Tuple[int, Path]] = []
+    timed: List[Tuple[str, Path]] = []
+    pending: List[Tuple[int, Path]] = []
+    for path in log_path.parent.iterdir():
+        # 圧縮待ち・圧縮中に中断された一時ファイル（".bot.log.1"）も読み込み対象にする
+        name = path.name[1:] if path.name.startswith("." + prefix) else path.name
+        if not name.startswith(prefix) or name.endswith((LOG_INDEX_SUFFIX, ".tmp")):
+            continue
+        
+        key = name[len(prefix):]
+        for suffix in LOG_COMPRESSION_SUFFIXES.values():
+            if key.endswith(suffix):
+                key = key[:-len(suffix)]
+                break
+        if key.isdigit():
+            numbered.append((int(key), path))
+        elif key.startswith(LOG_PENDING_PREFIX) and key[len(LOG_PENDING_PREFIX):].isdigit():
+            pending.append((int(key[len(LOG_PENDING_PREFIX):]), path))
+        elif key and key[0].isdigit():
+            timed.append((key, path))
+    
+    numbered.sort(key=lambda item: -item[0])
+    timed.sort()
+    pending.sort()
+    # 番号の付け替え待ちのファイルは、番号付きのどのファイルよりも新しい
+    return [path for _, path in timed] + [path for _, path in numbered] + [path for _, path in pending]
+
+def open_log_segment(path: Path) -> BinaryIO:
+    """
+    ログファイルをバイナリ読み込み用に開きます。圧縮ファイルは透過的に展開します。
+    
+    Args:
+        path (Path): ログファイルのパス
+        
+    Returns:
+        BinaryIO: 展開済みの内容を読み込めるストリーム
+    """
+    path = Path(path)
+    if path.suffix == LOG_COMPRESSION_SUFFIXES["gzip"]:
+        return gzip.open(path, 'rb')
+    if path.suffix == LOG_COMPRESSION_SUFFIXES["zstd"]:
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+def iter_log_lines(log_file: str, include_rotated: bool = True) -> Iterator[str]:
+    """
+    ログを古い順に1行ずつ読み込みます。
+    
+    ローテーション済みファイルは圧縮されていても透過的に読み込みます。
+    ファイル全体をメモリに読み込まないため、大きなログにも使用できます。
+    
+    Args:
+        log_file (str): 現在のログファイルのパス
+        include_rotated (bool): ローテーション済みファイルも読み込むか
+        
+    Yields:
+        str: 末尾の改行を除いたログ行
+    """
+    paths = find_log_segments(log_file) if include_rotated else []
+    log_path = Path(log_file)
+    if log_path.exists():
+        paths.append(log_path)
+    
+    for path in paths:
+        try:
+            f = open_log_segment(path)
+        except FileNotFoundError:
+            # 読み込み前にローテーション・削除された
+            continue
+        with f:
+            for raw in io.TextIOWrapper(f, encoding='utf-8', errors='replace'):
+                yield raw.rstrip("\r\n")
+
+def search_logs(
+    log_file: str,
+    pattern: str,
+    include_rotated: bool = True,
+    limit: int = 100
+) -> List[str]:
+    """
+    ログから正規表現に一致する行を検索します。
+    
+    Args:
+        log_file (str): 現在のログファイルのパス
+        pattern (str): 検索する正規表現
+        include_rotated (bool): ローテーション済みファイルも検索するか
+        limit (int): 返す最大行数（新しい行を優先、0で無制限）
+        
+    Returns:
+        List[str]: 一致した行（古い順）
+    """
+    regex = re.compile(pattern)
+    matches: Deque[str] = deque(maxlen=limit or None)
+    for line in iter_log_lines(log_file, include_rotated):
+        if regex.search(line):
+            matches.append(line)
+    return list(matches)
@@ -0,0 +1,262 @@
+"""
+イベントループのプロファイラー
+
+イベントループを一定時間以上ブロックした処理を検出し、そのときのスタックを
+記録して、どのCogのどのコマンドがブロックしたかを集計します。
+
+- イベントループ上のハートビートが予定時刻から閾値以上遅れると、監視スレッドが
+  イベントループのスレッドのスタックを取得します（ブロック中の処理がそのまま写ります）
+- スタック中のCogのソースファイルのフレームから、Cog名とコマンド名を求めます
+- ハートビートの遅れはイベントループの遅延として常に計測します
+
+ホットパスには何も追加しないため、有効にしてもコマンドの実行コストは変わりません。
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cog_loader import CogLoader
+from .metrics import Histogram, LOOP_LAG_BUCKETS, MetricsRegistry
+
+__all__ = ["LoopProfiler"]
+
+logger = logging.getLogger(__name__)
+
+# 記録するスタックの深さ
+STACK_DEPTH = 30
+
+# Cogに属さない処理の表示名
+UNKNOWN = "(不明)"
+
+# (ファイル名, 行番号, 関数名)
+Frame = Tuple[str, int, str]
+
+def _extract_stack(frame: Optional[FrameType], limit: int = STACK_DEPTH) -> List[Frame]:
+    """フレームから内側（ブロック中の処理）を先頭にしたスタックを取り出します"""
+    stack: List[Frame] = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return stack
+
+class _SlowCallback:
+    """同じ場所でのブロックの集計"""
+
+    __slots__ = ("cog", "command", "location", "count", "total", "max", "stack", "last_seen")
+
+    def __init__(self, cog: str, command: str, location: str, stack: List[Frame]):
+        self.cog = cog
+        self.command = command
+        self.location = location
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stack = stack
+        self.last_seen = 0.0
+
+class LoopProfiler:
+    """イベントループをブロックした処理をCog・コマンドごとに集計します"""
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        loader: Optional[CogLoader] = None,
+        registry: Optional[MetricsRegistry] = None,
+        max_entries: int = 200
+    ):
+        """
+        プロファイラーを初期化します。
+
+        Args:
+            threshold (float): この秒数以上ブロックした処理を記録する
+            loader (Optional[CogLoader]): スタックからCog名を求めるためのローダー
+            registry (Optional[MetricsRegistry]): 遅延などを公開するレジストリ
+            max_entries (int): 保持する集計の最大数（超えたら合計時間の短いものから捨てる）
+        """
+        self.threshold = threshold
+        self.loader = loader
+        self.max_entries = max_entries
+        # ハートビートの間隔（ブロックを閾値の1/4程度の誤差で検出する）
+        self.interval = max(threshold / 4, 0.001)
+        self.lag_histogram = Histogram(LOOP_LAG_BUCKETS)
+        self.max_lag = 0.0
+        self.slow_callbacks = 0
+        self._entries: Dict[Tuple[str, str, str], _SlowCallback] = {}
+        self._expected = 0.0
+        self._sample: Optional[Tuple[float, List[Frame]]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        if registry is not None:
+            registry.add_gauge(
+                "slow_callbacks_total",
+                "閾値以上イベントループをブロックした回数",
+                lambda: self.slow_callbacks
+            )
+
+    @property
+    def running(self) -> bool:
+        """計測中か"""
+        return self._task is not None
+
+    async def start(self) -> None:
+        """ハートビートと監視スレッドを開始します"""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._expected = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._watcher = threading.Thread(target=self._watch, name="loop-profiler", daemon=True)
+        self._watcher.start()
+        logger.info(f"Loop profiler started (threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        """計測を停止します"""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._watcher is not None:
+            self._watcher.join(timeout=1.0)
+            self._watcher = None
+
+    def reset(self) -> None:
+        """集計を消去します"""
+        self._entries.clear()
+        self.lag_histogram = Histogram(LOOP_LAG_BUCKETS)
+        self.max_lag = 0.0
+        self.slow_callbacks = 0
+
+    def get_report(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        ブロックした時間の合計が長い順に集計を取得します。
+
+        Args:
+            limit (int): 取得する件数
+
+        Returns:
+            List[Dict[str, Any]]: cog, command, location, count, total, max, stack
+        """
+        entries = sorted(self._entries.values(), key=lambda entry: entry.total, reverse=True)[:limit]
+        return [
+            {
+                'cog': entry.cog,
+                'command': entry.command,
+                'location': entry.location,
+                'count': entry.count,
+                'total': entry.total,
+                'max': entry.max,
+                'stack': [f"{_short_path(path)}:{line} in {name}" for path, line, name in entry.stack]
+            }
+            for entry in entries
+        ]
+
+    def format_report(self, limit: int = 10) -> str:
+        """
+        集計を表示用の文字列にします。
+
+        Args:
+            limit (int): 表示する件数
+
+        Returns:
+            str: ブロックした処理の一覧
+        """
+        header = (
+            f"🐢 **イベントループをブロックした処理**（閾値 {self.threshold * 1000:.0f}ms、"
+            f"最大遅延 {self.max_lag * 1000:.0f}ms、p99 {self.lag_histogram.quantile(0.99) * 1000:.0f}ms）"
+        )
+        report = self.get_report(limit)
+        if not report:
+            return f"{header}\n\n✅ 閾値を超えてブロックした処理はありません。"
+
+        lines = [header, ""]
+        for rank, entry in enumerate(report, 1):
+            name = entry['cog'] if entry['command'] == UNKNOWN else f"{entry['cog']}.{entry['command']}"
+            lines.append(
+                f"{rank}. `{name}` - {entry['count']}回、合計 {entry['total'] * 1000:.0f}ms、"
+                f"最大 {entry['max'] * 1000:.0f}ms"
+            )
+            lines.append(f"    `{entry['location']}`")
+        return "\n".join(lines)
+
+    async def _beat(self) -> None:
+        """一定間隔で起き、予定時刻からの遅れを記録します"""
+        while True:
+            expected = self._expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - expected)
+            self.lag_histogram.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
+            sample, self._sample = self._sample, None
+            if lag >= self.threshold:
+                # 監視スレッドが間に合わなかった短いブロックはスタックなしで記録する
+                stack = sample[1] if sample is not None and sample[0] == expected else []
+                self._record(lag, stack)
+
+    def _watch(self) -> None:
+        """ハートビートが遅れている間、イベントループのスレッドのスタックを取得します（別スレッド）"""
+        while not self._stopped.wait(self.interval):
+            expected = self._expected
+            if self._sample is not None and self._sample[0] == expected:
+                continue
+            if time.monotonic() - expected < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            self._sample = (expected, _extract_stack(frame))
+
+    def _record(self, duration: float, stack: List[Frame]) -> None:
+        """ブロックをCog・コマンド・場所ごとに集計します"""
+        self.slow_callbacks += 1
+        cog, command, location = self._attribute(stack)
+        key = (cog, command, location)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                smallest = min(self._entries, key=lambda k: self._entries[k].total)
+                del self._entries[smallest]
+            entry = self._entries[key] = _SlowCallback(cog, command, location, stack)
+        entry.count += 1
+        entry.total += duration
+        entry.stack = stack or entry.stack
+        entry.last_seen = time.time()
+        if duration > entry.max:
+            entry.max = duration
+        logger.warning(
+            f"Event loop blocked for {duration * 1000:.0f}ms by {cog}.{command} at {location}"
+        )
+
+    def _attribute(self, stack: List[Frame]) -> Tuple[str, str, str]:
+        """スタックからCog名・コマンド名・ブロックしていた場所を求めます"""
+        if not stack:
+            return UNKNOWN, UNKNOWN, UNKNOWN
+        path, line, name = stack[0]
+        location = f"{_short_path(path)}:{line} in {name}"
+
+        cog_files = self.loader.source_files() if self.loader is not None else {}
+        cog, command = UNKNOWN, UNKNOWN
+        # 最も外側のCogのフレームがコマンドのメソッド
+        for path, _, name in stack:
+            cog_name = cog_files.get(path)
+            if cog_name is not None:
+                cog, command = cog_name, name
+        return cog, command, location
+
+def _short_path(path: str) -> str:
+    """カレントディレクトリからの相対パスにします（外部のファイルはファイル名のみ）"""
+    try:
+        relative = os.path.relpath(path)
+    except ValueError:
+        return os.path.basename(path)
+    return os.path.basename(path) if relative.startswith("..") else relative
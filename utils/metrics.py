@@ -0,0 +1,386 @@
+"""
+メトリクス
+
+Cogのコマンドの実行時間を固定バケットのヒストグラムに、成功・失敗の回数を
+カウンターに記録し、イベントループの遅延と合わせてPrometheusのテキスト形式で
+公開します。
+
+- 記録は辞書の参照1回と、バケット境界の二分探索だけで終わります（O(1)）
+- 実行時間は CogLoader 経由で実行されたすべてのコマンドについて自動で記録されます
+- MetricsServer は /metrics を提供し、他のルート（/health など）も追加できます
+"""
+import asyncio
+import bisect
+import logging
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "Histogram",
+    "MetricsRegistry",
+    "LoopLagMonitor",
+    "MetricsServer",
+    "get_metrics",
+    "DEFAULT_LATENCY_BUCKETS"
+]
+
+logger = logging.getLogger(__name__)
+
+# コマンドの実行時間のバケット境界（秒）
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# イベントループの遅延のバケット境界（秒）
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRIC_PREFIX = "slackbot"
+
+class Histogram:
+    """固定バケットのヒストグラム"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        ヒストグラムを初期化します。
+
+        Args:
+            buckets (Sequence[float]): バケットの上限値（昇順、+Inf は自動で追加）
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        値を記録します。
+
+        Args:
+            value (float): 記録する値
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """
+        分位数をバケット内の線形補間で推定します。
+
+        Args:
+            q (float): 分位（0〜1）
+
+        Returns:
+            float: 推定値（記録がなければ0.0）
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """
+        バケットの上限値と累積の記録数を取得します。
+
+        Returns:
+            List[Tuple[float, int]]: (上限値, 累積数)（最後は +Inf）
+        """
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            result.append((bound, cumulative))
+        return result
+
+class _CommandMetrics:
+    """コマンドごとの実行時間と成功・失敗の回数"""
+
+    __slots__ = ("histogram", "success", "errors")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.histogram = Histogram(buckets)
+        self.success = 0
+        self.errors = 0
+
+class MetricsRegistry:
+    """コマンドのメトリクスとゲージの登録先"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        レジストリを初期化します。
+
+        Args:
+            buckets (Sequence[float]): コマンドの実行時間のバケット境界（秒）
+        """
+        self.buckets = tuple(buckets)
+        self._commands: Dict[Tuple[str, str], _CommandMetrics] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._histograms: Dict[str, Tuple[str, Histogram]] = {}
+
+    def observe_command(self, cog: str, command: str, duration: float, error: bool = False) -> None:
+        """
+        コマンドの実行結果を記録します。
+
+        Args:
+            cog (str): Cog名
+            command (str): コマンド名（メソッド名）
+            duration (float): 実行時間（秒）
+            error (bool): 例外で終了したか
+        """
+        metrics = self._commands.get((cog, command))
+        if metrics is None:
+            metrics = self._commands[(cog, command)] = _CommandMetrics(self.buckets)
+        metrics.histogram.observe(duration)
+        if error:
+            metrics.errors += 1
+        else:
+            metrics.success += 1
+
+    def add_gauge(self, name: str, help_text: str, func: Callable[[], float]) -> None:
+        """
+        公開時に値を取得するゲージを登録します（同名のゲージは置き換えます）。
+
+        Args:
+            name (str): メトリクス名（slackbot_ は自動で付きます）
+            help_text (str): 説明
+            func (Callable[[], float]): 現在値を返す関数
+        """
+        self._gauges[f"{METRIC_PREFIX}_{name}"] = (help_text, func)
+
+    def add_histogram(self, name: str, help_text: str, histogram: Histogram) -> None:
+        """
+        ラベルなしのヒストグラムを登録します（同名のものは置き換えます）。
+
+        Args:
+            name (str): メトリクス名（slackbot_ は自動で付きます）
+            help_text (str): 説明
+            histogram (Histogram): 公開するヒストグラム
+        """
+        self._histograms[f"{METRIC_PREFIX}_{name}"] = (help_text, histogram)
+
+    def get_command_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        コマンドごとの集計を取得します。
+
+        Returns:
+            Dict[str, Dict[str, Any]]: "cog.command" ごとの count, errors, avg, p50, p95, p99, max（秒）
+        """
+        stats = {}
+        for (cog, command), metrics in sorted(self._commands.items()):
+            histogram = metrics.histogram
+            stats[f"{cog}.{command}"] = {
+                'count': histogram.count,
+                'errors': metrics.errors,
+                'avg': histogram.sum / histogram.count if histogram.count else 0.0,
+                'p50': histogram.quantile(0.5),
+                'p95': histogram.quantile(0.95),
+                'p99': histogram.quantile(0.99),
+                'max': histogram.max
+            }
+        return stats
+
+    def render(self) -> str:
+        """
+        Prometheusのテキスト形式で出力します。
+
+        Returns:
+            str: すべてのメトリクス
+        """
+        lines: List[str] = []
+        duration = f"{METRIC_PREFIX}_command_duration_seconds"
+        total = f"{METRIC_PREFIX}_commands_total"
+        commands = sorted(self._commands.items())
+
+        lines.append(f"# HELP {duration} Cogのコマンドの実行時間")
+        lines.append(f"# TYPE {duration} histogram")
+        for (cog, command), metrics in commands:
+            labels = f'cog="{_escape(cog)}",command="{_escape(command)}"'
+            _render_histogram(lines, duration, metrics.histogram, labels)
+
+        lines.append(f"# HELP {total} Cogのコマンドの実行回数")
+        lines.append(f"# TYPE {total} counter")
+        for (cog, command), metrics in commands:
+            labels = f'cog="{_escape(cog)}",command="{_escape(command)}"'
+            lines.append(f'{total}{{{labels},status="success"}} {metrics.success}')
+            lines.append(f'{total}{{{labels},status="error"}} {metrics.errors}')
+
+        for name, (help_text, histogram) in sorted(self._histograms.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            _render_histogram(lines, name, histogram, "")
+
+        for name, (help_text, func) in sorted(self._gauges.items()):
+            try:
+                value = float(func())
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e!r}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    """ラベル値をエスケープします"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    """数値をPrometheusの形式にします"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+def _render_histogram(lines: List[str], name: str, histogram: Histogram, labels: str) -> None:
+    """ヒストグラムの _bucket, _sum, _count を出力します"""
+    separator = "," if labels else ""
+    for bound, cumulative in histogram.cumulative_counts():
+        lines.append(f'{name}_bucket{{{labels}{separator}le="{_format_value(bound)}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {_format_value(histogram.sum)}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+
+class LoopLagMonitor:
+    """一定間隔でタイマーの遅れを測り、イベントループの遅延を記録します"""
+
+    def __init__(self, interval: float = 0.5, registry: Optional[MetricsRegistry] = None):
+        """
+        遅延の計測を初期化します。
+
+        Args:
+            interval (float): 計測間隔（秒）
+            registry (Optional[MetricsRegistry]): ゲージを登録するレジストリ（Noneで共有レジストリ）
+        """
+        self.interval = interval
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.histogram = Histogram(LOOP_LAG_BUCKETS)
+        self._task: Optional[asyncio.Task] = None
+
+        registry = registry if registry is not None else get_metrics()
+        registry.add_gauge("event_loop_lag_seconds", "直近のイベントループの遅延", lambda: self.lag)
+        registry.add_gauge("event_loop_lag_max_seconds", "起動後のイベントループの最大遅延", lambda: self.max_lag)
+        registry.add_histogram("event_loop_lag_distribution_seconds", "イベントループの遅延の分布", self.histogram)
+
+    async def start(self) -> None:
+        """計測を開始します"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """計測を停止します"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        """タイマーが予定より遅れた時間を遅延として記録します"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.histogram.observe(self.lag)
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+
+class MetricsServer:
+    """/metrics などを提供する軽量なHTTPサーバー（aiohttpを使用）"""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 3000,
+        registry: Optional[MetricsRegistry] = None,
+        expose_metrics: bool = True
+    ):
+        """
+        サーバーを初期化します。
+
+        Args:
+            host (str): 待ち受けるホスト
+            port (int): 待ち受けるポート
+            registry (Optional[MetricsRegistry]): 公開するレジストリ（Noneで共有レジストリ）
+            expose_metrics (bool): /metrics を提供するか（False ならadd_routeしたルートのみ）
+        """
+        self.host = host
+        self.port = port
+        self.registry = registry if registry is not None else get_metrics()
+        self._routes: Dict[str, Callable[[Any], Awaitable[Any]]] = {}
+        if expose_metrics:
+            self._routes["/metrics"] = self._handle_metrics
+        self._runner: Any = None
+
+    def add_route(self, path: str, handler: Callable[[Any], Awaitable[Any]]) -> None:
+        """
+        GETのルートを追加します（start() の前に呼んでください）。
+
+        Args:
+            path (str): パス
+            handler (Callable[[Any], Awaitable[Any]]): aiohttpのリクエストハンドラー
+        """
+        self._routes[path] = handler
+
+    async def start(self) -> None:
+        """待ち受けを開始します"""
+        try:
+            from aiohttp import web
+        except ImportError:
+            raise ValueError("メトリクスサーバーには aiohttp パッケージが必要です")
+
+        app = web.Application()
+        for path, handler in self._routes.items():
+            app.router.add_get(path, handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        logger.info(f"HTTP server listening on http://{self.host}:{self.port} ({', '.join(self._routes)})")
+
+    async def stop(self) -> None:
+        """待ち受けを停止します"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def bound_port(self) -> Optional[int]:
+        """実際に待ち受けているポート（port=0 の場合に割り当てられたもの）"""
+        if self._runner is None or not self._runner.addresses:
+            return None
+        return self._runner.addresses[0][1]
+
+    async def _handle_metrics(self, request: Any) -> Any:
+        """Prometheusのテキスト形式でメトリクスを返します"""
+        from aiohttp import web
+
+        return web.Response(
+            body=self.registry.render().encode('utf-8'),
+            headers={"Content-Type": PROMETHEUS_CONTENT_TYPE}
+        )
+
+_default_registry: Optional[MetricsRegistry] = None
+
+def get_metrics() -> MetricsRegistry:
+    """
+    共有レジストリを取得します（未作成なら作成）。
+
+    Returns:
+        MetricsRegistry: 共有レジストリ
+    """
+    global _default_registry
+
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
@@ -0,0 +1,455 @@
+"""
+レート制限
+
+トークンバケットによる流量制限と、ユーザー・コマンドごとの呼び出し回数を
+GCRA（Generic Cell Rate Algorithm）で制限する rate_limit デコレータを提供します。
+GCRAはキーごとに次の許可時刻（TAT）を1つ保持するだけなので、呼び出し履歴の
+リストを走査せずに O(1) で判定できます。
+"""
+import asyncio
+import functools
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+__all__ = [
+    "TokenBucket",
+    "GCRALimiter",
+    "RedisGCRALimiter",
+    "configure_rate_limit",
+    "get_rate_limiter",
+    "get_rate_limit_stats",
+    "close_rate_limit",
+    "rate_limit"
+]
+
+logger = logging.getLogger(__name__)
+
+# GCRALimiterが保持するキー数のデフォルト上限
+DEFAULT_MAX_KEYS = 100_000
+
+# 浮動小数点の誤差で上限ちょうどの呼び出しを拒否しないための許容誤差
+_EPSILON = 1e-9
+
+# Redis上でGCRAを原子的に判定するスクリプト（時刻はRedisサーバーの時計を使う）
+_GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local wait = new_tat - now - window
+if wait > 0 then
+    return wait
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return 0
+"""
+
+class TokenBucket:
+    """
+    トークンバケット
+
+    1秒あたりrate個のトークンが最大capacity個まで貯まり、
+    処理ごとにトークンを消費します。スレッドセーフではないため、
+    複数スレッドから使う場合は呼び出し側でロックしてください。
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "_clock")
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        トークンバケットを初期化します。バケットは満杯の状態で開始します。
+
+        Args:
+            rate (float): 1秒あたりに補充するトークン数
+            capacity (Optional[float]): バケットの容量（バースト数、Noneでrateと同じ）
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        if rate <= 0:
+            raise ValueError("rate は0より大きい必要があります")
+        if capacity is None:
+            capacity = max(rate, 1.0)
+        if capacity < 1:
+            raise ValueError("capacity は1以上である必要があります")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self.updated_at = clock()
+
+    def _refill(self) -> None:
+        """経過時間に応じてトークンを補充します"""
+        now = self._clock()
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        トークンを消費できれば消費します。
+
+        Args:
+            tokens (float): 消費するトークン数
+
+        Returns:
+            bool: 消費できた場合True
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """
+        トークンが消費できるようになるまでの秒数を取得します。
+
+        Args:
+            tokens (float): 消費したいトークン数
+
+        Returns:
+            float: 待機秒数（すぐに消費できる場合0.0）
+        """
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+class GCRALimiter:
+    """
+    メモリ上でキーごとの呼び出し回数を制限するGCRAリミッター
+
+    time_window秒あたりmax_requests回まで（連続でmax_requests回まで）許可します。
+    キーごとに次の許可時刻を1つだけ保持し、期限切れのキーは更新順に並んだ
+    先頭から判定のついでに取り除きます（遅延削除）。
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_requests: int,
+        time_window: float,
+        max_keys: int = DEFAULT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        リミッターを初期化します。
+
+        Args:
+            max_requests (int): time_window秒あたりの最大呼び出し数
+            time_window (float): 制限の単位となる秒数
+            max_keys (int): 保持するキー数の上限（超えると最も古いキーを削除）
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        if max_requests < 1 or time_window <= 0:
+            raise ValueError("max_requests は1以上、time_window は0より大きい必要があります")
+
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.interval = time_window / max_requests
+        self.max_keys = max_keys
+        self._clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+        # メトリクス
+        self.allowed = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def hit(self, key: str) -> float:
+        """
+        呼び出しを1回記録します。
+
+        Args:
+            key (str): 制限の単位（ユーザーIDなど）
+
+        Returns:
+            float: 許可された場合0.0、拒否された場合は再試行できるまでの秒数
+        """
+        now = self._clock()
+        self._expire(now)
+
+        tat = self._tats.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + self.interval
+        wait = new_tat - now - self.time_window
+        if wait > _EPSILON:
+            self.rejected += 1
+            return wait
+
+        self._tats[key] = new_tat
+        self._tats.move_to_end(key)
+        if len(self._tats) > self.max_keys:
+            self._tats.popitem(last=False)
+        self.allowed += 1
+        return 0.0
+
+    async def acquire(self, key: str) -> float:
+        """
+        呼び出しを1回記録します（hit の非同期版）。
+
+        Args:
+            key (str): 制限の単位（ユーザーIDなど）
+
+        Returns:
+            float: 許可された場合0.0、拒否された場合は再試行できるまでの秒数
+        """
+        return self.hit(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        リミッターの統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: 許可・拒否の回数と保持中のキー数
+        """
+        return {
+            'backend': self.backend,
+            'max_requests': self.max_requests,
+            'time_window': self.time_window,
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'keys': len(self._tats)
+        }
+
+    def _expire(self, now: float) -> None:
+        """先頭から期限切れ（許可時刻を過ぎた）のキーを取り除きます"""
+        tats = self._tats
+        while tats:
+            key = next(iter(tats))
+            if tats[key] > now:
+                break
+            del tats[key]
+
+class RedisGCRALimiter:
+    """
+    Redisで複数のレプリカ間の呼び出し回数を共有するGCRAリミッター
+
+    判定はRedis上のスクリプトで原子的に行い、キーは許可時刻を過ぎると
+    Redisの有効期限で自動的に削除されます。Redisに接続できない間は
+    レプリカごとのメモリ上の制限で代用します。
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        redis: Any,
+        name: str,
+        max_requests: int,
+        time_window: float,
+        prefix: str = "slackbot:ratelimit",
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        リミッターを初期化します。
+
+        Args:
+            redis (Any): redis.asyncioクライアント
+            name (str): リミッターの名前（キーの接頭辞に使う）
+            max_requests (int): time_window秒あたりの最大呼び出し数
+            time_window (float): 制限の単位となる秒数
+            prefix (str): Redisキーの接頭辞
+            clock (Callable[[], float]): 代用のメモリ上の制限で使う時刻関数
+        """
+        self.redis = redis
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self._key_prefix = f"{prefix}:{name}:"
+        self._fallback = GCRALimiter(max_requests, time_window, clock=clock)
+        self._script = redis.register_script(_GCRA_SCRIPT)
+        self._interval_ms = max(1, round(time_window * 1000 / max_requests))
+        self._window_ms = round(time_window * 1000)
+
+        # メトリクス
+        self.allowed = 0
+        self.rejected = 0
+        self.remote_errors = 0
+
+    async def acquire(self, key: str) -> float:
+        """
+        呼び出しを1回記録します。
+
+        Args:
+            key (str): 制限の単位（ユーザーIDなど）
+
+        Returns:
+            float: 許可された場合0.0、拒否された場合は再試行できるまでの秒数
+        """
+        try:
+            wait_ms = await self._script(keys=[self._key_prefix + key], args=[self._interval_ms, self._window_ms])
+        except Exception as e:
+            self.remote_errors += 1
+            logger.warning(f"Rate limiter {self._key_prefix}: redis unavailable, using local limit: {e}")
+            wait = self._fallback.hit(key)
+        else:
+            wait = int(wait_ms) / 1000.0
+
+        if wait > 0:
+            self.rejected += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        リミッターの統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: 許可・拒否の回数とRedisのエラー数
+        """
+        return {
+            'backend': self.backend,
+            'max_requests': self.max_requests,
+            'time_window': self.time_window,
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'remote_errors': self.remote_errors
+        }
+
+_redis_client: Any = None
+_redis_prefix = "slackbot:ratelimit"
+_limiters: Dict[str, Any] = {}
+
+def configure_rate_limit(
+    redis_url: Optional[str] = None,
+    redis_client: Any = None,
+    prefix: str = "slackbot:ratelimit"
+) -> None:
+    """
+    rate_limit デコレータが使うバックエンドを設定します。既存のリミッターは破棄されます。
+
+    Args:
+        redis_url (Optional[str]): RedisのURL（Noneでメモリ上のみ）
+        redis_client (Any): 既存のredis.asyncioクライアント（redis_urlより優先）
+        prefix (str): Redisキーの接頭辞
+    """
+    global _redis_client, _redis_prefix
+
+    if redis_client is None and redis_url:
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:
+            raise ValueError("Redisによるレート制限には redis パッケージが必要です")
+        redis_client = redis_asyncio.from_url(redis_url, decode_responses=True)
+
+    _redis_client = redis_client
+    _redis_prefix = prefix
+    _limiters.clear()
+
+def get_rate_limiter(name: str, max_requests: int, time_window: float) -> Any:
+    """
+    名前ごとのリミッターを取得します（初回は設定済みのバックエンドで作成）。
+
+    Args:
+        name (str): リミッターの名前（コマンド名など）
+        max_requests (int): time_window秒あたりの最大呼び出し数
+        time_window (float): 制限の単位となる秒数
+
+    Returns:
+        Any: GCRALimiter または RedisGCRALimiter
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        if _redis_client is not None:
+            limiter = RedisGCRALimiter(_redis_client, name, max_requests, time_window, prefix=_redis_prefix)
+        else:
+            limiter = GCRALimiter(max_requests, time_window)
+        _limiters[name] = limiter
+    return limiter
+
+def get_rate_limit_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    全リミッターの統計情報を取得します。
+
+    Returns:
+        Dict[str, Dict[str, Any]]: リミッター名をキーにした統計
+    """
+    return {name: limiter.get_stats() for name, limiter in sorted(_limiters.items())}
+
+async def close_rate_limit() -> None:
+    """レート制限のRedis接続を閉じます"""
+    global _redis_client
+
+    if _redis_client is not None:
+        close = getattr(_redis_client, "aclose", None) or getattr(_redis_client, "close", None)
+        if close is not None:
+            await close()
+        _redis_client = None
+    _limiters.clear()
+
+def _context_key(ctx: Any, per: str) -> str:
+    """Slackコンテキストから制限の単位となるキーを取り出します"""
+    if per == "global":
+        return "*"
+    target = getattr(ctx, per, None)
+    target_id = getattr(target, "id", None)
+    return str(target_id) if target_id is not None else "*"
+
+def rate_limit(
+    max_requests: int,
+    time_window: float,
+    per: str = "user",
+    name: Optional[str] = None,
+    message: str = "⏳ 実行回数の上限に達しました。{retry_after}秒後に再度お試しください。"
+) -> Callable:
+    """
+    コマンドの実行回数を制限するデコレータ
+
+    time_window秒あたりmax_requests回を超えた実行はコマンドを呼び出さず、
+    ctx.respond で再試行までの秒数を伝えます。
+
+    Args:
+        max_requests (int): time_window秒あたりの最大実行回数
+        time_window (float): 制限の単位となる秒数
+        per (str): 制限の単位（user / channel / global）
+        name (Optional[str]): リミッターの名前（Noneで関数の修飾名）
+        message (str): 制限時の応答（{retry_after} に秒数が入る）
+
+    Returns:
+        Callable: デコレータ
+    """
+    if per not in ("user", "channel", "global"):
+        raise ValueError(f"不明な制限の単位です: {per}")
+    if max_requests < 1 or time_window <= 0:
+        raise ValueError("max_requests は1以上、time_window は0より大きい必要があります")
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        if not asyncio.iscoroutinefunction(func):
+            raise TypeError(f"{func.__qualname__} は非同期関数である必要があります")
+        limiter_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(self: Any, ctx: Any, *args: Any, **kwargs: Any) -> Any:
+            limiter = get_rate_limiter(limiter_name, max_requests, time_window)
+            key = _context_key(ctx, per)
+            retry_after = await limiter.acquire(key)
+            if retry_after > 0:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Rate limited {limiter_name} for {per} {key} (retry after {retry_after:.1f}s)")
+                await ctx.respond(message.format(retry_after=math.ceil(retry_after)))
+                return None
+            return await func(self, ctx, *args, **kwargs)
+
+        wrapper.rate_limit_name = limiter_name
+        return wrapper
+
+    return decorator
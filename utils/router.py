@@ -0,0 +1,289 @@
+"""
+コマンドルーター
+
+コマンド名・メッセージのパターン・action_id のプレフィックスから、処理する
+Cogとメソッドを求めるための索引です。イベントごとに全ハンドラーを順に
+照合する代わりに、
+
+- コマンドは辞書
+- 先頭一致（^ または \\A で始まる）のメッセージのパターンは、先頭の固定文字列のトライ木
+- action_id のプレフィックスはトライ木
+
+で引くため、ハンドラーが増えても振り分けのコストはほとんど変わりません。
+先頭一致でないパターンは登録順に照合しますが、パターン中の固定文字列が
+メッセージに含まれない場合は正規表現を実行せずに飛ばします。
+Cogの登録・解除のたびに、そのCogの分だけ索引を更新します。
+"""
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .validation import validate_command_name
+
+__all__ = ["Route", "CommandRouter"]
+
+logger = logging.getLogger(__name__)
+
+# トライ木のノードで、そこで終わるプレフィックスの値を保持するキー
+_TERMINAL = ""
+
+# 正規表現で特別な意味を持つ文字と、直前の文字を省略可能にする量指定子
+_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+_QUANTIFIERS = frozenset("*?{")
+
+def _literal_prefix(pattern: str) -> Tuple[bool, str]:
+    """
+    パターンが先頭一致かどうかと、先頭の固定文字列を求めます。
+
+    | を含むパターンは、どの分岐が一致するか分からないため固定文字列なしとして扱います。
+
+    Returns:
+        Tuple[bool, str]: (先頭一致か, 一致するメッセージに必ず含まれる先頭の固定文字列)
+    """
+    if "|" in pattern:
+        return False, ""
+    anchored = pattern.startswith(("^", "\\A"))
+    index = 1 if pattern.startswith("^") else 2 if anchored else 0
+    literal: List[str] = []
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\" and index + 1 < len(pattern) and not pattern[index + 1].isalnum():
+            char = pattern[index + 1]
+            index += 2
+        elif char in _SPECIAL_CHARS:
+            if char in _QUANTIFIERS and literal:
+                literal.pop()
+            break
+        else:
+            index += 1
+        literal.append(char)
+    return anchored, "".join(literal)
+
+def _trie_insert(trie: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """トライ木にキーのノードを作成して返します"""
+    node = trie
+    for char in key:
+        node = node.setdefault(char, {})
+    return node
+
+def _trie_prune(trie: Dict[str, Any], key: str) -> None:
+    """値がなくなったキーのノードを、不要になった親ノードと共に取り除きます"""
+    path = [trie]
+    for char in key:
+        path.append(path[-1][char])
+    for index in range(len(key), 0, -1):
+        if path[index]:
+            break
+        del path[index - 1][key[index - 1]]
+
+class Route:
+    """振り分け先（Cog名とメソッド名、メッセージの場合は一致結果）"""
+
+    __slots__ = ("cog_name", "method", "match")
+
+    def __init__(self, cog_name: str, method: str, match: Optional[re.Match] = None):
+        self.cog_name = cog_name
+        self.method = method
+        self.match = match
+
+    def __repr__(self) -> str:
+        return f"Route({self.cog_name}.{self.method})"
+
+class _MessageRoute:
+    """メッセージのパターンの登録内容"""
+
+    __slots__ = ("order", "pattern", "literal", "route")
+
+    def __init__(self, order: int, pattern: re.Pattern, literal: str, route: Route):
+        self.order = order
+        self.pattern = pattern
+        self.literal = literal
+        self.route = route
+
+class CommandRouter:
+    """コマンド・メッセージ・アクションの振り分け先の索引"""
+
+    def __init__(self):
+        self._commands: Dict[str, Route] = {}
+        self._patterns: Dict[str, _MessageRoute] = {}
+        # 先頭一致のパターン（固定文字列のトライ木）と、それ以外のパターン（登録順）
+        self._anchored: Dict[str, Any] = {}
+        self._unanchored: List[_MessageRoute] = []
+        self._actions: Dict[str, Route] = {}
+        self._action_trie: Dict[str, Any] = {}
+        self._order = 0
+
+    @property
+    def commands(self) -> Dict[str, str]:
+        """コマンド名とCog名の対応"""
+        return {command: route.cog_name for command, route in self._commands.items()}
+
+    def add(
+        self,
+        cog_name: str,
+        commands: Iterable[str] = (),
+        messages: Optional[Dict[str, str]] = None,
+        actions: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Cogのコマンド・メッセージのパターン・action_id のプレフィックスを登録します。
+
+        いずれかが不正・重複している場合は何も登録せずに ValueError を送出します。
+
+        Args:
+            cog_name (str): Cog名
+            commands (Iterable[str]): コマンド名（メソッド名）
+            messages (Optional[Dict[str, str]]): メッセージの正規表現とメソッド名
+            actions (Optional[Dict[str, str]]): action_id のプレフィックスとメソッド名
+        """
+        commands = list(commands)
+        messages = messages or {}
+        actions = actions or {}
+
+        for command in commands:
+            if not validate_command_name(command):
+                raise ValueError(f"コマンド名が不正です: {command}")
+            route = self._commands.get(command)
+            if route is not None:
+                raise ValueError(f"コマンド {command} は Cog {route.cog_name} と重複しています")
+        compiled: Dict[str, re.Pattern] = {}
+        for pattern in messages:
+            if pattern in self._patterns:
+                owner = self._patterns[pattern].route.cog_name
+                raise ValueError(f"メッセージのパターン {pattern} は Cog {owner} と重複しています")
+            try:
+                compiled[pattern] = re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"メッセージのパターン {pattern} が不正です: {e}")
+        for prefix in actions:
+            if not prefix:
+                raise ValueError("action_id のプレフィックスが空です")
+            if prefix in self._actions:
+                owner = self._actions[prefix].cog_name
+                raise ValueError(f"action_id のプレフィックス {prefix} は Cog {owner} と重複しています")
+
+        for command in commands:
+            self._commands[command] = Route(cog_name, command)
+        for pattern, method in messages.items():
+            anchored, literal = _literal_prefix(pattern)
+            entry = _MessageRoute(self._order, compiled[pattern], literal, Route(cog_name, method))
+            self._order += 1
+            self._patterns[pattern] = entry
+            if anchored:
+                _trie_insert(self._anchored, literal).setdefault(_TERMINAL, []).append(entry)
+            else:
+                self._unanchored.append(entry)
+        for prefix, method in actions.items():
+            route = Route(cog_name, method)
+            self._actions[prefix] = route
+            _trie_insert(self._action_trie, prefix)[_TERMINAL] = route
+
+    def remove(self, cog_name: str) -> None:
+        """
+        Cogの登録をすべて解除します。
+
+        Args:
+            cog_name (str): Cog名
+        """
+        for command in [c for c, route in self._commands.items() if route.cog_name == cog_name]:
+            del self._commands[command]
+
+        for pattern in [p for p, entry in self._patterns.items() if entry.route.cog_name == cog_name]:
+            entry = self._patterns.pop(pattern)
+            if entry in self._unanchored:
+                self._unanchored.remove(entry)
+                continue
+            node = _trie_insert(self._anchored, entry.literal)
+            node[_TERMINAL].remove(entry)
+            if not node[_TERMINAL]:
+                del node[_TERMINAL]
+                _trie_prune(self._anchored, entry.literal)
+
+        for prefix in [p for p, route in self._actions.items() if route.cog_name == cog_name]:
+            del self._actions[prefix]
+            del _trie_insert(self._action_trie, prefix)[_TERMINAL]
+            _trie_prune(self._action_trie, prefix)
+
+    def route_command(self, command: str) -> Optional[Route]:
+        """
+        コマンドの振り分け先を求めます。
+
+        Args:
+            command (str): コマンド名
+
+        Returns:
+            Optional[Route]: 振り分け先（登録されていなければNone）
+        """
+        return self._commands.get(command)
+
+    def route_message(self, text: str) -> Optional[Route]:
+        """
+        メッセージに一致するパターンの振り分け先を求めます。
+
+        先頭一致のパターンを優先し、その中では先に登録したものを選びます。
+        先頭一致のパターンが一致しなければ、それ以外のパターンを登録順に照合します。
+
+        Args:
+            text (str): メッセージ本文
+
+        Returns:
+            Optional[Route]: 一致結果を含む振り分け先（一致しなければNone）
+        """
+        best: Optional[_MessageRoute] = None
+        best_match: Optional[re.Match] = None
+        node = self._anchored
+        for index in range(len(text) + 1):
+            for entry in node.get(_TERMINAL, ()):
+                if best is not None and entry.order > best.order:
+                    continue
+                found = entry.pattern.match(text)
+                if found is not None:
+                    best, best_match = entry, found
+            if index == len(text):
+                break
+            node = node.get(text[index])
+            if node is None:
+                break
+        if best is not None:
+            return Route(best.route.cog_name, best.route.method, best_match)
+
+        for entry in self._unanchored:
+            if entry.literal not in text:
+                continue
+            found = entry.pattern.search(text)
+            if found is not None:
+                return Route(entry.route.cog_name, entry.route.method, found)
+        return None
+
+    def route_action(self, action_id: str) -> Optional[Route]:
+        """
+        action_id に最も長く一致するプレフィックスの振り分け先を求めます。
+
+        Args:
+            action_id (str): ブロックアクションの action_id
+
+        Returns:
+            Optional[Route]: 振り分け先（一致しなければNone）
+        """
+        node = self._action_trie
+        route = None
+        for char in action_id:
+            node = node.get(char)
+            if node is None:
+                break
+            route = node.get(_TERMINAL, route)
+        return route
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        索引の統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: コマンド・パターン（うち先頭一致でないもの）・プレフィックスの数
+        """
+        return {
+            'commands': len(self._commands),
+            'message_patterns': len(self._patterns),
+            'unanchored_patterns': len(self._unanchored),
+            'action_prefixes': len(self._actions)
+        }
@@ -0,0 +1,356 @@
+"""
+サンプリングプロファイラー
+
+稼働中のボットを再起動せずにプロファイルするための、時間を区切った
+統計的サンプリングプロファイラーです。
+
+- 別スレッドが一定間隔で全スレッドのスタックを取得し、同じスタックの出現回数を数えます
+- 結果は collapsed stack 形式（flamegraph.pl や speedscope で読み込める）と、
+  関数ごとの上位の一覧で取得できます
+- 対象はプロセス全体か、Cogのコード（Cogのフレームから内側）に絞れます
+
+計測対象のコードには何も追加しません。サンプリングのコストはサンプラースレッドの
+CPU時間として計測し、結果に含めます（既定の100Hzでは1%未満）。
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cog_loader import CogLoader
+from .executor import get_offload_executor
+from .loop_profiler import _short_path
+
+__all__ = ["ProfileResult", "SamplingProfiler", "SCOPE_ALL", "SCOPE_COGS"]
+
+logger = logging.getLogger(__name__)
+
+# プロセス全体・読み込み済みの全Cog（それ以外はCog名で1つのCogに絞る）
+SCOPE_ALL = "all"
+SCOPE_COGS = "cogs"
+
+# 既定のサンプリング間隔（秒）
+DEFAULT_INTERVAL = 0.01
+
+# 記録するスタックの深さ
+STACK_DEPTH = 64
+
+# 待機中とみなす最も内側のフレーム（ファイル名, 関数名）
+_IDLE_FRAMES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker")
+})
+
+# (スレッドID, 内側を先頭にしたコードオブジェクトの列)
+_RawStack = Tuple[int, Tuple[CodeType, ...]]
+
+def _frame_label(code: CodeType) -> str:
+    """コードオブジェクトを flamegraph 上の関数名にします"""
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+def _is_idle(code: CodeType) -> bool:
+    """待機中のスレッドのフレームか"""
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+class ProfileResult:
+    """プロファイルの結果"""
+
+    def __init__(
+        self,
+        stacks: Dict[Tuple[str, ...], int],
+        scope: str,
+        started_at: float,
+        duration: float,
+        samples: int,
+        idle: int,
+        cpu_time: float
+    ):
+        """
+        結果を初期化します。
+
+        Args:
+            stacks (Dict[Tuple[str, ...], int]): 外側を先頭にしたスタックと出現回数
+            scope (str): 対象（all, cogs, Cog名）
+            started_at (float): 開始時刻（UNIX時間）
+            duration (float): 計測した秒数
+            samples (int): サンプリングした回数
+            idle (int): 待機中のため除いたスタックの数
+            cpu_time (float): サンプリングに使ったCPU時間（秒）
+        """
+        self.stacks = stacks
+        self.scope = scope
+        self.started_at = started_at
+        self.duration = duration
+        self.samples = samples
+        self.idle = idle
+        self.cpu_time = cpu_time
+
+    @property
+    def total(self) -> int:
+        """記録したスタックの数"""
+        return sum(self.stacks.values())
+
+    @property
+    def overhead(self) -> float:
+        """計測時間に対するサンプリングのCPU時間の割合"""
+        return self.cpu_time / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def filename(self) -> str:
+        """保存するファイル名"""
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        return f"profile-{self.scope}-{timestamp}.folded"
+
+    def collapsed(self) -> str:
+        """
+        collapsed stack 形式のテキストを取得します。
+
+        Returns:
+            str: 1行に「外側;…;内側 回数」を並べたテキスト
+        """
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def top_functions(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """
+        関数ごとの出現回数を、実行中だった回数（self）の多い順に取得します。
+
+        Args:
+            limit (int): 取得する件数
+
+        Returns:
+            List[Dict[str, Any]]: function, self, total（呼び出し先を含む回数）
+        """
+        own: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self.stacks.items():
+            # 先頭はスレッド名・Cog名
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                inclusive[label] += count
+        ranked = sorted(inclusive, key=lambda label: (own[label], inclusive[label]), reverse=True)
+        return [
+            {'function': label, 'self': own[label], 'total': inclusive[label]}
+            for label in ranked[:limit]
+        ]
+
+    def format_summary(self, limit: int = 15) -> str:
+        """
+        結果を表示用の文字列にします。
+
+        Args:
+            limit (int): 表示する関数の数
+
+        Returns:
+            str: 上位の関数の一覧
+        """
+        header = (
+            f"🔬 **プロファイル結果**（対象: {self.scope}、{self.duration:.1f}秒、"
+            f"{self.samples}回サンプリング、負荷 {self.overhead * 100:.2f}%）"
+        )
+        total = self.total
+        if not total:
+            return f"{header}\n\n📝 対象のコードは実行されていませんでした。"
+
+        lines = [header, "", "関数（self% / total%）:"]
+        for entry in self.top_functions(limit):
+            lines.append(
+                f"• {entry['self'] / total * 100:5.1f}% / {entry['total'] / total * 100:5.1f}%  `{entry['function']}`"
+            )
+        return "\n".join(lines)
+
+    def save(self, directory: str) -> str:
+        """
+        collapsed stack 形式でファイルに保存します（ブロッキングI/O）。
+
+        Args:
+            directory (str): 保存先のディレクトリ
+
+        Returns:
+            str: 保存したファイルのパス
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return path
+
+class SamplingProfiler:
+    """時間を区切ってプロセスのスタックをサンプリングします"""
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        loader: Optional[CogLoader] = None,
+        max_duration: float = 60.0,
+        output_dir: str = "data/profiles"
+    ):
+        """
+        プロファイラーを初期化します。
+
+        Args:
+            interval (float): サンプリング間隔（秒）
+            loader (Optional[CogLoader]): スタックからCogを求めるためのローダー
+            max_duration (float): 1回のプロファイルの最大秒数
+            output_dir (str): 結果のファイルの保存先
+        """
+        if interval <= 0:
+            raise ValueError("サンプリング間隔は0より大きい必要があります")
+
+        self.interval = interval
+        self.loader = loader
+        self.max_duration = max_duration
+        self.output_dir = output_dir
+        self._counts: Counter = Counter()
+        self._samples = 0
+        self._cpu_time = 0.0
+        self._stopped = threading.Event()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        """プロファイル中か"""
+        return self._running
+
+    async def profile(self, duration: float, scope: str = SCOPE_ALL) -> ProfileResult:
+        """
+        指定した秒数だけサンプリングし、結果を返します。
+
+        Args:
+            duration (float): 計測する秒数
+            scope (str): all（プロセス全体）、cogs（全Cog）、またはCog名
+
+        Returns:
+            ProfileResult: プロファイルの結果
+
+        Raises:
+            ValueError: 秒数や対象が不正な場合
+            RuntimeError: 既にプロファイル中の場合
+        """
+        if not 0 < duration <= self.max_duration:
+            raise ValueError(f"秒数は0より大きく{self.max_duration:g}以下で指定してください")
+        if scope not in (SCOPE_ALL, SCOPE_COGS) and (self.loader is None or scope not in self.loader.cogs):
+            raise ValueError(f"読み込まれていないCogです: {scope}")
+        if self._running:
+            raise RuntimeError("既にプロファイル中です")
+
+        self._running = True
+        self._counts = Counter()
+        self._samples = 0
+        self._cpu_time = 0.0
+        self._stopped.clear()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        started_at = time.time()
+        start = time.monotonic()
+        logger.info(f"Sampling profiler started ({duration:g}s, scope {scope})")
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self._stopped.set()
+            await get_offload_executor().run(sampler.join)
+            self._running = False
+
+        elapsed = time.monotonic() - start
+        names.update((thread.ident, thread.name) for thread in threading.enumerate())
+        result = self._build_result(scope, names, started_at, elapsed)
+        logger.info(
+            f"Sampling profiler finished: {result.samples} samples, {result.total} stacks, "
+            f"overhead {result.overhead * 100:.2f}%"
+        )
+        return result
+
+    async def save(self, result: ProfileResult) -> str:
+        """
+        結果を output_dir に保存します（ファイル書き込みはオフロードします）。
+
+        Args:
+            result (ProfileResult): プロファイルの結果
+
+        Returns:
+            str: 保存したファイルのパス
+        """
+        return await get_offload_executor().run(result.save, self.output_dir)
+
+    def _run(self) -> None:
+        """停止されるまで一定間隔でサンプリングします（別スレッド）"""
+        own = threading.get_ident()
+        cpu_start = time.thread_time()
+        next_at = time.monotonic()
+        while not self._stopped.is_set():
+            self._take_sample(own)
+            next_at += self.interval
+            delay = next_at - time.monotonic()
+            if delay < 0:
+                # 間に合わなかった分は詰めずに飛ばす
+                next_at = time.monotonic()
+                delay = 0
+            self._stopped.wait(delay)
+        self._cpu_time = time.thread_time() - cpu_start
+
+    def _take_sample(self, own: int) -> None:
+        """自身を除く全スレッドのスタックを1回記録します"""
+        counts = self._counts
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None and len(codes) < STACK_DEPTH:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            counts[(ident, tuple(codes))] += 1
+        self._samples += 1
+
+    def _build_result(
+        self,
+        scope: str,
+        names: Dict[Optional[int], str],
+        started_at: float,
+        duration: float
+    ) -> ProfileResult:
+        """記録したスタックを対象で絞り込み、関数名の列に変換します"""
+        cog_files = self.loader.source_files() if self.loader is not None and scope != SCOPE_ALL else {}
+        stacks: Counter = Counter()
+        idle = 0
+        for (ident, codes), count in self._counts.items():
+            if not codes or _is_idle(codes[0]):
+                idle += count
+                continue
+
+            frames = list(reversed(codes))
+            if scope == SCOPE_ALL:
+                root = names.get(ident, f"thread-{ident}")
+            else:
+                # 最も外側のCogのフレームから内側だけを残す
+                index = next(
+                    (
+                        i for i, code in enumerate(frames)
+                        if cog_files.get(code.co_filename) is not None
+                        and scope in (SCOPE_COGS, cog_files[code.co_filename])
+                    ),
+                    None
+                )
+                if index is None:
+                    continue
+                root = cog_files[frames[index].co_filename]
+                frames = frames[index:]
+            stacks[(root, *(_frame_label(code) for code in frames))] += count
+
+        return ProfileResult(
+            stacks=dict(stacks),
+            scope=scope,
+            started_at=started_at,
+            duration=duration,
+            samples=self._samples,
+            idle=idle,
+            cpu_time=self._cpu_time
+        )
@@ -0,0 +1,424 @@
+"""
+Slack APIクライアント
+
+slack-sdkの非同期クライアントをラップし、同じ読み取りAPIの同時呼び出しを
+1回にまとめ（コアレッシング）、ユーザー情報の大量参照は users.list の
+ページ取得にまとめます（バッチ化）。取得したページはユーザーIDの索引として
+一定時間保持し、次のバッチは続きのページから取得します。HTTP接続はキープアライブ付きの
+接続プールを共有するため、コマンドが集中しても接続数は上限内に収まります。
+スケジューラーを設定すると、呼び出しはSlackのレート制限に合わせて送信されます。
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+from .cache import CacheNamespace, get_cache
+from .slack_scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, OutboundScheduler
+
+__all__ = ["SlackClient"]
+
+logger = logging.getLogger(__name__)
+
+# 副作用がなく、同じ引数の同時呼び出しをまとめてよいメソッド
+COALESCIBLE_METHODS = frozenset({
+    "auth.test",
+    "bots.info",
+    "conversations.history",
+    "conversations.info",
+    "conversations.members",
+    "conversations.replies",
+    "emoji.list",
+    "team.info",
+    "usergroups.list",
+    "usergroups.users.list",
+    "users.getPresence",
+    "users.info",
+    "users.list",
+    "users.lookupByEmail",
+    "users.profile.get"
+})
+
+# users.list の1ページの件数（Slackの推奨上限）
+USERS_LIST_PAGE_SIZE = 200
+
+class SlackClient:
+    """コアレッシング・バッチ化・接続プールを備えたSlack APIクライアント"""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        client: Any = None,
+        max_connections: int = 20,
+        keepalive_timeout: float = 30.0,
+        batch_window: float = 0.01,
+        users_list_threshold: int = 20,
+        users_list_max_pages: int = 10,
+        users_ttl: float = 600.0,
+        channels_ttl: float = 300.0,
+        scheduler: Optional[OutboundScheduler] = None
+    ):
+        """
+        クライアントを初期化します。接続は最初のAPI呼び出し時に作成されます。
+
+        Args:
+            token (Optional[str]): ボットトークン
+            client (Any): 既存の AsyncWebClient（Noneでtokenから作成）
+            max_connections (int): HTTP接続プールの最大接続数
+            keepalive_timeout (float): アイドル接続を保持する秒数
+            batch_window (float): ユーザー参照をまとめるために待つ秒数
+            users_list_threshold (int): この人数以上の同時参照は users.list で取得する
+            users_list_max_pages (int): 1回のバッチで取得する users.list の最大ページ数
+            users_ttl (float): ユーザー情報のキャッシュ秒数
+            channels_ttl (float): チャンネル情報のキャッシュ秒数
+            scheduler (Optional[OutboundScheduler]): 送信スケジューラー（Noneで直接送信）
+        """
+        if client is None and not token:
+            raise ValueError("token または client を指定してください")
+        if max_connections < 1 or users_list_threshold < 1 or users_list_max_pages < 1:
+            raise ValueError(
+                "max_connections, users_list_threshold, users_list_max_pages は1以上である必要があります"
+            )
+
+        self.token = token
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.batch_window = batch_window
+        self.users_list_threshold = users_list_threshold
+        self.users_list_max_pages = users_list_max_pages
+        self.users_ttl = users_ttl
+        self.channels_ttl = channels_ttl
+        self.scheduler = scheduler
+
+        self._client = client
+        self._session: Any = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._pending_users: Dict[str, asyncio.Future] = {}
+        self._batch_task: Optional[asyncio.Task] = None
+        # users.list で取得済みのユーザー（slack.users の件数上限の外に users_ttl 秒保持）と続きのカーソル
+        self._directory: Dict[str, Dict[str, Any]] = {}
+        self._directory_cursor: Optional[str] = None
+        self._directory_complete = False
+        self._directory_expires = 0.0
+        self._directory_lock = asyncio.Lock()
+
+        # メトリクス
+        self.calls: Dict[str, int] = {}
+        self.coalesced = 0
+        self.errors = 0
+        self.batched_lookups = 0
+        self.list_pages = 0
+
+    @property
+    def users(self) -> CacheNamespace:
+        """ユーザー情報のキャッシュ"""
+        return get_cache("slack.users", ttl=self.users_ttl)
+
+    @property
+    def channels(self) -> CacheNamespace:
+        """チャンネル情報のキャッシュ"""
+        return get_cache("slack.channels", ttl=self.channels_ttl)
+
+    def _get_client(self) -> Any:
+        """AsyncWebClientを取得します（未作成なら接続プールと共に作成）"""
+        if self._client is None:
+            import aiohttp
+            from slack_sdk.web.async_client import AsyncWebClient
+
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._client = AsyncWebClient(token=self.token, session=self._session)
+        return self._client
+
+    async def call(self, method: str, *, background: bool = False, **params: Any) -> Dict[str, Any]:
+        """
+        Slack APIを呼び出します。
+
+        COALESCIBLE_METHODS のメソッドは、同じ引数の呼び出しが実行中であれば
+        新たにリクエストせずその結果を共有します。共有するリクエストは独立したタスクで
+        実行するため、呼び出し元の1つがキャンセルされても他の呼び出し元には影響しません。
+
+        Args:
+            method (str): APIメソッド名（users.info など）
+            background (bool): 定期投稿などのバックグラウンド処理か（スケジューラーで後回しにされる）
+            **params (Any): APIの引数
+
+        Returns:
+            Dict[str, Any]: レスポンスの内容
+        """
+        priority = PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE
+        if method not in COALESCIBLE_METHODS:
+            return await self._request(method, params, priority)
+
+        key = f"{method}:{json.dumps(params, sort_keys=True, default=str)}"
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._request(method, params, priority))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_call(key, done))
+        return await asyncio.shield(task)
+
+    def _finish_call(self, key: str, task: asyncio.Task) -> None:
+        """完了したリクエストを実行中の一覧から外します"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 待っている呼び出しがなくても警告が出ないよう、例外を取得済みにしておく
+            task.exception()
+
+    async def users_info(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ユーザー情報を取得します（キャッシュ付き）。
+
+        同時に多数のユーザーが参照された場合は、users.info を個別に呼ばず
+        users.list のページ取得でまとめて読み込みます。
+
+        Args:
+            user_id (str): ユーザーID
+
+        Returns:
+            Optional[Dict[str, Any]]: ユーザー情報、存在しない場合None
+        """
+        return await self.users.get_or_load(user_id, lambda: self._enqueue_user(user_id))
+
+    async def conversations_info(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        """
+        チャンネル情報を取得します（キャッシュ付き）。
+
+        Args:
+            channel_id (str): チャンネルID
+
+        Returns:
+            Optional[Dict[str, Any]]: チャンネル情報、存在しない場合None
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            response = await self._call_or_none("conversations.info", "channel_not_found", channel=channel_id)
+            return response.get('channel') if response else None
+
+        return await self.channels.get_or_load(channel_id, load)
+
+    async def upload_file(self, channel: str, filename: str, content: str, title: Optional[str] = None) -> Dict[str, Any]:
+        """
+        テキストをファイルとしてチャンネルにアップロードします。
+
+        アップロードは複数のAPI呼び出しからなるため、スケジューラーを通さずに送信します。
+
+        Args:
+            channel (str): チャンネルID
+            filename (str): ファイル名
+            content (str): ファイルの内容
+            title (Optional[str]): 表示するタイトル
+
+        Returns:
+            Dict[str, Any]: レスポンスの内容
+        """
+        self.calls["files.upload"] = self.calls.get("files.upload", 0) + 1
+        client = self._get_client()
+        try:
+            response = await client.files_upload_v2(
+                channel=channel,
+                filename=filename,
+                content=content,
+                title=title or filename
+            )
+        except Exception:
+            self.errors += 1
+            raise
+        return getattr(response, "data", response)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        クライアントの統計情報を取得します。
+
+        Returns:
+            Dict[str, Any]: メソッドごとの呼び出し数・まとめた件数など
+        """
+        return {
+            'calls': dict(self.calls),
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'batched_lookups': self.batched_lookups,
+            'list_pages': self.list_pages,
+            'directory_size': len(self._directory),
+            'inflight': len(self._inflight),
+            'max_connections': self.max_connections,
+            'scheduler': self.scheduler.get_stats() if self.scheduler is not None else None
+        }
+
+    async def close(self) -> None:
+        """接続プールを閉じます"""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._client = None
+
+    async def _request(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> Dict[str, Any]:
+        """APIを1回呼び出します（スケジューラーがあれば送信を任せます）"""
+        if self.scheduler is not None:
+            return await self.scheduler.submit(method, params, priority)
+        return await self.send(method, params)
+
+    async def send(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        レート制限を考慮せずにAPIを1回呼び出します。
+
+        通常は call を使い、この関数はスケジューラーの送信関数として使います。
+
+        Args:
+            method (str): APIメソッド名
+            params (Dict[str, Any]): APIの引数
+
+        Returns:
+            Dict[str, Any]: レスポンスの内容
+        """
+        self.calls[method] = self.calls.get(method, 0) + 1
+        client = self._get_client()
+        try:
+            if method in COALESCIBLE_METHODS:
+                response = await client.api_call(method, http_verb="GET", params=params)
+            else:
+                response = await client.api_call(method, json=params)
+        except Exception:
+            self.errors += 1
+            raise
+        return getattr(response, "data", response)
+
+    async def _call_or_none(self, method: str, not_found_error: str, **params: Any) -> Optional[Dict[str, Any]]:
+        """APIを呼び出し、対象が存在しないエラーの場合はNoneを返します"""
+        try:
+            return await self.call(method, **params)
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if response is not None and response.get("error") == not_found_error:
+                return None
+            raise
+
+    async def _enqueue_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """ユーザー参照をバッチに追加し、バッチの処理結果を待ちます"""
+        future = self._pending_users.get(user_id)
+        if future is None:
+            future = self._pending_users[user_id] = asyncio.get_running_loop().create_future()
+        if self._batch_task is None:
+            self._batch_task = asyncio.ensure_future(self._run_user_batch())
+        return await asyncio.shield(future)
+
+    async def _run_user_batch(self) -> None:
+        """batch_window秒待ってから、たまったユーザー参照をまとめて処理します"""
+        pending: Dict[str, asyncio.Future] = {}
+        try:
+            try:
+                await asyncio.sleep(self.batch_window)
+            finally:
+                pending, self._pending_users = self._pending_users, {}
+                self._batch_task = None
+
+            users = await self._resolve_users(set(pending))
+            for user_id, future in pending.items():
+                result = users.get(user_id)
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                    future.exception()
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()
+        finally:
+            # 停止時などに処理できなかった参照は待っている側をキャンセルする
+            for future in pending.values():
+                if not future.done():
+                    future.cancel()
+
+    async def _resolve_users(self, user_ids: Set[str]) -> Dict[str, Any]:
+        """
+        ユーザー情報をまとめて取得します。
+
+        Returns:
+            Dict[str, Any]: ユーザーIDをキーにしたユーザー情報・None・例外
+        """
+        self._expire_directory()
+        users: Dict[str, Any] = {
+            user_id: self._directory[user_id] for user_id in user_ids if user_id in self._directory
+        }
+        remaining = set(user_ids) - users.keys()
+        if len(remaining) >= self.users_list_threshold and not self._directory_complete:
+            self.batched_lookups += len(remaining)
+            listed = await self._fetch_users_from_list(remaining)
+            users.update(listed)
+            remaining -= listed.keys()
+
+        # 少数の参照、ページ数の上限までに見つからなかったユーザー、一覧になかったユーザー（新規参加など）は個別に取得
+        ordered = list(remaining)
+        results = await asyncio.gather(
+            *[self._fetch_user(user_id) for user_id in ordered], return_exceptions=True
+        )
+        users.update(zip(ordered, results))
+        return users
+
+    async def _fetch_users_from_list(self, user_ids: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        users.list の続きのページを取得し、指定ユーザーの情報を取り出します。
+
+        取得したページのユーザーは索引に追加し、次のバッチでも使います。
+        全員が見つかるか、users_list_max_pages ページ取得した時点で打ち切り、
+        次のバッチは続きのページから取得します。
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 見つかったユーザーIDとユーザー情報
+        """
+        async with self._directory_lock:
+            found = {user_id: self._directory[user_id] for user_id in user_ids if user_id in self._directory}
+            wanted = set(user_ids) - found.keys()
+            pages = 0
+            while wanted and not self._directory_complete and pages < self.users_list_max_pages:
+                params: Dict[str, Any] = {'limit': USERS_LIST_PAGE_SIZE}
+                if self._directory_cursor:
+                    params['cursor'] = self._directory_cursor
+                elif not self._directory:
+                    self._directory_expires = time.monotonic() + self.users_ttl
+                response = await self.call("users.list", **params)
+                self.list_pages += 1
+                pages += 1
+
+                for member in response.get('members') or []:
+                    user_id = member.get('id')
+                    if not user_id:
+                        continue
+                    self._directory[user_id] = member
+                    if user_id in wanted:
+                        found[user_id] = member
+                        wanted.discard(user_id)
+
+                self._directory_cursor = (response.get('response_metadata') or {}).get('next_cursor') or None
+                self._directory_complete = self._directory_cursor is None
+            return found
+
+    def _expire_directory(self) -> None:
+        """users_ttl 秒を過ぎたユーザーの索引を破棄し、次の取得を最初のページからやり直します"""
+        if (self._directory or self._directory_complete) and time.monotonic() >= self._directory_expires:
+            self._directory.clear()
+            self._directory_cursor = None
+            self._directory_complete = False
+
+    async def _fetch_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """users.info で1人のユーザー情報を取得します"""
+        response = await self._call_or_none("users.info", "user_not_found", user=user_id)
+        return response.get('user') if response else None
@@ -0,0 +1,445 @@
+"""
+Slack API送信スケジューラー
+
+Slackのメソッドごとのレート制限（Tier）とチャンネルごとの投稿制限に合わせて
+API呼び出しの送信を調整します。429（Retry-After）を受けた場合は全体の送信を
+指定秒数止め、対話的な応答をバックグラウンドの投稿より優先して送信します。
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .rate_limit import TokenBucket
+
+__all__ = [
+    "OutboundScheduler",
+    "OutboundQueueFull",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND"
+]
+
+logger = logging.getLogger(__name__)
+
+# 送信の優先度（小さいほど優先）
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Tierごとの1分あたりの呼び出し数
+TIER_RATES_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+
+# 主なメソッドのTier（記載のないメソッドは default_tier）
+METHOD_TIERS = {
+    "admin.users.list": 2,
+    "auth.test": 4,
+    "chat.delete": 3,
+    "chat.postEphemeral": 4,
+    "chat.postMessage": 4,
+    "chat.scheduleMessage": 3,
+    "chat.update": 3,
+    "conversations.create": 2,
+    "conversations.history": 3,
+    "conversations.info": 3,
+    "conversations.invite": 3,
+    "conversations.list": 2,
+    "conversations.members": 4,
+    "conversations.replies": 3,
+    "files.upload": 2,
+    "reactions.add": 3,
+    "team.info": 3,
+    "usergroups.list": 2,
+    "users.info": 4,
+    "users.list": 2,
+    "users.lookupByEmail": 3,
+    "users.profile.get": 4,
+    "views.open": 4,
+    "views.update": 4
+}
+
+# Tierとは別に、チャンネルごとに約1件/秒の制限があるメソッド
+CHANNEL_SCOPED_METHODS = frozenset({
+    "chat.postEphemeral",
+    "chat.postMessage",
+    "chat.scheduleMessage",
+    "chat.update"
+})
+
+# 待ち時間のパーセンタイル計算に保持するサンプル数
+WAIT_SAMPLE_SIZE = 1024
+
+class OutboundQueueFull(Exception):
+    """送信キューが満杯で呼び出しを受け付けられない"""
+
+class _OutboundJob:
+    """送信待ちのAPI呼び出し"""
+
+    __slots__ = ("method", "params", "channel", "priority", "future", "enqueued_at", "attempts")
+
+    def __init__(self, method: str, params: Dict[str, Any], priority: int, future: asyncio.Future, now: float):
+        self.method = method
+        self.params = params
+        self.channel = params.get("channel") if method in CHANNEL_SCOPED_METHODS else None
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = now
+        self.attempts = 0
+
+def get_retry_after(error: BaseException) -> Optional[float]:
+    """
+    レート制限エラーからRetry-Afterの秒数を取り出します。
+
+    Args:
+        error (BaseException): API呼び出しの例外（slack_sdkのSlackApiErrorなど）
+
+    Returns:
+        Optional[float]: 待機秒数、レート制限エラーでなければNone
+    """
+    response = getattr(error, "response", None)
+    if response is None or getattr(response, "status_code", None) != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
+
+class OutboundScheduler:
+    """レート制限を考慮してSlack API呼び出しを送信するスケジューラー"""
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+        max_concurrency: int = 8,
+        max_queue_size: int = 1000,
+        default_tier: int = 3,
+        channel_rate: float = 1.0,
+        channel_burst: float = 1.0,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        スケジューラーを初期化します。
+
+        Args:
+            send (Callable[[str, Dict[str, Any]], Awaitable[Any]]): 実際にAPIを呼び出す関数
+            max_concurrency (int): 同時に送信中にできる呼び出し数
+            max_queue_size (int): 送信待ちキューの最大長
+            default_tier (int): METHOD_TIERS にないメソッドのTier
+            channel_rate (float): チャンネルごとの1秒あたりの投稿数
+            channel_burst (float): チャンネルごとに連続で投稿できる数
+            max_retries (int): 429を受けたときの最大再送回数
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        if max_concurrency < 1 or max_queue_size < 1:
+            raise ValueError("max_concurrency, max_queue_size は1以上である必要があります")
+        if default_tier not in TIER_RATES_PER_MINUTE:
+            raise ValueError(f"不明なTierです: {default_tier}")
+
+        self.send = send
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.default_tier = default_tier
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.max_retries = max_retries
+        self._clock = clock
+
+        # 優先度ごとの送信待ちキュー
+        self._queues: Dict[int, Deque[_OutboundJob]] = {}
+        self._pending = 0
+        self._active = 0
+        self._method_buckets: Dict[str, TokenBucket] = {}
+        self._channel_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+
+        # メトリクス
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.retried = 0
+        self._wait_samples: Dict[int, Deque[float]] = {}
+        self._wait_max: Dict[int, float] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        """送信待ちの呼び出し数"""
+        return self._pending
+
+    @property
+    def paused_for(self) -> float:
+        """Retry-Afterによる送信停止の残り秒数"""
+        return max(0.0, self._paused_until - self._clock())
+
+    def get_tier(self, method: str) -> int:
+        """
+        メソッドのTierを取得します。
+
+        Args:
+            method (str): APIメソッド名
+
+        Returns:
+            int: Tier（1〜4）
+        """
+        return METHOD_TIERS.get(method, self.default_tier)
+
+    async def start(self) -> None:
+        """送信ループを開始します"""
+        if self._loop_task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.ensure_future(self._run())
+        logger.info(f"Outbound scheduler started (concurrency={self.max_concurrency})")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        送信ループを停止します。
+
+        送信待ちの呼び出しが送信されるまで最大timeout秒待ち、
+        残った呼び出しはキャンセルします。
+
+        Args:
+            timeout (float): 完了待ちの最大秒数
+        """
+        deadline = self._clock() + timeout
+        while (self._pending or self._tasks) and self._clock() < deadline:
+            await asyncio.sleep(0.01)
+
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        dropped = 0
+        for queue in self._queues.values():
+            while queue:
+                job = queue.popleft()
+                if not job.future.done():
+                    job.future.cancel()
+                dropped += 1
+        self._pending = 0
+        if dropped:
+            logger.warning(f"Outbound scheduler stopped with {dropped} queued calls dropped")
+        logger.info("Outbound scheduler stopped")
+
+    async def submit(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> Any:
+        """
+        API呼び出しをキューに積み、送信結果を待ちます。
+
+        Args:
+            method (str): APIメソッド名
+            params (Dict[str, Any]): APIの引数
+            priority (int): 優先度（PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND など）
+
+        Returns:
+            Any: 送信関数の戻り値
+
+        Raises:
+            OutboundQueueFull: キューが満杯の場合
+        """
+        if self._loop_task is None:
+            raise RuntimeError("スケジューラーが開始されていません")
+        if self._pending >= self.max_queue_size:
+            self.rejected += 1
+            raise OutboundQueueFull(f"送信キューが満杯です（{self.max_queue_size}件）")
+
+        future = asyncio.get_running_loop().create_future()
+        job = _OutboundJob(method, params, priority, future, self._clock())
+        queue = self._queues.get(priority)
+        if queue is None:
+            queue = self._queues[priority] = deque()
+        queue.append(job)
+        self._pending += 1
+        self._wakeup.set()
+        return await future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        スケジューラーのメトリクスを取得します。
+
+        Returns:
+            Dict[str, Any]: キュー深さ・優先度ごとの待ち時間・429の回数など
+        """
+        priorities: Dict[int, Dict[str, Any]] = {}
+        for priority in sorted(set(self._queues) | set(self._wait_samples)):
+            samples = sorted(self._wait_samples.get(priority, ()))
+            priorities[priority] = {
+                'queued': len(self._queues.get(priority, ())),
+                'wait_time_avg': sum(samples) / len(samples) if samples else 0.0,
+                'wait_time_p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0,
+                'wait_time_max': self._wait_max.get(priority, 0.0)
+            }
+
+        return {
+            'queue_depth': self._pending,
+            'active': self._active,
+            'sent': self.sent,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'rate_limited': self.rate_limited,
+            'retried': self.retried,
+            'paused_for': self.paused_for,
+            'priorities': priorities
+        }
+
+    async def _run(self) -> None:
+        """送信できる呼び出しを送信し、なければ送信可能になるまで待機します"""
+        while True:
+            delay = self._dispatch_ready()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch_ready(self) -> Optional[float]:
+        """
+        送信可能な呼び出しを優先度順に開始します。
+
+        Returns:
+            Optional[float]: 次に送信可能になるまでの秒数（Noneで新たな呼び出しか完了まで待つ）
+        """
+        while self._pending and self._active < self.max_concurrency:
+            paused_for = self.paused_for
+            if paused_for > 0:
+                return paused_for
+
+            job, delay = self._take_next()
+            if job is None:
+                return delay
+            self._start(job)
+        return None
+
+    def _take_next(self) -> Tuple[Optional[_OutboundJob], Optional[float]]:
+        """
+        レート制限内で送信できる最も優先度の高い呼び出しを取り出します。
+
+        同じメソッド・チャンネルの呼び出しが制限中なら、それより後ろの同種の
+        呼び出しは確認せずに飛ばし、他の呼び出しを先に送信します。
+
+        Returns:
+            Tuple[Optional[_OutboundJob], Optional[float]]: (呼び出し, 送信可能になるまでの最短秒数)
+        """
+        shortest: Optional[float] = None
+        blocked: set = set()
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            for position, job in enumerate(queue):
+                key = (job.method, job.channel)
+                if key in blocked:
+                    continue
+
+                method_bucket = self._method_bucket(job.method)
+                channel_bucket = self._channel_bucket(job) if job.channel else None
+                wait = method_bucket.time_until_available()
+                if channel_bucket is not None:
+                    wait = max(wait, channel_bucket.time_until_available())
+                if wait > 0:
+                    blocked.add(key)
+                    shortest = wait if shortest is None else min(shortest, wait)
+                    continue
+
+                method_bucket.try_acquire()
+                if channel_bucket is not None:
+                    channel_bucket.try_acquire()
+                del queue[position]
+                self._pending -= 1
+                return job, None
+        return None, shortest
+
+    def _method_bucket(self, method: str) -> TokenBucket:
+        """メソッドのTierに応じたバケットを取得します"""
+        bucket = self._method_buckets.get(method)
+        if bucket is None:
+            per_minute = TIER_RATES_PER_MINUTE[self.get_tier(method)]
+            # 5秒分までの連続呼び出しを許容する
+            bucket = self._method_buckets[method] = TokenBucket(
+                per_minute / 60.0, max(1.0, per_minute / 12.0), clock=self._clock
+            )
+        return bucket
+
+    def _channel_bucket(self, job: _OutboundJob) -> TokenBucket:
+        """チャンネルごとの投稿制限のバケットを取得します"""
+        key = (job.method, job.channel)
+        bucket = self._channel_buckets.get(key)
+        if bucket is None:
+            bucket = self._channel_buckets[key] = TokenBucket(
+                self.channel_rate, self.channel_burst, clock=self._clock
+            )
+        return bucket
+
+    def _start(self, job: _OutboundJob) -> None:
+        """呼び出しの送信タスクを作成します"""
+        wait_time = self._clock() - job.enqueued_at
+        samples = self._wait_samples.get(job.priority)
+        if samples is None:
+            samples = self._wait_samples[job.priority] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        samples.append(wait_time)
+        if wait_time > self._wait_max.get(job.priority, 0.0):
+            self._wait_max[job.priority] = wait_time
+
+        self._active += 1
+        task = asyncio.ensure_future(self._send(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, job: _OutboundJob) -> None:
+        """呼び出しを送信し、429なら全体を止めて再度キューに戻します"""
+        try:
+            if job.future.done():
+                # 呼び出し元が待つのをやめた
+                return
+            job.attempts += 1
+            try:
+                result = await self.send(job.method, job.params)
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                retry_after = get_retry_after(e)
+                if retry_after is not None:
+                    self._handle_rate_limited(job, e, retry_after)
+                    return
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+
+            self.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._active -= 1
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def _handle_rate_limited(self, job: _OutboundJob, error: Exception, retry_after: float) -> None:
+        """429を受けた呼び出しを処理し、Retry-Afterの間すべての送信を止めます"""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        logger.warning(f"Slack API {job.method} rate limited, pausing outbound calls for {retry_after}s")
+
+        if job.attempts > self.max_retries:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+
+        # 再送は同じ優先度の先頭に戻し、順序をできるだけ保つ
+        self.retried += 1
+        self._queues.setdefault(job.priority, deque()).appendleft(job)
+        self._pending += 1
@@ -0,0 +1,347 @@
+"""
+集計ユーティリティ
+
+記録のたびに更新する O(1) の集計（スライディングウィンドウのカウンター、
+HyperLogLogによるユニーク数の推定）を提供します。
+"""
+import hashlib
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+__all__ = [
+    "SlidingWindowCounter",
+    "HyperLogLog",
+    "WindowedHyperLogLog",
+    "ActivityStats",
+    "hash_item"
+]
+
+# HyperLogLogのデフォルト精度（レジスタ数 2^10 = 1024、標準誤差 約3.3%）
+DEFAULT_HLL_PRECISION = 10
+
+# ActivityStatsのデフォルトの集計ウィンドウ（名前 -> 秒数）
+DEFAULT_WINDOWS = {"1m": 60.0, "1h": 3600.0, "24h": 86400.0}
+
+# レジスタ値 r に対する 2^-r の表
+_INVERSE_POWERS = [2.0 ** -r for r in range(65)]
+
+def hash_item(item: str) -> int:
+    """
+    HyperLogLog用に文字列を64ビットのハッシュ値に変換します。
+
+    プロセスごとに値が変わる組み込みのhash()と異なり、常に同じ値になります。
+
+    Args:
+        item (str): ハッシュする文字列
+
+    Returns:
+        int: 64ビットのハッシュ値
+    """
+    return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class _BucketRing(ABC):
+    """
+    時間を一定幅のバケットに区切り、ウィンドウ内のバケットだけを保持するリング
+
+    サブクラスは _clear_slot で期限切れになったバケットを片付けます。
+    """
+
+    def __init__(self, window: float, buckets: int, clock: Callable[[], float]):
+        if window <= 0 or buckets < 1:
+            raise ValueError("window は0より大きく、buckets は1以上である必要があります")
+
+        self.window = window
+        self.buckets = buckets
+        self._width = window / buckets
+        self._clock = clock
+        self._current = int(clock() / self._width)
+
+    def _advance(self) -> int:
+        """
+        現在時刻までバケットを進め、期限切れのバケットを片付けます。
+
+        Returns:
+            int: 現在のバケットのスロット番号
+        """
+        index = int(self._clock() / self._width)
+        if index > self._current:
+            # 1ウィンドウ以上経過していれば全スロットを1回ずつ片付ければよい
+            for step in range(1, min(index - self._current, self.buckets) + 1):
+                self._clear_slot((self._current + step) % self.buckets)
+            self._current = index
+        return index % self.buckets
+
+    @abstractmethod
+    def _clear_slot(self, slot: int) -> None:
+        """期限切れになったスロットのバケットを空にします"""
+
+class SlidingWindowCounter(_BucketRing):
+    """直近window秒間の件数を O(1) で数えるカウンター"""
+
+    def __init__(
+        self,
+        window: float,
+        buckets: int = 60,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        カウンターを初期化します。
+
+        Args:
+            window (float): 集計するウィンドウの秒数
+            buckets (int): ウィンドウの分割数（多いほど境界の精度が上がる）
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        super().__init__(window, buckets, clock)
+        self._counts: List[int] = [0] * buckets
+        self._total = 0
+
+    def add(self, amount: int = 1) -> None:
+        """
+        件数を加算します。
+
+        Args:
+            amount (int): 加算する件数
+        """
+        slot = self._advance()
+        self._counts[slot] += amount
+        self._total += amount
+
+    def count(self) -> int:
+        """
+        直近window秒間の件数を取得します。
+
+        Returns:
+            int: 件数（バケット幅の精度）
+        """
+        self._advance()
+        return self._total
+
+    def _clear_slot(self, slot: int) -> None:
+        self._total -= self._counts[slot]
+        self._counts[slot] = 0
+
+def _split_hash(hashed: int, precision: int) -> tuple:
+    """ハッシュ値をレジスタ番号と、残りのビットの先頭の0の数+1に分けます"""
+    remaining_bits = 64 - precision
+    index = hashed >> remaining_bits
+    rest = hashed & ((1 << remaining_bits) - 1)
+    return index, remaining_bits - rest.bit_length() + 1
+
+def _estimate(registers: bytearray) -> float:
+    """レジスタからユニーク数を推定します"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / sum(map(_INVERSE_POWERS.__getitem__, registers))
+
+    # 少数の場合は空のレジスタ数から求める方が正確
+    if estimate <= 2.5 * m:
+        zeros = registers.count(0)
+        if zeros:
+            return m * math.log(m / zeros)
+    return estimate
+
+class HyperLogLog:
+    """固定メモリでユニーク数を推定するHyperLogLog"""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        """
+        HyperLogLogを初期化します。
+
+        Args:
+            precision (int): 精度（レジスタ数は 2^precision、4〜16）
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision は4〜16である必要があります")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str) -> None:
+        """
+        要素を追加します。
+
+        Args:
+            item (str): 追加する要素
+        """
+        self.add_hash(hash_item(item))
+
+    def add_hash(self, hashed: int) -> None:
+        """
+        ハッシュ済みの要素を追加します。
+
+        Args:
+            hashed (int): hash_item で求めた64ビットのハッシュ値
+        """
+        index, rank = _split_hash(hashed, self.precision)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        別のHyperLogLogの要素を取り込みます（和集合）。
+
+        Args:
+            other (HyperLogLog): 同じ精度のHyperLogLog
+        """
+        if other.precision != self.precision:
+            raise ValueError("精度の異なるHyperLogLogはマージできません")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """
+        ユニーク数の推定値を取得します。
+
+        Returns:
+            int: 推定値
+        """
+        return round(_estimate(self.registers))
+
+class WindowedHyperLogLog(_BucketRing):
+    """
+    直近window秒間のユニーク数を推定するHyperLogLog
+
+    バケットごとのレジスタに加えて、ウィンドウ内の全バケットの和集合（ビュー）を
+    追加のたびに更新します。ビューの再構築はバケットが期限切れになったときだけ、
+    推定値の再計算は要素が追加されたときだけ行います。
+    """
+
+    def __init__(
+        self,
+        window: float,
+        buckets: int = 60,
+        precision: int = DEFAULT_HLL_PRECISION,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        ウィンドウ付きHyperLogLogを初期化します。
+
+        Args:
+            window (float): 集計するウィンドウの秒数
+            buckets (int): ウィンドウの分割数
+            precision (int): HyperLogLogの精度
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision は4〜16である必要があります")
+        super().__init__(window, buckets, clock)
+        self.precision = precision
+        self._registers: List[Optional[bytearray]] = [None] * buckets
+        self._view = bytearray(1 << precision)
+        self._view_stale = False
+        self._cached_count: Optional[int] = 0
+
+    def add_hash(self, hashed: int) -> None:
+        """
+        ハッシュ済みの要素を追加します。
+
+        Args:
+            hashed (int): hash_item で求めた64ビットのハッシュ値
+        """
+        slot = self._advance()
+        registers = self._registers[slot]
+        if registers is None:
+            registers = self._registers[slot] = bytearray(1 << self.precision)
+        index, rank = _split_hash(hashed, self.precision)
+        if rank > registers[index]:
+            registers[index] = rank
+            if rank > self._view[index]:
+                self._view[index] = rank
+                self._cached_count = None
+
+    def add(self, item: str) -> None:
+        """
+        要素を追加します。
+
+        Args:
+            item (str): 追加する要素
+        """
+        self.add_hash(hash_item(item))
+
+    def count(self) -> int:
+        """
+        直近window秒間のユニーク数の推定値を取得します。
+
+        Returns:
+            int: 推定値
+        """
+        self._advance()
+        if self._view_stale:
+            view = bytearray(1 << self.precision)
+            for registers in self._registers:
+                if registers is not None:
+                    view = bytearray(map(max, view, registers))
+            self._view = view
+            self._view_stale = False
+            self._cached_count = None
+        if self._cached_count is None:
+            self._cached_count = round(_estimate(self._view))
+        return self._cached_count
+
+    def _clear_slot(self, slot: int) -> None:
+        if self._registers[slot] is not None:
+            self._registers[slot] = None
+            self._view_stale = True
+
+class ActivityStats:
+    """
+    コマンド実行の累計とウィンドウごとの件数・ユニークユーザー数を集計します。
+
+    record() はウィンドウ数に比例する定数時間で、snapshot() はユーザー数に
+    関係なく一定のコストで集計結果を返します。
+    """
+
+    def __init__(
+        self,
+        windows: Optional[Dict[str, float]] = None,
+        buckets: int = 60,
+        precision: int = DEFAULT_HLL_PRECISION,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        集計を初期化します。
+
+        Args:
+            windows (Optional[Dict[str, float]]): ウィンドウ名と秒数（Noneで1m, 1h, 24h）
+            buckets (int): 各ウィンドウの分割数
+            precision (int): ユニークユーザー数の推定に使うHyperLogLogの精度
+            clock (Callable[[], float]): 現在時刻（秒）を返す関数
+        """
+        self.total_commands = 0
+        self._commands: Dict[str, SlidingWindowCounter] = {}
+        self._users: Dict[str, WindowedHyperLogLog] = {}
+        for name, seconds in (windows or DEFAULT_WINDOWS).items():
+            self._commands[name] = SlidingWindowCounter(seconds, buckets, clock)
+            self._users[name] = WindowedHyperLogLog(seconds, buckets, precision, clock)
+
+    def record(self, user_id: str) -> None:
+        """
+        コマンド実行を1回記録します。
+
+        Args:
+            user_id (str): 実行したユーザーID
+        """
+        self.total_commands += 1
+        hashed = hash_item(user_id)
+        for counter in self._commands.values():
+            counter.add()
+        for users in self._users.values():
+            users.add_hash(hashed)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """
+        ウィンドウごとのコマンド数・ユニークユーザー数（推定）を取得します。
+
+        Returns:
+            Dict[str, Dict[str, int]]: ウィンドウ名をキーにした commands, active_users
+        """
+        return {
+            name: {
+                'commands': counter.count(),
+                'active_users': self._users[name].count()
+            }
+            for name, counter in self._commands.items()
+        }
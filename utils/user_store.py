@@ -0,0 +1,467 @@
+"""
+ユーザー活動ストア
+
+ユーザーごとの初回利用日時とコマンド実行回数を記録します。
+メモリ上は配列で省メモリに保持し、永続化するバックエンドでは
+変更をまとめて非同期に書き込みます（ライトビハインド）。
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .executor import get_offload_executor
+
+__all__ = [
+    "UserActivityStore",
+    "MemoryUserStore",
+    "WriteBehindUserStore",
+    "SQLiteUserStore",
+    "RedisUserStore",
+    "create_user_store"
+]
+
+logger = logging.getLogger(__name__)
+
+USER_STORE_BACKENDS = ("memory", "sqlite", "redis")
+
+# (ユーザーID, 初回利用日時のUNIX秒, コマンド実行回数)
+UserRow = Tuple[str, float, int]
+
+class UserActivityStore(ABC):
+    """ユーザー活動ストアのインターフェース"""
+
+    # 全ユーザーのコマンド実行回数の合計（記録・削除のたびに更新する）
+    total_commands: int = 0
+
+    @abstractmethod
+    def track(self, user_id: str, now: Optional[float] = None) -> int:
+        """
+        ユーザーのコマンド実行を1回記録します。
+
+        Args:
+            user_id (str): ユーザーID
+            now (Optional[float]): 記録時刻のUNIX秒（Noneで現在時刻）
+
+        Returns:
+            int: 記録後のコマンド実行回数
+        """
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ユーザーの活動情報を取得します。
+
+        Args:
+            user_id (str): ユーザーID
+
+        Returns:
+            Optional[Dict[str, Any]]: first_seen（ISO形式）とcommand_count、未記録ならNone
+        """
+
+    @abstractmethod
+    def delete(self, user_id: str) -> bool:
+        """
+        ユーザーの活動情報を削除します。
+
+        Args:
+            user_id (str): ユーザーID
+
+        Returns:
+            bool: 削除した場合True
+        """
+
+    @abstractmethod
+    def iter_counts(self) -> Iterator[Tuple[str, int]]:
+        """
+        すべてのユーザーのコマンド実行回数を列挙します。
+
+        Yields:
+            Tuple[str, int]: (ユーザーID, コマンド実行回数)
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """記録済みのユーザー数"""
+
+    def __contains__(self, user_id: object) -> bool:
+        return self.get(user_id) is not None if isinstance(user_id, str) else False
+
+    async def start(self) -> None:
+        """保存済みのデータを読み込み、バックグラウンド処理を開始します"""
+
+    async def flush(self) -> None:
+        """未書き込みの変更を書き込みます"""
+
+    async def close(self) -> None:
+        """未書き込みの変更を書き込み、ストアを閉じます"""
+
+class MemoryUserStore(UserActivityStore):
+    """
+    配列で保持するメモリ上のストア
+
+    ユーザーごとの辞書を作らず、ユーザーIDから配列の位置への辞書と、
+    初回利用日時・実行回数の配列だけを持つため、1ユーザーあたりのメモリは
+    ユーザーID文字列を除いて数十バイトです。削除した位置は再利用します。
+    """
+
+    def __init__(self):
+        """メモリストアを初期化します"""
+        self._slots: Dict[str, int] = {}
+        self._first_seen = array('d')
+        self._counts = array('Q')
+        self._free: List[int] = []
+        self.total_commands = 0
+
+    def track(self, user_id: str, now: Optional[float] = None) -> int:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._allocate(user_id, time.time() if now is None else now)
+        count = self._counts[slot] + 1
+        self._counts[slot] = count
+        self.total_commands += 1
+        return count
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+        return {
+            'first_seen': datetime.fromtimestamp(self._first_seen[slot]).isoformat(),
+            'command_count': self._counts[slot]
+        }
+
+    def delete(self, user_id: str) -> bool:
+        slot = self._slots.pop(user_id, None)
+        if slot is None:
+            return False
+        self.total_commands -= self._counts[slot]
+        self._counts[slot] = 0
+        self._free.append(slot)
+        return True
+
+    def iter_counts(self) -> Iterator[Tuple[str, int]]:
+        counts = self._counts
+        for user_id, slot in self._slots.items():
+            yield user_id, counts[slot]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._slots
+
+    def _allocate(self, user_id: str, first_seen: float) -> int:
+        """ユーザーに配列の位置を割り当てます"""
+        if self._free:
+            slot = self._free.pop()
+            self._first_seen[slot] = first_seen
+            self._counts[slot] = 0
+        else:
+            slot = len(self._counts)
+            self._first_seen.append(first_seen)
+            self._counts.append(0)
+        self._slots[user_id] = slot
+        return slot
+
+    def _restore(self, user_id: str, first_seen: float, count: int) -> None:
+        """保存済みの行を読み込みます（起動前に記録済みの分には加算）"""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._allocate(user_id, first_seen)
+        elif first_seen < self._first_seen[slot]:
+            self._first_seen[slot] = first_seen
+        self._counts[slot] += count
+        self.total_commands += count
+
+class WriteBehindUserStore(MemoryUserStore):
+    """
+    メモリ上で記録し、変更をまとめてバックエンドに書き込むストアの基底クラス
+
+    track() はメモリ上の配列を更新して差分を記録するだけなので O(1) です。
+    差分は flush_interval 秒ごと、または flush_batch_size 人分たまった時点で
+    バックグラウンドのタスクが書き込みます。サブクラスは _load_rows と
+    _write_rows を実装します。
+    """
+
+    def __init__(self, flush_interval: float = 5.0, flush_batch_size: int = 500):
+        """
+        ストアを初期化します。
+
+        Args:
+            flush_interval (float): 定期的に書き込む間隔（秒）
+            flush_batch_size (int): この人数分の変更がたまったら即座に書き込む
+        """
+        super().__init__()
+        if flush_interval <= 0 or flush_batch_size < 1:
+            raise ValueError("flush_interval は0より大きく、flush_batch_size は1以上である必要があります")
+
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.flushes = 0
+        self.flush_errors = 0
+        # 未書き込みの変更（ユーザーID -> (初回利用日時, 実行回数の増分)）
+        self._dirty: Dict[str, Tuple[float, int]] = {}
+        self._deleted: Set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_writes(self) -> int:
+        """未書き込みの変更があるユーザー数"""
+        return len(self._dirty) + len(self._deleted)
+
+    def track(self, user_id: str, now: Optional[float] = None) -> int:
+        count = super().track(user_id, now)
+        pending = self._dirty.get(user_id)
+        if pending is None:
+            self._dirty[user_id] = (self._first_seen[self._slots[user_id]], 1)
+            if len(self._dirty) >= self.flush_batch_size and self._flush_requested is not None:
+                self._flush_requested.set()
+        else:
+            self._dirty[user_id] = (pending[0], pending[1] + 1)
+        return count
+
+    def delete(self, user_id: str) -> bool:
+        if not super().delete(user_id):
+            return False
+        self._dirty.pop(user_id, None)
+        self._deleted.add(user_id)
+        return True
+
+    async def start(self) -> None:
+        """保存済みの行を読み込み、定期書き込みタスクを開始します"""
+        rows = await self._load_rows()
+        for user_id, first_seen, count in rows:
+            self._restore(user_id, first_seen, count)
+        logger.info(f"{type(self).__name__} loaded {len(rows)} users")
+
+        self._flush_requested = asyncio.Event()
+        self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def flush(self) -> None:
+        """未書き込みの変更をまとめて書き込みます（失敗した分は次回に再試行）"""
+        async with self._flush_lock:
+            if not self._dirty and not self._deleted:
+                return
+            dirty, self._dirty = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+            upserts = [(user_id, first_seen, delta) for user_id, (first_seen, delta) in dirty.items()]
+
+            try:
+                await self._write_rows(sorted(deleted), upserts)
+                self.flushes += 1
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Failed to write {len(upserts)} user activity rows: {e}")
+                self._requeue(dirty, deleted)
+
+    async def close(self) -> None:
+        """定期書き込みを停止し、残りの変更を書き込んでからバックエンドを閉じます"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+        await self._close_backend()
+
+    def _requeue(self, dirty: Dict[str, Tuple[float, int]], deleted: Set[str]) -> None:
+        """書き込みに失敗した変更を、その後の変更とまとめて戻します"""
+        for user_id, (first_seen, delta) in dirty.items():
+            if user_id in self._deleted:
+                # 書き込み待ちの間に削除された
+                continue
+            newer = self._dirty.get(user_id)
+            self._dirty[user_id] = (first_seen, delta + (newer[1] if newer else 0))
+        # 削除は増分より先に適用されるため、その後の変更と合わせても順序は保たれる
+        self._deleted |= deleted
+
+    async def _flush_loop(self) -> None:
+        """flush_interval 秒ごと、または変更がたまった時点で書き込みます"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    @abstractmethod
+    async def _load_rows(self) -> List[UserRow]:
+        """保存済みのすべての行を読み込みます"""
+
+    @abstractmethod
+    async def _write_rows(self, deleted: List[str], upserts: List[UserRow]) -> None:
+        """
+        変更を書き込みます。削除を先に適用し、upsertsの実行回数は増分として加算します。
+
+        Args:
+            deleted (List[str]): 削除するユーザーID
+            upserts (List[UserRow]): (ユーザーID, 初回利用日時, 実行回数の増分)
+        """
+
+    async def _close_backend(self) -> None:
+        """バックエンドの接続を閉じます"""
+
+class SQLiteUserStore(WriteBehindUserStore):
+    """SQLiteに永続化するストア（ファイルI/Oは共有スレッドプールで実行）"""
+
+    def __init__(self, path: str = "data/users.db", **kwargs: Any):
+        """
+        SQLiteストアを初期化します。
+
+        Args:
+            path (str): データベースファイルのパス
+            **kwargs (Any): WriteBehindUserStore の引数
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """データベースに接続し、テーブルを作成します"""
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS user_activity ("
+                "user_id TEXT PRIMARY KEY, first_seen REAL NOT NULL, command_count INTEGER NOT NULL"
+                ")"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _read_all(self) -> List[UserRow]:
+        """すべての行を読み込みます（スレッドプールで実行）"""
+        cursor = self._connect().execute(
+            "SELECT user_id, first_seen, command_count FROM user_activity"
+        )
+        return cursor.fetchall()
+
+    def _write_all(self, deleted: List[str], upserts: List[UserRow]) -> None:
+        """変更を1トランザクションで書き込みます（スレッドプールで実行）"""
+        conn = self._connect()
+        with conn:
+            if deleted:
+                conn.executemany(
+                    "DELETE FROM user_activity WHERE user_id = ?",
+                    [(user_id,) for user_id in deleted]
+                )
+            conn.executemany(
+                "INSERT INTO user_activity (user_id, first_seen, command_count) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "command_count = command_count + excluded.command_count, "
+                "first_seen = MIN(first_seen, excluded.first_seen)",
+                upserts
+            )
+
+    async def _load_rows(self) -> List[UserRow]:
+        return await get_offload_executor().run(self._read_all)
+
+    async def _write_rows(self, deleted: List[str], upserts: List[UserRow]) -> None:
+        await get_offload_executor().run(self._write_all, deleted, upserts)
+
+    async def _close_backend(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+class RedisUserStore(WriteBehindUserStore):
+    """
+    Redis（互換サーバーを含む）に永続化するストア
+
+    初回利用日時と実行回数をそれぞれ1つのハッシュに保持し、
+    書き込みはパイプラインでまとめて送信します。実行回数は HINCRBY で
+    加算するため、複数のプロセスから同じキーを共有できます。
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "slackbot:users",
+        client: Any = None,
+        **kwargs: Any
+    ):
+        """
+        Redisストアを初期化します。
+
+        Args:
+            url (str): RedisのURL
+            prefix (str): キーの接頭辞
+            client (Any): 既存のredis.asyncioクライアント（Noneでurlから作成）
+            **kwargs (Any): WriteBehindUserStore の引数
+        """
+        super().__init__(**kwargs)
+        if client is None:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                raise ValueError("Redisストアには redis パッケージが必要です")
+            client = redis_asyncio.from_url(url, decode_responses=True)
+
+        self.client = client
+        self.first_seen_key = f"{prefix}:first_seen"
+        self.count_key = f"{prefix}:command_count"
+
+    async def _load_rows(self) -> List[UserRow]:
+        first_seen: Dict[str, float] = {}
+        async for user_id, value in self.client.hscan_iter(self.first_seen_key):
+            first_seen[user_id] = float(value)
+
+        rows: List[UserRow] = []
+        async for user_id, value in self.client.hscan_iter(self.count_key):
+            rows.append((user_id, first_seen.get(user_id, time.time()), int(value)))
+        return rows
+
+    async def _write_rows(self, deleted: List[str], upserts: List[UserRow]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        if deleted:
+            pipe.hdel(self.first_seen_key, *deleted)
+            pipe.hdel(self.count_key, *deleted)
+        for user_id, first_seen, delta in upserts:
+            pipe.hsetnx(self.first_seen_key, user_id, first_seen)
+            pipe.hincrby(self.count_key, user_id, delta)
+        await pipe.execute()
+
+    async def _close_backend(self) -> None:
+        close = getattr(self.client, "aclose", None) or getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+def create_user_store(
+    backend: str = "memory",
+    path: str = "data/users.db",
+    redis_url: str = "redis://localhost:6379/0",
+    flush_interval: float = 5.0,
+    flush_batch_size: int = 500
+) -> UserActivityStore:
+    """
+    設定に応じたユーザー活動ストアを作成します。
+
+    Args:
+        backend (str): バックエンド（memory, sqlite, redis）
+        path (str): SQLiteのデータベースファイルのパス
+        redis_url (str): RedisのURL
+        flush_interval (float): 永続化の間隔（秒）
+        flush_batch_size (int): 即座に永続化する変更人数
+
+    Returns:
+        UserActivityStore: ユーザー活動ストア
+    """
+    if backend not in USER_STORE_BACKENDS:
+        raise ValueError(f"不明なユーザーストアです: {backend}")
+
+    if backend == "sqlite":
+        return SQLiteUserStore(path, flush_interval=flush_interval, flush_batch_size=flush_batch_size)
+    if backend == "redis":
+        return RedisUserStore(redis_url, flush_interval=flush_interval, flush_batch_size=flush_batch_size)
+    return MemoryUserStore()
@@ -4,9 +4,36 @@
 入力値の検証とサニタイゼーション機能を提供します。
 """
 import re
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Union
 import html
 
+# 検証パターン（モジュール読み込み時に一度だけコンパイル）
+_SLACK_TOKEN_PATTERNS: Dict[str, Pattern[str]] = {
+    "bot": re.compile(r"^xoxb-[0-9]+-[0-9]+-[a-zA-Z0-9]+$"),
+    "app": re.compile(r"^xapp-[0-9]+-[A-Z0-9]+-[a-zA-Z0-9]+$"),
+    "user": re.compile(r"^xoxp-[0-9]+-[0-9]+-[0-9]+-[a-zA-Z0-9]+$")
+}
+# SlackユーザーIDの形式: U + 8-11桁の英数字
+_USER_ID_PATTERN = re.compile(r"^U[A-Z0-9]{8,11}$")
+# SlackチャンネルIDの形式: C + 8-11桁の英数字
+_CHANNEL_ID_PATTERN = re.compile(r"^C[A-Z0-9]{8,11}$")
+# コマンド名: 英数字、ハイフン、アンダースコアのみ、3-32文字
+_COMMAND_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{3,32}$")
+_EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+_URL_PATTERN = re.compile(r"^https?://[^\s/$.?#].[^\s]*$")
+
+# validate_many で使用するバリデーターの登録簿
+VALIDATOR_PATTERNS: Dict[str, Pattern[str]] = {
+    "bot_token": _SLACK_TOKEN_PATTERNS["bot"],
+    "app_token": _SLACK_TOKEN_PATTERNS["app"],
+    "user_token": _SLACK_TOKEN_PATTERNS["user"],
+    "user_id": _USER_ID_PATTERN,
+    "channel_id": _CHANNEL_ID_PATTERN,
+    "command_name": _COMMAND_NAME_PATTERN,
+    "email": _EMAIL_PATTERN,
+    "url": _URL_PATTERN
+}
+
 def validate_slack_token(token: str, token_type: str = "bot") -> bool:
     """
     Slackトークンの形式を検証します。
@@ -21,22 +48,28 @@ def validate_slack_token(token: str, token_type: str = "bot") -> bool:
     if not token or not isinstance(token, str):
         return False
     
-    patterns = {
-        "bot": r"^xoxb-[0-9]+-[0-9]+-[a-zA-Z0-9]+$",
-        "app": r"^xapp-[0-9]+-[A-Z0-9]+-[a-zA-Z0-9]+$",
-        "user": r"^xoxp-[0-9]+-[0-9]+-[0-9]+-[a-zA-Z0-9]+$"
-    }
-    
-    pattern = patterns.get(token_type)
+    pattern = _SLACK_TOKEN_PATTERNS.get(token_type)
     if not pattern:
         return False
     
-    return bool(re.match(pattern, token))
+    return bool(pattern.match(token))
+
+# 危険な文字列パターン（HTMLエスケープ後の文字列に適用する結合パターン）
+# エスケープ後は '<' が残らないため、<script>タグはこの時点で既に無害化されている。
+# 先頭を大文字小文字を区別する文字クラスにすると、reモジュールが候補位置を
+# 高速に走査できる（j, v, o は大文字小文字以外の同一視対象を持たない）
+_DANGEROUS_PATTERN = re.compile(
+    r'[jJvVoO](?:(?<=[jJ])(?i:avascript:)|(?<=[vV])(?i:bscript:)|(?<=[oO])(?i:n)\w+\s*=)'
+)
 
 def sanitize_input(input_text: str, max_length: int = 1000) -> str:
     """
     ユーザー入力をサニタイズします。
     
+    エスケープ後の先頭max_length文字は入力の先頭max_length文字だけで決まるため、
+    エスケープ前に切り詰めてから処理します。危険なパターンは除去によって
+    新たなパターンが現れなくなるまで繰り返し除去します。
+    
     Args:
         input_text (str): サニタイズする文字列
         max_length (int): 最大文字数
@@ -47,26 +80,37 @@ def sanitize_input(input_text: str, max_length: int = 1000) -> str:
     if not isinstance(input_text, str):
         return ""
     
+    # 最大長を制限（エスケープ前に切り詰めて不要な処理を避ける）
+    if len(input_text) > max_length:
+        input_text = input_text[:max_length]
+    
     # HTMLエスケープ
     sanitized = html.escape(input_text)
-    
-    # 最大長を制限
     if len(sanitized) > max_length:
         sanitized = sanitized[:max_length]
     
-    # 危険な文字列パターンを除去
-    dangerous_patterns = [
-        r'<script[^>]*>.*?</script>',
-        r'javascript:',
-        r'vbscript:',
-        r'on\w+\s*=',
-    ]
-    
-    for pattern in dangerous_patterns:
-        sanitized = re.sub(pattern, '', sanitized, flags=re.IGNORECASE | re.DOTALL)
+    # 危険な文字列パターンを除去（いずれも ':' か '=' を含むため、なければ省略）
+    if ':' in sanitized or '=' in sanitized:
+        sanitized, removed = _DANGEROUS_PATTERN.subn('', sanitized)
+        while removed:
+            sanitized, removed = _DANGEROUS_PATTERN.subn('', sanitized)
     
     return sanitized.strip()
 
+def sanitize_many(input_texts: Iterable[Any], max_length: int = 1000) -> List[str]:
+    """
+    複数のユーザー入力をまとめてサニタイズします。
+    
+    Args:
+        input_texts (Iterable[Any]): サニタイズする文字列の一覧
+        max_length (int): 最大文字数
+        
+    Returns:
+        List[str]: サニタイズされた文字列のリスト（入力と同じ順序）
+    """
+    sanitize = sanitize_input
+    return [sanitize(text, max_length) for text in input_texts]
+
 def validate_user_id(user_id: str) -> bool:
     """
     SlackユーザーIDの形式を検証します。
@@ -80,9 +124,7 @@ def validate_user_id(user_id: str) -> bool:
     if not user_id or not isinstance(user_id, str):
         return False
     
-    # SlackユーザーIDの形式: U + 8-11桁の英数字
-    pattern = r"^U[A-Z0-9]{8,11}$"
-    return bool(re.match(pattern, user_id))
+    return bool(_USER_ID_PATTERN.match(user_id))
 
 def validate_channel_id(channel_id: str) -> bool:
     """
@@ -97,9 +139,7 @@ def validate_channel_id(channel_id: str) -> bool:
     if not channel_id or not isinstance(channel_id, str):
         return False
     
-    # SlackチャンネルIDの形式: C + 8-11桁の英数字
-    pattern = r"^C[A-Z0-9]{8,11}$"
-    return bool(re.match(pattern, channel_id))
+    return bool(_CHANNEL_ID_PATTERN.match(channel_id))
 
 def validate_command_name(command_name: str) -> bool:
     """
@@ -114,9 +154,7 @@ def validate_command_name(command_name: str) -> bool:
     if not command_name or not isinstance(command_name, str):
         return False
     
-    # コマンド名: 英数字、ハイフン、アンダースコアのみ、3-32文字
-    pattern = r"^[a-zA-Z0-9_-]{3,32}$"
-    return bool(re.match(pattern, command_name))
+    return bool(_COMMAND_NAME_PATTERN.match(command_name))
 
 def validate_email(email: str) -> bool:
     """
@@ -131,8 +169,7 @@ def validate_email(email: str) -> bool:
     if not email or not isinstance(email, str):
         return False
     
-    pattern = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_PATTERN.match(email))
 
 def validate_url(url: str, allowed_schemes: Optional[List[str]] = None) -> bool:
     """
@@ -152,14 +189,47 @@ def validate_url(url: str, allowed_schemes: Optional[List[str]] = None) -> bool:
         allowed_schemes = ["http", "https"]
     
     # 基本的なURL形式をチェック
-    pattern = r"^https?://[^\s/$.?#].[^\s]*$"
-    if not re.match(pattern, url):
+    if not _URL_PATTERN.match(url):
         return False
     
     # スキームをチェック
     scheme = url.split("://")[0].lower()
     return scheme in allowed_schemes
 
+def register_validator(kind: str, pattern: Union[str, Pattern[str]]) -> None:
+    """
+    validate_many で使用するバリデーターを登録します。
+    
+    Args:
+        kind (str): バリデーターの種類名
+        pattern (Union[str, Pattern[str]]): 検証パターン（文字列ならコンパイルして登録）
+    """
+    VALIDATOR_PATTERNS[kind] = re.compile(pattern) if isinstance(pattern, str) else pattern
+
+def validate_many(kind: str, values: Iterable[Any]) -> List[bool]:
+    """
+    複数の値をまとめて検証し、真偽値のマスクを返します。
+    
+    結果は個別のバリデーター（validate_user_id など）と同じです。
+    パターンの検索は最初の1回だけ行い、各値はコンパイル済みの正規表現で判定します。
+    
+    Args:
+        kind (str): バリデーターの種類（VALIDATOR_PATTERNS のキー）
+        values (Iterable[Any]): 検証する値の一覧
+        
+    Returns:
+        List[bool]: 各値が有効かどうか（入力と同じ順序）
+        
+    Raises:
+        ValueError: 不明な種類が指定された場合
+    """
+    pattern = VALIDATOR_PATTERNS.get(kind)
+    if pattern is None:
+        raise ValueError(f"不明なバリデーターです: {kind}")
+    
+    match = pattern.match
+    return [isinstance(value, str) and match(value) is not None for value in values]
+
 def validate_numeric_range(
     value: Union[int, float], 
     min_value: Optional[Union[int, float]] = None,